@@ -119,7 +119,7 @@ def cli_progress(current: int, total: int, frame_data=None) -> None:
 
 
 def _convert_single(file_path: str, input_type: str, output_dir: str,
-                     config: configparser.ConfigParser) -> int:
+                     config: configparser.ConfigParser, jobs: int = 1) -> int:
     output_format = config.get('Output', 'format', fallback='txt').lower()
     conversion_mode = config.get('Mode', 'conversion_mode', fallback='ascii').lower()
 
@@ -127,8 +127,23 @@ def _convert_single(file_path: str, input_type: str, output_dir: str,
     _print_header(f"Convertendo: {os.path.basename(file_path)}")
     print(f"  Formato: {output_format} | Modo: {conversion_mode} | Saida: {output_dir}")
 
+    segmented = False
+    if jobs > 1 and input_type == 'video':
+        from src.core.segment_parallel import supports_segments
+        segmented = supports_segments(output_format, conversion_mode)
+        if segmented:
+            print(f"  Segmentado: ate {jobs} processos (pipeline CPU)")
+        else:
+            print(f"  --jobs ignorado: {output_format}/{conversion_mode} (ou sem ffmpeg) converte em um processo")
+
     try:
-        if output_format == 'mp4' and input_type == 'video':
+        if segmented:
+            from src.core.segment_parallel import converter_video_em_segmentos
+            result = converter_video_em_segmentos(
+                file_path, output_dir, config, jobs, progress_callback=cli_progress
+            )
+
+        elif output_format == 'mp4' and input_type == 'video':
             gpu_enabled = config.getboolean('Conversor', 'gpu_enabled', fallback=True)
             if gpu_enabled:
                 try:
@@ -208,6 +223,9 @@ def cmd_convert(args: argparse.Namespace) -> int:
     config_path = _resolve_config_path(args.config)
     config = _load_config(config_path)
     _apply_overrides(config, args)
+    jobs = 1
+    if args.jobs is not None:
+        jobs = max(1, args.jobs or os.cpu_count() or 1)
 
     if args.folder:
         folder_path = os.path.abspath(args.folder)
@@ -236,7 +254,7 @@ def cmd_convert(args: argparse.Namespace) -> int:
             if input_type == "unknown":
                 print(f"  [SKIP] Formato nao reconhecido: {os.path.basename(fp)}")
                 continue
-            rc = _convert_single(fp, input_type, output_dir, config)
+            rc = _convert_single(fp, input_type, output_dir, config, jobs)
             if rc != 0:
                 errors += 1
 
@@ -270,7 +288,7 @@ def cmd_convert(args: argparse.Namespace) -> int:
     output_dir = args.output or config.get('Pastas', 'output_dir', fallback='') or DEFAULT_OUTPUT_DIR
     os.makedirs(output_dir, exist_ok=True)
 
-    return _convert_single(file_path, input_type, output_dir, config)
+    return _convert_single(file_path, input_type, output_dir, config, jobs)
 
 
 def cmd_config(args: argparse.Namespace) -> int:
@@ -647,6 +665,117 @@ def cmd_info(args: argparse.Namespace) -> int:
     return 0
 
 
+def _collect_ascii_videos(paths: list) -> list:
+    from src.core.ascii_migration import is_ascii_video_path
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, f) for f in os.listdir(path)
+                if not f.startswith('.') and is_ascii_video_path(f)
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def _format_rate(frames_per_second: float) -> str:
+    return "-" if frames_per_second == float('inf') else f"{frames_per_second:.0f} frames/s"
+
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from src.core.ascii_migration import migrate_file, migration_output_path
+    from src.core.utils.ascii_video import (
+        A4R_EXTENSION, COMPRESSION_NAMES, TXT_COMPRESSION_EXTENSIONS, a4r_options_from_config, txt_compression_level,
+        txt_output_extension
+    )
+
+    config = _load_config(_resolve_config_path(args.config))
+    a4r_options = a4r_options_from_config(config)
+    if args.keyframe_interval is not None:
+        a4r_options['keyframe_interval'] = args.keyframe_interval
+    if args.a4r_compression:
+        a4r_options['compression'] = COMPRESSION_NAMES[args.a4r_compression]
+    if args.to == 'a4r':
+        extension = A4R_EXTENSION
+    elif args.txt_compression:
+        extension = ".txt" + TXT_COMPRESSION_EXTENSIONS[args.txt_compression]
+    else:
+        extension = txt_output_extension(config)
+
+    files = _collect_ascii_videos(args.paths)
+    missing = [f for f in files if not os.path.isfile(f)]
+    if missing:
+        print(f"[FAIL] Arquivo nao encontrado: {missing[0]}", file=sys.stderr)
+        return 1
+    if not files:
+        print("[FAIL] Nenhum video ASCII (.txt, .txt.gz, .txt.zst, .a4r) encontrado", file=sys.stderr)
+        return 1
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    tasks = {}
+    for file_path in files:
+        output_path = migration_output_path(file_path, extension, args.output)
+        if os.path.abspath(output_path) == os.path.abspath(file_path):
+            print(f"  [SKIP] Ja esta no formato de destino: {os.path.basename(file_path)}")
+            continue
+        tasks[file_path] = output_path
+
+    jobs = max(1, args.jobs or os.cpu_count() or 1)
+    _print_header(f"Migracao para {extension}: {len(tasks)} arquivo(s), {jobs} processo(s)")
+    kwargs = dict(verify=not args.no_verify, level=txt_compression_level(config), **a4r_options)
+    errors = 0
+    total_in = total_out = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(migrate_file, src, dst, **kwargs): src for src, dst in tasks.items()}
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                result = future.result()
+            except Exception as e:
+                _print_fail(name, str(e))
+                errors += 1
+                continue
+            total_in += result.source_bytes
+            total_out += result.output_bytes
+            detail = (f"{result.frames} frames, {result.source_bytes / 1024:.0f}KB -> {result.output_bytes / 1024:.0f}KB "
+                      f"({-result.size_reduction:+.1%}), parse {_format_rate(result.source_fps)}")
+            if result.verified:
+                detail += f" -> {_format_rate(result.output_fps)}, round-trip ok"
+            _print_ok(name, detail)
+
+    _print_header("Resultado da Migracao")
+    print(f"  {len(tasks) - errors}/{len(tasks)} migrados com sucesso")
+    if total_in:
+        print(f"  Tamanho: {total_in / (1024 * 1024):.1f}MB -> {total_out / (1024 * 1024):.1f}MB "
+              f"({total_out / total_in - 1:+.1%})")
+    return 1 if errors > 0 else 0
+
+
+def cmd_inspect(args: argparse.Namespace) -> int:
+    from src.core.ascii_migration import inspect_file
+
+    files = _collect_ascii_videos(args.paths)
+    if not files:
+        print("[FAIL] Nenhum video ASCII encontrado", file=sys.stderr)
+        return 1
+    errors = 0
+    for file_path in files:
+        _print_header(f"Inspecao: {os.path.basename(file_path)}")
+        try:
+            info = inspect_file(file_path)
+        except Exception as e:
+            _print_fail("Leitura", str(e))
+            errors += 1
+            continue
+        for key, value in info.items():
+            if key != 'path':
+                print(f"  {key:14s}: {value}")
+    return 1 if errors > 0 else 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="cli.py",
@@ -658,7 +787,7 @@ def build_parser() -> argparse.ArgumentParser:
     p_convert = subparsers.add_parser('convert', help='Converte video/imagem')
     p_convert.add_argument('--video', type=str, help='Caminho do video de entrada')
     p_convert.add_argument('--image', type=str, help='Caminho da imagem de entrada')
-    p_convert.add_argument('--format', choices=['txt', 'mp4', 'gif', 'html', 'png', 'png_all'], help='Formato de saida')
+    p_convert.add_argument('--format', choices=['txt', 'a4r', 'mp4', 'gif', 'html', 'png', 'png_all'], help='Formato de saida')
     p_convert.add_argument('--quality', choices=list(QUALITY_PRESETS.keys()) + ['custom'], help='Preset de qualidade')
     p_convert.add_argument('--mode', choices=['ascii', 'pixelart'], help='Modo de conversao')
     p_convert.add_argument('--style', choices=list(STYLE_PRESETS.keys()), help='Preset de estilo')
@@ -671,6 +800,7 @@ def build_parser() -> argparse.ArgumentParser:
     p_convert.add_argument('--height', type=int, help='Altura em caracteres')
     p_convert.add_argument('--folder', type=str, help='Pasta com videos para conversao em lote')
     p_convert.add_argument('--output', type=str, help='Diretorio de saida')
+    p_convert.add_argument('--jobs', type=int, help='Divide o video em N trechos convertidos em paralelo (txt/a4r/mp4/gif, CPU; 0 = numero de CPUs)')
     p_convert.add_argument('--config', type=str, help='Caminho do config.ini')
 
     # config
@@ -701,6 +831,22 @@ def build_parser() -> argparse.ArgumentParser:
     p_info = subparsers.add_parser('info', help='Diagnostico do sistema')
     p_info.add_argument('--config', type=str, help='Caminho do config.ini')
 
+    # migrate
+    p_migrate = subparsers.add_parser('migrate', help='Converte videos ASCII entre .txt e .a4r em lote')
+    p_migrate.add_argument('paths', nargs='+', help='Arquivos ou pastas com videos ASCII')
+    p_migrate.add_argument('--to', choices=['a4r', 'txt'], default='a4r', help='Formato de destino (padrao: a4r)')
+    p_migrate.add_argument('--output', type=str, help='Diretorio de saida (padrao: ao lado da origem)')
+    p_migrate.add_argument('--jobs', type=int, help='Processos em paralelo (padrao: numero de CPUs)')
+    p_migrate.add_argument('--no-verify', action='store_true', help='Nao reler a saida para conferir o round-trip')
+    p_migrate.add_argument('--keyframe-interval', type=int, help='Frames entre keyframes no .a4r')
+    p_migrate.add_argument('--a4r-compression', choices=['none', 'zlib'], help='Compressao dos frames no .a4r')
+    p_migrate.add_argument('--txt-compression', choices=['none', 'gzip', 'zstd'], help='Compressao do .txt de destino')
+    p_migrate.add_argument('--config', type=str, help='Caminho do config.ini')
+
+    # inspect
+    p_inspect = subparsers.add_parser('inspect', help='Cabecalho e indice de videos ASCII, sem decodificar frames')
+    p_inspect.add_argument('paths', nargs='+', help='Arquivos ou pastas com videos ASCII')
+
     return parser
 
 
@@ -717,6 +863,8 @@ def main() -> None:
         'config': cmd_config,
         'validate': cmd_validate,
         'info': cmd_info,
+        'migrate': cmd_migrate,
+        'inspect': cmd_inspect,
     }
 
     handler = dispatch.get(args.command)
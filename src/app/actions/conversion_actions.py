@@ -124,8 +124,11 @@ class ConversionActionsMixin:
                 output_filename = os.path.splitext(file_name)[0] + "_ascii.png"
             elif output_format == 'png_all':
                 output_filename = os.path.splitext(file_name)[0] + "_png_frames"
+            elif output_format == 'a4r' and not self._is_image_file(file_path):
+                output_filename = os.path.splitext(file_name)[0] + ".a4r"
             else:
-                output_filename = os.path.splitext(file_name)[0] + ".txt"
+                from src.core.utils.ascii_video import txt_output_extension
+                output_filename = os.path.splitext(file_name)[0] + txt_output_extension(self.config)
 
             output_filepath = os.path.join(self.output_dir, output_filename)
             progress = i / total
@@ -464,7 +467,7 @@ class ConversionActionsMixin:
 
         if response == RESPONSE_OPEN_FILE and output_files:
             first_file = output_files[0]
-            if first_file.lower().endswith('.txt'):
+            if first_file.lower().endswith(('.txt', '.a4r', '.txt.gz', '.txt.zst')):
                 self._launch_player_gtk(first_file)
             else:
                 self.open_path(first_file)
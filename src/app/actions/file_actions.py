@@ -80,7 +80,7 @@ class FileActionsMixin:
 
     def on_select_ascii_button_clicked(self, widget):
         dialog = Gtk.FileChooserDialog(
-            title="Selecione um arquivo ASCII (.txt)",
+            title="Selecione um arquivo ASCII (.txt, .a4r)",
             parent=self.window,
             action=Gtk.FileChooserAction.OPEN
         )
@@ -90,8 +90,15 @@ class FileActionsMixin:
         filter_text.set_name("Arquivos de Texto")
         filter_text.add_mime_type("text/plain")
         filter_text.add_pattern("*.txt")
+        filter_text.add_pattern("*.txt.gz")
+        filter_text.add_pattern("*.txt.zst")
         dialog.add_filter(filter_text)
 
+        filter_a4r = Gtk.FileFilter()
+        filter_a4r.set_name("ASCII Binario (.a4r)")
+        filter_a4r.add_pattern("*.a4r")
+        dialog.add_filter(filter_a4r)
+
         filter_any = Gtk.FileFilter()
         filter_any.set_name("Todos")
         filter_any.add_pattern("*")
@@ -119,9 +126,7 @@ class FileActionsMixin:
 
         ascii_exists = False
         if file_selected and hasattr(self, 'output_dir'):
-            media_name = os.path.splitext(os.path.basename(self.selected_file_path))[0] + ".txt"
-            ascii_path = os.path.join(self.output_dir, media_name)
-            ascii_exists = os.path.exists(ascii_path)
+            ascii_exists = self._find_ascii_output(self.selected_file_path) is not None
 
         self.convert_button.set_sensitive(file_selected)
         self.play_button.set_sensitive(file_selected and ascii_exists)
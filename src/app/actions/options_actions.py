@@ -363,7 +363,7 @@ class OptionsActionsMixin:
 
             if hasattr(self, 'pref_format_combo') and self.pref_format_combo:
                 fmt = self.config.get('Output', 'format', fallback='txt')
-                fmt_map = {'txt': 0, 'mp4': 1, 'gif': 2, 'html': 3, 'png_first': 4, 'png_all': 5}
+                fmt_map = {'txt': 0, 'mp4': 1, 'gif': 2, 'html': 3, 'png_first': 4, 'png_all': 5, 'a4r': 6}
                 self.pref_format_combo.set_active(fmt_map.get(fmt, 0))
 
             if hasattr(self, 'pref_theme_combo') and self.pref_theme_combo:
@@ -736,7 +736,7 @@ class OptionsActionsMixin:
             if hasattr(self, 'pref_format_combo') and self.pref_format_combo:
                 if 'Output' not in self.config:
                     self.config.add_section('Output')
-                fmt_list = ['txt', 'mp4', 'gif', 'html', 'png_first', 'png_all']
+                fmt_list = ['txt', 'mp4', 'gif', 'html', 'png_first', 'png_all', 'a4r']
                 active = self.pref_format_combo.get_active()
                 if 0 <= active < len(fmt_list):
                     self.config.set('Output', 'format', fmt_list[active])
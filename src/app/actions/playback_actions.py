@@ -13,10 +13,10 @@ class PlaybackActionsMixin:
         if not self.selected_file_path:
             return
 
-        media_name = os.path.splitext(os.path.basename(self.selected_file_path))[0] + ".txt"
-        file_path = os.path.join(self.output_dir, media_name)
-        if not os.path.exists(file_path):
-            self.show_error_dialog("Erro", f"Arquivo ASCII '{os.path.basename(file_path)}' nao encontrado.\nConverta o arquivo primeiro.")
+        file_path = self._find_ascii_output(self.selected_file_path)
+        if file_path is None:
+            media_name = os.path.splitext(os.path.basename(self.selected_file_path))[0] + ".txt"
+            self.show_error_dialog("Erro", f"Arquivo ASCII '{media_name}' nao encontrado.\nConverta o arquivo primeiro.")
             return
 
         python_executable = self._get_python_executable()
@@ -33,6 +33,15 @@ class PlaybackActionsMixin:
         except Exception as e:
             self.show_error_dialog("Erro Player", f"Nao foi possivel abrir o player:\n{e}")
 
+    def _find_ascii_output(self, media_path):
+        # Saida convertida da midia: container .a4r ou .txt legado
+        nome_base = os.path.splitext(os.path.basename(media_path))[0]
+        for extensao in ('.a4r', '.txt', '.txt.gz', '.txt.zst'):
+            file_path = os.path.join(self.output_dir, nome_base + extensao)
+            if os.path.exists(file_path):
+                return file_path
+        return None
+
     def on_play_ascii_button_clicked(self, widget):
         if self.selected_ascii_path and os.path.exists(self.selected_ascii_path):
             self._launch_player_gtk(self.selected_ascii_path)
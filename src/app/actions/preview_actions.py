@@ -7,6 +7,9 @@ gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, GLib, GdkPixbuf
 
 from src.core.utils.ascii_converter import LUMINANCE_RAMP_DEFAULT
+from src.core.utils.ramp import compile_ramp
+from src.core.utils.ascii_frame import EDGE_CHARS
+from src.core.utils.edges import compute_edge_features
 from src.core.utils.image import sharpen_frame, apply_morphological_refinement
 from src.app.defaults import get_default
 
@@ -119,12 +122,8 @@ class PreviewActionsMixin:
         resized_color = cv2.resize(frame_bgr, target_dims, interpolation=cv2.INTER_AREA)
         resized_mask = cv2.resize(mask, target_dims, interpolation=cv2.INTER_NEAREST)
 
-        sobel_x = cv2.Sobel(resized_gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(resized_gray, cv2.CV_64F, 0, 1, ksize=3)
-        magnitude = np.hypot(sobel_x, sobel_y)
-        angle = np.arctan2(sobel_y, sobel_x) * (180 / np.pi)
-        angle = (angle + 180) % 180
-        magnitude_norm = cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        edges = compute_edge_features(resized_gray)
+        magnitude_norm, orientation = edges.magnitude, edges.orientation
 
         canvas_w = 640
         canvas_h = 480
@@ -143,17 +142,14 @@ class PreviewActionsMixin:
         offset_x = (canvas_w - total_w) // 2
         offset_y = (canvas_h - total_h) // 2
         font_scale = max(0.25, 0.35 * scale)
-        ramp_len = len(luminance_ramp)
 
         is_edge = magnitude_norm > sobel_threshold
 
+        compiled_ramp = compile_ramp(luminance_ramp)
         if edge_boost_enabled:
-            brightness = resized_gray.astype(np.int32)
-            edge_boost = is_edge.astype(np.int32) * edge_boost_amount
-            brightness = np.clip(brightness + edge_boost, 0, 255)
-            lum_indices = ((brightness / 255) * (ramp_len - 1)).astype(np.int32)
+            lum_indices = compiled_ramp.lookup(resized_gray, is_edge, edge_boost_amount)
         else:
-            lum_indices = (resized_gray * (ramp_len - 1) / 255).astype(np.int32)
+            lum_indices = compiled_ramp.lookup(resized_gray)
 
         for y in range(height):
             py = offset_y + y * char_h + char_h - 3
@@ -165,17 +161,9 @@ class PreviewActionsMixin:
                     continue
 
                 mag = magnitude_norm[y, x]
-                ang = angle[y, x]
 
                 if use_edge_chars and mag > sobel_threshold:
-                    if 22.5 <= ang < 67.5 or 157.5 <= ang < 202.5:
-                        char = '/'
-                    elif 67.5 <= ang < 112.5 or 247.5 <= ang < 292.5:
-                        char = '|'
-                    elif 112.5 <= ang < 157.5 or 292.5 <= ang < 337.5:
-                        char = '\\'
-                    else:
-                        char = '-'
+                    char = EDGE_CHARS[orientation[y, x]]
                 else:
                     char = luminance_ramp[lum_indices[y, x]]
 
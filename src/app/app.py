@@ -7,7 +7,8 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, GLib, GdkPixbuf, Gdk
 
-from .constants import UI_FILE, LOGO_FILE, CONFIG_PATH, ROOT_DIR
+from .constants import UI_FILE, LOGO_FILE, CONFIG_PATH, ROOT_DIR, LUMINANCE_RAMPS, DEFAULT_LUMINANCE_RAMP
+from src.core.utils.ramp import warm_ramps
 from .actions.file_actions import FileActionsMixin
 from .actions.conversion_actions import ConversionActionsMixin
 from .actions.playback_actions import PlaybackActionsMixin
@@ -29,6 +30,9 @@ class App(
     def __init__(self, logger):
         self.logger = logger
         self.initialization_failed = False
+
+        # Rampas dos presets compiladas antes do primeiro preview
+        warm_ramps([DEFAULT_LUMINANCE_RAMP] + [preset['ramp'] for preset in LUMINANCE_RAMPS.values()])
         self.builder = Gtk.Builder()
 
         # Initialize Color Provider EARLY
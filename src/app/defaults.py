@@ -25,6 +25,7 @@ DEFAULTS = {
         'temporal_threshold': 50,
         'auto_seg_enabled': False,
         'render_mode': 'both',
+        'video_decoder': 'auto',
         'edge_boost_enabled': False,
         'edge_boost_amount': 100,
         'use_edge_chars': True,
@@ -46,6 +47,11 @@ DEFAULTS = {
         'clear_screen': True,
         'show_fps': False,
         'speed': 1.0,
+        'run_length_colors': True,
+        'color_tolerance': 0,
+        'terminal_diff': True,
+        'synchronized_output': 'auto',
+        'read_ahead_frames': 8,
     },
     'ChromaKey': {
         'h_min': 0, 'h_max': 84,
@@ -65,6 +71,11 @@ DEFAULTS = {
     'Output': {
         'format': 'txt',
         'mp4_target_fps': 0,
+        'a4r_keyframe_interval': 30,
+        'a4r_compression': 'zlib',
+        'txt_compression': 'none',
+        'txt_compression_level': 6,
+        'gif_palette': 'ansi',
     },
     'Preview': {
         'font_family': 'auto',
@@ -0,0 +1,194 @@
+import hashlib
+import itertools
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.core.utils.ascii_video import (
+    A4R_EXTENSION, COMPRESSION_NONE, COMPRESSION_ZLIB, DEFAULT_KEYFRAME_INTERVAL, DEFAULT_TXT_COMPRESSION_LEVEL, FRAME_KEY,
+    A4rReader, A4rWriter, CompressedTxtReader, TxtReader, TxtWriter, is_a4r, is_compressed_txt, open_ascii_video, txt_index_path
+)
+
+# Extensoes reconhecidas como video ASCII (a mais longa primeiro, para tirar o sufixo certo)
+ASCII_VIDEO_EXTENSIONS = ('.txt.gz', '.txt.zst', '.txt', A4R_EXTENSION)
+
+
+@dataclass
+class MigrationResult:
+    """Resultado da migracao de um arquivo (tempos em segundos)."""
+    source_path: str
+    output_path: str
+    frames: int
+    source_bytes: int
+    output_bytes: int
+    source_parse_seconds: float
+    output_parse_seconds: float
+    verified: bool
+
+    @property
+    def size_reduction(self) -> float:
+        """Fracao do tamanho original economizada (negativa se o arquivo cresceu)."""
+        return 1.0 - self.output_bytes / self.source_bytes if self.source_bytes else 0.0
+
+    @staticmethod
+    def _rate(frames: int, seconds: float) -> float:
+        return frames / seconds if seconds > 0 else float('inf')
+
+    @property
+    def source_fps(self) -> float:
+        """Frames por segundo lidos e convertidos para AsciiFrame no formato de origem."""
+        return self._rate(self.frames, self.source_parse_seconds)
+
+    @property
+    def output_fps(self) -> float:
+        return self._rate(self.frames, self.output_parse_seconds)
+
+
+def strip_ascii_extension(path: str) -> str:
+    lower = path.lower()
+    for extension in ASCII_VIDEO_EXTENSIONS:
+        if lower.endswith(extension):
+            return path[:-len(extension)]
+    return os.path.splitext(path)[0]
+
+
+def is_ascii_video_path(path: str) -> bool:
+    return path.lower().endswith(ASCII_VIDEO_EXTENSIONS)
+
+
+def migration_output_path(source_path: str, extension: str, output_dir: str = None) -> str:
+    base = strip_ascii_extension(os.path.basename(source_path))
+    return os.path.join(output_dir or os.path.dirname(os.path.abspath(source_path)), base + extension)
+
+
+def _frame_digest(frame) -> bytes:
+    return hashlib.blake2b(frame.to_text_bytes(), digest_size=16).digest()
+
+
+class _TimedFrames:
+    """Itera os frames somando o tempo gasto dentro do leitor (leitura + parse), sem contar o consumidor."""
+
+    def __init__(self, frames):
+        self._iterator = iter(frames)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def _open_writer(output_path: str, fps: float, first_frame, ramp: str, keyframe_interval: int, compression: int, level: int):
+    if output_path.lower().endswith(A4R_EXTENSION):
+        height, width = first_frame.shape if first_frame is not None else (0, 0)
+        return A4rWriter(output_path, fps, width, height, ramp, compression=compression,
+                         keyframe_interval=keyframe_interval)
+    return TxtWriter(output_path, fps, level=level)
+
+
+def migrate_file(source_path: str, output_path: str, verify: bool = True,
+                 keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL, compression: int = COMPRESSION_ZLIB,
+                 level: int = DEFAULT_TXT_COMPRESSION_LEVEL) -> MigrationResult:
+    """
+    Converte um video ASCII entre .txt (comprimido ou nao) e .a4r; o
+    formato de saida vem da extensao de output_path. Com verify, a saida e
+    relida e cada frame comparado (pelo hash do texto) com o de origem; em
+    caso de divergencia a saida e removida e o erro sobe como ValueError.
+
+    Roda inteira num processo, para ser usada por um pool (ProcessPoolExecutor).
+    """
+    if os.path.abspath(source_path) == os.path.abspath(output_path):
+        raise ValueError(f"Saida igual a entrada: {source_path}")
+
+    source_bytes = os.path.getsize(source_path)
+    digests = []
+    with open_ascii_video(source_path) as source:
+        frames = _TimedFrames(source)
+        first_frame = next(frames, None)
+        ramp = getattr(source, 'ramp', "")
+        with _open_writer(output_path, source.fps, first_frame, ramp, keyframe_interval, compression, level) as writer:
+            if first_frame is not None:
+                for frame in itertools.chain((first_frame,), frames):
+                    writer.write_frame(frame)
+                    if verify:
+                        digests.append(_frame_digest(frame))
+            frame_count = len(writer)
+
+    output_seconds = 0.0
+    if verify:
+        try:
+            output_seconds = _verify(output_path, digests)
+        except Exception:
+            os.remove(output_path)
+            raise
+
+    return MigrationResult(
+        source_path=source_path,
+        output_path=output_path,
+        frames=frame_count,
+        source_bytes=source_bytes,
+        output_bytes=os.path.getsize(output_path),
+        source_parse_seconds=frames.seconds,
+        output_parse_seconds=output_seconds,
+        verified=verify,
+    )
+
+
+def _verify(output_path: str, digests: list) -> float:
+    with open_ascii_video(output_path) as output:
+        frames = _TimedFrames(output)
+        count = 0
+        for index, frame in enumerate(frames):
+            if index >= len(digests) or _frame_digest(frame) != digests[index]:
+                raise ValueError(f"Round-trip divergente no frame {index} de '{output_path}'")
+            count += 1
+    if count != len(digests):
+        raise ValueError(f"Round-trip com {count} frames, esperado {len(digests)} ('{output_path}')")
+    return frames.seconds
+
+
+def inspect_file(path: str) -> dict:
+    """
+    Cabecalho e estatisticas do indice de um video ASCII, sem decodificar
+    frames. Num .txt comprimido a contagem exige descomprimir o stream
+    inteiro (o texto dos frames nao e convertido).
+    """
+    info = {'path': path, 'bytes': os.path.getsize(path)}
+    if is_a4r(path):
+        with A4rReader(path) as reader:
+            sizes = np.diff(reader.offsets)
+            info.update({
+                'format': 'a4r',
+                'fps': reader.fps,
+                'grid': f"{reader.width}x{reader.height}",
+                'compression': 'none' if reader.compression == COMPRESSION_NONE else 'zlib',
+                'glyphs': len(reader.glyphs),
+                'ramp': reader.ramp,
+                'frames': len(reader),
+                'keyframes': len(reader.keyframes),
+                'delta_frames': int(np.count_nonzero(reader.frame_types != FRAME_KEY)),
+                'index_offset': int(reader.offsets[-1]) if len(reader.offsets) else 0,
+                'zero_copy': reader.zero_copy,
+            })
+            _frame_size_stats(info, sizes)
+    elif is_compressed_txt(path):
+        reader = CompressedTxtReader(path)
+        info.update({'format': 'txt (comprimido)', 'fps': reader.fps, 'frames': len(reader)})
+    else:
+        cached = os.path.exists(txt_index_path(path))
+        with TxtReader(path) as reader:
+            info.update({'format': 'txt', 'fps': reader.fps, 'frames': len(reader), 'index_cache': cached})
+            _frame_size_stats(info, reader.offsets[:, 1] - reader.offsets[:, 0])
+    return info
+
+
+def _frame_size_stats(info: dict, sizes: np.ndarray):
+    if len(sizes):
+        info['frame_bytes'] = f"media {sizes.mean():.0f}, min {sizes.min()}, max {sizes.max()}"
@@ -2,47 +2,121 @@
 import os
 import subprocess
 import shutil
+import tempfile
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def extract_audio_as_aac(video_path: str, temp_dir: str) -> str | None:
-    result = subprocess.run(
-        ['ffprobe', '-i', video_path, '-show_streams',
-         '-select_streams', 'a', '-loglevel', 'error'],
-        capture_output=True, text=True, encoding='utf-8', errors='replace'
-    )
-
-    if not result.stdout.strip():
-        logger.info("Video sem stream de audio: %s", video_path)
-        return None
-
-    temp_audio = os.path.join(temp_dir, "audio.m4a")
-
-    cmd = [
-        'ffmpeg', '-y',
-        '-i', video_path,
-        '-vn',
-        '-c:a', 'aac',
-        '-b:a', '192k',
-        temp_audio
-    ]
-
-    result = subprocess.run(
-        cmd, capture_output=True, text=True, encoding='utf-8', errors='replace'
-    )
-
+AAC_AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '192k']
+MP3_AUDIO_ARGS = ['-c:a', 'libmp3lame', '-b:a', '128k']
+
+
+def has_audio_stream(video_path: str) -> bool:
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-i', video_path, '-show_streams',
+             '-select_streams', 'a', '-loglevel', 'error'],
+            capture_output=True, text=True, encoding='utf-8', errors='replace'
+        )
+    except OSError:
+        return False
+    return bool(result.stdout.strip())
+
+
+def audio_stream_decodes(video_path: str) -> bool:
+    """
+    Abre o video e decodifica o primeiro segundo do audio. Stream sem
+    decoder ou ilegivel falha aqui, antes do encode, e nao no meio dele.
+    """
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-nostdin', '-i', video_path,
+             '-map', '0:a:0', '-t', '1', '-f', 'null', '-'],
+            capture_output=True, text=True, encoding='utf-8', errors='replace'
+        )
+    except OSError:
+        return False
     if result.returncode != 0:
-        logger.warning("Falha ao extrair audio: %s", result.stderr[:200])
-        return None
+        logger.warning("Audio do video nao decodifica, MP4 sai sem audio: %s", result.stderr[:200])
+        return False
+    return True
+
+
+def live_audio_args(video_path: str) -> list:
+    """
+    Argumentos para o ffmpeg que recebe os frames rawvideo pelo stdin (a
+    entrada 0) tambem ler o audio do video original e codifica-lo como AAC
+    no mesmo processo: o MP4 sai pronto, sem extracao e mux no fim. Vao
+    logo apos o `-i -`. Lista vazia se o video nao tem audio ou se o audio
+    nao decodifica: os frames chegam pelo pipe e nao ha como refazer o
+    encode sem audio, entao o MP4 sai so com video, como no mux antigo.
+    Pacotes corrompidos no meio do audio sao descartados sem derrubar o
+    encode (-max_error_rate 1).
+    """
+    if not has_audio_stream(video_path):
+        logger.info("Video sem stream de audio: %s", video_path)
+        return []
+    if not audio_stream_decodes(video_path):
+        return []
+    return ['-max_error_rate', '1', '-i', video_path, '-map', '0:v:0', '-map', '1:a:0?', *AAC_AUDIO_ARGS]
+
+
+class AudioExtraction:
+    """
+    Extracao do audio de um video num subprocesso ffmpeg que roda em
+    paralelo com o render; result() espera o fim e devolve o caminho do
+    arquivo, ou None se o video nao tem audio ou a extracao falhou.
+    """
+
+    def __init__(self, video_path: str, output_path: str, codec_args: list = AAC_AUDIO_ARGS):
+        self.video_path = video_path
+        self.output_path = output_path
+        self.process = None
+        self._stderr = None
+        if not has_audio_stream(video_path):
+            logger.info("Video sem stream de audio: %s", video_path)
+            return
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            ['ffmpeg', '-y', '-nostdin', '-i', video_path, '-vn', *codec_args, output_path],
+            stdout=subprocess.DEVNULL, stderr=self._stderr
+        )
+
+    def result(self) -> str | None:
+        if self.process is None:
+            return None
+        returncode = self.process.wait()
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode('utf-8', errors='replace')
+        self._stderr.close()
+        self.process = None
+
+        if returncode != 0:
+            logger.warning("Falha ao extrair audio: %s", stderr[:200])
+            return None
+
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) < 1024:
+            logger.warning("Audio extraido invalido ou muito pequeno")
+            return None
+
+        logger.info("Audio extraido com sucesso: %s", self.output_path)
+        return self.output_path
+
+    def cancel(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self._stderr.close()
+        self.process = None
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
 
-    if not os.path.exists(temp_audio) or os.path.getsize(temp_audio) < 1024:
-        logger.warning("Audio extraido invalido ou muito pequeno")
-        return None
 
-    logger.info("Audio extraido com sucesso: %s", temp_audio)
-    return temp_audio
+def extract_audio_as_aac(video_path: str, temp_dir: str) -> str | None:
+    return AudioExtraction(video_path, os.path.join(temp_dir, "audio.m4a")).result()
 
 
 def mux_video_audio(video_path: str, audio_path: str | None, output_path: str) -> bool:
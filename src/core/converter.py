@@ -1,8 +1,6 @@
-import cv2
 import os
 import sys
 import logging
-import numpy as np
 import configparser
 import argparse
 
@@ -12,121 +10,86 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from src.core.utils.color import rgb_to_ansi256
-from src.core.utils.image import sharpen_frame, apply_morphological_refinement
-from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT as LUMINANCE_RAMP, COLOR_SEPARATOR
+from src.core.utils.ascii_converter import LUMINANCE_RAMP_DEFAULT as LUMINANCE_RAMP, COLOR_SEPARATOR
+from src.core.utils.ascii_video import (
+    A4R_EXTENSION, A4rWriter, TxtWriter, COMPRESSION_ZLIB, DEFAULT_KEYFRAME_INTERVAL, DEFAULT_TXT_COMPRESSION_LEVEL,
+    a4r_options_from_config, txt_compression_level, txt_output_extension
+)
+from src.core.frame_pipeline import FramePipeline, FrameSink
+
+
+class TxtSink(FrameSink):
+    """
+    Formato .txt legado: fps na primeira linha e frames "c§code§" separados
+    por [FRAME]. Cada frame vai para o disco assim que e gerado (memoria
+    constante); o arquivo so aparece no destino quando a conversao termina.
+    Destinos .txt.gz/.txt.zst sao comprimidos em stream.
+    """
+
+    def __init__(self, caminho_saida, level=DEFAULT_TXT_COMPRESSION_LEVEL):
+        self.caminho_saida = caminho_saida
+        self.level = level
+        self.writer = None
+
+    def open(self, info):
+        super().open(info)
+        try:
+            self.writer = TxtWriter(self.caminho_saida, info.fps, level=self.level)
+        except OSError as e:
+            raise IOError(f"Erro ao salvar arquivo: {e}")
 
-try:
-    from src.core.auto_segmenter import AutoSegmenter, is_available as auto_seg_available
-    AUTO_SEG_AVAILABLE = auto_seg_available()
-except ImportError:
-    AUTO_SEG_AVAILABLE = False
-    AutoSegmenter = None
+    def write(self, frame, image):
+        self.writer.write_frame(frame)
 
-try:
-    from src.core.post_fx_gpu import PostFXProcessor, PostFXConfig
-    POSTFX_AVAILABLE = True
-except ImportError:
-    POSTFX_AVAILABLE = False
-    PostFXProcessor = None
-    PostFXConfig = None
+    def close(self):
+        try:
+            return self.writer.close()
+        except OSError as e:
+            raise IOError(f"Erro ao salvar arquivo: {e}")
 
+    def abort(self):
+        if self.writer is not None:
+            self.writer.abort()
 
-def iniciar_conversao(video_path, output_dir, config, chroma_override=None, force_output_path=None):
-    try:
-        target_width = config.getint('Conversor', 'target_width')
-        char_aspect_ratio = config.getfloat('Conversor', 'char_aspect_ratio')
-        sobel_threshold = config.getint('Conversor', 'sobel_threshold')
 
-        # Melhorias de nitidez
-        sharpen_enabled = config.getboolean('Conversor', 'sharpen_enabled', fallback=True)
-        sharpen_amount = config.getfloat('Conversor', 'sharpen_amount', fallback=0.5)
+class A4rSink(FrameSink):
+    """Container binario .a4r: keyframes + frames delta comprimidos e indice de offsets no fim."""
 
-        luminance_ramp = config.get('Conversor', 'luminance_ramp', fallback=LUMINANCE_RAMP).rstrip('|')
-        logger.info(f"Usando rampa: {repr(luminance_ramp)} ({len(luminance_ramp)} caracteres)")
+    def __init__(self, caminho_saida, ramp="", keyframe_interval=DEFAULT_KEYFRAME_INTERVAL, compression=COMPRESSION_ZLIB):
+        self.caminho_saida = caminho_saida
+        self.ramp = ramp
+        self.keyframe_interval = keyframe_interval
+        self.compression = compression
+        self.writer = None
 
-        edge_boost_enabled = config.getboolean('Conversor', 'edge_boost_enabled', fallback=False)
-        edge_boost_amount = config.getint('Conversor', 'edge_boost_amount', fallback=100)
-        use_edge_chars = config.getboolean('Conversor', 'use_edge_chars', fallback=True)
+    def open(self, info):
+        super().open(info)
+        width, height = info.grid_size
+        self.writer = A4rWriter(self.caminho_saida, info.output_fps, width, height, ramp=self.ramp,
+                                keyframe_interval=self.keyframe_interval, compression=self.compression)
 
-        auto_seg_enabled = config.getboolean('Conversor', 'auto_seg_enabled', fallback=False)
-        temporal_enabled = config.getboolean('Conversor', 'temporal_coherence_enabled', fallback=False)
-        temporal_threshold = config.getint('Conversor', 'temporal_threshold', fallback=50)
-        braille_enabled = config.getboolean('Conversor', 'braille_enabled', fallback=False)
-        braille_threshold = config.getint('Conversor', 'braille_threshold', fallback=128)
+    def write(self, frame, image):
+        self.writer.write_frame(frame)
 
-        render_mode = config.get('Conversor', 'render_mode', fallback='both').lower()
-        if render_mode not in ('user', 'background', 'both'):
-            render_mode = 'both'
+    def close(self):
+        return self.writer.close()
 
-        postfx_processor = None
-        if POSTFX_AVAILABLE:
-            bloom_enabled = config.getboolean('PostFX', 'bloom_enabled', fallback=False)
-            chromatic_enabled = config.getboolean('PostFX', 'chromatic_enabled', fallback=False)
-            scanlines_enabled = config.getboolean('PostFX', 'scanlines_enabled', fallback=False)
-            glitch_enabled = config.getboolean('PostFX', 'glitch_enabled', fallback=False)
+    def abort(self):
+        if self.writer is not None:
+            self.writer.abort()
 
-            if bloom_enabled or chromatic_enabled or scanlines_enabled or glitch_enabled:
-                try:
-                    postfx_config = PostFXConfig(
-                        bloom_enabled=bloom_enabled,
-                        bloom_intensity=config.getfloat('PostFX', 'bloom_intensity', fallback=1.2),
-                        bloom_radius=config.getint('PostFX', 'bloom_radius', fallback=21),
-                        bloom_threshold=config.getint('PostFX', 'bloom_threshold', fallback=80),
-                        chromatic_enabled=chromatic_enabled,
-                        chromatic_shift=config.getint('PostFX', 'chromatic_shift', fallback=12),
-                        scanlines_enabled=scanlines_enabled,
-                        scanlines_intensity=config.getfloat('PostFX', 'scanlines_intensity', fallback=0.7),
-                        scanlines_spacing=config.getint('PostFX', 'scanlines_spacing', fallback=2),
-                        glitch_enabled=glitch_enabled,
-                        glitch_intensity=config.getfloat('PostFX', 'glitch_intensity', fallback=0.6),
-                        glitch_block_size=config.getint('PostFX', 'glitch_block_size', fallback=8)
-                    )
-                    postfx_processor = PostFXProcessor(postfx_config, use_gpu=False)
-                    fx_list = []
-                    if bloom_enabled:
-                        fx_list.append("Bloom")
-                    if chromatic_enabled:
-                        fx_list.append("Chromatic")
-                    if scanlines_enabled:
-                        fx_list.append("Scanlines")
-                    if glitch_enabled:
-                        fx_list.append("Glitch")
-                    logger.info(f"PostFX habilitado (CPU): {', '.join(fx_list)}")
-                except Exception as e:
-                    logger.warning(f"PostFX falhou ao inicializar: {e}")
 
-        if chroma_override:
-            lower_green = np.array([
-                chroma_override['h_min'],
-                chroma_override['s_min'],
-                chroma_override['v_min']
-            ])
-            upper_green = np.array([
-                chroma_override['h_max'],
-                chroma_override['s_max'],
-                chroma_override['v_max']
-            ])
-            erode_size = chroma_override.get('erode', 2)
-            dilate_size = chroma_override.get('dilate', 2)
-        else:
-            lower_green = np.array([
-                config.getint('ChromaKey', 'h_min'),
-                config.getint('ChromaKey', 's_min'),
-                config.getint('ChromaKey', 'v_min')
-            ])
-            upper_green = np.array([
-                config.getint('ChromaKey', 'h_max'),
-                config.getint('ChromaKey', 's_max'),
-                config.getint('ChromaKey', 'v_max')
-            ])
-            erode_size = config.getint('ChromaKey', 'erode', fallback=2)
-            dilate_size = config.getint('ChromaKey', 'dilate', fallback=2)
-    except Exception as e:
-        raise ValueError(f"Erro ao ler o config.ini. Erro: {e}")
+def iniciar_conversao(video_path, output_dir, config, chroma_override=None, force_output_path=None):
+    pipeline = FramePipeline.from_config(config, chroma_override)
+    settings = pipeline.settings
+    logger.info(f"Usando rampa: {repr(settings.luminance_ramp)} ({len(settings.luminance_ramp)} caracteres)")
 
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Erro: '{video_path}' nao encontrado.")
+    if settings.temporal_enabled:
+        logger.info(f"Temporal Coherence ativado: threshold={settings.temporal_threshold}")
+    if config.getboolean('Conversor', 'braille_enabled', fallback=False):
+        logger.warning("Braille requer GPU Converter (gpu_converter.py), ignorado em conversao CPU")
+    if settings.render_mode != 'both':
+        logger.info(f"Render Mode: {settings.render_mode}")
 
     if force_output_path:
         caminho_saida = force_output_path
@@ -134,133 +97,15 @@ def iniciar_conversao(video_path, output_dir, config, chroma_override=None, forc
         os.makedirs(os.path.dirname(caminho_saida), exist_ok=True)
     else:
         nome_base = os.path.splitext(os.path.basename(video_path))[0]
-        caminho_saida = os.path.join(output_dir, f"{nome_base}.txt")
-
-    captura = cv2.VideoCapture(video_path)
-    if not captura.isOpened():
-        raise IOError(f"Erro: Nao abriu '{video_path}'.")
-
-    fps = captura.get(cv2.CAP_PROP_FPS)
-    frames_ascii = []
+        extensao = A4R_EXTENSION if config.get('Output', 'format', fallback='txt').lower() == 'a4r' else txt_output_extension(config)
+        caminho_saida = os.path.join(output_dir, f"{nome_base}{extensao}")
 
-    try:
-        source_width = captura.get(cv2.CAP_PROP_FRAME_WIDTH)
-        source_height = captura.get(cv2.CAP_PROP_FRAME_HEIGHT)
-
-        config_height = config.getint('Conversor', 'target_height', fallback=0)
-        if config_height > 0:
-            target_height = config_height
-        else:
-            target_height = int((target_width * source_height * char_aspect_ratio) / source_width)
-            if target_height <= 0:
-                target_height = int(target_width * (9/16) * char_aspect_ratio)
-
-        target_dimensions = (target_width, target_height)
-        manual_flag = '[altura manual]' if config_height > 0 else ''
-        logger.info(f"Video de origem: {int(source_width)}x{int(source_height)}. Convertendo para: {target_width}x{target_height} (caracteres).{manual_flag}")
-    except Exception as e:
-        logger.warning(f"Nao foi possivel calcular a proporcao. Usando 80x25. Erro: {e}")
-        target_dimensions = (target_width, 25)
-
-    auto_segmenter = None
-    if auto_seg_enabled and AUTO_SEG_AVAILABLE:
-        try:
-            auto_segmenter = AutoSegmenter(threshold=0.5, use_gpu=False)
-            logger.info("Auto Seg ativado para conversao (CPU)")
-        except Exception as e:
-            logger.warning(f"Auto Seg falhou ao inicializar, usando ChromaKey HSV. Erro: {e}")
-            auto_segmenter = None
-    elif auto_seg_enabled and not AUTO_SEG_AVAILABLE:
-        logger.warning("Auto Seg solicitado mas MediaPipe nao disponivel, usando ChromaKey HSV")
-
-    if temporal_enabled:
-        logger.info(f"Temporal Coherence ativado: threshold={temporal_threshold}")
-
-    if braille_enabled:
-        logger.warning("Braille requer GPU Converter (gpu_converter.py), ignorado em conversao CPU")
-
-    if render_mode != 'both':
-        logger.info(f"Render Mode: {render_mode}")
-
-    prev_gray_frame = None
-
-    while True:
-        sucesso, frame_colorido = captura.read()
-        if not sucesso:
-            break
-
-        if auto_segmenter is not None:
-            frame_h, frame_w = frame_colorido.shape[:2]
-            max_autoseg_size = 320
-            if max(frame_h, frame_w) > max_autoseg_size:
-                scale = max_autoseg_size / max(frame_h, frame_w)
-                small_h, small_w = int(frame_h * scale), int(frame_w * scale)
-                small_frame = cv2.resize(frame_colorido, (small_w, small_h), interpolation=cv2.INTER_AREA)
-                small_mask = auto_segmenter.process(small_frame)
-                mask = cv2.resize(small_mask, (frame_w, frame_h), interpolation=cv2.INTER_NEAREST)
-            else:
-                mask = auto_segmenter.process(frame_colorido)
-            mask = apply_morphological_refinement(mask, erode_size, dilate_size)
-        else:
-            hsv_frame = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2HSV)
-            mask = cv2.inRange(hsv_frame, lower_green, upper_green)
-            mask = apply_morphological_refinement(mask, erode_size, dilate_size)
-
-        grayscale_frame = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2GRAY)
-
-        resized_gray = cv2.resize(grayscale_frame, target_dimensions, interpolation=cv2.INTER_AREA)
-        resized_color = cv2.resize(frame_colorido, target_dimensions, interpolation=cv2.INTER_AREA)
-        resized_mask = cv2.resize(mask, target_dimensions, interpolation=cv2.INTER_NEAREST)
-
-        if sharpen_enabled:
-            resized_color = sharpen_frame(resized_color, sharpen_amount)
-            resized_gray = cv2.cvtColor(resized_color, cv2.COLOR_BGR2GRAY)
-
-        if render_mode == 'user':
-            resized_color[resized_mask > 127] = 0
-            mask_for_ascii = resized_mask
-        elif render_mode == 'background':
-            resized_color[resized_mask < 128] = 0
-            mask_for_ascii = 255 - resized_mask
-        else:
-            mask_for_ascii = np.zeros_like(resized_mask)
-
-        if temporal_enabled and prev_gray_frame is not None:
-            diff = np.abs(resized_gray.astype(np.int32) - prev_gray_frame.astype(np.int32))
-            temporal_mask = diff < temporal_threshold
-            resized_gray = np.where(temporal_mask, prev_gray_frame, resized_gray).astype(np.uint8)
-
-        prev_gray_frame = resized_gray.copy()
-        sobel_x = cv2.Sobel(resized_gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(resized_gray, cv2.CV_64F, 0, 1, ksize=3)
-        magnitude = np.hypot(sobel_x, sobel_y)
-        angle = np.arctan2(sobel_y, sobel_x) * (180 / np.pi)
-        angle = (angle + 180) % 180
-        magnitude_norm = cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
-        frame_ascii = converter_frame_para_ascii(
-            resized_gray, resized_color, mask_for_ascii, magnitude_norm, angle, sobel_threshold, luminance_ramp,
-            output_format="file",
-            edge_boost_enabled=edge_boost_enabled,
-            edge_boost_amount=edge_boost_amount,
-            use_edge_chars=use_edge_chars
-        )
-        frames_ascii.append(frame_ascii)
-
-    captura.release()
-
-    if auto_segmenter is not None:
-        try:
-            auto_segmenter.close()
-        except Exception:
-            pass
-
-    try:
-        with open(caminho_saida, 'w') as f:
-            f.write(f"{fps}\n")
-            f.write("[FRAME]\n".join(frames_ascii))
-        return caminho_saida
-    except Exception as e:
-        raise IOError(f"Erro ao salvar arquivo: {e}")
+    # O formato segue a extensao do arquivo de saida
+    if caminho_saida.lower().endswith(A4R_EXTENSION):
+        sink = A4rSink(caminho_saida, ramp=settings.luminance_ramp, **a4r_options_from_config(config))
+    else:
+        sink = TxtSink(caminho_saida, level=txt_compression_level(config))
+    return pipeline.run(video_path, sink)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,452 @@
+import os
+import logging
+import configparser
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from src.core.utils.image import sharpen_frame, apply_morphological_refinement
+from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT
+from src.core.utils.ascii_frame import AsciiFrame
+from src.core.utils.buffer_pool import BufferPool
+from src.core.utils.edges import compute_edge_features
+from src.core.utils.frame_source import FrameSource
+from src.core.utils.ffmpeg_source import MASK_INGEST_SCALE, open_scaled_capture
+from src.core.utils.postfx_loader import load_postfx_config, postfx_effects, POSTFX_AVAILABLE
+
+if POSTFX_AVAILABLE:
+    from src.core.post_fx_gpu import PostFXProcessor
+
+try:
+    from src.core.auto_segmenter import AutoSegmenter, is_available as auto_seg_available
+    AUTO_SEG_AVAILABLE = auto_seg_available()
+except ImportError:
+    AUTO_SEG_AVAILABLE = False
+    AutoSegmenter = None
+
+logger = logging.getLogger(__name__)
+
+RENDER_MODES = ('user', 'background', 'both')
+VIDEO_DECODERS = ('auto', 'opencv', 'ffmpeg')
+MAX_AUTOSEG_SIZE = 320
+PREVIEW_INTERVAL = 30
+DEFAULT_FONT_SCALE = 0.5
+
+
+@dataclass
+class PipelineSettings:
+    """Parametros do [Conversor]/[ChromaKey] usados por todos os formatos."""
+    target_width: int
+    char_aspect_ratio: float
+    sobel_threshold: int
+    luminance_ramp: str = LUMINANCE_RAMP_DEFAULT
+    target_height: int = 0
+    sharpen_enabled: bool = True
+    sharpen_amount: float = 0.5
+    edge_boost_enabled: bool = False
+    edge_boost_amount: int = 100
+    use_edge_chars: bool = True
+    render_mode: str = 'both'
+    auto_seg_enabled: bool = False
+    temporal_enabled: bool = False
+    temporal_threshold: int = 50
+    lower_green: Optional[np.ndarray] = None
+    upper_green: Optional[np.ndarray] = None
+    erode_size: int = 2
+    dilate_size: int = 2
+    video_decoder: str = 'auto'
+    # Estica a magnitude do Sobel min-max para 0..255 (txt/imagem); MP4/GIF/PNG/HTML usam a magnitude crua
+    edge_normalize: bool = True
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser, chroma_override=None,
+                    edge_normalize: bool = True) -> "PipelineSettings":
+        try:
+            render_mode = config.get('Conversor', 'render_mode', fallback='both').lower()
+            if render_mode not in RENDER_MODES:
+                render_mode = 'both'
+            video_decoder = config.get('Conversor', 'video_decoder', fallback='auto').lower()
+            if video_decoder not in VIDEO_DECODERS:
+                video_decoder = 'auto'
+
+            if chroma_override:
+                chroma = chroma_override
+                erode_size = chroma_override.get('erode', 2)
+                dilate_size = chroma_override.get('dilate', 2)
+            else:
+                chroma = {key: config.getint('ChromaKey', key)
+                          for key in ('h_min', 's_min', 'v_min', 'h_max', 's_max', 'v_max')}
+                erode_size = config.getint('ChromaKey', 'erode', fallback=2)
+                dilate_size = config.getint('ChromaKey', 'dilate', fallback=2)
+
+            return cls(
+                target_width=config.getint('Conversor', 'target_width'),
+                char_aspect_ratio=config.getfloat('Conversor', 'char_aspect_ratio'),
+                sobel_threshold=config.getint('Conversor', 'sobel_threshold'),
+                luminance_ramp=config.get('Conversor', 'luminance_ramp', fallback=LUMINANCE_RAMP_DEFAULT).rstrip('|'),
+                target_height=config.getint('Conversor', 'target_height', fallback=0),
+                sharpen_enabled=config.getboolean('Conversor', 'sharpen_enabled', fallback=True),
+                sharpen_amount=config.getfloat('Conversor', 'sharpen_amount', fallback=0.5),
+                edge_boost_enabled=config.getboolean('Conversor', 'edge_boost_enabled', fallback=False),
+                edge_boost_amount=config.getint('Conversor', 'edge_boost_amount', fallback=100),
+                use_edge_chars=config.getboolean('Conversor', 'use_edge_chars', fallback=True),
+                render_mode=render_mode,
+                auto_seg_enabled=config.getboolean('Conversor', 'auto_seg_enabled', fallback=False),
+                temporal_enabled=config.getboolean('Conversor', 'temporal_coherence_enabled', fallback=False),
+                temporal_threshold=config.getint('Conversor', 'temporal_threshold', fallback=50),
+                lower_green=np.array([chroma['h_min'], chroma['s_min'], chroma['v_min']]),
+                upper_green=np.array([chroma['h_max'], chroma['s_max'], chroma['v_max']]),
+                erode_size=erode_size,
+                dilate_size=dilate_size,
+                video_decoder=video_decoder,
+                edge_normalize=edge_normalize,
+            )
+        except Exception as e:
+            raise ValueError(f"Erro ao ler config.ini: {e}")
+
+    def grid_size(self, source_width: float, source_height: float) -> tuple:
+        """(largura, altura) da grade em caracteres para um video/imagem de origem."""
+        if self.target_height > 0:
+            return self.target_width, self.target_height
+        target_height = 0
+        if source_width > 0:
+            target_height = int((self.target_width * source_height * self.char_aspect_ratio) / source_width)
+        if target_height <= 0:
+            target_height = int(self.target_width * (9 / 16) * self.char_aspect_ratio)
+        return self.target_width, target_height
+
+
+@dataclass
+class StreamInfo:
+    """O que o sink precisa saber do job antes do primeiro frame."""
+    source_path: str
+    fps: float
+    total_frames: int
+    grid_size: tuple
+    frame_interval: int = 1
+
+    @property
+    def output_fps(self) -> float:
+        return self.fps / self.frame_interval
+
+
+class FrameSink:
+    """
+    Estagio final (encode) do FramePipeline. Cada formato de exportacao
+    implementa write(); open() recebe o StreamInfo antes do primeiro frame
+    e close() devolve o caminho gerado. Com needs_image o pipeline tambem
+    rasteriza (e aplica o PostFX) antes de chamar write().
+    """
+    needs_image = False
+
+    def open(self, info: StreamInfo):
+        self.info = info
+
+    def write(self, frame: AsciiFrame, image: Optional[np.ndarray]):
+        raise NotImplementedError
+
+    def close(self):
+        return None
+
+    def abort(self):
+        pass
+
+
+class FramePipeline:
+    """
+    decode -> mask -> resize -> features -> map -> rasterize -> encode.
+
+    Todos os buffers por frame (HSV, mascaras, frames reduzidos, Sobel,
+    indices da rampa, cores ANSI, estado do temporal coherence, tiles e
+    imagem rasterizada) vem de um BufferPool do job: sao alocados no
+    primeiro frame e reaproveitados ate o fim. `frame_allocations` diz
+    quantos buffers o ultimo frame precisou alocar (0 em regime).
+
+    O AsciiFrame de process() e a imagem de rasterize() apontam para esses
+    buffers e so valem ate o proximo frame; use .copy() para guardar.
+    """
+
+    def __init__(
+        self,
+        settings: PipelineSettings,
+        target_fps: float = 0,
+        font_scale: float = DEFAULT_FONT_SCALE,
+        postfx_config=None
+    ):
+        self.settings = settings
+        self.target_fps = target_fps
+        self.font_scale = font_scale
+        self.postfx_config = postfx_config
+        self._postfx = None
+        self._segmenter = None
+        self._buffers_key = None
+        self._has_prev_gray = False
+        self.pool = BufferPool()
+        self.frame_allocations = 0
+        self.frames_written = 0
+        self.grid_size = None
+
+        if settings.auto_seg_enabled:
+            if AUTO_SEG_AVAILABLE:
+                try:
+                    self._segmenter = AutoSegmenter()
+                    logger.info("AutoSeg habilitado para conversao")
+                except Exception as e:
+                    logger.warning(f"Auto Seg falhou ao inicializar, usando ChromaKey HSV. Erro: {e}")
+            else:
+                logger.warning("Auto Seg solicitado mas MediaPipe nao disponivel, usando ChromaKey HSV")
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser, chroma_override=None, edge_normalize: bool = True,
+                    **kwargs) -> "FramePipeline":
+        settings = PipelineSettings.from_config(config, chroma_override, edge_normalize=edge_normalize)
+        return cls(settings, postfx_config=load_postfx_config(config), **kwargs)
+
+    def _allocate(self, source_shape: tuple):
+        if self.grid_size is None:
+            self.grid_size = self.settings.grid_size(source_shape[1], source_shape[0])
+        key = (source_shape, self.grid_size)
+        if key == self._buffers_key:
+            return
+        src_h, src_w = source_shape[:2]
+        grid_w, grid_h = self.grid_size
+        pool = self.pool
+        self._hsv = pool.get('hsv', (src_h, src_w, 3))
+        self._chroma = pool.get('chroma', (src_h, src_w))
+        self._chroma_refined = pool.get('chroma_refined', (src_h, src_w))
+        self._color = pool.get('color', (grid_h, grid_w, 3))
+        self._sharp = pool.get('sharp', (grid_h, grid_w, 3))
+        self._gray = pool.get('gray', (grid_h, grid_w))
+        self._mask = pool.zeros('mask', (grid_h, grid_w))
+        self._mask_for_ascii = pool.zeros('mask_for_ascii', (grid_h, grid_w))
+        self._prev_gray = pool.get('prev_gray', (grid_h, grid_w))
+        self._has_prev_gray = False
+        self._diff = pool.get('diff', (grid_h, grid_w))
+        self._keep = pool.get('keep', (grid_h, grid_w), bool)
+        self._buffers_key = key
+
+    def _mask_stage(self, frame: np.ndarray) -> np.ndarray:
+        s = self.settings
+        if self._segmenter is not None:
+            frame_h, frame_w = frame.shape[:2]
+            if max(frame_h, frame_w) > MAX_AUTOSEG_SIZE:
+                scale = MAX_AUTOSEG_SIZE / max(frame_h, frame_w)
+                small = cv2.resize(frame, (int(frame_w * scale), int(frame_h * scale)), interpolation=cv2.INTER_AREA)
+                mask = cv2.resize(self._segmenter.process(small), (frame_w, frame_h), dst=self._chroma, interpolation=cv2.INTER_NEAREST)
+            else:
+                mask = self._segmenter.process(frame)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self._hsv)
+            mask = cv2.inRange(self._hsv, s.lower_green, s.upper_green, dst=self._chroma)
+        return apply_morphological_refinement(mask, s.erode_size, s.dilate_size, dst=self._chroma_refined)
+
+    def _resize_stage(self, frame: np.ndarray, mask: Optional[np.ndarray]):
+        s = self.settings
+        color = cv2.resize(frame, self.grid_size, dst=self._color, interpolation=cv2.INTER_AREA)
+        if s.sharpen_enabled:
+            color = sharpen_frame(color, s.sharpen_amount, dst=self._sharp)
+        gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if mask is not None:
+            cv2.resize(mask, self.grid_size, dst=self._mask, interpolation=cv2.INTER_NEAREST)
+        return color, gray
+
+    def _temporal_stage(self, gray: np.ndarray):
+        s = self.settings
+        if not s.temporal_enabled:
+            return
+        if not self._has_prev_gray:
+            np.copyto(self._prev_gray, gray)
+            self._has_prev_gray = True
+            return
+        # Pixels que mudaram pouco mantem o valor do frame anterior
+        cv2.absdiff(gray, self._prev_gray, dst=self._diff)
+        np.less(self._diff, s.temporal_threshold, out=self._keep)
+        np.copyto(gray, self._prev_gray, where=self._keep)
+        np.copyto(self._prev_gray, gray)
+
+    def _apply_render_mode(self, color: np.ndarray) -> np.ndarray:
+        mode = self.settings.render_mode
+        if mode == 'user':
+            np.greater(self._mask, 127, out=self._keep)
+            np.copyto(color, 0, where=self._keep[..., None])
+            return self._mask
+        if mode == 'background':
+            np.less(self._mask, 128, out=self._keep)
+            np.copyto(color, 0, where=self._keep[..., None])
+            return cv2.bitwise_not(self._mask, dst=self._mask_for_ascii)
+        return self._mask_for_ascii
+
+    def process(self, frame: np.ndarray) -> AsciiFrame:
+        """Um frame BGR -> AsciiFrame (estagios mask, resize, features e map)."""
+        s = self.settings
+        allocations = self.pool.allocations
+        self._allocate(frame.shape)
+
+        # Em render_mode 'both' a mascara nao e usada
+        mask = self._mask_stage(frame) if s.render_mode != 'both' else None
+        color, gray = self._resize_stage(frame, mask)
+        self._temporal_stage(gray)
+        mask_for_ascii = self._apply_render_mode(color)
+
+        edges = compute_edge_features(gray, normalize=s.edge_normalize, pool=self.pool)
+        ascii_frame = converter_frame_para_ascii(
+            gray, color, mask_for_ascii,
+            edges.magnitude, edges.orientation,
+            s.sobel_threshold, s.luminance_ramp,
+            output_format="frame",
+            edge_boost_enabled=s.edge_boost_enabled,
+            edge_boost_amount=s.edge_boost_amount,
+            use_edge_chars=s.use_edge_chars,
+            pool=self.pool
+        )
+        self.frame_allocations = self.pool.allocations - allocations
+        return ascii_frame
+
+    def rasterize(self, frame: AsciiFrame) -> np.ndarray:
+        """AsciiFrame -> imagem BGR (com PostFX, se configurado)."""
+        from src.core.renderer import render_ascii_as_image, ASCII_CHAR_WIDTH, ASCII_CHAR_HEIGHT
+
+        allocations = self.pool.allocations
+        shape = (frame.height * ASCII_CHAR_HEIGHT, frame.width * ASCII_CHAR_WIDTH, 3)
+        image = self.pool.get('image', shape)
+        image = render_ascii_as_image(frame, font_scale=self.font_scale, out=image, pool=self.pool)
+        self.frame_allocations += self.pool.allocations - allocations
+
+        postfx = self._get_postfx()
+        if postfx is not None:
+            image = postfx.process(image)
+        return image
+
+    @property
+    def postfx_enabled(self) -> bool:
+        """Algum efeito do PostFX sera aplicado na imagem rasterizada."""
+        return bool(postfx_effects(self.postfx_config))
+
+    def _get_postfx(self):
+        if self._postfx is None and self.postfx_config is not None and POSTFX_AVAILABLE:
+            fx_list = postfx_effects(self.postfx_config)
+            if fx_list:
+                self._postfx = PostFXProcessor(self.postfx_config, use_gpu=True)
+                logger.info(f"PostFX habilitado: {', '.join(fx_list)}")
+            else:
+                self.postfx_config = None
+        return self._postfx
+
+    def run(self, video_path: str, sink: FrameSink, progress_callback=None, max_frames: Optional[int] = None,
+            start_frame: int = 0, stop_frame: Optional[int] = None, prime_frames: int = 0):
+        """
+        Converte o video para o sink e devolve o retorno de sink.close().
+
+        start_frame/stop_frame (indices da origem, stop exclusivo) limitam a
+        conversao a um trecho; os limites sao arredondados para cima ao
+        multiplo de frame_interval, para trechos vizinhos nao repetirem nem
+        perderem frames. A leitura comeca prime_frames frames de saida antes
+        de start_frame: eles passam pelo pipeline so para preparar o estado
+        do temporal coherence e nao vao para o sink.
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video nao encontrado: {video_path}")
+
+        # Busca de segmento precisa ser exata: so o ffmpeg (-ss com accurate_seek) garante isso
+        source, grid_size = self._open_source(video_path, exact_seek=start_frame > 0)
+        try:
+            interval = source.frame_interval
+            start_frame = -(-start_frame // interval) * interval
+            if stop_frame is not None:
+                stop_frame = -(-stop_frame // interval) * interval
+            seek_frame = max(0, start_frame - prime_frames * interval)
+            if seek_frame:
+                source.seek(seek_frame)
+
+            fps = source.fps
+            self.grid_size = grid_size
+            info = StreamInfo(video_path, fps, source.total_frames, grid_size, source.frame_interval)
+            logger.info(f"Decodificado em: {source.width}x{source.height} -> ASCII: {grid_size[0]}x{grid_size[1]}")
+            logger.info(f"FPS Original: {fps} -> Saida: {info.output_fps} (interval={source.frame_interval})")
+
+            try:
+                sink.open(info)
+                self._run_frames(source, sink, info, progress_callback, max_frames, start_frame, stop_frame)
+            except BaseException:
+                sink.abort()
+                raise
+        finally:
+            source.close()
+            self.close()
+
+        return sink.close()
+
+    def _open_source(self, video_path: str, exact_seek: bool = False) -> tuple:
+        """
+        (FrameSource, grade) do video. Com o ffmpeg (video_decoder auto ou
+        ffmpeg) o frame ja chega reduzido na decodificacao para a grade, ou
+        para MASK_INGEST_SCALE x a grade quando ha mascara; so o que o
+        pipeline usa passa pela memoria. Sem ffmpeg, ou num video que ja e
+        pequeno, decodifica com o OpenCV na resolucao original. Com
+        exact_seek (trecho que nao comeca no frame 0) usa sempre o ffmpeg,
+        qualquer que seja o video_decoder: o CAP_PROP_POS_FRAMES do OpenCV
+        nao e exato com B-frames ou VFR.
+        """
+        s = self.settings
+        if s.video_decoder != 'opencv' or exact_seek:
+            needs_mask = s.render_mode != 'both'
+            try:
+                capture, grid_size = open_scaled_capture(
+                    video_path, s.grid_size, MASK_INGEST_SCALE if needs_mask else 1,
+                    force=s.video_decoder == 'ffmpeg' or exact_seek
+                )
+            except IOError as e:
+                logger.warning(f"ffprobe falhou, usando OpenCV: {e}")
+                capture = None
+            if capture is not None:
+                logger.info(f"Video: {capture.source_size[0]}x{capture.source_size[1]} (ffmpeg, escala na decodificacao)")
+                return FrameSource(capture, target_fps=self.target_fps), grid_size
+
+        if exact_seek:
+            logger.warning("Sem ffmpeg: busca do trecho pelo OpenCV pode nao ser exata")
+        source = FrameSource(video_path, target_fps=self.target_fps)
+        logger.info(f"Video: {source.width}x{source.height} (OpenCV)")
+        return source, s.grid_size(source.width, source.height)
+
+    def _run_frames(self, source, sink, info, progress_callback, max_frames, start_frame=0, stop_frame=None):
+        written = 0
+        read_count = 0
+        # A decodificacao do proximo frame corre na thread do FrameSource
+        for frame in source:
+            if max_frames is not None and written >= max_frames:
+                break
+            if stop_frame is not None and frame.index >= stop_frame:
+                break
+            read_count = frame.index + 1
+
+            ascii_frame = self.process(frame.image)
+            if frame.index < start_frame:
+                # Frame de sobreposicao: so atualiza o estado do temporal coherence
+                continue
+            image = self.rasterize(ascii_frame) if sink.needs_image else None
+            sink.write(ascii_frame, image)
+            written += 1
+
+            if progress_callback:
+                if written % PREVIEW_INTERVAL == 0:
+                    preview = image if image is not None else self.rasterize(ascii_frame)
+                    progress_callback(read_count, info.total_frames, preview.copy())
+                else:
+                    progress_callback(read_count, info.total_frames)
+
+            if written % PREVIEW_INTERVAL == 0:
+                logger.info(f"Processado: {read_count}/{info.total_frames} frames ({written} salvos)")
+
+        self.frames_written = written
+        logger.info(f"Total de frames convertidos: {written}")
+        logger.debug(f"Buffers do job: {len(self.pool)} ({self.pool.nbytes / 1e6:.1f} MB, {self.pool.allocations} alocacoes)")
+
+    def close(self):
+        if self._segmenter is not None:
+            try:
+                self._segmenter.close()
+            except Exception:
+                pass
+            self._segmenter = None
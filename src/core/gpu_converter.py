@@ -14,7 +14,6 @@ except ImportError:
 import os
 import sys
 import configparser
-import subprocess
 import shutil
 import tempfile
 import pickle
@@ -27,9 +26,14 @@ if BASE_DIR not in sys.path:
 from src.core.utils.ascii_converter import LUMINANCE_RAMP_DEFAULT, COLOR_SEPARATOR
 from src.core.renderer import ASCII_FONT, ASCII_FONT_SCALE, ASCII_FONT_THICKNESS, ASCII_CHAR_WIDTH, ASCII_CHAR_HEIGHT
 from src.core.utils import color as color_module
-from src.core.utils.color import rgb_to_ansi256_vectorized
+from src.core.utils.color import rgb_to_ansi256_vectorized, rgb_to_ansi256_lut
 from src.core.utils.image import apply_morphological_refinement
-from src.core.audio_utils import extract_audio_as_aac, mux_video_audio
+from src.core.utils.ascii_frame import EDGE_CHARS
+from src.core.utils.edges import orientation_bins
+from src.core.utils.frame_source import FrameSource
+from src.core.utils.ffmpeg_source import scaled_frame_source
+from src.core.utils.encoder_sink import EncoderSink
+from src.core.audio_utils import live_audio_args
 from src.app.constants import USER_CACHE_DIR
 from src.app.defaults import get_default
 
@@ -555,6 +559,38 @@ class GPUConverter:
 
         return char_indices, color_indices
 
+def _stderr_tail(stderr_log):
+    if not os.path.exists(stderr_log):
+        return ''
+    with open(stderr_log, 'r') as f:
+        return f.read()[-500:]
+
+
+def _remove_partial_output(output_mp4):
+    if os.path.exists(output_mp4):
+        os.remove(output_mp4)
+
+
+def _finish_gpu_encoder(encoder, stderr_file, stderr_log, output_mp4, label="Encoder"):
+    """Fecha o ffmpeg; codigo de saida diferente de zero remove o MP4 parcial e sobe o fim do stderr (como Mp4Sink.close)."""
+    returncode = encoder.close()
+    stderr_file.close()
+    logger.info(f"{label}: {encoder.frames} frames, render {encoder.render_seconds:.2f}s, "
+                f"espera pelo encoder {encoder.stall_seconds:.2f}s")
+    if returncode != 0:
+        _remove_partial_output(output_mp4)
+        raise RuntimeError(f"Erro ao criar video: {_stderr_tail(stderr_log)}")
+
+
+def _abort_gpu_encoder(encoder, stderr_file, stderr_log, output_mp4, error):
+    """Encerra o ffmpeg e remove o MP4 parcial; pipe quebrado (ffmpeg morreu) vira RuntimeError com o stderr."""
+    encoder.abort()
+    stderr_file.close()
+    _remove_partial_output(output_mp4)
+    if isinstance(error, BrokenPipeError):
+        raise RuntimeError(f"Erro ao criar video: {_stderr_tail(stderr_log)}") from error
+
+
 def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callback=None, chroma_override=None, async_mode=None):
     if async_mode is None:
         async_mode = config.getboolean('Conversor', 'gpu_async_enabled', fallback=False)
@@ -574,6 +610,7 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
         ramp_array = np.array([ord(c) for c in luminance_ramp_str], dtype=np.int32)
         ramp_gpu = cp.array(ramp_array)
         ramp_len = len(ramp_array)
+        edge_codes_gpu = cp.array([ord(c) for c in EDGE_CHARS], dtype=cp.int32)
 
         render_mode = config.get('Conversor', 'gpu_render_mode', fallback='fast')
         is_hifi = (render_mode == 'high_fidelity')
@@ -666,14 +703,17 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
     except Exception as e:
          raise ValueError(f"Config Error: {e}")
 
-    captura = cv2.VideoCapture(video_path)
-    if not captura.isOpened():
-         raise IOError(f"Cannot open video: {video_path}")
+    mp4_target_fps = config.getint('Output', 'mp4_target_fps', fallback=0)
+    video_decoder = config.get('Conversor', 'video_decoder', fallback='auto').lower()
+    try:
+        captura = FrameSource(video_path, target_fps=mp4_target_fps)
+    except IOError:
+        raise IOError(f"Cannot open video: {video_path}")
 
-    fps = captura.get(cv2.CAP_PROP_FPS)
-    total_frames = int(captura.get(cv2.CAP_PROP_FRAME_COUNT))
-    source_w = captura.get(cv2.CAP_PROP_FRAME_WIDTH)
-    source_h = captura.get(cv2.CAP_PROP_FRAME_HEIGHT)
+    fps = captura.fps
+    total_frames = captura.total_frames
+    source_w = captura.width
+    source_h = captura.height
 
     config_height = config.getint('Conversor', 'target_height', fallback=0)
     if config_height > 0:
@@ -713,7 +753,6 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
     temp_dir = tempfile.mkdtemp(prefix="gpu_ascii_")
 
     nome_base = os.path.splitext(os.path.basename(video_path))[0]
-    temp_video_no_audio = os.path.join(temp_dir, "video_no_audio.mp4")
     output_mp4 = os.path.join(output_dir, f"{nome_base}_ascii.mp4")
 
     if is_hifi:
@@ -722,9 +761,9 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
     else:
         resize_target = target_dim
 
-    mp4_target_fps = config.getint('Output', 'mp4_target_fps', fallback=0)
-    target_fps = min(fps, mp4_target_fps) if mp4_target_fps > 0 else fps
-    frame_interval = max(1, round(fps / target_fps))
+    # Com ffmpeg o frame ja chega do decoder em resize_target
+    captura = scaled_frame_source(video_path, captura, resize_target, video_decoder, mp4_target_fps)
+    frame_interval = captura.frame_interval
     actual_fps = fps / frame_interval
     actual_fps_int = int(round(actual_fps))
 
@@ -738,6 +777,8 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
         '-pix_fmt', 'bgr24',
         '-r', str(actual_fps_int),
         '-i', '-',
+        # Audio do original muxado no mesmo processo, durante o encode
+        *live_audio_args(video_path),
         '-c:v', 'libx264',
         '-preset', 'fast',
         '-crf', '12',
@@ -747,26 +788,23 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
         '-vsync', 'cfr',
         '-movflags', '+faststart',
         '-pix_fmt', 'yuv420p',
-        temp_video_no_audio
+        output_mp4
     ]
 
     stderr_log_sync = os.path.join(temp_dir, "ffmpeg_stderr.log")
     stderr_file_sync = open(stderr_log_sync, 'w')
-    proc = subprocess.Popen(cmd_ffmpeg, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file_sync)
+    # Escrita no pipe do ffmpeg numa thread: o render do proximo frame nao espera o x264
+    encoder = EncoderSink(cmd_ffmpeg, (gpu_renderer.out_h, gpu_renderer.out_w, 3), stderr=stderr_file_sync)
 
     processed_count = 0
     frame_count = 0
     prev_gray_cpu = None
 
     try:
-        while True:
-            sucesso, frame_img = captura.read()
-            if not sucesso:
-                break
-
-            if frame_count % frame_interval != 0:
-                frame_count += 1
-                continue
+        # Decodificacao na thread do FrameSource; frames pulados pelo frame_interval nem sao decodificados
+        for frame in captura:
+            frame_img = frame.image
+            frame_count = frame.index
 
             resized = cv2.resize(frame_img, resize_target, interpolation=cv2.INTER_AREA)
 
@@ -846,7 +884,7 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
                     full_gray_gpu = cp.array(full_gray)
                     char_indices = gpu_renderer.render_high_fidelity(full_gray_gpu)
 
-                ansi_cpu = rgb_to_ansi256_vectorized(resized_color)
+                ansi_cpu = rgb_to_ansi256_lut(resized_color)
                 ansi_gpu = cp.array(ansi_cpu, dtype=cp.int32)
                 if render_mode == 'both':
                     ansi_gpu[is_masked] = 232
@@ -876,24 +914,12 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
                         mag = cp.sqrt(gx**2 + gy**2)
                         mag_norm = cp.clip(mag, 0, 255).astype(cp.uint8)
 
-                        angle = cp.arctan2(gy, gx)
-                        angle_deg = angle * (180 / cp.pi)
-                        angle_deg = (angle_deg + 180) % 180
-
                         lum_indices = ((gray_gpu / 255.0) * (ramp_len - 1)).astype(cp.int32)
                         char_indices = ramp_gpu[lum_indices]
 
                         is_edge = mag_norm > sobel_threshold
-
-                        slash = is_edge & (((angle_deg >= 22.5) & (angle_deg < 67.5)) | ((angle_deg >= 157.5) & (angle_deg < 202.5)))
-                        pipe = is_edge & (((angle_deg >= 67.5) & (angle_deg < 112.5)) | ((angle_deg >= 247.5) & (angle_deg < 292.5)))
-                        backslash = is_edge & (((angle_deg >= 112.5) & (angle_deg < 157.5)) | ((angle_deg >= 292.5) & (angle_deg < 337.5)))
-                        dash = is_edge & (~(slash | pipe | backslash))
-
-                        char_indices[slash] = 47
-                        char_indices[pipe] = 124
-                        char_indices[backslash] = 92
-                        char_indices[dash] = 45
+                        edge_codes = edge_codes_gpu[orientation_bins(gx, gy)]
+                        char_indices = cp.where(is_edge, edge_codes, char_indices)
 
                 if temporal_enabled:
                     if is_hifi:
@@ -915,7 +941,7 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
             if postfx_processor:
                 output_cpu = postfx_processor.process(output_cpu)
 
-            proc.stdin.write(output_cpu.tobytes())
+            encoder.write(output_cpu)
 
             processed_count += 1
             frame_count += 1
@@ -926,24 +952,17 @@ def converter_video_para_mp4_gpu(video_path, output_dir, config, progress_callba
             if progress_callback and processed_count % 30 == 0:
                 progress_callback(frame_count, total_frames, output_cpu)
 
-    except BrokenPipeError:
-        logger.info("FFmpeg pipe broke.")
+        _finish_gpu_encoder(encoder, stderr_file_sync, stderr_log_sync, output_mp4)
+    except BaseException as e:
+        if not stderr_file_sync.closed:
+            _abort_gpu_encoder(encoder, stderr_file_sync, stderr_log_sync, output_mp4, e)
+        raise
     finally:
-        if proc:
-            proc.stdin.close()
-            proc.wait()
-        stderr_file_sync.close()
-        captura.release()
+        captura.close()
         if auto_segmenter is not None:
             auto_segmenter.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
-    logger.info("Extraindo audio do video original...")
-    temp_audio = extract_audio_as_aac(video_path, temp_dir)
-
-    logger.info("Muxando video + audio..." if temp_audio else "Video sem audio, copiando...")
-    mux_video_audio(temp_video_no_audio, temp_audio, output_mp4)
-
-    shutil.rmtree(temp_dir, ignore_errors=True)
     logger.info(f"GPU Video ASCII criado: {output_mp4}")
     return output_mp4
 
@@ -1009,14 +1028,17 @@ def _converter_video_para_mp4_gpu_async(video_path, output_dir, config, progress
     if render_mode != 'both':
         logger.info(f"[ASYNC] Render Mode: {render_mode}")
 
-    captura = cv2.VideoCapture(video_path)
-    if not captura.isOpened():
+    mp4_target_fps = config.getint('Output', 'mp4_target_fps', fallback=0)
+    video_decoder = config.get('Conversor', 'video_decoder', fallback='auto').lower()
+    try:
+        captura = FrameSource(video_path, target_fps=mp4_target_fps)
+    except IOError:
         raise IOError(f"Cannot open video: {video_path}")
 
-    fps = captura.get(cv2.CAP_PROP_FPS)
-    total_frames = int(captura.get(cv2.CAP_PROP_FRAME_COUNT))
-    source_w = captura.get(cv2.CAP_PROP_FRAME_WIDTH)
-    source_h = captura.get(cv2.CAP_PROP_FRAME_HEIGHT)
+    fps = captura.fps
+    total_frames = captura.total_frames
+    source_w = captura.width
+    source_h = captura.height
 
     config_height = config.getint('Conversor', 'target_height', fallback=0)
     if config_height > 0:
@@ -1044,12 +1066,10 @@ def _converter_video_para_mp4_gpu_async(video_path, output_dir, config, progress
 
     temp_dir = tempfile.mkdtemp(prefix="gpu_async_")
     nome_base = os.path.splitext(os.path.basename(video_path))[0]
-    temp_video_no_audio = os.path.join(temp_dir, "video_no_audio.mp4")
     output_mp4 = os.path.join(output_dir, f"{nome_base}_ascii.mp4")
 
-    mp4_target_fps = config.getint('Output', 'mp4_target_fps', fallback=0)
-    target_fps = min(fps, mp4_target_fps) if mp4_target_fps > 0 else fps
-    frame_interval = max(1, round(fps / target_fps))
+    captura = scaled_frame_source(video_path, captura, target_dim, video_decoder, mp4_target_fps)
+    frame_interval = captura.frame_interval
     actual_fps = fps / frame_interval
     actual_fps_int = int(round(actual_fps))
 
@@ -1065,6 +1085,8 @@ def _converter_video_para_mp4_gpu_async(video_path, output_dir, config, progress
         '-pix_fmt', 'bgr24',
         '-r', str(actual_fps_int),
         '-i', '-',
+        # Audio do original muxado no mesmo processo, durante o encode
+        *live_audio_args(video_path),
         '-c:v', 'libx264',
         '-preset', 'fast',
         '-crf', '12',
@@ -1074,12 +1096,13 @@ def _converter_video_para_mp4_gpu_async(video_path, output_dir, config, progress
         '-vsync', 'cfr',
         '-movflags', '+faststart',
         '-pix_fmt', 'yuv420p',
-        temp_video_no_audio
+        output_mp4
     ]
 
     stderr_log_async = os.path.join(temp_dir, "ffmpeg_stderr.log")
     stderr_file_async = open(stderr_log_async, 'w')
-    proc = subprocess.Popen(cmd_ffmpeg, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file_async)
+    encoder = EncoderSink(cmd_ffmpeg, (async_converter.gpu_converter.out_h, async_converter.gpu_converter.out_w, 3),
+                          stderr=stderr_file_async)
 
     processed_count = 0
     frame_count = 0
@@ -1088,14 +1111,10 @@ def _converter_video_para_mp4_gpu_async(video_path, output_dir, config, progress
     color_batch = []
 
     try:
-        while True:
-            sucesso, frame_img = captura.read()
-            if not sucesso:
-                break
-
-            if frame_count % frame_interval != 0:
-                frame_count += 1
-                continue
+        # Decodificacao na thread do FrameSource; frames pulados pelo frame_interval nem sao decodificados
+        for frame in captura:
+            frame_img = frame.image
+            frame_count = frame.index
 
             resized = cv2.resize(frame_img, target_dim, interpolation=cv2.INTER_AREA)
 
@@ -1148,7 +1167,7 @@ def _converter_video_para_mp4_gpu_async(video_path, output_dir, config, progress
                         color_indices_gpu
                     ).get()
 
-                    proc.stdin.write(output_cpu.tobytes())
+                    encoder.write(output_cpu)
                     processed_count += 1
 
                     if progress_callback and processed_count % 30 == 0:
@@ -1169,38 +1188,23 @@ def _converter_video_para_mp4_gpu_async(video_path, output_dir, config, progress
                     color_indices_gpu
                 ).get()
 
-                proc.stdin.write(output_cpu.tobytes())
+                encoder.write(output_cpu)
                 processed_count += 1
 
                 if progress_callback and processed_count % 30 == 0:
                     progress_callback(processed_count, total_frames, output_cpu)
 
-    except Exception as e:
-        proc.stdin.close()
-        proc.wait()
-        stderr_file_async.close()
-        captura.release()
+        _finish_gpu_encoder(encoder, stderr_file_async, stderr_log_async, output_mp4, label="[ASYNC] Encoder")
+    except BaseException as e:
+        if not stderr_file_async.closed:
+            _abort_gpu_encoder(encoder, stderr_file_async, stderr_log_async, output_mp4, e)
+        raise
+    finally:
+        captura.close()
         if auto_segmenter is not None:
             auto_segmenter.close()
-        raise e
-
-    proc.stdin.close()
-    proc.wait()
-    stderr_file_async.close()
-    captura.release()
-    if auto_segmenter is not None:
-        auto_segmenter.close()
-
-    if not os.path.exists(temp_video_no_audio):
-        raise RuntimeError("FFmpeg failed to create temp video")
-
-    logger.info("Extraindo audio do video original...")
-    temp_audio = extract_audio_as_aac(video_path, temp_dir)
-
-    logger.info("Muxando video + audio..." if temp_audio else "Video sem audio, copiando...")
-    mux_video_audio(temp_video_no_audio, temp_audio, output_mp4)
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
-    shutil.rmtree(temp_dir, ignore_errors=True)
     logger.info(f"[ASYNC] GPU Video ASCII criado: {output_mp4}")
     return output_mp4
 
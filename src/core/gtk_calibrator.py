@@ -25,6 +25,13 @@ if BASE_DIR not in sys.path:
 from src.core.utils.color import rgb_to_ansi256
 from src.core.utils.image import sharpen_frame, apply_morphological_refinement
 from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT, COLOR_SEPARATOR
+from src.core.utils.ramp import compile_ramp, warm_ramps
+from src.core.utils.ascii_frame import EDGE_CHARS
+from src.core.utils.ascii_video import (
+    A4R_EXTENSION, A4rWriter, TxtWriter, a4r_options_from_config, txt_compression_level, txt_output_extension
+)
+from src.core.utils.edges import compute_edge_features
+from src.core.utils.video_recorder import VideoRecorder
 from src.core.pixel_art_converter import quantize_colors
 from src.app.constants import LUMINANCE_RAMPS, FIXED_PALETTES, QUALITY_PRESETS
 from src.app.defaults import get_default
@@ -94,6 +101,7 @@ MODE_PIXELART = 'pixelart'
 class GTKCalibrator:
 
     def __init__(self, config_path: str, video_path: str = None):
+        warm_ramps([LUMINANCE_RAMP_DEFAULT] + [preset['ramp'] for preset in LUMINANCE_RAMPS.values()])
         self.config_path = config_path
         self.video_path = video_path
         self.config = None
@@ -102,13 +110,14 @@ class GTKCalibrator:
 
         self.is_recording_mp4 = False
         self.is_recording_ascii = False
-        self.mp4_process = None
+        self.mp4_recorder = None
         self.mp4_audio_process = None
         self.mp4_output_file = None
         self.mp4_temp_dir = None
-        self.mp4_frame_count = 0
+        self.mp4_stderr_log = None
         self.mp4_start_time = None
-        self.ascii_frames = []
+        self.ascii_writer = None
+        self.ascii_output_file = None
         self.recording_fps = 30
 
         self.current_frame = None
@@ -891,7 +900,7 @@ class GTKCalibrator:
 
         return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
 
-    def _render_ascii_to_image(self, resized_gray, resized_color, resized_mask, magnitude_norm, angle, frame_h, frame_w) -> np.ndarray:
+    def _render_ascii_to_image(self, resized_gray, resized_color, resized_mask, magnitude_norm, orientation, frame_h, frame_w) -> np.ndarray:
         try:
             height, width = resized_gray.shape
 
@@ -925,18 +934,15 @@ class GTKCalibrator:
         font_scale = max(0.25, 0.35 * scale)
 
         luminance_ramp = self.converter_config['luminance_ramp']
-        ramp_len = len(luminance_ramp)
         sobel_threshold = self.converter_config['sobel_threshold']
 
         is_edge = magnitude_norm > sobel_threshold
 
+        compiled_ramp = compile_ramp(luminance_ramp)
         if self.edge_boost_enabled:
-            brightness = resized_gray.astype(np.int32)
-            edge_boost = is_edge.astype(np.int32) * self.edge_boost_amount
-            brightness = np.clip(brightness + edge_boost, 0, 255)
-            lum_indices = ((brightness / 255) * (ramp_len - 1)).astype(np.int32)
+            lum_indices = compiled_ramp.lookup(resized_gray, is_edge, self.edge_boost_amount)
         else:
-            lum_indices = (resized_gray * (ramp_len - 1) / 255).astype(np.int32)
+            lum_indices = compiled_ramp.lookup(resized_gray)
 
         for y in range(height):
             py = offset_y + y * char_h + char_h - 3
@@ -952,17 +958,9 @@ class GTKCalibrator:
                         continue
 
                 mag = magnitude_norm[y, x]
-                ang = angle[y, x]
 
                 if self.use_edge_chars and mag > sobel_threshold:
-                    if 22.5 <= ang < 67.5 or 157.5 <= ang < 202.5:
-                        char = '/'
-                    elif 67.5 <= ang < 112.5 or 247.5 <= ang < 292.5:
-                        char = '|'
-                    elif 112.5 <= ang < 157.5 or 292.5 <= ang < 337.5:
-                        char = '\\'
-                    else:
-                        char = '-'
+                    char = EDGE_CHARS[orientation[y, x]]
                 else:
                     char = luminance_ramp[lum_indices[y, x]]
 
@@ -1011,9 +1009,9 @@ class GTKCalibrator:
         if self.lbl_status:
             prefix = ""
             if self.is_recording_mp4:
-                prefix += f"[REC MP4: {self.mp4_frame_count}] "
+                prefix += f"[REC MP4: {self._mp4_recorded_frames()}] "
             if self.is_recording_ascii:
-                prefix += f"[REC TXT: {len(self.ascii_frames)}] "
+                prefix += f"[REC ASCII: {self._ascii_recorded_frames()}] "
 
             self.lbl_status.set_text(prefix + text if prefix else f"Status: {text}")
 
@@ -1129,12 +1127,8 @@ class GTKCalibrator:
                 resized_color = self.style_processor.process(resized_color)
                 resized_gray = cv2.cvtColor(resized_color, cv2.COLOR_BGR2GRAY)
 
-            sobel_x = cv2.Sobel(resized_gray, cv2.CV_64F, 1, 0, ksize=3)
-            sobel_y = cv2.Sobel(resized_gray, cv2.CV_64F, 0, 1, ksize=3)
-            magnitude = np.hypot(sobel_x, sobel_y)
-            angle = np.arctan2(sobel_y, sobel_x) * (180 / np.pi)
-            angle = (angle + 180) % 180
-            magnitude_norm = cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+            edges = compute_edge_features(resized_gray)
+            magnitude_norm, orientation = edges.magnitude, edges.orientation
 
             if self.conversion_mode == MODE_PIXELART:
                 result_image = self._render_pixelart_to_image(resized_color, resized_mask, frame_h, frame_w)
@@ -1147,7 +1141,7 @@ class GTKCalibrator:
 
                 result_image = self._render_braille_to_image(braille_grid, resized_color, resized_mask, frame_h, frame_w)
             else:
-                result_image = self._render_ascii_to_image(resized_gray, resized_color, resized_mask, magnitude_norm, angle, frame_h, frame_w)
+                result_image = self._render_ascii_to_image(resized_gray, resized_color, resized_mask, magnitude_norm, orientation, frame_h, frame_w)
 
             render_time = time.time() - render_start
             if render_time > 0:
@@ -1174,12 +1168,11 @@ class GTKCalibrator:
             else:
                 self._set_frame_to_image(self.image_ascii, self.aspect_ascii, result_image)
 
-            self._cached_ascii_data = (resized_gray, resized_color, resized_mask, magnitude_norm, angle)
+            self._cached_ascii_data = (resized_gray, resized_color, resized_mask, magnitude_norm, orientation)
 
             if self.is_recording_mp4 and result_image is not None:
-                frame_filename = os.path.join(self.mp4_temp_dir, f"frame_{self.mp4_frame_count:06d}.png")
-                cv2.imwrite(frame_filename, result_image)
-                self.mp4_frame_count += 1
+                # So copia para a fila: o encode roda na thread do VideoRecorder
+                self.mp4_recorder.write(result_image)
         except cv2.error as e:
             print(f"[ERRO CV2] Dimensoes: {self.target_dimensions}, Erro: {e}")
             import traceback
@@ -1192,7 +1185,7 @@ class GTKCalibrator:
             return True
 
         if self.is_recording_ascii and self._cached_ascii_data:
-            resized_gray, resized_color, resized_mask, magnitude_norm, angle = self._cached_ascii_data
+            resized_gray, resized_color, resized_mask, magnitude_norm, orientation = self._cached_ascii_data
 
             mask_for_file = resized_mask.copy()
             if self.render_mode == RENDER_MODE_BACKGROUND:
@@ -1202,15 +1195,15 @@ class GTKCalibrator:
 
             frame_for_file = converter_frame_para_ascii(
                 resized_gray, resized_color, mask_for_file,
-                magnitude_norm, angle,
+                magnitude_norm, orientation,
                 self.converter_config['sobel_threshold'],
                 self.converter_config['luminance_ramp'],
-                output_format="file",
+                output_format="frame",
                 edge_boost_enabled=self.edge_boost_enabled,
                 edge_boost_amount=self.edge_boost_amount,
                 use_edge_chars=self.use_edge_chars
             )
-            self.ascii_frames.append(frame_for_file)
+            self._write_ascii_recording_frame(frame_for_file)
 
         return True
 
@@ -1218,7 +1211,7 @@ class GTKCalibrator:
         if not self._cached_ascii_data or self.current_frame is None:
             return
 
-        resized_gray, resized_color, resized_mask, magnitude_norm, angle = self._cached_ascii_data
+        resized_gray, resized_color, resized_mask, magnitude_norm, orientation = self._cached_ascii_data
         frame_h, frame_w = self.current_frame.shape[:2]
 
         if self.conversion_mode == MODE_PIXELART:
@@ -1230,7 +1223,7 @@ class GTKCalibrator:
                 braille_grid = self._apply_temporal_coherence(braille_grid, braille_gray, self.temporal_threshold)
             result_image = self._render_braille_to_image(braille_grid, resized_color, resized_mask, frame_h, frame_w)
         else:
-            result_image = self._render_ascii_to_image(resized_gray, resized_color, resized_mask, magnitude_norm, angle, frame_h, frame_w)
+            result_image = self._render_ascii_to_image(resized_gray, resized_color, resized_mask, magnitude_norm, orientation, frame_h, frame_w)
 
         if result_image is None or result_image.size == 0:
             return
@@ -1278,8 +1271,11 @@ class GTKCalibrator:
         self.mp4_output_file = os.path.join(output_dir, f"webcam_ascii_{timestamp}.mp4")
 
         self.mp4_temp_dir = tempfile.mkdtemp(prefix="ascii_webcam_")
-        self.mp4_frame_count = 0
-        self.mp4_start_time = time.time()
+        self.mp4_stderr_log = open(os.path.join(self.mp4_temp_dir, "ffmpeg_stderr.log"), 'wb')
+        # O video e codificado durante a gravacao, com CFR pelo relogio de parede
+        self.mp4_recorder = VideoRecorder(os.path.join(self.mp4_temp_dir, "temp_video.mp4"), actual_fps,
+                                          stderr=self.mp4_stderr_log)
+        self.mp4_start_time = time.monotonic()
         self.is_recording_mp4 = True
 
         temp_audio = os.path.join(self.mp4_temp_dir, "audio.aac")
@@ -1309,15 +1305,19 @@ class GTKCalibrator:
             context.add_class("recording-active")
 
         self._set_status(f"Gravacao iniciada ({actual_fps:.1f} fps)")
-        print(f"[DEBUG] Salvando frames em: {self.mp4_temp_dir}")
+        print(f"[DEBUG] Codificando em: {self.mp4_temp_dir}")
         print(f"[DEBUG] FPS da webcam: {actual_fps}")
 
+    def _mp4_recorded_frames(self):
+        return len(self.mp4_recorder) if self.mp4_recorder is not None else 0
+
     def _stop_mp4_recording(self):
         if not self.is_recording_mp4:
             return
 
         self.is_recording_mp4 = False
-        recording_duration = time.time() - self.mp4_start_time
+        stop_time = time.monotonic()
+        recording_duration = stop_time - self.mp4_start_time
 
         if self.btn_record_mp4:
             context = self.btn_record_mp4.get_style_context()
@@ -1332,45 +1332,29 @@ class GTKCalibrator:
                 self.mp4_audio_process.kill()
                 self.mp4_audio_process.wait()
 
-        self._set_status(f"Processando {self.mp4_frame_count} frames...")
-        print(f"[DEBUG] Parando gravacao. Total de frames: {self.mp4_frame_count}")
+        recorder, self.mp4_recorder = self.mp4_recorder, None
+        frame_count = len(recorder)
+        self._set_status(f"Finalizando {frame_count} frames...")
+        print(f"[DEBUG] Parando gravacao. Total de frames: {frame_count} (descartados: {recorder.dropped_frames})")
         print(f"[DEBUG] Duracao da gravacao: {recording_duration:.2f}s")
 
-        actual_fps = self.mp4_frame_count / recording_duration if recording_duration > 0 else self.recording_fps
-        print(f"[DEBUG] FPS real calculado: {actual_fps:.2f} (reportado: {self.recording_fps:.2f})")
-
-        self.recording_fps = actual_fps
-
-        if self.mp4_frame_count == 0:
-            self._set_status("Erro: Nenhum frame gravado")
-            if self.mp4_temp_dir and os.path.exists(self.mp4_temp_dir):
-                shutil.rmtree(self.mp4_temp_dir, ignore_errors=True)
-            return
-
         try:
+            if frame_count == 0:
+                recorder.abort()
+                self._set_status("Erro: Nenhum frame gravado")
+                return
+
             temp_video = os.path.join(self.mp4_temp_dir, "temp_video.mp4")
             temp_audio = os.path.join(self.mp4_temp_dir, "audio.aac")
 
-            print("[DEBUG] Criando video ASCII...")
-            cmd_video = [
-                'ffmpeg', '-y',
-                '-framerate', str(self.recording_fps),
-                '-i', os.path.join(self.mp4_temp_dir, 'frame_%06d.png'),
-                '-c:v', 'libx264',
-                '-preset', 'medium',
-                '-crf', '12',
-                '-tune', 'animation',
-                '-g', '24',
-                '-bf', '0',
-                '-vsync', 'cfr',
-                '-movflags', '+faststart',
-                '-pix_fmt', 'yuv420p',
-                temp_video
-            ]
-
-            result = subprocess.run(cmd_video, capture_output=True, text=True, encoding='utf-8', errors='replace')
-            if result.returncode != 0:
-                raise RuntimeError(f"Erro ao criar video: {result.stderr}")
+            print("[DEBUG] Finalizando video ASCII...")
+            try:
+                written = recorder.close(end_time=stop_time)
+            except RuntimeError as e:
+                self.mp4_stderr_log.flush()
+                with open(self.mp4_stderr_log.name, 'r', errors='replace') as f:
+                    raise RuntimeError(f"{e} {f.read()[-500:]}")
+            print(f"[DEBUG] Frames no video: {written} @ {self.recording_fps:.2f} fps")
 
             has_audio = os.path.exists(temp_audio) and os.path.getsize(temp_audio) > 1024
 
@@ -1403,6 +1387,7 @@ class GTKCalibrator:
             print(f"[DEBUG] Erro: {e}")
 
         finally:
+            self.mp4_stderr_log.close()
             if self.mp4_temp_dir and os.path.exists(self.mp4_temp_dir):
                 print(f"[DEBUG] Limpando arquivos temporarios...")
                 shutil.rmtree(self.mp4_temp_dir, ignore_errors=True)
@@ -1415,10 +1400,36 @@ class GTKCalibrator:
 
         self._show_recording_finished_dialog(self.mp4_output_file, "MP4")
 
+    def _ascii_recorded_frames(self):
+        return len(self.ascii_writer) if self.ascii_writer is not None else 0
+
+    def _write_ascii_recording_frame(self, frame):
+        # Frames vao direto para o disco (.a4r ou .txt, comprimido ou nao)
+        if self.ascii_writer is None:
+            if self.ascii_output_file.endswith(A4R_EXTENSION):
+                self.ascii_writer = A4rWriter(
+                    self.ascii_output_file, self.recording_fps, frame.width, frame.height,
+                    ramp=self.converter_config['luminance_ramp'],
+                    **a4r_options_from_config(self.config)
+                )
+            else:
+                self.ascii_writer = TxtWriter(self.ascii_output_file, self.recording_fps,
+                                              level=txt_compression_level(self.config))
+        try:
+            self.ascii_writer.write_frame(frame)
+        except ValueError:
+            # O container tem grade fixa: frames apos mudar a resolucao ficam de fora
+            self._set_status("Resolucao alterada durante a gravacao .a4r, frame ignorado")
+
     def _start_ascii_recording(self):
         if self.is_recording_ascii:
             return
-        self.ascii_frames = []
+        self.ascii_writer = None
+        output_dir = os.path.expanduser("~/Vídeos")
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        extensao = A4R_EXTENSION if self.config.get('Output', 'format', fallback='txt').lower() == 'a4r' else txt_output_extension(self.config)
+        self.ascii_output_file = os.path.join(output_dir, f"gravacao_{timestamp}{extensao}")
         self.is_recording_ascii = True
 
         if self.btn_record_ascii:
@@ -1437,26 +1448,19 @@ class GTKCalibrator:
             context = self.btn_record_ascii.get_style_context()
             context.remove_class("recording-active")
 
-        if len(self.ascii_frames) == 0:
+        if self._ascii_recorded_frames() == 0:
+            if self.ascii_writer is not None:
+                self.ascii_writer.abort()
+                self.ascii_writer = None
             self._set_status("Nenhum frame gravado")
             return
 
-        output_dir = os.path.expanduser("~/Vídeos")
-        os.makedirs(output_dir, exist_ok=True)
-
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(output_dir, f"gravacao_{timestamp}.txt")
-
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(f"{self.recording_fps}\n")
-                f.write("[FRAME]\n".join(self.ascii_frames))
-
-            self.ascii_frames = []
+            output_file = self.ascii_writer.close()
             self._show_recording_finished_dialog(output_file, "ASCII")
         except Exception as e:
             self._set_status(f"Erro: {e}")
-            self.ascii_frames = []
+        self.ascii_writer = None
 
     def _show_recording_finished_dialog(self, filepath, file_type):
         dialog = Gtk.MessageDialog(
@@ -2569,7 +2573,7 @@ class GTKCalibrator:
         if self.is_recording_mp4:
             self._stop_mp4_recording()
 
-        if self.is_recording_ascii and len(self.ascii_frames) > 0:
+        if self.is_recording_ascii and self._ascii_recorded_frames() > 0:
             self._stop_ascii_recording()
 
         if self.auto_segmenter:
@@ -16,7 +16,12 @@ if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
 from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT, COLOR_SEPARATOR
+from src.core.utils.ramp import compile_ramp
+from src.core.utils.ascii_frame import EDGE_CHARS
+from src.core.utils.ascii_video import open_ascii_video, read_ahead, DEFAULT_READ_AHEAD
+from src.core.utils.edges import compute_edge_features
 from src.core.utils.image import sharpen_frame, apply_morphological_refinement
+from src.core.utils.frame_source import FrameSource
 from src.app.defaults import get_default
 
 try:
@@ -182,12 +187,8 @@ class GtkFullscreenPlayer(Gtk.Window):
         resized_color = cv2.resize(frame_bgr, target_dims, interpolation=cv2.INTER_AREA)
         resized_mask = cv2.resize(mask, target_dims, interpolation=cv2.INTER_NEAREST)
 
-        sobel_x = cv2.Sobel(resized_gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(resized_gray, cv2.CV_64F, 0, 1, ksize=3)
-        magnitude = np.hypot(sobel_x, sobel_y)
-        angle = np.arctan2(sobel_y, sobel_x) * (180 / np.pi)
-        angle = (angle + 180) % 180
-        magnitude_norm = cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        edges = compute_edge_features(resized_gray)
+        magnitude_norm, orientation = edges.magnitude, edges.orientation
 
         if self.temporal_enabled and self._prev_gray_frame is not None:
             diff = np.abs(resized_gray.astype(np.int32) - self._prev_gray_frame.astype(np.int32))
@@ -202,7 +203,7 @@ class GtkFullscreenPlayer(Gtk.Window):
 
         result_image = self._render_ascii_to_image(
             resized_gray, resized_color, resized_mask,
-            magnitude_norm, angle, frame_h, frame_w
+            magnitude_norm, orientation, frame_h, frame_w
         )
 
         if self._matrix_rain and self.matrix_enabled:
@@ -316,7 +317,7 @@ class GtkFullscreenPlayer(Gtk.Window):
             return image
 
     def _render_ascii_to_image(self, resized_gray, resized_color, resized_mask,
-                                magnitude_norm, angle, canvas_h, canvas_w) -> np.ndarray:
+                                magnitude_norm, orientation, canvas_h, canvas_w) -> np.ndarray:
         height, width = resized_gray.shape
 
         if height <= 0 or width <= 0 or canvas_h <= 0 or canvas_w <= 0:
@@ -348,13 +349,11 @@ class GtkFullscreenPlayer(Gtk.Window):
 
         is_edge = magnitude_norm > sobel_threshold
 
+        compiled_ramp = compile_ramp(luminance_ramp)
         if self.edge_boost_enabled:
-            brightness = resized_gray.astype(np.int32)
-            edge_boost = is_edge.astype(np.int32) * self.edge_boost_amount
-            brightness = np.clip(brightness + edge_boost, 0, 255)
-            lum_indices = ((brightness / 255) * (ramp_len - 1)).astype(np.int32)
+            lum_indices = compiled_ramp.lookup(resized_gray, is_edge, self.edge_boost_amount)
         else:
-            lum_indices = (resized_gray * (ramp_len - 1) / 255).astype(np.int32)
+            lum_indices = compiled_ramp.lookup(resized_gray)
 
         for y in range(height):
             py = offset_y + y * char_h + char_h - 3
@@ -370,17 +369,9 @@ class GtkFullscreenPlayer(Gtk.Window):
                         continue
 
                 mag = magnitude_norm[y, x]
-                ang = angle[y, x]
 
                 if self.use_edge_chars and mag > sobel_threshold:
-                    if 22.5 <= ang < 67.5 or 157.5 <= ang < 202.5:
-                        char = '/'
-                    elif 67.5 <= ang < 112.5 or 247.5 <= ang < 292.5:
-                        char = '|'
-                    elif 112.5 <= ang < 157.5 or 292.5 <= ang < 337.5:
-                        char = '\\'
-                    else:
-                        char = '-'
+                    char = EDGE_CHARS[orientation[y, x]]
                 else:
                     idx = min(max(lum_indices[y, x], 0), ramp_len - 1)
                     char = luminance_ramp[idx]
@@ -450,23 +441,10 @@ class GtkFullscreenPlayer(Gtk.Window):
 
 
 def play_file_gtk(arquivo_path: str, config, loop: bool = False):
-    if not os.path.exists(arquivo_path):
-        raise FileNotFoundError(f"Arquivo ASCII '{arquivo_path}' nao encontrado.")
-
-    with open(arquivo_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    parts = content.split('\n', 1)
-    if len(parts) < 2:
-        raise ValueError("Formato de arquivo invalido.")
-
-    fps = float(parts[0].strip())
-    frame_content = parts[1]
-    if frame_content.startswith("[FRAME]\n"):
-        frame_content = frame_content[len("[FRAME]\n"):]
-    frames = frame_content.split("[FRAME]\n")
-
-    if not frames or all(not f.strip() for f in frames):
+    video = open_ascii_video(arquivo_path)
+    fps = video.fps
+    if not video:
+        video.close()
         raise ValueError("Nenhum frame valido encontrado.")
 
     from src.core.renderer import render_ascii_as_image
@@ -481,6 +459,7 @@ def play_file_gtk(arquivo_path: str, config, loop: bool = False):
 
     is_static = (fps == 0)
     delay = 1.0 / fps if fps > 0 else 0
+    read_ahead_frames = config.getint('Player', 'read_ahead_frames', fallback=DEFAULT_READ_AHEAD)
 
     window._init_effects()
 
@@ -498,15 +477,15 @@ def play_file_gtk(arquivo_path: str, config, loop: bool = False):
 
     try:
         if is_static:
-            img = render_ascii_as_image(frames[0])
+            img = render_ascii_as_image(video[0])
             img = _apply_file_effects(img)
             if img is not None:
                 window.display_frame(img)
             Gtk.main()
         else:
             while not window.should_close:
-                for frame_data in frames:
-                    if window.should_close or not frame_data.strip():
+                for frame_data in read_ahead(video, read_ahead_frames):
+                    if window.should_close:
                         break
 
                     img = render_ascii_as_image(frame_data)
@@ -525,18 +504,21 @@ def play_file_gtk(arquivo_path: str, config, loop: bool = False):
     except KeyboardInterrupt:
         pass
     finally:
+        video.close()
         window.cleanup()
 
 
 def play_realtime_gtk(config, video_path: str = None):
     capture_source = video_path if video_path else 0
-    cap = cv2.VideoCapture(capture_source)
-    if not cap.isOpened():
+    is_video = video_path is not None
+    try:
+        # Decodificacao numa thread de fundo; videos recomecam sozinhos no fim
+        cap = FrameSource(capture_source, loop=is_video)
+    except IOError:
         source_name = video_path if video_path else "webcam"
         raise IOError(f"Nao foi possivel abrir: {source_name}")
 
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30
-    is_video = video_path is not None
+    fps = cap.fps or 30
 
     window = GtkFullscreenPlayer(config, title="Extase em 4R73 - Real-Time")
     window.show_all()
@@ -547,14 +529,10 @@ def play_realtime_gtk(config, video_path: str = None):
         time.sleep(0.05)
 
     try:
-        while not window.should_close:
-            ret, frame = cap.read()
-            if not ret:
-                if is_video:
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    continue
+        for source_frame in cap:
+            if window.should_close:
                 break
-
+            frame = source_frame.image
             if not is_video:
                 frame = cv2.flip(frame, 1)
 
@@ -569,7 +547,7 @@ def play_realtime_gtk(config, video_path: str = None):
     except KeyboardInterrupt:
         pass
     finally:
-        cap.release()
+        cap.close()
         window.cleanup()
 
 
@@ -578,7 +556,7 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="GTK Fullscreen ASCII Player")
     parser.add_argument("--config", required=True, help="Caminho para config.ini")
-    parser.add_argument("--file", default=None, help="Arquivo .txt ASCII para reproduzir")
+    parser.add_argument("--file", default=None, help="Arquivo ASCII (.a4r, .txt ou .txt.gz/.txt.zst) para reproduzir")
     parser.add_argument("--video", default=None, help="Arquivo de video para real-time")
     parser.add_argument("--loop", action="store_true", help="Loop na reproducao")
     args = parser.parse_args()
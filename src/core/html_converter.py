@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
-import cv2
 import os
 import sys
-import subprocess
 import logging
 import numpy as np
 import configparser
@@ -16,14 +14,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from src.core.utils.image import sharpen_frame, apply_morphological_refinement
-from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT as LUMINANCE_RAMP, COLOR_SEPARATOR
-
-try:
-    from src.core.auto_segmenter import AutoSegmenter, is_available as auto_seg_available
-    AUTO_SEG_AVAILABLE = auto_seg_available()
-except ImportError:
-    AUTO_SEG_AVAILABLE = False
+from src.core.frame_pipeline import FramePipeline, FrameSink
+from src.core.audio_utils import AudioExtraction, MP3_AUDIO_ARGS
 
 def generate_ansi_palette():
     palette = {}
@@ -268,174 +260,53 @@ HTML_TEMPLATE = """
 </html>
 """
 
+HTML_TARGET_FPS = 12
+
+
+class HtmlSink(FrameSink):
+    """Player HTML autocontido: frames como arrays [char, cor, ...] e audio MP3 ao lado."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.frames_data = []
+        self.audio = None
+
+    def open(self, info):
+        super().open(info)
+        grid_w, grid_h = info.grid_size
+        print(f"HTML Export: {grid_w}x{grid_h} @ {info.output_fps:g}fps (Colorido)")
+        # O MP3 e extraido em paralelo com o render dos frames
+        self.audio = AudioExtraction(info.source_path, html_audio_path(info.source_path, self.output_dir), MP3_AUDIO_ARGS)
+
+    def write(self, ascii_frame, image):
+        # Interleaved Integer Array [char, color, char, color...] matching the JS loop logic
+        frame_int_stream = np.stack(
+            (ascii_frame.codepoints(), ascii_frame.colors), axis=-1
+        ).ravel().tolist()
+
+        self.frames_data.append(frame_int_stream)
+
+    def close(self):
+        return _write_html_player(self.info, self.frames_data, self.output_dir, self.audio.result())
+
+    def abort(self):
+        if self.audio is not None:
+            self.audio.cancel()
+
+
 def converter_video_para_html(video_path: str, output_dir: str, config: configparser.ConfigParser, progress_callback=None, chroma_override=None) -> str:
-    try:
-        target_width = config.getint('Conversor', 'target_width')
-        char_aspect_ratio = config.getfloat('Conversor', 'char_aspect_ratio')
-        sobel_threshold = config.getint('Conversor', 'sobel_threshold')
-        sharpen_enabled = config.getboolean('Conversor', 'sharpen_enabled', fallback=True)
-        sharpen_amount = config.getfloat('Conversor', 'sharpen_amount', fallback=0.5)
-        luminance_ramp = config.get('Conversor', 'luminance_ramp', fallback=LUMINANCE_RAMP).rstrip('|')
-
-        edge_boost_enabled = config.getboolean('Conversor', 'edge_boost_enabled', fallback=False)
-        edge_boost_amount = config.getint('Conversor', 'edge_boost_amount', fallback=100)
-        use_edge_chars = config.getboolean('Conversor', 'use_edge_chars', fallback=True)
-
-        render_mode = config.get('Conversor', 'render_mode', fallback='both').lower()
-        if render_mode not in ('user', 'background', 'both'):
-            render_mode = 'both'
-
-        auto_seg_enabled = config.getboolean('Conversor', 'auto_seg_enabled', fallback=False)
-        auto_segmenter = None
-        if auto_seg_enabled and AUTO_SEG_AVAILABLE:
-            auto_segmenter = AutoSegmenter()
-            print("AutoSeg habilitado para conversao HTML")
-    except Exception as e:
-        raise ValueError(f"Erro ao ler config.ini: {e}")
-
-    captura = cv2.VideoCapture(video_path)
-    if not captura.isOpened():
-        raise IOError(f"Erro ao abrir video: {video_path}")
-
-    fps = captura.get(cv2.CAP_PROP_FPS)
-    total_frames = int(captura.get(cv2.CAP_PROP_FRAME_COUNT))
-    source_width = captura.get(cv2.CAP_PROP_FRAME_WIDTH)
-    source_height = captura.get(cv2.CAP_PROP_FRAME_HEIGHT)
-
-    target_fps = min(fps, 12)
-    frame_interval = max(1, int(fps / target_fps))
-
-    config_height = config.getint('Conversor', 'target_height', fallback=0)
-    if config_height > 0:
-        target_height = config_height
-    else:
-        target_height = int((target_width * source_height * char_aspect_ratio) / source_width)
-
-    target_dimensions = (target_width, target_height)
-
-    # Chroma Key
-    if chroma_override:
-        lower_green = np.array([
-            chroma_override['h_min'], chroma_override['s_min'], chroma_override['v_min']
-        ])
-        upper_green = np.array([
-            chroma_override['h_max'], chroma_override['s_max'], chroma_override['v_max']
-        ])
-        erode_size = chroma_override.get('erode', 2)
-        dilate_size = chroma_override.get('dilate', 2)
-    else:
-        lower_green = np.array([
-            config.getint('ChromaKey', 'h_min'), config.getint('ChromaKey', 's_min'), config.getint('ChromaKey', 'v_min')
-        ])
-        upper_green = np.array([
-            config.getint('ChromaKey', 'h_max'), config.getint('ChromaKey', 's_max'), config.getint('ChromaKey', 'v_max')
-        ])
-        erode_size = config.getint('ChromaKey', 'erode', fallback=2)
-        dilate_size = config.getint('ChromaKey', 'dilate', fallback=2)
-
-    frames_data = []
-    processed_count = 0
-    read_count = 0
-
-    from src.core.renderer import render_ascii_as_image
-
-    print(f"HTML Export: {target_width}x{target_height} @ {target_fps}fps (Colorido)")
-
-    while True:
-        sucesso, frame_colorido = captura.read()
-        if not sucesso:
-            break
-
-        if read_count % frame_interval != 0:
-            read_count += 1
-            continue
-
-        read_count += 1
-        processed_count += 1
-
-        if auto_segmenter:
-            mask_refined = auto_segmenter.process(frame_colorido)
-        else:
-            hsv = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2HSV)
-            mask_green = cv2.inRange(hsv, lower_green, upper_green)
-
-            if erode_size > 0:
-                kernel_erode = np.ones((erode_size, erode_size), np.uint8)
-                mask_green = cv2.erode(mask_green, kernel_erode, iterations=1)
-            if dilate_size > 0:
-                kernel_dilate = np.ones((dilate_size, dilate_size), np.uint8)
-                mask_green = cv2.dilate(mask_green, kernel_dilate, iterations=1)
-
-            mask_refined = apply_morphological_refinement(mask_green)
-        frame_gray = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2GRAY)
-
-        if sharpen_enabled:
-            frame_gray = sharpen_frame(frame_gray, sharpen_amount)
-
-        resized_gray = cv2.resize(frame_gray, target_dimensions, interpolation=cv2.INTER_AREA)
-        resized_color = cv2.resize(frame_colorido, target_dimensions, interpolation=cv2.INTER_AREA)
-        resized_mask = cv2.resize(mask_refined, target_dimensions, interpolation=cv2.INTER_NEAREST)
-
-        if render_mode == 'user':
-            resized_color[resized_mask > 127] = 0
-            mask_for_ascii = resized_mask
-        elif render_mode == 'background':
-            resized_color[resized_mask < 128] = 0
-            mask_for_ascii = 255 - resized_mask
-        else:
-            mask_for_ascii = np.zeros_like(resized_mask)
-
-        dx = cv2.Sobel(resized_gray, cv2.CV_64F, 1, 0, ksize=3)
-        dy = cv2.Sobel(resized_gray, cv2.CV_64F, 0, 1, ksize=3)
-        magnitude = np.sqrt(dx**2 + dy**2)
-        magnitude_norm = np.clip(magnitude, 0, 255).astype(np.uint8)
-        angle = np.arctan2(dy, dx)
-
-        ascii_raw = converter_frame_para_ascii(
-            resized_gray, resized_color, mask_for_ascii,
-            magnitude_norm, angle,
-            sobel_threshold, luminance_ramp,
-            output_format="file",
-            edge_boost_enabled=edge_boost_enabled,
-            edge_boost_amount=edge_boost_amount,
-            use_edge_chars=use_edge_chars
-        )
-
-        # Parse ASCII RAW "char§code§char§code" into Interleaved Integer Array [char, color, char, color...]
-        # Remove newlines first to have a continuous stream matching the JS loop logic
-        lines = ascii_raw.split('\n')
-        frame_int_stream = []
-
-        for line in lines:
-            if not line: continue
-            parts = line.split(COLOR_SEPARATOR)
-            # parts has extra empty element at end usually
-            # Format: c, code, c, code...
-            # Valid pairs are at indices i, i+1
-            for i in range(0, len(parts)-1, 2):
-                char_str = parts[i]
-                code_str = parts[i+1]
-                if char_str and code_str:
-                     # Get ord of first char (ASCII assumes 1 char per block)
-                     char_code = ord(char_str[0])
-                     try:
-                         color_code = int(code_str)
-                     except:
-                         color_code = 232 # Default black/bg
-
-                     frame_int_stream.append(char_code)
-                     frame_int_stream.append(color_code)
-
-        frames_data.append(frame_int_stream)
-
-        if progress_callback:
-             if processed_count % 30 == 0:
-                 thumb = render_ascii_as_image(ascii_raw, font_scale=0.5)
-                 progress_callback(read_count, total_frames, thumb)
-             else:
-                 progress_callback(read_count, total_frames)
-
-    captura.release()
+    pipeline = FramePipeline.from_config(config, chroma_override, edge_normalize=False, target_fps=HTML_TARGET_FPS)
+    return pipeline.run(video_path, HtmlSink(output_dir), progress_callback=progress_callback)
+
+
+def html_audio_path(video_path: str, output_dir: str) -> str:
+    nome_base = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(output_dir, f"{nome_base}_player.mp3")
+
+
+def _write_html_player(info, frames_data, output_dir, audio_output_path=None):
+    video_path = info.source_path
+    target_width, target_height = info.grid_size
 
     # Generate CSS Palette
     palette = generate_ansi_palette()
@@ -447,45 +318,18 @@ def converter_video_para_html(video_path: str, output_dir: str, config: configpa
     nome_base = os.path.splitext(os.path.basename(video_path))[0]
     output_html = os.path.join(output_dir, f"{nome_base}_player.html")
 
-    has_audio = False
-    audio_filename = f"{nome_base}_player.mp3"
-    audio_output_path = os.path.join(output_dir, audio_filename)
-
-    probe_result = subprocess.run(
-        ['ffprobe', '-i', video_path, '-show_streams',
-         '-select_streams', 'a', '-loglevel', 'error'],
-        capture_output=True, text=True, encoding='utf-8', errors='replace'
-    )
-
-    if probe_result.stdout.strip():
-        cmd_audio = [
-            'ffmpeg', '-y',
-            '-i', video_path,
-            '-vn',
-            '-c:a', 'libmp3lame',
-            '-b:a', '128k',
-            audio_output_path
-        ]
-        result = subprocess.run(
-            cmd_audio, capture_output=True, text=True,
-            encoding='utf-8', errors='replace'
-        )
-        if result.returncode == 0 and os.path.exists(audio_output_path) and os.path.getsize(audio_output_path) > 1024:
-            has_audio = True
-            logger.info("Audio MP3 extraido: %s", audio_output_path)
-        else:
-            has_audio = False
-            logger.warning("Falha ao extrair audio MP3 para HTML")
+    has_audio = audio_output_path is not None
+    audio_filename = os.path.basename(audio_output_path) if has_audio else None
 
     js_frames_json = json.dumps(frames_data)
 
     metadata = {
-        "fps": target_fps,
+        "fps": info.output_fps,
         "width": target_width,
         "height": target_height,
         "fontSize": max(6, int(10 * (100 / target_width))),
         "hasAudio": has_audio,
-        "audioFile": audio_filename if has_audio else None
+        "audioFile": audio_filename
     }
 
     html_content = HTML_TEMPLATE.replace("{FRAMES_DATA}", js_frames_json)
@@ -500,6 +344,7 @@ def converter_video_para_html(video_path: str, output_dir: str, config: configpa
         print(f"Audio MP3: {audio_output_path}")
     return output_html
 
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Converte video para Player HTML ASCII Colorido")
@@ -1,13 +1,10 @@
 #!/usr/bin/env python3
-import cv2
 import os
 import sys
 import logging
-import numpy as np
 
 logger = logging.getLogger(__name__)
 import configparser
-import subprocess
 import tempfile
 import shutil
 
@@ -15,302 +12,118 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from src.core.utils.color import rgb_to_ansi256
-from src.core.utils.image import sharpen_frame, apply_morphological_refinement
-from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT as LUMINANCE_RAMP
-from src.core.renderer import render_ascii_as_image, ASCII_CHAR_WIDTH, ASCII_CHAR_HEIGHT
-from src.core.audio_utils import extract_audio_as_aac, mux_video_audio
-from src.core.utils.postfx_loader import load_postfx_config, POSTFX_AVAILABLE
-
-if POSTFX_AVAILABLE:
-    from src.core.post_fx_gpu import PostFXProcessor
-
-try:
-    from src.core.auto_segmenter import AutoSegmenter, is_available as auto_seg_available
-    AUTO_SEG_AVAILABLE = auto_seg_available()
-except ImportError:
-    AUTO_SEG_AVAILABLE = False
+from src.core.renderer import ASCII_CHAR_WIDTH, ASCII_CHAR_HEIGHT
+from src.core.audio_utils import live_audio_args
+from src.core.frame_pipeline import FramePipeline, FrameSink
+from src.core.utils.encoder_sink import EncoderSink
+
+
+class Mp4Sink(FrameSink):
+    """
+    Frames rasterizados enviados como rawvideo BGR para um ffmpeg (libx264)
+    pelo EncoderSink. O mesmo ffmpeg le o audio do video original e muxa
+    durante o encode: quando o stream de video fecha o MP4 ja esta pronto.
+    Audio que nao decodifica fica de fora (live_audio_args) e o MP4 sai so
+    com video.
+    Com audio=False sai so o video (segmentos que ainda serao concatenados).
+    """
+    needs_image = True
+
+    def __init__(self, output_mp4, audio=True):
+        self.output_mp4 = output_mp4
+        self.audio = audio
+        self.encoder = None
+        self.temp_dir = None
+        self.stderr_file = None
+
+    def open(self, info):
+        super().open(info)
+        grid_w, grid_h = info.grid_size
+        out_h = grid_h * ASCII_CHAR_HEIGHT
+        out_w = grid_w * ASCII_CHAR_WIDTH
+        if out_h % 2 != 0:
+            out_h += 1
+        if out_w % 2 != 0:
+            out_w += 1
+
+        self.temp_dir = tempfile.mkdtemp(prefix="ascii_mp4_")
+        actual_fps_int = int(round(info.output_fps))
+
+        logger.info(f"Output: {out_w}x{out_h} @ {actual_fps_int}fps (CFR pipe)")
+
+        cmd_ffmpeg = [
+            'ffmpeg', '-y',
+            '-f', 'rawvideo',
+            '-vcodec', 'rawvideo',
+            '-s', f'{out_w}x{out_h}',
+            '-pix_fmt', 'bgr24',
+            '-r', str(actual_fps_int),
+            '-i', '-',
+            *(live_audio_args(info.source_path) if self.audio else []),
+            '-c:v', 'libx264',
+            '-preset', 'medium',
+            '-crf', '12',
+            '-tune', 'animation',
+            '-g', '24',
+            '-bf', '0',
+            '-vsync', 'cfr',
+            '-movflags', '+faststart',
+            '-pix_fmt', 'yuv420p',
+            self.output_mp4
+        ]
+
+        self.stderr_log = os.path.join(self.temp_dir, "ffmpeg_stderr.log")
+        self.stderr_file = open(self.stderr_log, 'w')
+
+        # Frame com tamanho impar (ou diferente) e recortado/completado pelo EncoderSink
+        self.encoder = EncoderSink(cmd_ffmpeg, (out_h, out_w, 3), stderr=self.stderr_file)
+
+    def write(self, frame, image):
+        self.encoder.write(image)
+
+    def close(self):
+        try:
+            returncode = self.encoder.close()
+            self.stderr_file.close()
+            logger.info(f"Encoder: {self.encoder.frames} frames, render {self.encoder.render_seconds:.2f}s, "
+                        f"espera pelo encoder {self.encoder.stall_seconds:.2f}s")
+
+            if returncode != 0:
+                stderr_out = ''
+                if os.path.exists(self.stderr_log):
+                    with open(self.stderr_log, 'r') as f:
+                        stderr_out = f.read()[-500:]
+                self._remove_partial_output()
+                raise RuntimeError(f"Erro ao criar video: {stderr_out}")
+
+            logger.info(f"Video ASCII criado: {self.output_mp4}")
+            return self.output_mp4
+        finally:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _remove_partial_output(self):
+        if os.path.exists(self.output_mp4):
+            os.remove(self.output_mp4)
+
+    def abort(self):
+        if self.encoder is not None:
+            self.encoder.abort()
+            self._remove_partial_output()
+        # O log do stderr abre antes do EncoderSink, que pode falhar (ffmpeg ausente)
+        if self.stderr_file is not None:
+            self.stderr_file.close()
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
 
 
 def converter_video_para_mp4(video_path: str, output_dir: str, config: configparser.ConfigParser, progress_callback=None, chroma_override=None) -> str:
-    try:
-        target_width = config.getint('Conversor', 'target_width')
-        char_aspect_ratio = config.getfloat('Conversor', 'char_aspect_ratio')
-        sobel_threshold = config.getint('Conversor', 'sobel_threshold')
-        sharpen_enabled = config.getboolean('Conversor', 'sharpen_enabled', fallback=True)
-        sharpen_amount = config.getfloat('Conversor', 'sharpen_amount', fallback=0.5)
-        luminance_ramp = config.get('Conversor', 'luminance_ramp', fallback=LUMINANCE_RAMP).rstrip('|')
-
-        edge_boost_enabled = config.getboolean('Conversor', 'edge_boost_enabled', fallback=False)
-        edge_boost_amount = config.getint('Conversor', 'edge_boost_amount', fallback=100)
-        use_edge_chars = config.getboolean('Conversor', 'use_edge_chars', fallback=True)
-
-        render_mode = config.get('Conversor', 'render_mode', fallback='both').lower()
-        if render_mode not in ('user', 'background', 'both'):
-            render_mode = 'both'
-
-        auto_seg_enabled = config.getboolean('Conversor', 'auto_seg_enabled', fallback=False)
-        auto_segmenter = None
-        if auto_seg_enabled and AUTO_SEG_AVAILABLE:
-            auto_segmenter = AutoSegmenter()
-            logger.info("AutoSeg habilitado para conversao")
-
-        postfx_processor = None
-        postfx_config = load_postfx_config(config)
-        if postfx_config and POSTFX_AVAILABLE:
-            has_any_fx = any([
-                postfx_config.bloom_enabled,
-                postfx_config.chromatic_enabled,
-                postfx_config.scanlines_enabled,
-                postfx_config.glitch_enabled
-            ])
-            if has_any_fx:
-                postfx_processor = PostFXProcessor(postfx_config, use_gpu=True)
-                fx_list = []
-                if postfx_config.bloom_enabled:
-                    fx_list.append("Bloom")
-                if postfx_config.chromatic_enabled:
-                    fx_list.append("Chromatic")
-                if postfx_config.scanlines_enabled:
-                    fx_list.append("Scanlines")
-                if postfx_config.glitch_enabled:
-                    fx_list.append("Glitch")
-                logger.info(f"PostFX habilitado: {', '.join(fx_list)}")
-
-        if chroma_override:
-            lower_green = np.array([
-                chroma_override['h_min'],
-                chroma_override['s_min'],
-                chroma_override['v_min']
-            ])
-            upper_green = np.array([
-                chroma_override['h_max'],
-                chroma_override['s_max'],
-                chroma_override['v_max']
-            ])
-            erode_size = chroma_override.get('erode', 2)
-            dilate_size = chroma_override.get('dilate', 2)
-        else:
-            lower_green = np.array([
-                config.getint('ChromaKey', 'h_min'),
-                config.getint('ChromaKey', 's_min'),
-                config.getint('ChromaKey', 'v_min')
-            ])
-            upper_green = np.array([
-                config.getint('ChromaKey', 'h_max'),
-                config.getint('ChromaKey', 's_max'),
-                config.getint('ChromaKey', 'v_max')
-            ])
-            erode_size = config.getint('ChromaKey', 'erode', fallback=2)
-            dilate_size = config.getint('ChromaKey', 'dilate', fallback=2)
-    except Exception as e:
-        raise ValueError(f"Erro ao ler config.ini: {e}")
-
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video nao encontrado: {video_path}")
+    mp4_target_fps = config.getint('Output', 'mp4_target_fps', fallback=0)
+    pipeline = FramePipeline.from_config(config, chroma_override, edge_normalize=False, target_fps=mp4_target_fps)
 
     nome_base = os.path.splitext(os.path.basename(video_path))[0]
     output_mp4 = os.path.join(output_dir, f"{nome_base}_ascii.mp4")
 
-    captura = cv2.VideoCapture(video_path)
-    if not captura.isOpened():
-        raise IOError(f"Erro ao abrir video: {video_path}")
-
-    fps = captura.get(cv2.CAP_PROP_FPS)
-    total_frames = int(captura.get(cv2.CAP_PROP_FRAME_COUNT))
-
-    source_width = captura.get(cv2.CAP_PROP_FRAME_WIDTH)
-    source_height = captura.get(cv2.CAP_PROP_FRAME_HEIGHT)
-
-    config_height = config.getint('Conversor', 'target_height', fallback=0)
-    if config_height > 0:
-        target_height = config_height
-    else:
-        target_height = int((target_width * source_height * char_aspect_ratio) / source_width)
-        if target_height <= 0:
-            target_height = int(target_width * (9/16) * char_aspect_ratio)
-
-    target_dimensions = (target_width, target_height)
-
-    mp4_target_fps = config.getint('Output', 'mp4_target_fps', fallback=0)
-    target_fps = min(fps, mp4_target_fps) if mp4_target_fps > 0 else fps
-    frame_interval = max(1, round(fps / target_fps))
-    actual_fps = fps / frame_interval
-
-    temporal_enabled = config.getboolean('Conversor', 'temporal_coherence_enabled', fallback=False)
-    temporal_threshold = config.getint('Conversor', 'temporal_threshold', fallback=50)
-
-    logger.info(f"Video: {int(source_width)}x{int(source_height)} -> ASCII: {target_width}x{target_height}")
-    logger.info(f"FPS Original: {fps} -> MP4 FPS: {actual_fps} (interval={frame_interval})")
-
-    out_h = target_height * ASCII_CHAR_HEIGHT
-    out_w = target_width * ASCII_CHAR_WIDTH
-    if out_h % 2 != 0:
-        out_h += 1
-    if out_w % 2 != 0:
-        out_w += 1
-
-    temp_dir = tempfile.mkdtemp(prefix="ascii_mp4_")
-    temp_video = os.path.join(temp_dir, "temp_video.mp4")
-    actual_fps_int = int(round(actual_fps))
-
-    logger.info(f"Output: {out_w}x{out_h} @ {actual_fps_int}fps (CFR pipe)")
-
-    cmd_ffmpeg = [
-        'ffmpeg', '-y',
-        '-f', 'rawvideo',
-        '-vcodec', 'rawvideo',
-        '-s', f'{out_w}x{out_h}',
-        '-pix_fmt', 'bgr24',
-        '-r', str(actual_fps_int),
-        '-i', '-',
-        '-c:v', 'libx264',
-        '-preset', 'medium',
-        '-crf', '12',
-        '-tune', 'animation',
-        '-g', '24',
-        '-bf', '0',
-        '-vsync', 'cfr',
-        '-movflags', '+faststart',
-        '-pix_fmt', 'yuv420p',
-        temp_video
-    ]
-
-    stderr_log = os.path.join(temp_dir, "ffmpeg_stderr.log")
-    stderr_file = open(stderr_log, 'w')
-
-    proc = subprocess.Popen(
-        cmd_ffmpeg,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.DEVNULL,
-        stderr=stderr_file
-    )
-
-    try:
-        frame_count = 0
-        saved_frame_count = 0
-        prev_gray = None
-        while True:
-            sucesso, frame_colorido = captura.read()
-            if not sucesso:
-                break
-
-            if frame_count % frame_interval != 0:
-                frame_count += 1
-                continue
-
-            if auto_segmenter:
-                mask_refined = auto_segmenter.process(frame_colorido)
-            else:
-                hsv = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2HSV)
-                mask_green = cv2.inRange(hsv, lower_green, upper_green)
-
-                if erode_size > 0:
-                    kernel_erode = np.ones((erode_size, erode_size), np.uint8)
-                    mask_green = cv2.erode(mask_green, kernel_erode, iterations=1)
-                if dilate_size > 0:
-                    kernel_dilate = np.ones((dilate_size, dilate_size), np.uint8)
-                    mask_green = cv2.dilate(mask_green, kernel_dilate, iterations=1)
-
-                mask_refined = apply_morphological_refinement(mask_green)
-
-            frame_gray = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2GRAY)
-
-            if sharpen_enabled:
-                frame_gray = sharpen_frame(frame_gray, sharpen_amount=sharpen_amount)
-
-            resized_gray = cv2.resize(frame_gray, target_dimensions, interpolation=cv2.INTER_AREA)
-            resized_color = cv2.resize(frame_colorido, target_dimensions, interpolation=cv2.INTER_AREA)
-            resized_mask = cv2.resize(mask_refined, target_dimensions, interpolation=cv2.INTER_NEAREST)
-
-            if temporal_enabled and prev_gray is not None:
-                diff = np.abs(resized_gray.astype(np.int32) - prev_gray.astype(np.int32))
-                temporal_mask = diff < temporal_threshold
-                resized_gray = np.where(temporal_mask, prev_gray, resized_gray).astype(np.uint8)
-            prev_gray = resized_gray.copy()
-
-            if render_mode == 'user':
-                resized_color[resized_mask > 127] = 0
-                mask_for_ascii = resized_mask
-            elif render_mode == 'background':
-                resized_color[resized_mask < 128] = 0
-                mask_for_ascii = 255 - resized_mask
-            else:
-                mask_for_ascii = np.zeros_like(resized_mask)
-
-            dx = cv2.Sobel(resized_gray, cv2.CV_64F, 1, 0, ksize=3)
-            dy = cv2.Sobel(resized_gray, cv2.CV_64F, 0, 1, ksize=3)
-            magnitude = np.sqrt(dx**2 + dy**2)
-            magnitude_norm = np.clip(magnitude, 0, 255).astype(np.uint8)
-            angle = np.arctan2(dy, dx)
-
-            ascii_string = converter_frame_para_ascii(
-                resized_gray, resized_color, mask_for_ascii,
-                magnitude_norm, angle,
-                sobel_threshold, luminance_ramp,
-                output_format="file",
-                edge_boost_enabled=edge_boost_enabled,
-                edge_boost_amount=edge_boost_amount,
-                use_edge_chars=use_edge_chars
-            )
-
-            frame_image = render_ascii_as_image(ascii_string, font_scale=0.5)
-
-            canvas = np.zeros((out_h, out_w, 3), dtype=np.uint8)
-            fh, fw = frame_image.shape[:2]
-            canvas[:min(fh, out_h), :min(fw, out_w)] = frame_image[:min(fh, out_h), :min(fw, out_w)]
-
-            if postfx_processor:
-                canvas = postfx_processor.process(canvas)
-
-            proc.stdin.write(canvas.tobytes())
-
-            saved_frame_count += 1
-            frame_count += 1
-
-            if progress_callback:
-                if saved_frame_count % 30 == 0:
-                    progress_callback(frame_count, total_frames, canvas)
-                else:
-                    progress_callback(frame_count, total_frames)
-
-            if saved_frame_count % 30 == 0:
-                logger.info(f"Processado: {frame_count}/{total_frames} frames ({saved_frame_count} salvos)")
-
-        captura.release()
-        proc.stdin.close()
-        proc.wait()
-        stderr_file.close()
-
-        if proc.returncode != 0:
-            stderr_out = ''
-            if os.path.exists(stderr_log):
-                with open(stderr_log, 'r') as f:
-                    stderr_out = f.read()[-500:]
-            raise RuntimeError(f"Erro ao criar video: {stderr_out}")
-
-        logger.info(f"Total de frames renderizados: {saved_frame_count}")
-
-        logger.info("Extraindo audio do video original...")
-        temp_audio = extract_audio_as_aac(video_path, temp_dir)
-
-        logger.info("Muxando video + audio..." if temp_audio else "Video sem audio, copiando...")
-        mux_video_audio(temp_video, temp_audio, output_mp4)
-
-        logger.info(f"Video ASCII criado: {output_mp4}")
-        return output_mp4
-
-    except Exception:
-        try:
-            proc.stdin.close()
-        except Exception:
-            pass
-        proc.wait()
-        stderr_file.close()
-        raise
-
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    return pipeline.run(video_path, Mp4Sink(output_mp4), progress_callback=progress_callback)
 
 
 if __name__ == "__main__":
@@ -11,8 +11,10 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from src.core.utils.color import rgb_to_ansi256
+from src.core.utils.color import rgb_to_ansi256_lut
+from src.core.utils.ascii_frame import AsciiFrame
 from src.core.utils.image import sharpen_frame, apply_morphological_refinement
+from src.core.utils.frame_source import FrameSource
 
 COLOR_SEPARATOR = "§"
 
@@ -70,25 +72,13 @@ def converter_frame_para_pixelart(frame, mask, pixel_size, n_colors, use_fixed_p
 
     quantized = quantize_colors(frame_small, n_colors, use_fixed_palette)
 
-    height, width = quantized.shape[:2]
-    ascii_str_lines = []
     block_char = "█"
+    is_masked = mask_small == 255
+    ansi_codes = rgb_to_ansi256_lut(quantized)
+    ansi_codes[is_masked] = 232
 
-    for y in range(height):
-        line = ""
-        for x in range(width):
-            if mask_small[y, x] == 255:
-                char = " "
-                ansi_code = 232
-            else:
-                char = block_char
-                b, g, r = quantized[y, x]
-                ansi_code = rgb_to_ansi256(r, g, b)
-
-            line += f"{char}{COLOR_SEPARATOR}{ansi_code}{COLOR_SEPARATOR}"
-        ascii_str_lines.append(line)
-
-    return "\n".join(ascii_str_lines)
+    frame = AsciiFrame(chars=is_masked.astype(np.uint8), colors=ansi_codes, glyphs=block_char + " ")
+    return frame.to_text()
 
 
 def iniciar_conversao(video_path, output_dir, config):
@@ -124,16 +114,17 @@ def iniciar_conversao(video_path, output_dir, config):
     nome_base = os.path.splitext(os.path.basename(video_path))[0]
     caminho_saida = os.path.join(output_dir, f"{nome_base}.txt")
 
-    captura = cv2.VideoCapture(video_path)
-    if not captura.isOpened():
+    try:
+        captura = FrameSource(video_path)
+    except IOError:
         raise IOError(f"Erro: Nao abriu '{video_path}'.")
 
-    fps = captura.get(cv2.CAP_PROP_FPS)
+    fps = captura.fps
     frames_pixelart = []
 
     try:
-        source_width = captura.get(cv2.CAP_PROP_FRAME_WIDTH)
-        source_height = captura.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        source_width = captura.width
+        source_height = captura.height
 
         config_height = config.getint('Conversor', 'target_height', fallback=0)
         if config_height > 0:
@@ -151,28 +142,26 @@ def iniciar_conversao(video_path, output_dir, config):
         target_dimensions = (target_width, 25)
 
     frame_count = 0
-    while True:
-        sucesso, frame_colorido = captura.read()
-        if not sucesso:
-            break
-
-        if sharpen_enabled:
-            frame_colorido = sharpen_frame(frame_colorido, sharpen_amount)
-
-        hsv_frame = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2HSV)
-        mask = cv2.inRange(hsv_frame, lower_green, upper_green)
-        mask = apply_morphological_refinement(mask, erode_size, dilate_size)
-
-        resized_color = cv2.resize(frame_colorido, target_dimensions, interpolation=cv2.INTER_LANCZOS4)
-        resized_mask = cv2.resize(mask, target_dimensions, interpolation=cv2.INTER_NEAREST)
-
-        frame_pixelart = converter_frame_para_pixelart(
-            resized_color, resized_mask, pixel_size, n_colors, use_fixed_palette
-        )
-        frames_pixelart.append(frame_pixelart)
-        frame_count += 1
-
-    captura.release()
+    try:
+        for frame in captura:
+            frame_colorido = frame.image
+            if sharpen_enabled:
+                frame_colorido = sharpen_frame(frame_colorido, sharpen_amount)
+
+            hsv_frame = cv2.cvtColor(frame_colorido, cv2.COLOR_BGR2HSV)
+            mask = cv2.inRange(hsv_frame, lower_green, upper_green)
+            mask = apply_morphological_refinement(mask, erode_size, dilate_size)
+
+            resized_color = cv2.resize(frame_colorido, target_dimensions, interpolation=cv2.INTER_LANCZOS4)
+            resized_mask = cv2.resize(mask, target_dimensions, interpolation=cv2.INTER_NEAREST)
+
+            frame_pixelart = converter_frame_para_pixelart(
+                resized_color, resized_mask, pixel_size, n_colors, use_fixed_palette
+            )
+            frames_pixelart.append(frame_pixelart)
+            frame_count += 1
+    finally:
+        captura.close()
     print(f"Processados {frame_count} frames em pixel art.")
     
     try:
@@ -11,7 +11,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from src.core.utils.color import rgb_to_ansi256
+from src.core.utils.color import rgb_to_ansi256_lut
+from src.core.utils.ascii_frame import AsciiFrame
 from src.core.utils.image import sharpen_frame, apply_morphological_refinement
 
 COLOR_SEPARATOR = "§"
@@ -68,25 +69,13 @@ def converter_imagem_para_pixelart(frame, mask, pixel_size, n_colors, use_fixed_
 
     quantized = quantize_colors(frame_small, n_colors, use_fixed_palette)
 
-    height, width = quantized.shape[:2]
-    ascii_str_lines = []
     block_char = "█"
+    is_masked = mask_small == 255
+    ansi_codes = rgb_to_ansi256_lut(quantized)
+    ansi_codes[is_masked] = 232
 
-    for y in range(height):
-        line = ""
-        for x in range(width):
-            if mask_small[y, x] == 255:
-                char = " "
-                ansi_code = 232
-            else:
-                char = block_char
-                b, g, r = quantized[y, x]
-                ansi_code = rgb_to_ansi256(r, g, b)
-
-            line += f"{char}{COLOR_SEPARATOR}{ansi_code}{COLOR_SEPARATOR}"
-        ascii_str_lines.append(line)
-
-    return "\n".join(ascii_str_lines)
+    frame = AsciiFrame(chars=is_masked.astype(np.uint8), colors=ansi_codes, glyphs=block_char + " ")
+    return frame.to_text()
 
 
 def iniciar_conversao_imagem(image_path, output_dir, config):
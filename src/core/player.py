@@ -12,8 +12,11 @@ import sys
 import cv2
 import configparser
 import random
+import numpy as np
 
-from .renderer import render_terminal, render_window, cleanup_window, DEFAULT_SCALE_FACTOR
+from .utils.ascii_frame import AsciiFrame, glyph_index_dtype
+from .utils.ascii_video import open_ascii_video, read_ahead, DEFAULT_READ_AHEAD
+from .renderer import render_terminal, render_window, cleanup_window, create_terminal_encoder, create_terminal_diff_renderer, DEFAULT_SCALE_FACTOR
 try:
     from .renderer import render_window_gtk, GTK_AVAILABLE
 except ImportError:
@@ -107,7 +110,46 @@ class TerminalMatrixRain:
         self.speed_multiplier = speed_multiplier
         self._update_internal(dt)
 
-    def render_overlay(self, frame_data: str, speed_multiplier: float = 1.0) -> str:
+    def _resize(self, width: int, height: int):
+        if self.width != width or self.height != height:
+            self.width = max(1, width)
+            self.height = max(1, height)
+            self._init_columns()
+
+    def render_overlay_frame(self, frame: AsciiFrame, speed_multiplier: float = 1.0) -> AsciiFrame:
+        self._resize(frame.width, frame.height)
+        self.update(0.033, speed_multiplier)
+
+        h = min(frame.height, self.height)
+        w = min(frame.width, self.width)
+        colors = frame.colors[:h, :w]
+        blank = np.array([c.strip() == '' for c in frame.glyphs], dtype=bool)
+        is_background = ((colors >= 232) & (colors <= 240)) | (colors == 16) | blank[frame.chars[:h, :w]]
+
+        brightness = np.array(self.brightness_grid, dtype=np.float32)[:h, :w]
+        rain = is_background & (brightness > 0.05)
+
+        # Caracteres da chuva entram no fim da tabela de simbolos do frame
+        rain_glyphs = ''.join(self.chars)
+        glyph_index = {c: len(frame.glyphs) + i for i, c in enumerate(rain_glyphs)}
+        rain_chars = np.array([[glyph_index[c] for c in row[:w]] for row in self.char_grid[:h]])
+        rain_colors = np.select(
+            [brightness >= 1.2, brightness >= 0.8, brightness >= 0.5, brightness >= 0.3],
+            [GREEN_BRIGHT, GREEN_MED, GREEN_DARK, GREEN_DARKER],
+            GREEN_DARKEST
+        )
+
+        glyphs = frame.glyphs + rain_glyphs
+        chars = frame.chars.astype(glyph_index_dtype(len(glyphs)))
+        colors = frame.colors.copy()
+        chars[:h, :w][rain] = rain_chars[rain]
+        colors[:h, :w][rain] = rain_colors[rain]
+        return AsciiFrame(chars=chars, colors=colors, glyphs=glyphs, ramp=frame.ramp)
+
+    def render_overlay(self, frame_data, speed_multiplier: float = 1.0):
+        if isinstance(frame_data, AsciiFrame):
+            return self.render_overlay_frame(frame_data, speed_multiplier)
+
         lines = frame_data.split('\n')
         if not lines:
             return frame_data
@@ -184,7 +226,7 @@ def iniciar_player(arquivo_path, loop=False, config=None):
     Play ASCII/Pixel Art video with configurable display mode
 
     Args:
-        arquivo_path: Path to .txt file with ASCII art
+        arquivo_path: Path to .a4r container or legacy .txt (optionally .txt.gz/.txt.zst) file with ASCII art
         loop: Whether to loop playback
         config: ConfigParser object (optional, for display_mode)
     """
@@ -211,31 +253,10 @@ def iniciar_player(arquivo_path, loop=False, config=None):
             print(f"[Matrix Rain] Erro ao inicializar: {e}")
             matrix_rain = None
 
-    if not os.path.exists(arquivo_path):
-        raise FileNotFoundError(f"Arquivo ASCII '{arquivo_path}' nao encontrado.")
-
-    try:
-        with open(arquivo_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except Exception as e:
-        raise IOError(f"Erro ao ler o arquivo '{arquivo_path}': {e}")
-
-    # Parse file format
-    parts = content.split('\n', 1)
-    if len(parts) < 2:
-        raise ValueError("Formato de arquivo invalido: FPS ou conteudo nao encontrado.")
-
-    try:
-        fps = float(parts[0].strip())
-    except ValueError as e:
-        raise ValueError(f"FPS invalido na primeira linha ('{parts[0].strip()}'): {e}")
-
-    frame_content = parts[1]
-    if frame_content.startswith("[FRAME]\n"):
-        frame_content = frame_content[len("[FRAME]\n"):]
-    frames = frame_content.split("[FRAME]\n")
-
-    if not frames or all(not f.strip() for f in frames):
+    video = open_ascii_video(arquivo_path)
+    fps = video.fps
+    if not video:
+        video.close()
         raise ValueError("Nenhum frame valido encontrado no arquivo apos o FPS.")
 
     # Determine display mode from config
@@ -260,6 +281,10 @@ def iniciar_player(arquivo_path, loop=False, config=None):
         print(f"Aviso: display_mode '{display_mode}' invalido. Usando 'terminal'.")
         display_mode = 'terminal'
     
+    read_ahead_frames = config.getint('Player', 'read_ahead_frames', fallback=DEFAULT_READ_AHEAD) if config else DEFAULT_READ_AHEAD
+    terminal_encoder = create_terminal_encoder(config)
+    terminal_diff = create_terminal_diff_renderer(config, terminal_encoder)
+
     # Clear screen for initial display
     os.system('clear')
     
@@ -286,46 +311,45 @@ def iniciar_player(arquivo_path, loop=False, config=None):
 
     try:
         if is_static_image:
-            frame_data = frames[0]
-            if frame_data.strip():
-                frame_to_render = frame_data
-                if matrix_rain and display_mode in ['terminal', 'both']:
-                    frame_to_render = matrix_rain.render_overlay(frame_data, matrix_speed)
-
-                if display_mode in ['terminal', 'both']:
-                    render_terminal(frame_to_render)
-                
-                gtk_window = None
-                
-                if display_mode in ['window', 'both']:
-                    if use_gtk:
-                        # GTK mode - perfect aspect ratio!
-                        gtk_window = render_window_gtk(None, None, 
-                                                      is_ascii=True, ascii_string=frame_data)
-                        
-                        print("\n[Imagem Estatica - Pressione ESC ou 'q' para sair]")
-                        
-                        # GTK event loop for static image
-                        import gi
-                        gi.require_version('Gtk', '3.0')
-                        from gi.repository import Gtk
-                        
-                        Gtk.main()  # Will exit when window closes or q/ESC pressed
-                    else:
-                        # OpenCV fallback
-                        render_window(None, window_name, current_scale, 
-                                     is_ascii=True, ascii_string=frame_data)
-                        
-                        print("\n[Imagem Estatica - Pressione ESC ou 'q' para sair]")
-                        
-                        while True:
-                            key = cv2.waitKey(100) & 0xFF
-                            if key == ord('q') or key == 27:  # ESC
-                                break
-                
-                elif display_mode == 'terminal':
-                    print("\n\n[Imagem Estatica - Pressione Enter para sair]")
-                    input()
+            frame_data = video[0]
+            frame_to_render = frame_data
+            if matrix_rain and display_mode in ['terminal', 'both']:
+                frame_to_render = matrix_rain.render_overlay(frame_data, matrix_speed)
+
+            if display_mode in ['terminal', 'both']:
+                render_terminal(frame_to_render, terminal_encoder, terminal_diff)
+            
+            gtk_window = None
+            
+            if display_mode in ['window', 'both']:
+                if use_gtk:
+                    # GTK mode - perfect aspect ratio!
+                    gtk_window = render_window_gtk(None, None, 
+                                                  is_ascii=True, ascii_string=frame_data)
+                    
+                    print("\n[Imagem Estatica - Pressione ESC ou 'q' para sair]")
+                    
+                    # GTK event loop for static image
+                    import gi
+                    gi.require_version('Gtk', '3.0')
+                    from gi.repository import Gtk
+                    
+                    Gtk.main()  # Will exit when window closes or q/ESC pressed
+                else:
+                    # OpenCV fallback
+                    render_window(None, window_name, current_scale, 
+                                 is_ascii=True, ascii_string=frame_data)
+                    
+                    print("\n[Imagem Estatica - Pressione ESC ou 'q' para sair]")
+                    
+                    while True:
+                        key = cv2.waitKey(100) & 0xFF
+                        if key == ord('q') or key == 27:  # ESC
+                            break
+            
+            elif display_mode == 'terminal':
+                print("\n\n[Imagem Estatica - Pressione Enter para sair]")
+                input()
         else:
             # Video playback
             delay = 1.0 / fps
@@ -334,16 +358,13 @@ def iniciar_player(arquivo_path, loop=False, config=None):
             gtk_window = None
             
             while True:
-                for frame_data in frames:
-                    if not frame_data.strip():
-                        continue
-
+                for frame_data in read_ahead(video, read_ahead_frames):
                     frame_to_render = frame_data
                     if matrix_rain and display_mode in ['terminal', 'both']:
                         frame_to_render = matrix_rain.render_overlay(frame_data, matrix_speed)
 
                     if display_mode in ['terminal', 'both']:
-                        render_terminal(frame_to_render)
+                        render_terminal(frame_to_render, terminal_encoder, terminal_diff)
 
                     if display_mode in ['window', 'both']:
                         if use_gtk:
@@ -380,11 +401,16 @@ def iniciar_player(arquivo_path, loop=False, config=None):
         print("\nPlayer interrompido pelo usuario.")
     finally:
         # Cleanup
+        video.close()
         if display_mode in ['window', 'both']:
             cleanup_window(window_name)
         if display_mode in ['terminal', 'both']:
+            if terminal_diff is not None:
+                terminal_diff.close()
             print(ANSI_RESET)
             os.system('clear')
+            if terminal_encoder.frames:
+                print(f"Terminal: {terminal_encoder.bytes_per_frame / 1024:.1f} KB/frame em media ({terminal_encoder.frames} frames)")
 
 
 if __name__ == '__main__':
@@ -413,5 +439,5 @@ if __name__ == '__main__':
             print("----------------------------")
             input("Pressione Enter para sair...")
     else:
-        print("Uso para teste: python src/core/player.py <caminho_arquivo.txt> [--loop]")
+        print("Uso para teste: python src/core/player.py <caminho_arquivo.a4r|.txt> [--loop]")
 
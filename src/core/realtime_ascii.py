@@ -5,6 +5,7 @@ import sys
 import configparser
 import argparse
 import time
+import itertools
 
 # Ensure project root is in sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,8 +14,13 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.app.defaults import get_default
-from src.core.utils.color import rgb_to_ansi256
+from src.core.utils.color import rgb_to_ansi256_lut
+from src.core.utils.ramp import compile_ramp
+from src.core.utils.ansi_encoder import AnsiEncoder, encode_ansi256, encode_truecolor
+from src.core.utils.terminal_diff import TerminalDiffRenderer
+from src.core.utils.edges import compute_edge_features
 from src.core.utils.image import sharpen_frame
+from src.core.utils.frame_source import FrameSource
 
 try:
     from src.core.auto_segmenter import AutoSegmenter, is_available as auto_seg_available
@@ -38,6 +44,7 @@ except ImportError:
 ANSI_RESET = "\033[0m"
 COLOR_SEPARATOR = "§"
 ANSI_CLEAR_AND_HOME = "\033[2J\033[H"
+ANSI_CLEAR_AND_HOME_BYTES = ANSI_CLEAR_AND_HOME.encode('ascii')
 LUMINANCE_RAMP_DEFAULT = "$@B8&WM#*oahkbdpqwmZO0QLCJUYXzcvunxrjft/\|()1{}[]?-_+~<>i!lI;:,\"^`'. "
 
 
@@ -46,57 +53,53 @@ def rgb_to_truecolor(r, g, b):
     return f"\033[38;2;{r};{g};{b}m"
 
 
-def frame_para_ascii_rt(gray_frame, color_frame, magnitude_frame, angle_frame, sobel_threshold, luminance_ramp,
+def frame_para_ascii_rt(gray_frame, color_frame, magnitude_frame, orientation_frame, sobel_threshold, luminance_ramp,
                         edge_boost_enabled=False, edge_boost_amount=100, use_edge_chars=True, use_truecolor=True):
-    height, width = gray_frame.shape
-    output_buffer = []
-    ramp_len = len(luminance_ramp)
+    return encode_frame_rt(
+        gray_frame, color_frame, magnitude_frame, orientation_frame, sobel_threshold, luminance_ramp,
+        edge_boost_enabled, edge_boost_amount, use_edge_chars, use_truecolor
+    ).decode('utf-8')
 
+
+def ascii_planes_rt(gray_frame, color_frame, magnitude_frame, orientation_frame, sobel_threshold, luminance_ramp,
+                    edge_boost_enabled=False, edge_boost_amount=100, use_edge_chars=True):
+    """Plano de indices em glyphs (rampa + bordas + espaco) do frame; retorna (chars, glyphs)."""
+    compiled = compile_ramp(luminance_ramp)
     is_edge = magnitude_frame > sobel_threshold
 
     if edge_boost_enabled:
         brightness = gray_frame.astype(np.int32)
-        edge_boost = is_edge.astype(np.int32) * edge_boost_amount
-        brightness = np.clip(brightness + edge_boost, 0, 255).astype(np.uint8)
+        brightness += is_edge * edge_boost_amount
+        brightness = np.clip(brightness, 0, 255).astype(np.uint8)
     else:
         brightness = gray_frame
 
-    for y in range(height):
-        line_buffer = []
-        for x in range(width):
-            if use_edge_chars and is_edge[y, x]:
-                angle = angle_frame[y, x]
-                if (angle > 67.5 and angle <= 112.5):
-                    char = "|"
-                elif (angle > 112.5 and angle <= 157.5):
-                    char = "/"
-                elif (angle > 157.5 or angle <= 22.5):
-                    char = "-"
-                else:
-                    char = "\\"
-                b, g, r = color_frame[y, x]
-            else:
-                pixel_brightness = brightness[y, x]
-                if pixel_brightness == 0 and len(color_frame[y, x]) == 3 and np.array_equal(color_frame[y, x], [0, 0, 0]):
-                    char = " "
-                    r, g, b = 0, 0, 0
-                else:
-                    char_index = int((pixel_brightness / 255) * (ramp_len - 1))
-                    char = luminance_ramp[char_index]
-                    b, g, r = color_frame[y, x]
-
-            if char:
-                if use_truecolor:
-                    line_buffer.append(f"\033[38;2;{r};{g};{b}m{char}")
-                else:
-                    ansi_code = rgb_to_ansi256(r, g, b)
-                    line_buffer.append(f"\033[38;5;{ansi_code}m{char}")
-            else:
-                line_buffer.append(" ")
-
-        output_buffer.append("".join(line_buffer))
-
-    return "\n".join(output_buffer) + ANSI_RESET
+    chars = compiled.lookup(brightness)
+    # Pixel preto puro vira espaco
+    chars[(brightness == 0) & ~color_frame.any(axis=2)] = compiled.mask_index
+    if use_edge_chars:
+        edge_chars = orientation_frame.astype(chars.dtype) + chars.dtype.type(compiled.edge_base)
+        chars = np.where(is_edge, edge_chars, chars)
+    return chars, compiled.glyphs
+
+
+def encode_frame_rt(gray_frame, color_frame, magnitude_frame, orientation_frame, sobel_threshold, luminance_ramp,
+                    edge_boost_enabled=False, edge_boost_amount=100, use_edge_chars=True, use_truecolor=True,
+                    encoder=None):
+    """
+    Mesmo frame de frame_para_ascii_rt ja em bytes, pronto para sys.stdout.buffer.
+    Com um AnsiEncoder (run-length, tolerancia, contagem de bytes) ele decide
+    o formato das cores e use_truecolor e ignorado.
+    """
+    chars, glyphs = ascii_planes_rt(
+        gray_frame, color_frame, magnitude_frame, orientation_frame, sobel_threshold, luminance_ramp,
+        edge_boost_enabled, edge_boost_amount, use_edge_chars
+    )
+    if encoder is not None:
+        return encoder.encode(chars, glyphs, color_frame)
+    if use_truecolor:
+        return encode_truecolor(chars, glyphs, color_frame)
+    return encode_ansi256(chars, glyphs, rgb_to_ansi256_lut(color_frame))
 
 
 def apply_chroma_key(frame, hsv_values):
@@ -283,19 +286,21 @@ def run_realtime_ascii(config_path, video_path=None, overrides=None):
     print(f"Render target: {render_target}")
 
     capture_source = video_path if is_video_file else 0
-    cap = cv2.VideoCapture(capture_source)
-    if not cap.isOpened():
+    try:
+        # Decodificacao numa thread de fundo; videos recomecam sozinhos no fim
+        cap = FrameSource(capture_source, loop=is_video_file)
+    except IOError:
         source_name = video_path if is_video_file else "webcam"
         print(f"Erro: Nao foi possivel abrir {source_name}.")
         return
 
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    fps = cap.fps or 30
+    first_frame = next(cap, None)
 
     try:
-        ret, frame_teste = cap.read()
-        if not ret or frame_teste is None:
+        if first_frame is None:
             raise ValueError("Nao foi possivel ler o primeiro frame.")
-        source_height, source_width, _ = frame_teste.shape
+        source_height, source_width, _ = first_frame.image.shape
 
         if 'target_height' not in locals() or target_height <= 0:
             target_height = int((target_width * source_height * char_aspect_ratio) / source_width)
@@ -306,23 +311,23 @@ def run_realtime_ascii(config_path, video_path=None, overrides=None):
         source_name = f"Video: {os.path.basename(video_path)}" if is_video_file else "Webcam"
         print(f"{source_name} detectado: {source_width}x{source_height}. Convertendo para: {target_width}x{target_height} chars.")
         print("Pressione Ctrl+C para sair.")
-
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
     except Exception as e:
         print(f"Erro ao calcular dimensoes: {e}. Usando 80x{int(80*0.45*(9/16))}.")
         target_dimensions = (target_width, int(target_width * 0.45 * (9/16)))
 
-    try:
-        while True:
-            ret, frame_colorido = cap.read()
-            if not ret or frame_colorido is None:
-                if is_video_file:
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    continue
-                print("Erro ao ler frame.")
-                time.sleep(0.5)
-                continue
+    encoder = AnsiEncoder.from_config(config, truecolor=True)
+    terminal = None
+    if config.getboolean('Player', 'terminal_diff', fallback=True):
+        terminal = TerminalDiffRenderer.from_config(config, encoder)
+
+    # Frames ja saem do encoder em bytes; escreve direto no buffer do stdout
+    sys.stdout.flush()
+    stdout = sys.stdout.buffer
 
+    frames = itertools.chain((first_frame,), cap) if first_frame is not None else cap
+    try:
+        for frame in frames:
+            frame_colorido = frame.image
             if not is_video_file:
                 frame_colorido = cv2.flip(frame_colorido, 1)
 
@@ -391,24 +396,25 @@ def run_realtime_ascii(config_path, video_path=None, overrides=None):
 
             prev_gray_frame = resized_gray.copy()
 
-            sobel_x = cv2.Sobel(resized_gray, cv2.CV_64F, 1, 0, ksize=3)
-            sobel_y = cv2.Sobel(resized_gray, cv2.CV_64F, 0, 1, ksize=3)
-            magnitude = np.hypot(sobel_x, sobel_y)
-            angle = np.arctan2(sobel_y, sobel_x) * (180 / np.pi)
-            angle = (angle + 180) % 180
-            magnitude_norm = cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+            edges = compute_edge_features(resized_gray)
+            magnitude_norm, orientation = edges.magnitude, edges.orientation
 
-            frame_ascii = frame_para_ascii_rt(
-                resized_gray, resized_color, magnitude_norm, angle,
+            chars, glyphs = ascii_planes_rt(
+                resized_gray, resized_color, magnitude_norm, orientation,
                 sobel_threshold, luminance_ramp,
                 edge_boost_enabled, edge_boost_amount, use_edge_chars
             )
 
-            sys.stdout.write(ANSI_CLEAR_AND_HOME + frame_ascii)
-            sys.stdout.flush()
+            if terminal is not None:
+                terminal.render(chars, glyphs, resized_color)
+            else:
+                stdout.write(ANSI_CLEAR_AND_HOME_BYTES + encoder.encode(chars, glyphs, resized_color))
+                stdout.flush()
 
             time.sleep(1.0 / fps)
 
+        if not is_video_file:
+            print("Erro ao ler frame.")
     except KeyboardInterrupt:
         print("\nSaindo do modo Real-Time...")
     except Exception as e:
@@ -416,14 +422,16 @@ def run_realtime_ascii(config_path, video_path=None, overrides=None):
         import traceback
         traceback.print_exc()
     finally:
+        if terminal: terminal.close()
         if segmenter: segmenter.close()
         if matrix_rain: matrix_rain.close()
-        if cap.isOpened():
-            cap.release()
+        cap.close()
         cv2.destroyAllWindows()
         time.sleep(0.3)
         os.system('cls' if os.name == 'nt' else 'clear')
         print(ANSI_RESET)
+        if encoder.frames:
+            print(f"Terminal: {encoder.bytes_per_frame / 1024:.1f} KB/frame em media ({encoder.frames} frames)")
 
 
 if __name__ == "__main__":
@@ -9,6 +9,11 @@ import sys
 import cv2
 import numpy as np
 
+from src.core.utils.glyph_atlas import GlyphAtlas
+from src.core.utils.ascii_frame import AsciiFrame, parse_rectangular_text
+from src.core.utils.ansi_encoder import AnsiEncoder
+from src.core.utils.terminal_diff import TerminalDiffRenderer
+
 # GTK player for aspect ratio preservation
 try:
     from .gtk_player import create_player_window
@@ -34,13 +39,38 @@ ASCII_CHAR_WIDTH = 8
 ASCII_CHAR_HEIGHT = 16
 
 
-def render_terminal(ascii_string):
+def render_terminal(ascii_string, encoder=None, diff_renderer=None):
     """
     Render ASCII art to terminal using ANSI color codes
-    
+
+    Rectangular frames go through an AnsiEncoder, which only emits a color
+    escape when the color changes along a row and tracks bytes per frame.
+    With a TerminalDiffRenderer only the cells that changed since the
+    previous frame are sent.
+
     Args:
-        ascii_string: String with ASCII art and ANSI color codes (§-separated format)
+        ascii_string: AsciiFrame, or string with ASCII art and ANSI color codes (§-separated format)
+        encoder: AnsiEncoder to use (default: shared 256-color encoder with run-length escapes)
+        diff_renderer: TerminalDiffRenderer to redraw only changed cells (optional)
     """
+    frame = ascii_string
+    if not isinstance(frame, AsciiFrame):
+        frame = parse_rectangular_text(ascii_string)
+        if frame is None:
+            if diff_renderer is not None:
+                diff_renderer.reset()
+            _render_terminal_ragged(ascii_string)
+            return
+
+    if diff_renderer is not None:
+        diff_renderer.render_frame(frame)
+        return
+
+    data = (encoder or get_terminal_encoder()).encode_frame(frame)
+    _write_terminal(ANSI_CLEAR_AND_HOME.encode('ascii') + data)
+
+
+def _render_terminal_ragged(ascii_string):
     output_buffer = []
     lines = ascii_string.split('\n')
 
@@ -63,6 +93,18 @@ def render_terminal(ascii_string):
     sys.stdout.flush()
 
 
+def _write_terminal(data):
+    # Write encoded bytes straight to the stdout buffer, skipping the text layer
+    sys.stdout.flush()
+    out = getattr(sys.stdout, 'buffer', None)
+    if out is None:
+        sys.stdout.write(data.decode('utf-8'))
+        sys.stdout.flush()
+        return
+    out.write(data)
+    out.flush()
+
+
 def ansi256_to_bgr(ansi_code):
     """
     Convert ANSI 256 color code to BGR tuple
@@ -102,17 +144,168 @@ def ansi256_to_bgr(ansi_code):
     return (255, 255, 255)  # Default to white
 
 
-def render_ascii_as_image(ascii_string, font_scale=ASCII_FONT_SCALE):
+def generate_ansi_palette_bgr():
+    """
+    Build the ANSI 256 palette used by the image renderers
+
+    Returns:
+        NumPy array (257, 3) uint8 in BGR order. Index 256 is the white
+        fallback that ansi256_to_bgr returns for out-of-range codes.
+    """
+    palette = np.zeros((257, 3), dtype=np.uint8)
+    for i in range(257):
+        palette[i] = ansi256_to_bgr(i)
+    return palette
+
+
+ANSI_PALETTE_BGR = generate_ansi_palette_bgr()
+
+_terminal_encoder = None
+
+
+def get_terminal_encoder():
+    """Shared AnsiEncoder used by render_terminal when none is given"""
+    global _terminal_encoder
+    if _terminal_encoder is None:
+        _terminal_encoder = create_terminal_encoder()
+    return _terminal_encoder
+
+
+def create_terminal_encoder(config=None):
+    """
+    Build an AnsiEncoder for the player
+
+    Args:
+        config: ConfigParser with [Player] run_length_colors / color_tolerance (optional)
+
+    Returns:
+        AnsiEncoder that can quantize ANSI 256 codes through ANSI_PALETTE_BGR
+    """
+    if config is None:
+        return AnsiEncoder(palette=ANSI_PALETTE_BGR[:256])
+    return AnsiEncoder.from_config(config, palette=ANSI_PALETTE_BGR[:256])
+
+
+def create_terminal_diff_renderer(config=None, encoder=None):
+    """
+    Build the cell-diff terminal back-end for the player
+
+    Args:
+        config: ConfigParser with [Player] terminal_diff / synchronized_output (optional)
+        encoder: AnsiEncoder shared with render_terminal (optional)
+
+    Returns:
+        TerminalDiffRenderer, or None when [Player] terminal_diff is disabled
+    """
+    if config is not None and not config.getboolean('Player', 'terminal_diff', fallback=True):
+        return None
+    return TerminalDiffRenderer.from_config(config, encoder or create_terminal_encoder(config))
+
+_glyph_atlases = {}
+
+
+def get_glyph_atlas(font_scale=ASCII_FONT_SCALE):
+    """
+    Return the (cached) glyph atlas for a font scale
+
+    Args:
+        font_scale: Font scale used to rasterize the glyphs
+
+    Returns:
+        GlyphAtlas shared by every render at this scale
+    """
+    atlas = _glyph_atlases.get(font_scale)
+    if atlas is None:
+        atlas = GlyphAtlas(font_scale, ASCII_CHAR_WIDTH, ASCII_CHAR_HEIGHT, ANSI_PALETTE_BGR,
+                           font=ASCII_FONT, thickness=ASCII_FONT_THICKNESS)
+        _glyph_atlases[font_scale] = atlas
+    return atlas
+
+
+def _parse_ascii_line(line):
+    pixels = line.split(COLOR_SEPARATOR)
+    chars_with_colors = []
+    for i in range(0, len(pixels) - 1, 2):
+        char = pixels[i]
+        code = pixels[i+1]
+        if char and code.isdigit():
+            chars_with_colors.append((char, int(code)))
+        elif char:
+            chars_with_colors.append((char, 255))
+    return chars_with_colors
+
+
+def parse_ascii_grid(ascii_frame, atlas, pool=None):
+    """
+    Map an ASCII frame onto atlas-row and color-code grids
+
+    Args:
+        ascii_frame: AsciiFrame, or string with ASCII art and ANSI color codes (§-separated format)
+        atlas: GlyphAtlas used to map characters to atlas rows
+        pool: Optional BufferPool holding the row/code grids between frames
+
+    Returns:
+        Tuple (rows, codes) of int32 arrays shaped (lines, max_width).
+        Missing cells of short lines map to the empty glyph.
+    """
+    if isinstance(ascii_frame, str):
+        frame = parse_rectangular_text(ascii_frame)
+        if frame is None:
+            return _parse_ragged_grid(ascii_frame, atlas)
+    else:
+        frame = ascii_frame
+
+    glyph_rows = atlas.lookup(list(frame.glyphs))
+    if pool is None:
+        return glyph_rows[frame.chars], frame.colors.astype(np.int32)
+    rows = np.take(glyph_rows, frame.chars, out=pool.get('grid.rows', frame.shape, np.int32), mode='clip')
+    codes = pool.get('grid.codes', frame.shape, np.int32)
+    np.copyto(codes, frame.colors)
+    return rows, codes
+
+
+def _parse_ragged_grid(ascii_string, atlas):
+    lines = ascii_string.split('\n')
+    parsed = [_parse_ascii_line(line) if line else [] for line in lines]
+    grid_w = max((len(cells) for cells in parsed), default=0)
+    rows = np.zeros((len(lines), grid_w), dtype=np.int32)
+    codes = np.zeros((len(lines), grid_w), dtype=np.int32)
+    for y, cells in enumerate(parsed):
+        if cells:
+            line_chars, line_codes = zip(*cells)
+            rows[y, :len(cells)] = atlas.lookup(line_chars)
+            codes[y, :len(cells)] = np.minimum(line_codes, len(ANSI_PALETTE_BGR) - 1)
+    return rows, codes
+
+
+def render_ascii_as_image(ascii_frame, font_scale=ASCII_FONT_SCALE, out=None, pool=None):
     """
     Convert ASCII art string to OpenCV image for window rendering
-    
+
+    Glyphs come from a pre-rasterized atlas tinted with the ANSI palette,
+    so the whole frame is composed with a few vectorized operations while
+    matching the per-character cv2.putText output pixel for pixel.
+
     Args:
-        ascii_string: String with ASCII art and ANSI color codes (§-separated format)
+        ascii_frame: AsciiFrame, or string with ASCII art and ANSI color codes (§-separated format)
         font_scale: Font scale for rendering (default: 0.4)
-    
+        out: Optional preallocated (lines*16, width*8, 3) uint8 buffer to render into
+        pool: Optional BufferPool for the per-frame scratch arrays (see FramePipeline)
+
     Returns:
         NumPy array (BGR format) of rendered ASCII art
     """
+    atlas = get_glyph_atlas(font_scale)
+    rows, codes = parse_ascii_grid(ascii_frame, atlas, pool)
+    return atlas.render(rows, codes, out=out, pool=pool)
+
+
+def render_ascii_as_image_legacy(ascii_string, font_scale=ASCII_FONT_SCALE):
+    """
+    Reference renderer drawing one cv2.putText/cv2.rectangle per cell
+
+    Kept for pixel-compatibility tests and benchmarks of render_ascii_as_image.
+    """
     lines = ascii_string.split('\n')
     
     # Parse lines and extract characters with colors
@@ -0,0 +1,307 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+import configparser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+
+from src.core.audio_utils import live_audio_args
+from src.core.frame_pipeline import FramePipeline, PipelineSettings
+from src.core.utils.ascii_video import (
+    A4R_EXTENSION, COMPRESSION_NONE, A4rReader, A4rWriter, TxtWriter, a4r_options_from_config, txt_compression_level,
+    txt_output_extension
+)
+from src.core.utils.ffmpeg_source import ffmpeg_available, probe_video
+from src.core.utils.postfx_loader import load_postfx_config, postfx_effects
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_FORMATS = ('txt', 'a4r', 'mp4', 'gif')
+# Frames de saida antes do inicio de cada segmento que so preparam o temporal coherence
+# (aproximam o estado da conversao continua; nao o reproduzem exatamente)
+TEMPORAL_PRIME_FRAMES = 4
+# Abaixo disso o custo de abrir o decoder/encoder de um processo nao compensa
+MIN_SEGMENT_FRAMES = 48
+_SEGMENT_EXTENSIONS = {'txt': A4R_EXTENSION, 'a4r': A4R_EXTENSION, 'mp4': '.mp4', 'gif': '.mkv'}
+
+
+@dataclass
+class Segment:
+    """Trecho [start, stop) do video, em indices da origem; stop None vai ate o fim."""
+    index: int
+    start: int
+    stop: Optional[int]
+    prime_frames: int = 0
+
+    def source_frames(self, total_frames: int) -> int:
+        stop = total_frames if self.stop is None else self.stop
+        return max(0, stop - self.start)
+
+
+@dataclass
+class SegmentResult:
+    """Segmento convertido por um processo (tempo em segundos)."""
+    index: int
+    path: str
+    frames: int
+    seconds: float
+
+
+def supports_segments(output_format: str, conversion_mode: str = 'ascii') -> bool:
+    """
+    Formatos que o modo segmentado sabe costurar (so o pipeline ASCII da
+    CPU). Exige ffmpeg: a busca do inicio de cada trecho pelo OpenCV nao e
+    exata em streams com B-frames ou VFR.
+    """
+    return output_format in SEGMENT_FORMATS and conversion_mode == 'ascii' and ffmpeg_available()
+
+
+def plan_segments(total_frames: int, jobs: int, prime_frames: int = 0,
+                  min_frames: int = MIN_SEGMENT_FRAMES) -> list:
+    """
+    Divide o video em ate `jobs` trechos contiguos de tamanho parecido, com
+    pelo menos min_frames frames cada. O ultimo vai ate o fim do video (a
+    contagem do container pode errar). Todos menos o primeiro comecam a
+    leitura prime_frames frames antes, para o temporal coherence chegar ao
+    inicio do trecho com um estado proximo ao de uma conversao continua.
+    E uma aproximacao: o limiar mantem pixels parados por tempo
+    indeterminado, entao celulas estaveis desde antes da sobreposicao podem
+    diferir da conversao serial na fronteira.
+    """
+    count = 1
+    if total_frames > 0:
+        count = max(1, min(int(jobs), total_frames // max(1, min_frames)))
+    bounds = [total_frames * i // count for i in range(count + 1)]
+    return [
+        Segment(i, bounds[i], bounds[i + 1] if i < count - 1 else None, prime_frames if i > 0 else 0)
+        for i in range(count)
+    ]
+
+
+def segment_output_path(video_path: str, output_dir: str, output_format: str, config: configparser.ConfigParser) -> str:
+    """Mesmo nome de arquivo que o conversor serial daquele formato gera."""
+    nome_base = os.path.splitext(os.path.basename(video_path))[0]
+    if output_format in ('mp4', 'gif'):
+        return os.path.join(output_dir, f"{nome_base}_ascii.{output_format}")
+    extensao = A4R_EXTENSION if output_format == 'a4r' else txt_output_extension(config)
+    return os.path.join(output_dir, f"{nome_base}{extensao}")
+
+
+def _config_to_dict(config: configparser.ConfigParser) -> dict:
+    # ConfigParser nao e serializavel de forma confiavel: vai para o processo como dict
+    return {section: dict(config.items(section, raw=True)) for section in config.sections()}
+
+
+def _config_from_dict(sections: dict) -> configparser.ConfigParser:
+    config = configparser.ConfigParser(interpolation=None)
+    config.read_dict(sections)
+    return config
+
+
+def _target_fps(config: configparser.ConfigParser, output_format: str) -> int:
+    if output_format in ('mp4', 'gif'):
+        return config.getint('Output', 'mp4_target_fps', fallback=0)
+    return 0
+
+
+def _segment_sink(output_format: str, segment_path: str, settings: PipelineSettings):
+    if output_format == 'mp4':
+        from src.core.mp4_converter import Mp4Sink
+        # O audio entra uma vez so, na concatenacao
+        return Mp4Sink(segment_path, audio=False)
+    if output_format == 'gif':
+        from src.core.gif_converter import SpoolSink
+        # Segmentos sem perda: a paleta sai uma vez so, sobre o video inteiro
+        return SpoolSink(segment_path)
+    from src.core.converter import A4rSink
+    # Segmentos de texto viram .a4r so de keyframes sem compressao: a costura le sem parse nem zlib
+    return A4rSink(segment_path, ramp=settings.luminance_ramp, keyframe_interval=1, compression=COMPRESSION_NONE)
+
+
+def convert_segment(video_path: str, config_sections: dict, output_format: str, segment: Segment,
+                    segment_path: str) -> SegmentResult:
+    """
+    Converte um segmento num processo do pool: busca o inicio do trecho no
+    video, passa os frames de sobreposicao so pelo pipeline e grava os
+    frames do trecho em segment_path.
+    """
+    # Cada processo ja ocupa um nucleo; threads internas do OpenCV so disputariam CPU
+    cv2.setNumThreads(1)
+    start = time.perf_counter()
+    config = _config_from_dict(config_sections)
+    # MP4/GIF usam a magnitude do Sobel crua, como na conversao sem segmentos
+    pipeline = FramePipeline.from_config(config, edge_normalize=output_format not in ('mp4', 'gif'),
+                                         target_fps=_target_fps(config, output_format))
+    pipeline.run(video_path, _segment_sink(output_format, segment_path, pipeline.settings),
+                 start_frame=segment.start, stop_frame=segment.stop, prime_frames=segment.prime_frames)
+    return SegmentResult(segment.index, segment_path, pipeline.frames_written, time.perf_counter() - start)
+
+
+def concat_list(paths: list) -> str:
+    """Lista de arquivos no formato do demuxer concat do ffmpeg."""
+    lines = []
+    for path in paths:
+        escaped = os.path.abspath(path).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'\n")
+    return ''.join(lines)
+
+
+def ffmpeg_concat_command(list_path: str, output_path: str, source_path: str, audio: bool = True) -> list:
+    """
+    MP4: os segmentos tem os mesmos parametros de encode, entao o video e
+    copiado sem recodificar e o audio do original e muxado aqui.
+    """
+    return ['ffmpeg', '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+            *(live_audio_args(source_path) if audio else []),
+            '-c:v', 'copy', '-movflags', '+faststart', output_path]
+
+
+def concat_video_segments(paths: list, output_path: str, output_format: str, source_path: str,
+                          gif_palette: str = 'ansi') -> str:
+    """
+    Costura os segmentos com o demuxer concat do ffmpeg. No GIF os
+    segmentos sao intermediarios sem perda (FFV1): com paleta adaptativa o
+    palettegen roda sobre todos eles e o paletteuse gera o GIF; com a
+    paleta ANSI o GIF sai num passo so.
+    """
+    from src.core.gif_converter import (
+        ffmpeg_ansi_gif_command, ffmpeg_palettegen_command, ffmpeg_paletteuse_command, run_ffmpeg
+    )
+    temp_dir = os.path.dirname(paths[0])
+    list_path = os.path.join(temp_dir, "segments.txt")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        f.write(concat_list(paths))
+    concat_input = ['-f', 'concat', '-safe', '0', '-i', list_path]
+    try:
+        if output_format == 'mp4':
+            try:
+                run_ffmpeg(ffmpeg_concat_command(list_path, output_path, source_path), "Erro ao concatenar segmentos")
+            except RuntimeError as e:
+                # Como no mux antigo: se o audio derruba o concat, o MP4 sai so com video
+                logger.warning("Concat com audio falhou, gerando MP4 sem audio: %s", e)
+                run_ffmpeg(ffmpeg_concat_command(list_path, output_path, source_path, audio=False),
+                           "Erro ao concatenar segmentos")
+        elif gif_palette == 'ansi':
+            run_ffmpeg(ffmpeg_ansi_gif_command(concat_input, output_path), "Erro ao concatenar segmentos")
+        else:
+            palette_path = os.path.join(temp_dir, "palette.png")
+            run_ffmpeg(ffmpeg_palettegen_command(concat_input, palette_path), "Erro ao gerar paleta do GIF")
+            run_ffmpeg(ffmpeg_paletteuse_command(concat_input, palette_path, output_path), "Erro ao concatenar segmentos")
+    except BaseException:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    return output_path
+
+
+def concat_ascii_segments(paths: list, output_path: str, config: configparser.ConfigParser) -> str:
+    """Concatena os frames dos segmentos .a4r no .txt (comprimido ou nao) ou .a4r final."""
+    with A4rReader(paths[0]) as first:
+        fps, width, height, ramp = first.fps, first.width, first.height, first.ramp
+    if output_path.lower().endswith(A4R_EXTENSION):
+        writer = A4rWriter(output_path, fps, width, height, ramp=ramp, **a4r_options_from_config(config))
+    else:
+        writer = TxtWriter(output_path, fps, level=txt_compression_level(config))
+    with writer:
+        for path in paths:
+            with A4rReader(path) as reader:
+                for frame in reader:
+                    writer.write_frame(frame)
+    return output_path
+
+
+def _source_frame_count(video_path: str) -> int:
+    if ffmpeg_available():
+        try:
+            return probe_video(video_path).frames
+        except IOError as e:
+            logger.warning(f"ffprobe falhou, usando OpenCV: {e}")
+    capture = cv2.VideoCapture(video_path)
+    try:
+        return max(0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+    finally:
+        capture.release()
+
+
+def _convert_serial(video_path: str, output_dir: str, config: configparser.ConfigParser, output_format: str,
+                    progress_callback=None) -> str:
+    if output_format == 'mp4':
+        from src.core.mp4_converter import converter_video_para_mp4
+        return converter_video_para_mp4(video_path, output_dir, config, progress_callback=progress_callback)
+    if output_format == 'gif':
+        from src.core.gif_converter import converter_video_para_gif
+        return converter_video_para_gif(video_path, output_dir, config, progress_callback=progress_callback)
+    from src.core.converter import iniciar_conversao
+    return iniciar_conversao(video_path, output_dir, config)
+
+
+def converter_video_em_segmentos(video_path: str, output_dir: str, config: configparser.ConfigParser, jobs: int,
+                                 progress_callback=None) -> str:
+    """
+    Converte o video em ate `jobs` processos, um trecho de tempo por
+    processo, e costura os segmentos: demuxer concat do ffmpeg para MP4/GIF
+    e concatenacao de frames para TXT/A4R. O resultado tem o mesmo nome e
+    formato da conversao serial. Videos curtos demais para dividir seguem
+    pelo conversor serial.
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video nao encontrado: {video_path}")
+    output_format = config.get('Output', 'format', fallback='txt').lower()
+    if output_format not in SEGMENT_FORMATS:
+        raise ValueError(f"Formato sem suporte a conversao segmentada: {output_format}")
+
+    settings = PipelineSettings.from_config(config)
+    gif_palette = 'ansi'
+    if output_format == 'gif':
+        from src.core.gif_converter import gif_palette_from_config
+        gif_palette = gif_palette_from_config(config, bool(postfx_effects(load_postfx_config(config))))
+    total_frames = _source_frame_count(video_path)
+    prime_frames = TEMPORAL_PRIME_FRAMES if settings.temporal_enabled else 0
+    segments = plan_segments(total_frames, jobs, prime_frames)
+    if len(segments) == 1:
+        logger.info(f"Video curto para dividir ({total_frames} frames), convertendo em um processo")
+        return _convert_serial(video_path, output_dir, config, output_format, progress_callback)
+
+    output_path = segment_output_path(video_path, output_dir, output_format, config)
+    logger.info(f"Conversao segmentada: {len(segments)} segmentos de ~{total_frames // len(segments)} frames")
+
+    temp_dir = tempfile.mkdtemp(prefix=".ascii_segments_", dir=output_dir)
+    try:
+        sections = _config_to_dict(config)
+        extension = _SEGMENT_EXTENSIONS[output_format]
+        results = []
+        done_frames = 0
+        with ProcessPoolExecutor(max_workers=len(segments)) as pool:
+            futures = {
+                pool.submit(convert_segment, video_path, sections, output_format, segment,
+                            os.path.join(temp_dir, f"segment_{segment.index:03d}{extension}")): segment
+                for segment in segments
+            }
+            for future in as_completed(futures):
+                segment = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    for pending in futures:
+                        pending.cancel()
+                    raise RuntimeError(f"Segmento {segment.index} falhou: {e}") from e
+                results.append(result)
+                logger.info(f"Segmento {result.index}: {result.frames} frames em {result.seconds:.1f}s")
+                done_frames += segment.source_frames(total_frames)
+                if progress_callback:
+                    progress_callback(min(done_frames, total_frames), total_frames)
+
+        paths = [result.path for result in sorted(results, key=lambda r: r.index)]
+        if output_format in ('mp4', 'gif'):
+            concat_video_segments(paths, output_path, output_format, video_path, gif_palette)
+        else:
+            concat_ascii_segments(paths, output_path, config)
+        logger.info(f"Segmentos costurados em: {output_path}")
+        return output_path
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
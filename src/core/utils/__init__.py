@@ -1,10 +1,24 @@
 from .color import rgb_to_ansi256
 from .image import sharpen_frame, apply_morphological_refinement
 from .ascii_converter import converter_frame_para_ascii
+from .ascii_frame import AsciiFrame
+from .edges import EdgeFeatures, compute_edge_features
+from .buffer_pool import BufferPool
+from .frame_source import FrameSource, SourceFrame
+from .encoder_sink import EncoderSink
+from .video_recorder import VideoRecorder
 
 __all__ = [
     'rgb_to_ansi256',
     'sharpen_frame',
     'apply_morphological_refinement',
     'converter_frame_para_ascii',
+    'AsciiFrame',
+    'EdgeFeatures',
+    'compute_edge_features',
+    'BufferPool',
+    'FrameSource',
+    'SourceFrame',
+    'EncoderSink',
+    'VideoRecorder',
 ]
@@ -0,0 +1,147 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .ascii_frame import ANSI_RESET, AsciiFrame, _ANSI_TOKENS, _token_table, glyph_tokens, serialize_cells
+from .color import rgb_to_ansi256_lut
+
+# Escape truecolor "\033[38;2;R;G;Bm" em tres tokens pre-codificados por
+# componente (0-255); o prefixo vai junto do vermelho e o "m" do azul.
+_TRUECOLOR_R = _token_table(f"\033[38;2;{value};" for value in range(256))
+_TRUECOLOR_G = _token_table(f"{value};" for value in range(256))
+_TRUECOLOR_B = _token_table(f"{value}m" for value in range(256))
+
+_RESET_BYTES = ANSI_RESET.encode('ascii')
+
+
+def repeated_color_mask(colors: np.ndarray) -> np.ndarray:
+    """
+    True nas celulas cuja cor e igual a da celula a esquerda (o escape pode
+    ser omitido). A primeira coluna sempre emite, para cada linha valer
+    sozinha. Aceita codigos (altura, largura) ou cores (altura, largura, 3).
+    """
+    same = np.zeros(colors.shape[:2], dtype=bool)
+    equal = colors[:, 1:] == colors[:, :-1]
+    if equal.ndim == 3:
+        equal = equal.all(axis=2)
+    same[:, 1:] = equal
+    return same
+
+
+def encode_ansi256(chars: np.ndarray, glyphs: str, codes: np.ndarray, reset: bool = True, run_length: bool = True) -> bytes:
+    """Grade de indices em `glyphs` + codigos ANSI 256 -> bytes para o terminal."""
+    repeated = repeated_color_mask(codes) if run_length else None
+    body = serialize_cells([
+        (_ANSI_TOKENS, codes, repeated),
+        (glyph_tokens(glyphs), chars),
+    ], chars.shape)
+    return body + _RESET_BYTES if reset else body
+
+
+def encode_truecolor(chars: np.ndarray, glyphs: str, color_frame: np.ndarray, reset: bool = True, run_length: bool = True) -> bytes:
+    """Grade de indices em `glyphs` + cores BGR -> bytes com escapes 24-bit."""
+    repeated = repeated_color_mask(color_frame) if run_length else None
+    body = serialize_cells([
+        (_TRUECOLOR_R, color_frame[..., 2], repeated),
+        (_TRUECOLOR_G, color_frame[..., 1], repeated),
+        (_TRUECOLOR_B, color_frame[..., 0], repeated),
+        (glyph_tokens(glyphs), chars),
+    ], chars.shape)
+    return body + _RESET_BYTES if reset else body
+
+
+@lru_cache(maxsize=16)
+def _quantize_lut(tolerance: int) -> np.ndarray:
+    # Degraus de (tolerance + 1) niveis por canal, representados pelo centro
+    step = tolerance + 1
+    levels = np.arange(256)
+    return np.minimum(levels // step * step + step // 2, 255).astype(np.uint8)
+
+
+def quantize_colors(color_frame: np.ndarray, tolerance: int) -> np.ndarray:
+    """Cores BGR com cada canal levado ao centro de um degrau de tolerance + 1 niveis."""
+    if tolerance <= 0:
+        return color_frame
+    return _quantize_lut(tolerance).take(color_frame)
+
+
+class AnsiEncoder:
+    """
+    Codifica frames para o terminal e conta os bytes gerados.
+
+    Com run_length o escape de cor so e emitido quando a cor muda ao longo
+    da linha. color_tolerance > 0 quantiza as cores antes (degraus de
+    color_tolerance + 1 niveis por canal), juntando celulas de cores
+    proximas no mesmo run. Para frames que ja chegam em codigos ANSI 256 a
+    quantizacao precisa da paleta BGR desses codigos (`palette`).
+    """
+
+    def __init__(self, truecolor: bool = False, run_length: bool = True, color_tolerance: int = 0, palette: np.ndarray = None):
+        self.truecolor = truecolor
+        self.run_length = run_length
+        self.color_tolerance = max(0, int(color_tolerance))
+        self.palette = palette
+        self._code_remap = None
+        self.frames = 0
+        self.total_bytes = 0
+        self.last_frame_bytes = 0
+
+    @classmethod
+    def from_config(cls, config, truecolor: bool = False, palette: np.ndarray = None) -> "AnsiEncoder":
+        return cls(
+            truecolor=truecolor,
+            run_length=config.getboolean('Player', 'run_length_colors', fallback=True),
+            color_tolerance=config.getint('Player', 'color_tolerance', fallback=0),
+            palette=palette,
+        )
+
+    @property
+    def bytes_per_frame(self) -> float:
+        return self.total_bytes / self.frames if self.frames else 0.0
+
+    def _remap_codes(self, codes: np.ndarray) -> np.ndarray:
+        if self.color_tolerance <= 0 or self.palette is None:
+            return codes
+        if self._code_remap is None:
+            # Codigo -> codigo da cor da paleta quantizada (tabela de 256 entradas)
+            palette = np.ascontiguousarray(self.palette[:256], dtype=np.uint8)[None]
+            self._code_remap = rgb_to_ansi256_lut(quantize_colors(palette, self.color_tolerance))[0]
+        return self._code_remap.take(codes)
+
+    def prepare_colors(self, colors: np.ndarray) -> np.ndarray:
+        """
+        Cores como vao para o terminal: BGR quantizado no modo truecolor,
+        senao codigos ANSI 256 (remapeados pela tolerancia).
+        """
+        if colors.ndim == 3:
+            colors = quantize_colors(colors, self.color_tolerance)
+            return colors if self.truecolor else rgb_to_ansi256_lut(colors)
+        return self._remap_codes(colors)
+
+    def color_segments(self, colors: np.ndarray, omit: np.ndarray = None) -> list:
+        """Segmentos de serialize_cells com o escape de cor de cada celula (cores ja preparadas)."""
+        if colors.ndim == 3:
+            return [
+                (_TRUECOLOR_R, colors[..., 2], omit),
+                (_TRUECOLOR_G, colors[..., 1], omit),
+                (_TRUECOLOR_B, colors[..., 0], omit),
+            ]
+        return [(_ANSI_TOKENS, colors, omit)]
+
+    def record(self, data: bytes) -> bytes:
+        self.frames += 1
+        self.last_frame_bytes = len(data)
+        self.total_bytes += len(data)
+        return data
+
+    def encode(self, chars: np.ndarray, glyphs: str, colors: np.ndarray, reset: bool = True) -> bytes:
+        """colors e um plano de codigos ANSI 256 ou um frame BGR (altura, largura, 3)."""
+        colors = self.prepare_colors(colors)
+        if colors.ndim == 3:
+            data = encode_truecolor(chars, glyphs, colors, reset, self.run_length)
+        else:
+            data = encode_ansi256(chars, glyphs, colors, reset, self.run_length)
+        return self.record(data)
+
+    def encode_frame(self, frame: AsciiFrame, reset: bool = True) -> bytes:
+        return self.encode(frame.chars, frame.glyphs, frame.colors, reset)
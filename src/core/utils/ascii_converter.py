@@ -1,7 +1,10 @@
 import numpy as np
-from .color import rgb_to_ansi256, rgb_to_ansi256_vectorized
+from typing import Union
+from .color import rgb_to_ansi256, rgb_to_ansi256_lut
+from .ascii_frame import AsciiFrame, COLOR_SEPARATOR, EDGE_CHARS, MASK_COLOR
+from .edges import orientation_from_angle
+from .ramp import compile_ramp
 
-COLOR_SEPARATOR = "§"
 LUMINANCE_RAMP_DEFAULT = "$@B8&WM#*oahkbdpqwmZO0QLCJUYXzcvunxrjft/\\|()1{}[]?-_+~<>i!lI;:,\"^`'. "
 
 
@@ -16,62 +19,85 @@ def converter_frame_para_ascii(
     output_format: str = "file",
     edge_boost_enabled: bool = False,
     edge_boost_amount: int = 100,
-    use_edge_chars: bool = True
-) -> str:
-    height, width = gray_frame.shape
-    ramp_len = len(luminance_ramp)
-    ramp_array = np.array(list(luminance_ramp))
+    use_edge_chars: bool = True,
+    pool=None
+) -> Union[str, AsciiFrame]:
+    # Com um BufferPool os intermediarios e os arrays do AsciiFrame vem do
+    # pool: o frame devolvido so vale ate a proxima chamada com o mesmo pool.
+    if pool is not None:
+        return _converter_frame_into(
+            gray_frame, color_frame, mask, magnitude_frame, angle_frame,
+            sobel_threshold, luminance_ramp, output_format,
+            edge_boost_enabled, edge_boost_amount, use_edge_chars, pool
+        )
+
+    compiled = compile_ramp(luminance_ramp)
+    edge_base = compiled.edge_base
 
     is_edge = magnitude_frame > sobel_threshold
 
     if edge_boost_enabled:
-        brightness = gray_frame.astype(np.int32)
-        edge_boost = is_edge.astype(np.int32) * edge_boost_amount
-        brightness = np.clip(brightness + edge_boost, 0, 255)
-        lum_indices = ((brightness / 255) * (ramp_len - 1)).astype(np.int32)
+        chars = compiled.lookup(gray_frame, is_edge, edge_boost_amount)
     else:
-        lum_indices = ((gray_frame / 255) * (ramp_len - 1)).astype(np.int32)
+        chars = compiled.lookup(gray_frame)
+
+    if use_edge_chars:
+        # angle_frame e o plano de orientacao de EdgeFeatures (indice em
+        # EDGE_CHARS); angulos em radianos ainda sao aceitos
+        if np.issubdtype(angle_frame.dtype, np.integer):
+            orientation = angle_frame
+        else:
+            orientation = orientation_from_angle(angle_frame)
+        edge_chars = orientation.astype(chars.dtype) + chars.dtype.type(edge_base)
+        chars = np.where(is_edge, edge_chars, chars)
+
+    ansi_codes = rgb_to_ansi256_lut(color_frame)
+
+    is_masked = mask > 127
+    chars[is_masked] = compiled.mask_index
+    ansi_codes[is_masked] = MASK_COLOR
+
+    frame = AsciiFrame(chars=chars, colors=ansi_codes, glyphs=compiled.glyphs, ramp=luminance_ramp)
+    return _format_output(frame, output_format)
 
-    chars = ramp_array[lum_indices].copy()
+
+def _converter_frame_into(
+    gray_frame, color_frame, mask, magnitude_frame, angle_frame,
+    sobel_threshold, luminance_ramp, output_format,
+    edge_boost_enabled, edge_boost_amount, use_edge_chars, pool
+):
+    compiled = compile_ramp(luminance_ramp)
+    shape = gray_frame.shape
+
+    is_edge = np.greater(magnitude_frame, sobel_threshold, out=pool.get('ascii.is_edge', shape, bool))
+
+    if edge_boost_enabled:
+        chars = compiled.lookup(gray_frame, is_edge, edge_boost_amount, pool=pool)
+    else:
+        chars = compiled.lookup(gray_frame, pool=pool)
 
     if use_edge_chars:
-        angle_degrees = angle_frame * (180 / np.pi)
-        angle_degrees = (angle_degrees + 180) % 180
+        if np.issubdtype(angle_frame.dtype, np.integer):
+            orientation = angle_frame
+        else:
+            orientation = orientation_from_angle(angle_frame)
+        edge_chars = pool.get('ascii.edge_chars', shape, chars.dtype)
+        np.add(orientation, compiled.edge_base, out=edge_chars, dtype=chars.dtype)
+        np.copyto(chars, edge_chars, where=is_edge)
 
-        slash_mask = is_edge & (((angle_degrees >= 22.5) & (angle_degrees < 67.5)) |
-                                ((angle_degrees >= 157.5) & (angle_degrees < 202.5)))
-        pipe_mask = is_edge & (((angle_degrees >= 67.5) & (angle_degrees < 112.5)) |
-                               ((angle_degrees >= 247.5) & (angle_degrees < 292.5)))
-        backslash_mask = is_edge & (((angle_degrees >= 112.5) & (angle_degrees < 157.5)) |
-                                    ((angle_degrees >= 292.5) & (angle_degrees < 337.5)))
-        dash_mask = is_edge & ~(slash_mask | pipe_mask | backslash_mask)
+    ansi_codes = rgb_to_ansi256_lut(color_frame, pool)
 
-        chars[slash_mask] = '/'
-        chars[pipe_mask] = '|'
-        chars[backslash_mask] = '\\'
-        chars[dash_mask] = '-'
+    is_masked = np.greater(mask, 127, out=pool.get('ascii.is_masked', shape, bool))
+    np.copyto(chars, compiled.mask_index, where=is_masked)
+    np.copyto(ansi_codes, MASK_COLOR, where=is_masked)
 
-    ansi_codes = rgb_to_ansi256_vectorized(color_frame)
+    frame = AsciiFrame(chars=chars, colors=ansi_codes, glyphs=compiled.glyphs, ramp=luminance_ramp)
+    return _format_output(frame, output_format)
 
-    is_masked = mask > 127
-    chars[is_masked] = ' '
-    ansi_codes[is_masked] = 232
 
+def _format_output(frame: AsciiFrame, output_format: str) -> Union[str, AsciiFrame]:
+    if output_format == "frame":
+        return frame
     if output_format == "file":
-        lines = []
-        for y in range(height):
-            row_chars = chars[y]
-            row_codes = ansi_codes[y]
-            line = COLOR_SEPARATOR.join(
-                f"{c}{COLOR_SEPARATOR}{code}" for c, code in zip(row_chars, row_codes)
-            ) + COLOR_SEPARATOR
-            lines.append(line)
-        return "\n".join(lines)
-    else:
-        lines = []
-        for y in range(height):
-            row_chars = chars[y]
-            row_codes = ansi_codes[y]
-            line = "".join(f"\033[38;5;{code}m{c}" for c, code in zip(row_chars, row_codes))
-            lines.append(line)
-        return "\n".join(lines) + "\033[0m"
+        return frame.to_text()
+    return frame.to_ansi()
@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+COLOR_SEPARATOR = "§"
+ANSI_RESET = "\033[0m"
+EDGE_CHARS = "/|\\-"
+MASK_CHAR = " "
+MASK_COLOR = 232
+DEFAULT_COLOR = 255
+
+
+@dataclass
+class AsciiFrame:
+    """
+    Frame ASCII em forma de arrays, sem passar pelo texto "c§code§".
+
+    chars guarda indices para `glyphs` (uint8, ou uint16 quando a tabela
+    passa de 256 simbolos) e colors o codigo ANSI 256 de cada celula. A
+    serializacao para o formato legado so acontece na borda de arquivo
+    (to_text) ou do terminal (to_ansi).
+    """
+    chars: np.ndarray
+    colors: np.ndarray
+    glyphs: str
+    ramp: str = ""
+
+    @property
+    def shape(self) -> tuple:
+        return self.chars.shape
+
+    @property
+    def height(self) -> int:
+        return self.chars.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.chars.shape[1]
+
+    def copy(self) -> "AsciiFrame":
+        """Copia independente (frames do FramePipeline usam buffers reaproveitados)."""
+        return AsciiFrame(chars=self.chars.copy(), colors=self.colors.copy(), glyphs=self.glyphs, ramp=self.ramp)
+
+    def char_array(self) -> np.ndarray:
+        return np.array(list(self.glyphs))[self.chars]
+
+    def codepoints(self) -> np.ndarray:
+        table = np.frombuffer(self.glyphs.encode('utf-32-le'), dtype=np.uint32)
+        return table[self.chars]
+
+    def to_text(self) -> str:
+        # Cada celula vira "c§code§"; linhas separadas por "\n"
+        return self.to_text_bytes().decode('utf-8')
+
+    def to_text_bytes(self) -> bytes:
+        return _serialize(glyph_tokens(self.glyphs), self.chars, _COLOR_TOKENS, self.colors)
+
+    def to_ansi(self) -> str:
+        # Cada celula vira "\033[38;5;{code}m{c}", com reset no final
+        body = _serialize(_ANSI_TOKENS, self.colors, glyph_tokens(self.glyphs), self.chars)
+        return body.decode('utf-8') + ANSI_RESET
+
+    @classmethod
+    def from_text(cls, text: str) -> "AsciiFrame":
+        """
+        Le um frame no formato legado "c§code§c§code§...".
+
+        Linhas curtas sao completadas com celulas mascaradas; codigos de cor
+        invalidos viram DEFAULT_COLOR, como no renderizador de imagem.
+        """
+        frame = parse_rectangular_text(text)
+        if frame is not None:
+            return frame
+
+        lines = text.split('\n')
+        height = len(lines)
+        rows = []
+        for line in lines:
+            cells = []
+            parts = line.split(COLOR_SEPARATOR)
+            for i in range(0, len(parts) - 1, 2):
+                char, code = parts[i], parts[i + 1]
+                if char:
+                    cells.append((char[0], min(int(code), 255) if code.isdigit() else DEFAULT_COLOR))
+            rows.append(cells)
+
+        width = max((len(cells) for cells in rows), default=0)
+        glyph_index = {MASK_CHAR: 0}
+        chars = np.zeros((height, width), dtype=np.int64)
+        colors = np.full((height, width), MASK_COLOR, dtype=np.uint8)
+        for y, cells in enumerate(rows):
+            for x, (char, code) in enumerate(cells):
+                chars[y, x] = glyph_index.setdefault(char, len(glyph_index))
+                colors[y, x] = code
+        glyphs = ''.join(glyph_index)
+        return cls(chars=chars.astype(glyph_index_dtype(len(glyphs))), colors=colors, glyphs=glyphs)
+
+
+def _token_table(tokens) -> tuple:
+    # Tokens pre-codificados em UTF-8, numa tabela de largura fixa + comprimentos
+    encoded = [token.encode('utf-8') for token in tokens]
+    width = max(len(token) for token in encoded)
+    table = np.frombuffer(b''.join(token.ljust(width, b'\0') for token in encoded), dtype=np.uint8)
+    lengths = np.array([len(token) for token in encoded], dtype=np.intp)
+    return table.reshape(len(encoded), width), lengths
+
+
+_COLOR_TOKENS = _token_table(f"{COLOR_SEPARATOR}{code}{COLOR_SEPARATOR}" for code in range(256))
+_ANSI_TOKENS = _token_table(f"\033[38;5;{code}m" for code in range(256))
+
+
+@lru_cache(maxsize=32)
+def glyph_tokens(glyphs: str) -> tuple:
+    return _token_table(glyphs)
+
+
+def _serialize(first_tokens: tuple, first: np.ndarray, second_tokens: tuple, second: np.ndarray) -> bytes:
+    return serialize_cells([(first_tokens, first), (second_tokens, second)], first.shape)
+
+
+def serialize_cells(segments, shape: tuple, newline: bytes = b'\n') -> bytes:
+    """
+    Concatena, por celula, um token de cada segmento e junta as linhas com
+    `newline` usando so gathers e uma mascara sobre buffers de largura fixa.
+
+    Cada segmento e (tabela, indices) ou (tabela, indices, omitir): indices
+    e um plano (altura, largura) de linhas da tabela, ou None para o token
+    0 em todas as celulas; omitir e uma mascara opcional de celulas em que
+    o segmento nao e emitido.
+    """
+    height, width = shape
+    if height == 0:
+        return b''
+    widths = [tokens[0].shape[1] for tokens, *_ in segments]
+    cell = sum(widths)
+    line = width * cell + len(newline)
+    buf = np.empty((height, line), dtype=np.uint8)
+    keep = np.empty(buf.shape, dtype=bool)
+    cells = buf[:, :width * cell].reshape(height, width, cell)
+    keep_cells = keep[:, :width * cell].reshape(height, width, cell)
+
+    offset = 0
+    for (tokens, index, *omit), n in zip(segments, widths):
+        table, lengths = tokens
+        span = slice(offset, offset + n)
+        if index is None:
+            cells[..., span] = table[0]
+            keep_cells[..., span] = np.arange(n) < lengths[0]
+        else:
+            cells[..., span] = table[index]
+            keep_cells[..., span] = np.arange(n) < lengths[index][..., None]
+        if omit and omit[0] is not None:
+            keep_cells[..., span] &= ~omit[0][..., None]
+        offset += n
+
+    buf[:, width * cell:] = np.frombuffer(newline, dtype=np.uint8)
+    keep[:, width * cell:] = True
+    keep[-1, width * cell:] = False
+    return buf[keep].tobytes()
+
+
+def glyph_index_dtype(n_glyphs: int):
+    return np.uint8 if n_glyphs <= 256 else np.uint16
+
+
+def parse_rectangular_text(text: str) -> Optional[AsciiFrame]:
+    """
+    Caminho rapido de AsciiFrame.from_text: frame retangular com um
+    caractere e um codigo numerico por celula, como o gerado por
+    converter_frame_para_ascii. Retorna None se o texto nao se encaixa.
+    """
+    lines = text.split('\n')
+    pixels = text.replace('\n', '').split(COLOR_SEPARATOR)
+    chars = pixels[0:len(pixels) - 1:2]
+    codes = pixels[1:len(pixels):2]
+    height = len(lines)
+    width = len(chars) // height if height else 0
+
+    cell_text = ''.join(chars)
+    code_text = ' '.join(codes)
+    if not (width and len(cell_text) == len(chars) == width * height
+            and code_text.replace(' ', '').isdecimal()
+            and all(line.count(COLOR_SEPARATOR) == 2 * width for line in lines)):
+        return None
+
+    codepoints = np.frombuffer(cell_text.encode('utf-32-le'), dtype=np.uint32)
+    table, indices = np.unique(codepoints, return_inverse=True)
+    glyphs = table.astype('<u4').tobytes().decode('utf-32-le')
+    colors = np.minimum(np.fromstring(code_text, dtype=np.int64, sep=' '), 255)
+    return AsciiFrame(
+        chars=indices.astype(glyph_index_dtype(len(glyphs))).reshape(height, width),
+        colors=colors.astype(np.uint8).reshape(height, width),
+        glyphs=glyphs
+    )
@@ -0,0 +1,695 @@
+import gzip
+import mmap
+import os
+import queue
+import re
+import struct
+import threading
+import uuid
+import zlib
+
+import numpy as np
+
+from .ascii_frame import AsciiFrame
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+A4R_EXTENSION = ".a4r"
+A4R_MAGIC = b"A4R\x00"
+A4R_INDEX_MAGIC = b"A4RI"
+A4R_VERSION = 2
+
+FRAME_KEY = 0
+FRAME_DELTA = 1
+DEFAULT_KEYFRAME_INTERVAL = 30
+
+# Frames entre flushes do arquivo em gravacao
+FLUSH_INTERVAL = 30
+
+# .txt comprimido em stream: extensao do arquivo por metodo
+TXT_COMPRESSION_EXTENSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+DEFAULT_TXT_COMPRESSION_LEVEL = 6
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_READ_CHUNK = 1 << 20
+
+# Frames decodificados antes da reproducao (read_ahead)
+DEFAULT_READ_AHEAD = 8
+
+PALETTE_ANSI256 = 0
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_NAMES = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB}
+
+# magic, versao, flags, fps, largura, altura, paleta, compressao, bytes da rampa
+_HEADER = struct.Struct("<4sHHdHHBBH")
+# offset do indice, numero de frames, magic do indice
+_FOOTER = struct.Struct("<QI4s")
+_GLYPHS_SIZE = struct.Struct("<I")
+
+_TXT_SEPARATOR = b"[FRAME]\n"
+_NON_BLANK = re.compile(rb"\S")
+# magic, tamanho e mtime do .txt, numero de frames; depois pares (inicio, fim)
+_TXT_INDEX_HEADER = struct.Struct("<4sQqI")
+_TXT_INDEX_MAGIC = b"A4TI"
+
+
+def _open_temp(path: str):
+    """Arquivo temporario no mesmo diretorio de `path` (o rename final fica atomico)."""
+    directory, name = os.path.split(os.path.abspath(path))
+    temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.part")
+    return open(temp_path, 'xb'), temp_path
+
+
+class _StreamingWriter:
+    """
+    Base dos writers: os frames vao para um temporario ao lado do destino
+    assim que chegam (flush a cada FLUSH_INTERVAL frames) e close() troca
+    o temporario pelo destino com os.replace. Uma falha no meio nunca deixa
+    um arquivo pela metade no lugar do destino.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._count = 0
+        self._file, self._temp_path = _open_temp(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _wrote_frame(self):
+        self._count += 1
+        if self._count % FLUSH_INTERVAL == 0:
+            self._file.flush()
+
+    def _finish(self):
+        pass
+
+    def close(self) -> str:
+        if self._file is None:
+            return self.path
+        try:
+            self._finish()
+            self._file.close()
+            os.replace(self._temp_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+        self._file = None
+        return self.path
+
+    def abort(self):
+        """Descarta o arquivo incompleto."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            try:
+                os.remove(self._temp_path)
+            except OSError:
+                pass
+
+
+class TxtWriter(_StreamingWriter):
+    """
+    Formato .txt legado: fps na primeira linha e frames "c§code§" separados
+    por [FRAME]. Com destino .gz (ou .zst, se o modulo zstandard estiver
+    instalado) o texto e comprimido em stream com o nivel `level`.
+    """
+
+    def __init__(self, path: str, fps: float, level: int = DEFAULT_TXT_COMPRESSION_LEVEL):
+        super().__init__(path)
+        try:
+            self._stream = _compressed_stream(self._file, path, level)
+            self._stream.write(f"{fps}\n".encode('utf-8'))
+        except BaseException:
+            self.abort()
+            raise
+
+    def write_frame(self, frame: AsciiFrame):
+        if self._count:
+            self._stream.write(_TXT_SEPARATOR)
+        self._stream.write(frame.to_text_bytes())
+        self._wrote_frame()
+
+    def _finish(self):
+        if self._stream is not self._file:
+            self._stream.close()
+
+    def abort(self):
+        stream = getattr(self, '_stream', None)
+        if stream is not None and stream is not self._file and self._file is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+        super().abort()
+
+
+def _compressed_stream(raw, path: str, level: int):
+    lower = path.lower()
+    if lower.endswith(TXT_COMPRESSION_EXTENSIONS['gzip']):
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=min(max(level, 1), 9), mtime=0)
+    if lower.endswith(TXT_COMPRESSION_EXTENSIONS['zstd']):
+        if not ZSTD_AVAILABLE:
+            raise ImportError("Compressao zstd requer o modulo 'zstandard' (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+    return raw
+
+
+def txt_output_extension(config) -> str:
+    """Extensao da saida texto conforme [Output] txt_compression (zstd cai para gzip sem o modulo)."""
+    method = config.get('Output', 'txt_compression', fallback='none').lower()
+    if method == 'zstd' and not ZSTD_AVAILABLE:
+        method = 'gzip'
+    return ".txt" + TXT_COMPRESSION_EXTENSIONS.get(method, '')
+
+
+def txt_compression_level(config) -> int:
+    return config.getint('Output', 'txt_compression_level', fallback=DEFAULT_TXT_COMPRESSION_LEVEL)
+
+
+class A4rWriter(_StreamingWriter):
+    """
+    Container binario .a4r para videos ASCII.
+
+    Layout: cabecalho fixo (fps, grade, paleta, compressao) + rampa em
+    UTF-8; depois um bloco por frame com os planos uint8 de caracteres e de
+    cores (codigos ANSI 256), comprimido individualmente; no fim a tabela
+    de simbolos, os offsets de cada frame (uint64), o tipo de cada frame e
+    um rodape que aponta para eles. Os indices de caracteres sao relativos
+    a tabela de simbolos do arquivo, que acumula os simbolos dos frames na
+    ordem em que aparecem.
+
+    A cada keyframe_interval frames vai um keyframe com os planos
+    completos; entre eles, frames delta guardam o XOR dos planos com o
+    frame anterior, quase todo zero quando poucas celulas mudam, e por isso
+    comprimem para poucos bytes. keyframe_interval <= 1 grava so keyframes.
+    """
+
+    def __init__(self, path: str, fps: float, width: int, height: int, ramp: str = "",
+                 compression: int = COMPRESSION_ZLIB, level: int = 6,
+                 keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        super().__init__(path)
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.compression = compression
+        self.level = level
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self._glyph_index = {}
+        self._remaps = {}
+        self._offsets = []
+        self._types = []
+        self._prev_planes = None
+        ramp_bytes = ramp.encode('utf-8')
+        self._file.write(_HEADER.pack(A4R_MAGIC, A4R_VERSION, 0, fps, width, height,
+                                      PALETTE_ANSI256, compression, len(ramp_bytes)))
+        self._file.write(ramp_bytes)
+
+    @property
+    def glyphs(self) -> str:
+        return ''.join(self._glyph_index)
+
+    def _remap(self, glyphs: str) -> np.ndarray:
+        # Indice na tabela do frame -> indice na tabela do arquivo
+        remap = self._remaps.get(glyphs)
+        if remap is None:
+            for glyph in glyphs:
+                self._glyph_index.setdefault(glyph, len(self._glyph_index))
+            if len(self._glyph_index) > 256:
+                raise ValueError("Container .a4r suporta ate 256 simbolos por arquivo")
+            remap = self._remaps[glyphs] = np.array([self._glyph_index[g] for g in glyphs], dtype=np.uint8)
+        return remap
+
+    def write_frame(self, frame: AsciiFrame):
+        if frame.shape != (self.height, self.width):
+            raise ValueError(f"Frame {frame.width}x{frame.height} difere da grade do arquivo ({self.width}x{self.height})")
+        planes = np.empty((2, self.height, self.width), dtype=np.uint8)
+        self._remap(frame.glyphs).take(frame.chars, out=planes[0])
+        planes[1] = frame.colors
+
+        if self._prev_planes is None or len(self._offsets) % self.keyframe_interval == 0:
+            self._types.append(FRAME_KEY)
+            payload = planes.tobytes()
+        else:
+            self._types.append(FRAME_DELTA)
+            payload = np.bitwise_xor(planes, self._prev_planes).tobytes()
+        self._prev_planes = planes
+
+        if self.compression == COMPRESSION_ZLIB:
+            payload = zlib.compress(payload, self.level)
+        self._offsets.append(self._file.tell())
+        self._file.write(payload)
+        self._wrote_frame()
+
+    def _finish(self):
+        index_offset = self._file.tell()
+        glyph_bytes = self.glyphs.encode('utf-8')
+        self._file.write(_GLYPHS_SIZE.pack(len(glyph_bytes)))
+        self._file.write(glyph_bytes)
+        # Offset extra no fim marca onde termina o ultimo frame
+        self._file.write(np.array(self._offsets + [index_offset], dtype='<u8').tobytes())
+        self._file.write(np.array(self._types, dtype=np.uint8).tobytes())
+        self._file.write(_FOOTER.pack(index_offset, len(self._offsets), A4R_INDEX_MAGIC))
+
+
+class A4rReader:
+    """
+    Leitura com acesso aleatorio de um arquivo .a4r: o cabecalho e o indice
+    sao lidos na abertura e cada frame e lido e descomprimido so quando
+    pedido (reader[i] ou iteracao).
+
+    Frames delta sao reconstruidos a partir do ultimo frame decodificado
+    quando ele esta entre o keyframe anterior e o frame pedido (leitura
+    sequencial custa um delta por frame); senao a decodificacao recomeca
+    no keyframe mais proximo antes do frame.
+
+    O arquivo fica mapeado com mmap. Sem compressao, os planos de um
+    keyframe sao views (somente leitura) direto do mapa, sem copia; num
+    arquivo so de keyframes sem compressao (zero_copy) o seek para
+    qualquer frame e O(1) e varios players abrindo o mesmo arquivo
+    dividem as mesmas paginas do cache do sistema.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._last_index = -1
+        self._last_planes = None
+        self._mmap = None
+        self._file = open(path, 'rb')
+        try:
+            self._read_index()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+    def _read_index(self):
+        f = self._file
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:4] != A4R_MAGIC:
+            raise ValueError(f"Arquivo '{self.path}' nao e um container .a4r")
+        _, version, _, self.fps, self.width, self.height, self.palette, self.compression, ramp_size = _HEADER.unpack(header)
+        if version > A4R_VERSION:
+            raise ValueError(f"Versao .a4r {version} nao suportada (maximo {A4R_VERSION})")
+        self.ramp = f.read(ramp_size).decode('utf-8')
+
+        f.seek(-_FOOTER.size, os.SEEK_END)
+        index_offset, n_frames, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+        if magic != A4R_INDEX_MAGIC:
+            raise ValueError(f"Arquivo '{self.path}' sem indice de frames (gravacao incompleta?)")
+        f.seek(index_offset)
+        glyph_size, = _GLYPHS_SIZE.unpack(f.read(_GLYPHS_SIZE.size))
+        self.glyphs = f.read(glyph_size).decode('utf-8')
+        self.offsets = np.frombuffer(f.read(8 * (n_frames + 1)), dtype='<u8').astype(np.int64)
+        if version >= 2:
+            self.frame_types = np.frombuffer(f.read(n_frames), dtype=np.uint8)
+        else:
+            self.frame_types = np.zeros(n_frames, dtype=np.uint8)
+        self.keyframes = np.flatnonzero(self.frame_types == FRAME_KEY)
+        if n_frames and (not len(self.keyframes) or self.keyframes[0] != 0):
+            raise ValueError(f"Arquivo '{self.path}' sem keyframe inicial")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def zero_copy(self) -> bool:
+        """True quando todo frame e uma view do mmap (sem compressao e sem deltas)."""
+        return self.compression == COMPRESSION_NONE and len(self.keyframes) == len(self)
+
+    def __getitem__(self, index: int) -> AsciiFrame:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError(f"Frame {index} fora do intervalo (0-{n - 1})")
+
+        keyframe = self.keyframe_for(index)
+        if keyframe <= self._last_index <= index:
+            current, planes = self._last_index, self._last_planes
+        else:
+            current, planes = keyframe, self._read_planes(keyframe)
+        while current < index:
+            current += 1
+            # XOR gera arrays novos: frames ja devolvidos nao sao alterados
+            planes = np.bitwise_xor(planes, self._read_planes(current))
+
+        self._last_index, self._last_planes = index, planes
+        return AsciiFrame(chars=planes[0], colors=planes[1], glyphs=self.glyphs, ramp=self.ramp)
+
+    def keyframe_for(self, index: int) -> int:
+        """Keyframe mais proximo em ou antes de `index` (ponto de partida de um seek)."""
+        return int(self.keyframes[np.searchsorted(self.keyframes, index, side='right') - 1])
+
+    def _read_planes(self, index: int) -> np.ndarray:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        if self.compression == COMPRESSION_ZLIB:
+            payload = zlib.decompress(self._mmap[start:end])
+            return np.frombuffer(payload, dtype=np.uint8).reshape(2, self.height, self.width)
+        return np.frombuffer(self._mmap, dtype=np.uint8, count=end - start, offset=start).reshape(2, self.height, self.width)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        self._last_planes = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Frames ainda em uso apontam para o mapa; ele fecha quando forem coletados
+                pass
+            self._mmap = None
+        self._file.close()
+
+
+class TxtReader:
+    """
+    Formato .txt legado: fps na primeira linha e frames "c§code§"
+    separados por [FRAME]. Frames vazios sao descartados; reader[i]
+    converte o texto do frame para AsciiFrame.
+
+    O arquivo e mapeado com mmap e so os offsets de cada frame ficam em
+    memoria: o indice sai de uma passada pelos separadores e e guardado num
+    arquivo lateral (.<nome>.idx) com o tamanho e o mtime do .txt, entao a
+    segunda abertura do mesmo arquivo nao percorre o texto de novo.
+    """
+
+    def __init__(self, path: str, use_index_cache: bool = True):
+        self.path = path
+        self._mmap = None
+        try:
+            self._file = open(path, 'rb')
+        except Exception as e:
+            raise IOError(f"Erro ao ler o arquivo '{path}': {e}")
+        try:
+            self._open(use_index_cache)
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, use_index_cache: bool):
+        stat = os.fstat(self._file.fileno())
+        if stat.st_size == 0:
+            raise ValueError("Formato de arquivo invalido: FPS ou conteudo nao encontrado.")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        first_line_end = self._mmap.find(b"\n")
+        if first_line_end < 0:
+            raise ValueError("Formato de arquivo invalido: FPS ou conteudo nao encontrado.")
+        first_line = self._mmap[:first_line_end].decode('utf-8', errors='replace').strip()
+        try:
+            self.fps = float(first_line)
+        except ValueError as e:
+            raise ValueError(f"FPS invalido na primeira linha ('{first_line}'): {e}")
+
+        key = (stat.st_size, stat.st_mtime_ns)
+        self.offsets = _load_txt_index(self.path, key) if use_index_cache else None
+        if self.offsets is None:
+            self.offsets = self._build_index(first_line_end + 1)
+            if use_index_cache:
+                _save_txt_index(self.path, key, self.offsets)
+
+    def _build_index(self, body_start: int) -> np.ndarray:
+        mm = self._mmap
+        if mm[body_start:body_start + len(_TXT_SEPARATOR)] == _TXT_SEPARATOR:
+            body_start += len(_TXT_SEPARATOR)
+        ranges = []
+        start = body_start
+        while True:
+            end = mm.find(_TXT_SEPARATOR, start)
+            stop = end if end >= 0 else len(mm)
+            # Frames so com espaco em branco sao descartados, como no split legado
+            if _NON_BLANK.search(mm, start, stop):
+                ranges.append((start, stop))
+            if end < 0:
+                break
+            start = end + len(_TXT_SEPARATOR)
+        return np.array(ranges, dtype=np.int64).reshape(-1, 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def frame_text(self, index: int) -> str:
+        start, end = self.offsets[index]
+        return self._mmap[start:end].decode('utf-8').rstrip('\n')
+
+    def __getitem__(self, index: int) -> AsciiFrame:
+        return AsciiFrame.from_text(self.frame_text(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+def txt_index_path(path: str) -> str:
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.idx")
+
+
+def _load_txt_index(path: str, key: tuple):
+    try:
+        with open(txt_index_path(path), 'rb') as f:
+            magic, size, mtime_ns, n_frames = _TXT_INDEX_HEADER.unpack(f.read(_TXT_INDEX_HEADER.size))
+            if magic != _TXT_INDEX_MAGIC or (size, mtime_ns) != key:
+                return None
+            offsets = np.frombuffer(f.read(16 * n_frames), dtype='<i8')
+    except (OSError, struct.error):
+        return None
+    if len(offsets) != 2 * n_frames:
+        return None
+    return offsets.astype(np.int64).reshape(-1, 2)
+
+
+def _save_txt_index(path: str, key: tuple, offsets: np.ndarray):
+    # Cache opcional: diretorio sem permissao de escrita so perde o atalho
+    index_path = txt_index_path(path)
+    try:
+        f, temp_path = _open_temp(index_path)
+    except OSError:
+        return
+    try:
+        with f:
+            f.write(_TXT_INDEX_HEADER.pack(_TXT_INDEX_MAGIC, key[0], key[1], len(offsets)))
+            f.write(offsets.astype('<i8').tobytes())
+        os.replace(temp_path, index_path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+class CompressedTxtReader:
+    """
+    .txt comprimido (gzip ou zstd) lido em stream: o texto nunca e
+    descomprimido inteiro na memoria. Cada iteracao abre um stream novo e
+    devolve os frames na ordem; reader[i] percorre o stream ate o frame i e
+    len() exige uma passada completa (o resultado fica guardado).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._len = None
+        with self._open_stream() as stream:
+            first_line = b""
+            while b"\n" not in first_line:
+                chunk = stream.read(256)
+                if not chunk:
+                    raise ValueError("Formato de arquivo invalido: FPS ou conteudo nao encontrado.")
+                first_line += chunk
+        first_line = first_line.split(b"\n", 1)[0].decode('utf-8', errors='replace').strip()
+        try:
+            self.fps = float(first_line)
+        except ValueError as e:
+            raise ValueError(f"FPS invalido na primeira linha ('{first_line}'): {e}")
+
+    def _open_stream(self):
+        with open(self.path, 'rb') as f:
+            magic = f.read(len(ZSTD_MAGIC))
+        if magic.startswith(GZIP_MAGIC):
+            return gzip.open(self.path, 'rb')
+        if not ZSTD_AVAILABLE:
+            raise ImportError("Arquivo zstd requer o modulo 'zstandard' (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(open(self.path, 'rb'), closefd=True)
+
+    def frame_texts(self):
+        """Texto de cada frame nao vazio, lido em blocos do stream."""
+        with self._open_stream() as stream:
+            buffer = b""
+            while b"\n" not in buffer:
+                chunk = stream.read(_READ_CHUNK)
+                if not chunk:
+                    return
+                buffer += chunk
+            buffer = buffer.split(b"\n", 1)[1]
+            eof = False
+            while not eof:
+                chunk = stream.read(_READ_CHUNK)
+                eof = not chunk
+                buffer += chunk
+                pieces = buffer.split(_TXT_SEPARATOR)
+                # O ultimo pedaco pode estar cortado no meio do frame (ou do separador)
+                buffer = b"" if eof else pieces.pop()
+                for piece in pieces:
+                    if _NON_BLANK.search(piece):
+                        yield piece.decode('utf-8').rstrip('\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __bool__(self) -> bool:
+        texts = self.frame_texts()
+        try:
+            return next(texts, None) is not None
+        finally:
+            texts.close()
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self.frame_texts())
+        return self._len
+
+    def __getitem__(self, index: int) -> AsciiFrame:
+        if index < 0:
+            index += len(self)
+        for current, text in enumerate(self.frame_texts()):
+            if current == index:
+                return AsciiFrame.from_text(text)
+        raise IndexError(f"Frame {index} fora do intervalo")
+
+    def __iter__(self):
+        for text in self.frame_texts():
+            yield AsciiFrame.from_text(text)
+
+    def close(self):
+        pass
+
+
+class _ReadAheadError:
+    def __init__(self, error):
+        self.error = error
+
+
+_READ_AHEAD_DONE = object()
+
+
+def read_ahead(frames, depth: int = DEFAULT_READ_AHEAD):
+    """
+    Itera `frames` com a leitura/descompressao numa thread de fundo que
+    mantem ate `depth` frames prontos, para a reproducao nao esperar o
+    disco nem o zlib/gzip. depth <= 0 itera direto. Interromper a iteracao
+    (break, return) encerra a thread.
+    """
+    if depth <= 0:
+        yield from frames
+        return
+
+    ready = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def worker():
+        try:
+            for frame in frames:
+                if not put(frame):
+                    return
+            put(_READ_AHEAD_DONE)
+        except BaseException as e:
+            put(_ReadAheadError(e))
+
+    thread = threading.Thread(target=worker, name="ascii-read-ahead", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is _READ_AHEAD_DONE:
+                return
+            if isinstance(item, _ReadAheadError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join(timeout=1.0)
+
+
+def a4r_options_from_config(config) -> dict:
+    """Parametros de A4rWriter vindos do [Output] (keyframes e compressao)."""
+    compression = config.get('Output', 'a4r_compression', fallback='zlib').lower()
+    return {
+        'keyframe_interval': config.getint('Output', 'a4r_keyframe_interval', fallback=DEFAULT_KEYFRAME_INTERVAL),
+        'compression': COMPRESSION_NAMES.get(compression, COMPRESSION_ZLIB),
+    }
+
+
+def is_a4r(path: str) -> bool:
+    """Detecta o container pelo magic, nao pela extensao."""
+    with open(path, 'rb') as f:
+        return f.read(len(A4R_MAGIC)) == A4R_MAGIC
+
+
+def is_compressed_txt(path: str) -> bool:
+    """Detecta .txt comprimido (gzip ou zstd) pelo magic."""
+    with open(path, 'rb') as f:
+        magic = f.read(len(ZSTD_MAGIC))
+    return magic.startswith(GZIP_MAGIC) or magic == ZSTD_MAGIC
+
+
+def open_ascii_video(path: str):
+    """
+    Abre um video ASCII (.a4r, .txt legado ou .txt comprimido com gzip/zstd)
+    para reproducao; o formato vem do magic do arquivo. O retorno tem fps,
+    bool() (tem frames?), iteracao e reader[i] -> AsciiFrame.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Arquivo ASCII '{path}' nao encontrado.")
+    if is_a4r(path):
+        return A4rReader(path)
+    if is_compressed_txt(path):
+        return CompressedTxtReader(path)
+    return TxtReader(path)
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class BufferPool:
+    """
+    Buffers de trabalho de um job, pedidos por nome.
+
+    Cada nome guarda um bloco contiguo que so cresce: get() devolve uma view
+    contigua do shape/dtype pedido e so aloca quando o bloco atual nao
+    comporta o pedido. `allocations` conta essas alocacoes, entao num loop
+    em regime (mesmas dimensoes a cada frame) ele para de crescer depois do
+    primeiro frame. Dois pedidos com o mesmo nome devolvem a mesma memoria.
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self.allocations = 0
+
+    def get(self, name: str, shape, dtype=np.uint8) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        shape = tuple(int(n) for n in shape)
+        nbytes = dtype.itemsize
+        for n in shape:
+            nbytes *= n
+        block = self._blocks.get(name)
+        if block is None or block.nbytes < nbytes:
+            # Alocado como uint64 para que a view de qualquer dtype fique alinhada
+            block = self._blocks[name] = np.empty(max(1, -(-nbytes // 8)), dtype=np.uint64)
+            self.allocations += 1
+        return block.view(np.uint8)[:nbytes].view(dtype).reshape(shape)
+
+    def zeros(self, name: str, shape, dtype=np.uint8) -> np.ndarray:
+        buf = self.get(name, shape, dtype)
+        buf.fill(0)
+        return buf
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.nbytes for block in self._blocks.values())
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def clear(self):
+        self._blocks.clear()
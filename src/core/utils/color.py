@@ -1,3 +1,4 @@
+import os
 import numpy as np
 
 
@@ -40,3 +41,112 @@ def rgb_to_ansi256_vectorized(color_frame: np.ndarray) -> np.ndarray:
     result[is_gray] = gray_ansi
 
     return result
+
+
+def _lut_cache_dir():
+    try:
+        from src.app.constants import USER_CACHE_DIR
+    except ImportError:
+        return None
+    return USER_CACHE_DIR
+
+
+class ColorLUT:
+    """
+    Tabela 3D [B, G, R] -> indice de paleta, montada uma unica vez.
+
+    Com bits=8 a tabela tem 256^3 entradas (16 MB) e reproduz o mapeamento
+    exato; e salva no diretorio de cache do usuario e reaberta via mmap nas
+    execucoes seguintes. Com menos bits cada canal e quantizado antes da
+    busca (bits=6 -> 64^3 entradas). Converter um frame vira um unico gather.
+    """
+
+    def __init__(self, name: str, builder, bits: int = 8, cache: bool = True):
+        self.name = name
+        self.builder = builder
+        self.bits = bits
+        self.cache = cache
+        self.shift = 8 - bits
+        self._table = None
+
+    @property
+    def table(self) -> np.ndarray:
+        if self._table is None:
+            self._table = self._load()
+        return self._table
+
+    def _build(self) -> np.ndarray:
+        levels = 1 << self.bits
+        # Centro de cada faixa quantizada (o proprio valor quando bits=8)
+        values = (np.arange(levels, dtype=np.int32) << self.shift) + ((1 << self.shift) >> 1)
+        table = np.empty((levels, levels, levels), dtype=np.uint8)
+        g, r = np.meshgrid(values, values, indexing='ij')
+        for i, b in enumerate(values):
+            table[i] = self.builder(np.full_like(g, b), g, r)
+        return table
+
+    def _load(self) -> np.ndarray:
+        cache_dir = _lut_cache_dir() if self.cache else None
+        if cache_dir is None:
+            return self._build()
+
+        path = os.path.join(cache_dir, f"{self.name}_lut{self.bits}.npy")
+        levels = 1 << self.bits
+        try:
+            table = np.load(path, mmap_mode='r')
+            if table.shape == (levels, levels, levels) and table.dtype == np.uint8:
+                return table
+        except (OSError, ValueError):
+            pass
+
+        table = self._build()
+        # Temporario com .npy no fim: np.save nao acrescenta outra extensao
+        tmp_path = f"{path[:-len('.npy')]}.{os.getpid()}.tmp.npy"
+        try:
+            np.save(tmp_path, table)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return table
+
+    def __call__(self, color_frame: np.ndarray, pool=None) -> np.ndarray:
+        if pool is not None:
+            return self._lookup_into(color_frame, pool)
+        channels = color_frame.astype(np.int32)
+        if self.shift:
+            channels >>= self.shift
+        index = channels[..., 0] << (2 * self.bits)
+        index |= channels[..., 1] << self.bits
+        index |= channels[..., 2]
+        return self.table.reshape(-1).take(index)
+
+    def _lookup_into(self, color_frame: np.ndarray, pool) -> np.ndarray:
+        # Mesmo indice de __call__ montado canal a canal em buffers do pool
+        shape = color_frame.shape[:-1]
+        index = pool.get(f'{self.name}.index', shape, np.int32)
+        channel = pool.get(f'{self.name}.channel', shape, np.int32)
+        np.right_shift(color_frame[..., 0], self.shift, out=index, dtype=np.int32)
+        index <<= 2 * self.bits
+        np.right_shift(color_frame[..., 1], self.shift, out=channel, dtype=np.int32)
+        channel <<= self.bits
+        index |= channel
+        np.right_shift(color_frame[..., 2], self.shift, out=channel, dtype=np.int32)
+        index |= channel
+        out = pool.get(f'{self.name}.codes', shape, np.uint8)
+        return self.table.reshape(-1).take(index, out=out, mode='clip')
+
+
+def _build_ansi256(b: np.ndarray, g: np.ndarray, r: np.ndarray) -> np.ndarray:
+    return rgb_to_ansi256_vectorized(np.stack((b, g, r), axis=-1))
+
+
+ANSI256_LUT = ColorLUT('ansi256', _build_ansi256, bits=8)
+
+
+def rgb_to_ansi256_lut(color_frame: np.ndarray, pool=None) -> np.ndarray:
+    """Mesmo resultado de rgb_to_ansi256_vectorized (BGR), em uint8, via ANSI256_LUT."""
+    return ANSI256_LUT(color_frame, pool)
+
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from .ascii_frame import EDGE_CHARS
+
+SLASH = EDGE_CHARS.index('/')
+PIPE = EDGE_CHARS.index('|')
+BACKSLASH = EDGE_CHARS.index('\\')
+DASH = EDGE_CHARS.index('-')
+NO_EDGE = 255
+
+# Limites dos bins em 22.5 e 67.5 graus como razoes inteiras:
+# tan(22.5) ~ 5/12 e tan(67.5) ~ 12/5 (erro < 0.2 grau). Com Sobel 3x3 sobre
+# uint8 |dx|, |dy| <= 1020, entao 12 * 1020 ainda cabe em int16.
+_TAN_NUM = 5
+_TAN_DEN = 12
+
+
+@dataclass
+class EdgeFeatures:
+    """
+    Saida do estagio de bordas: magnitude uint8 (0..255) e, por pixel, o
+    indice em EDGE_CHARS do caractere da orientacao do gradiente.
+    """
+    magnitude: np.ndarray
+    orientation: np.ndarray
+
+    def edge_mask(self, sobel_threshold: int) -> np.ndarray:
+        return self.magnitude > sobel_threshold
+
+    def edge_index(self, sobel_threshold: int) -> np.ndarray:
+        """Plano uint8 com o indice em EDGE_CHARS nas bordas e NO_EDGE no resto."""
+        return np.where(self.edge_mask(sobel_threshold), self.orientation, np.uint8(NO_EDGE))
+
+
+def approx_magnitude(ax, ay):
+    # alpha-max + beta-min com alpha = 15/16 e beta = 7/16 (erro < 7% do hypot)
+    hi = np.maximum(ax, ay)
+    lo = np.minimum(ax, ay)
+    return (hi * 15 + lo * 7) >> 4
+
+
+def orientation_bins(dx, dy):
+    """
+    Bin de 4 direcoes do gradiente (mesmos intervalos de 45 graus centrados
+    em 0/45/90/135 do antigo arctan2) usando so sinais e razoes de dx/dy.
+    So usa operadores, entao serve tanto para numpy quanto para cupy.
+    """
+    ax = abs(dx)
+    ay = abs(dy)
+    diagonal = _TAN_DEN * ay > _TAN_NUM * ax
+    steep = _TAN_NUM * ay > _TAN_DEN * ax
+    # Gradiente no 1o/3o quadrante -> '/', no 2o/4o -> '\'
+    opposite = (dx < 0) != (dy < 0)
+
+    orientation = diagonal * (SLASH - DASH) + DASH
+    orientation += steep * (PIPE - SLASH)
+    orientation += (diagonal & ~steep & opposite) * (BACKSLASH - SLASH)
+    return orientation.astype('uint8')
+
+
+def orientation_from_angle(angle_frame: np.ndarray) -> np.ndarray:
+    """Mesmo bin de orientation_bins a partir de um angulo em radianos (formato antigo)."""
+    octant = (np.mod(angle_frame, np.pi) * (8 / np.pi)).astype(np.int32)
+    table = np.array([DASH, SLASH, PIPE, BACKSLASH], dtype=np.uint8)
+    return table[((octant + 1) >> 1) & 3]
+
+
+def compute_edge_features(gray_frame: np.ndarray, normalize: bool = True, pool=None) -> EdgeFeatures:
+    """
+    Sobel 3x3 em int16 sobre o frame em cinza.
+
+    Com normalize=True a magnitude e esticada min-max para 0..255 (como o
+    conversor .txt e os previews faziam); com False ela so satura em 255
+    (como os conversores de MP4/GIF/PNG/HTML). Com um BufferPool todos os
+    intermediarios e a saida vem do pool (a saida e sobrescrita no proximo
+    frame).
+    """
+    if pool is not None:
+        return _edge_features_into(gray_frame, normalize, pool)
+    dx = cv2.Sobel(gray_frame, cv2.CV_16S, 1, 0, ksize=3)
+    dy = cv2.Sobel(gray_frame, cv2.CV_16S, 0, 1, ksize=3)
+    magnitude = approx_magnitude(np.abs(dx), np.abs(dy))
+    if normalize:
+        magnitude = cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+    else:
+        magnitude = cv2.convertScaleAbs(magnitude)
+    return EdgeFeatures(magnitude=magnitude, orientation=orientation_bins(dx, dy))
+
+
+def _edge_features_into(gray_frame: np.ndarray, normalize: bool, pool) -> EdgeFeatures:
+    # Mesmas contas de approx_magnitude/orientation_bins, mas com out= em tudo
+    shape = gray_frame.shape
+    dx = cv2.Sobel(gray_frame, cv2.CV_16S, 1, 0, dst=pool.get('edges.dx', shape, np.int16), ksize=3)
+    dy = cv2.Sobel(gray_frame, cv2.CV_16S, 0, 1, dst=pool.get('edges.dy', shape, np.int16), ksize=3)
+    ax = np.abs(dx, out=pool.get('edges.ax', shape, np.int16))
+    ay = np.abs(dy, out=pool.get('edges.ay', shape, np.int16))
+    hi = np.maximum(ax, ay, out=pool.get('edges.hi', shape, np.int16))
+    lo = np.minimum(ax, ay, out=pool.get('edges.lo', shape, np.int16))
+    hi *= 15
+    lo *= 7
+    hi += lo
+    hi >>= 4
+    magnitude = pool.get('edges.magnitude', shape, np.uint8)
+    if normalize:
+        cv2.normalize(hi, magnitude, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+    else:
+        cv2.convertScaleAbs(hi, dst=magnitude)
+
+    # hi/lo ja foram consumidos e viram rascunho das razoes
+    diagonal = pool.get('edges.diagonal', shape, bool)
+    steep = pool.get('edges.steep', shape, bool)
+    opposite = pool.get('edges.opposite', shape, bool)
+    np.greater(np.multiply(ay, _TAN_DEN, out=hi), np.multiply(ax, _TAN_NUM, out=lo), out=diagonal)
+    np.greater(np.multiply(ay, _TAN_NUM, out=hi), np.multiply(ax, _TAN_DEN, out=lo), out=steep)
+    np.not_equal(np.less(dx, 0, out=opposite), np.less(dy, 0, out=pool.get('edges.negative', shape, bool)), out=opposite)
+    # '\\' = diagonal, nao ingreme e com dx/dy de sinais opostos
+    backslash = np.greater(diagonal, steep, out=pool.get('edges.backslash', shape, bool))
+    np.logical_and(backslash, opposite, out=backslash)
+
+    orientation = pool.get('edges.orientation', shape, np.uint8)
+    orientation.fill(DASH)
+    np.copyto(orientation, SLASH, where=diagonal)
+    np.copyto(orientation, PIPE, where=steep)
+    np.copyto(orientation, BACKSLASH, where=backslash)
+    return EdgeFeatures(magnitude=magnitude, orientation=orientation)
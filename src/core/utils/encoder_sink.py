@@ -0,0 +1,142 @@
+import queue
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+# Frames renderizados que podem esperar o encoder antes de o render bloquear
+DEFAULT_ENCODER_QUEUE = 4
+
+
+_ENCODER_DONE = object()
+
+
+class EncoderSink:
+    """
+    Envia frames BGR para o stdin de um ffmpeg (rawvideo) numa thread
+    dedicada, para o render do proximo frame correr enquanto o encoder
+    consome o atual.
+
+    Os frames passam por uma fila limitada de `depth` buffers
+    pre-alocados com o formato `frame_shape`: write() copia o frame para
+    um buffer livre e volta; a thread escreve o buffer no pipe via
+    memoryview, sem copia extra. Quando o encoder fica para tras a fila
+    enche e write() espera um buffer livre; esse tempo vai para
+    stall_seconds, separado do tempo gasto pelo produtor (render_seconds).
+
+    Para renderizar direto no buffer: acquire() -> preencher -> submit().
+    submit(slot, repeat=n) escreve o mesmo frame n vezes (CFR com frames
+    repetidos). Erros do pipe (BrokenPipeError, por exemplo) sobem na
+    proxima chamada de write()/acquire().
+    """
+
+    def __init__(self, cmd: list, frame_shape: tuple, depth: int = DEFAULT_ENCODER_QUEUE, stderr=None):
+        self.frame_shape = tuple(frame_shape)
+        self.frames = 0
+        self.stall_seconds = 0.0
+        self.encode_seconds = 0.0
+        self._ring = [np.zeros(self.frame_shape, dtype=np.uint8) for _ in range(max(1, int(depth)))]
+        self._free = queue.Queue()
+        for slot in range(len(self._ring)):
+            self._free.put(slot)
+        self._ready = queue.Queue()
+        self.error = None
+        self._closed = False
+        self._started = time.perf_counter()
+        self._finished = None
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr if stderr is not None else subprocess.DEVNULL
+        )
+        self._thread = threading.Thread(target=self._encode, name="encoder-sink", daemon=True)
+        self._thread.start()
+
+    @property
+    def render_seconds(self) -> float:
+        """Tempo do produtor (decodificacao + render) desde a abertura, sem a espera pelo encoder."""
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return end - self._started - self.stall_seconds
+
+    def buffer(self, slot: int) -> np.ndarray:
+        return self._ring[slot]
+
+    def acquire(self, block: bool = True):
+        """Indice de um buffer livre; sem block devolve None se a fila estiver cheia."""
+        self._raise_error()
+        if not block:
+            try:
+                return self._free.get_nowait()
+            except queue.Empty:
+                return None
+        start = time.perf_counter()
+        while True:
+            try:
+                slot = self._free.get(timeout=0.1)
+                break
+            except queue.Empty:
+                self._raise_error()
+        self.stall_seconds += time.perf_counter() - start
+        return slot
+
+    def submit(self, slot: int, repeat: int = 1):
+        self._ready.put((slot, max(1, int(repeat))))
+
+    def write(self, image: np.ndarray, repeat: int = 1):
+        """Copia o frame para um buffer da fila; tamanho diferente e recortado/completado com preto."""
+        slot = self.acquire()
+        buffer = self._ring[slot]
+        if image.shape == self.frame_shape:
+            np.copyto(buffer, image)
+        else:
+            height = min(image.shape[0], self.frame_shape[0])
+            width = min(image.shape[1], self.frame_shape[1])
+            buffer.fill(0)
+            buffer[:height, :width] = image[:height, :width]
+        self.submit(slot, repeat)
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def _encode(self):
+        stdin = self.process.stdin
+        try:
+            while True:
+                item = self._ready.get()
+                if item is _ENCODER_DONE:
+                    break
+                slot, repeat = item
+                view = memoryview(self._ring[slot]).cast('B')
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    stdin.write(view)
+                self.encode_seconds += time.perf_counter() - start
+                self.frames += repeat
+                self._free.put(slot)
+        except BaseException as e:
+            self.error = e
+
+    def close(self) -> int:
+        """Espera a fila esvaziar, fecha o pipe e devolve o codigo de saida do ffmpeg."""
+        if not self._closed:
+            self._closed = True
+            self._ready.put(_ENCODER_DONE)
+            self._thread.join()
+            self._finished = time.perf_counter()
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        return self.process.wait()
+
+    def abort(self):
+        """Descarta o que ainda esta na fila e encerra o ffmpeg."""
+        if self._closed:
+            return
+        # Matar antes do join: uma escrita presa no pipe falha e a thread sai
+        if self.process.poll() is None:
+            self.process.kill()
+        self.close()
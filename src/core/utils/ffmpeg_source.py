@@ -0,0 +1,298 @@
+import json
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+# Com mascara (chroma/autoseg) a imagem chega a este multiplo da grade, para a
+# mascara ter bordas melhores que a propria grade
+MASK_INGEST_SCALE = 4
+
+
+@dataclass
+class VideoProbe:
+    """
+    Metadados do stream de video, lidos com ffprobe. width/height ja sao os
+    de exibicao: o ffmpeg gira os frames pelo metadado de rotacao
+    (autorotate), entao um video de celular em retrato sai em retrato.
+    """
+    width: int
+    height: int
+    fps: float
+    frames: int
+    rotation: int = 0
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which('ffmpeg') is not None and shutil.which('ffprobe') is not None
+
+
+def _parse_rate(rate: str) -> float:
+    num, _, den = (rate or "0").partition('/')
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _parse_rotation(stream: dict) -> int:
+    # Display matrix (ffmpeg >= 5) ou a tag rotate dos containers antigos, em graus
+    for side_data in stream.get('side_data_list') or []:
+        if 'rotation' in side_data:
+            return int(round(float(side_data['rotation']))) % 360
+    try:
+        return int(round(float((stream.get('tags') or {}).get('rotate', 0)))) % 360
+    except ValueError:
+        return 0
+
+
+def parse_probe(output: str) -> VideoProbe:
+    """
+    Saida JSON do ffprobe (-show_entries stream=...:format=duration) ->
+    VideoProbe. Rotacao de +-90 graus troca largura e altura.
+    """
+    data = json.loads(output or "{}")
+    streams = data.get('streams') or []
+    if not streams:
+        raise IOError("Nenhum stream de video encontrado")
+    stream = streams[0]
+    fps = _parse_rate(stream.get('avg_frame_rate')) or _parse_rate(stream.get('r_frame_rate'))
+    frames = str(stream.get('nb_frames', ''))
+    if frames.isdigit():
+        frames = int(frames)
+    else:
+        # Containers sem contagem (mkv, webm): estimativa pela duracao
+        duration = float(stream.get('duration') or data.get('format', {}).get('duration') or 0)
+        frames = int(round(duration * fps))
+    width, height = int(stream['width']), int(stream['height'])
+    rotation = _parse_rotation(stream)
+    if rotation % 180 == 90:
+        width, height = height, width
+    return VideoProbe(width, height, fps, frames, rotation)
+
+
+def probe_video(path: str) -> VideoProbe:
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=width,height,avg_frame_rate,r_frame_rate,nb_frames,duration'
+                          ':stream_tags=rotate:stream_side_data=rotation:format=duration',
+         '-of', 'json', path],
+        capture_output=True, text=True, encoding='utf-8', errors='replace'
+    )
+    if result.returncode != 0:
+        raise IOError(f"ffprobe falhou para '{path}': {result.stderr.strip()[:200]}")
+    return parse_probe(result.stdout)
+
+
+def ingest_size(grid_size: tuple, source_size: tuple, scale: int = 1) -> tuple:
+    """
+    Menor resolucao que atende o pipeline: a grade vezes `scale`, sem passar
+    da resolucao de origem (nunca amplia).
+    """
+    grid_w, grid_h = grid_size
+    src_w, src_h = source_size
+    width, height = grid_w * scale, grid_h * scale
+    if width >= src_w or height >= src_h:
+        return src_w, src_h
+    return width, height
+
+
+def seek_time(frame: int, fps: float) -> float:
+    """
+    Instante do -ss para comecar a leitura no frame `frame`: meio frame
+    antes do pts. Com fps nao inteiro (30000/1001) frame / fps arredondado
+    pode cair logo depois do pts real, e a busca exata descartaria o frame.
+    """
+    if frame <= 0 or fps <= 0:
+        return 0.0
+    return max(0.0, (frame - 0.5) / fps)
+
+
+def ffmpeg_ingest_command(path: str, size: tuple, source_size: tuple, frame_interval: int = 1,
+                          start_time: float = 0.0) -> list:
+    filters = []
+    if frame_interval > 1:
+        # Descarta antes do scale: frames pulados nao sao escalados nem passam pelo pipe
+        filters.append(f"select='not(mod(n\\,{frame_interval}))'")
+    if tuple(size) != tuple(source_size):
+        filters.append(f"scale={size[0]}:{size[1]}:flags=area")
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin']
+    if start_time > 0:
+        # -ss antes do -i: busca pelo keyframe e descarta ate o instante exato (accurate_seek)
+        cmd += ['-ss', f'{start_time:.6f}']
+    cmd += ['-i', path, '-an', '-sn']
+    if filters:
+        cmd += ['-vf', ','.join(filters)]
+    cmd += ['-vsync', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+    return cmd
+
+
+class FfmpegCapture:
+    """
+    Backend do FrameSource que decodifica com ffmpeg: o filtro scale reduz
+    cada frame ja na decodificacao para `size` e os frames chegam em BGR
+    pelo pipe (rawvideo), lidos direto no buffer do chamador com readinto.
+    Para videos UHD isso evita trafegar frames 4K pela memoria so para
+    reduzi-los depois em Python.
+
+    Segue a interface do cv2.VideoCapture que o FrameSource usa. get()
+    devolve fps e contagem de frames da origem e a largura/altura de saida;
+    decimate(k) (antes da primeira leitura) faz o ffmpeg manter so 1 de
+    cada k frames, descartando os outros antes do scale. set() da posicao
+    reinicia o ffmpeg com -ss no frame pedido. Se o ffmpeg sai com erro
+    (filtro invalido, falha de decodificacao, processo morto) a leitura
+    levanta IOError com o fim do stderr, em vez de parecer fim do video.
+    """
+
+    def __init__(self, path: str, size: tuple = None, probe: VideoProbe = None):
+        self.path = path
+        self.probe = probe or probe_video(path)
+        self.source_size = (self.probe.width, self.probe.height)
+        self.width, self.height = size or self.source_size
+        self.frame_interval = 1
+        self._frame_bytes = self.width * self.height * 3
+        self._scratch = None
+        self._process = None
+        self._stderr = None
+        self._position = 0
+        self._start_frame = 0
+        self._opened = True
+
+    def decimate(self, frame_interval: int):
+        if self._process is not None:
+            raise RuntimeError("decimate() deve ser chamado antes da primeira leitura")
+        self.frame_interval = max(1, int(frame_interval))
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def get(self, prop) -> float:
+        if prop == cv2.CAP_PROP_FPS:
+            return self.probe.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.probe.frames
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self._start_frame + self._position * self.frame_interval
+        return 0
+
+    def set(self, prop, value) -> bool:
+        # So a posicao (rewind do loop ou busca de segmento) e suportada: reinicia o processo
+        if prop == cv2.CAP_PROP_POS_FRAMES and int(value) >= 0:
+            self._stop()
+            self._start_frame = int(value)
+            self._position = 0
+            return True
+        return False
+
+    def _start(self):
+        start_time = seek_time(self._start_frame, self.probe.fps)
+        cmd = ffmpeg_ingest_command(self.path, (self.width, self.height), self.source_size, self.frame_interval,
+                                    start_time)
+        # stderr em arquivo: o pipe cheio travaria o ffmpeg, e o erro e lido so se ele falhar
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=self._stderr,
+                                         bufsize=self._frame_bytes)
+
+    def _check_exit(self):
+        """Fim do pipe: saida normal e fim do video; codigo diferente de zero vira IOError."""
+        returncode = self._process.wait()
+        if returncode == 0:
+            return
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode('utf-8', errors='replace').strip()
+        raise IOError(f"ffmpeg falhou ao decodificar '{self.path}' (codigo {returncode}): {stderr[-500:]}")
+
+    def _read_into(self, image: np.ndarray) -> bool:
+        if not self._opened:
+            return False
+        if self._process is None:
+            self._start()
+        view = memoryview(image).cast('B')
+        received = 0
+        while received < self._frame_bytes:
+            count = self._process.stdout.readinto(view[received:])
+            if not count:
+                self._check_exit()
+                return False
+            received += count
+        self._position += 1
+        return True
+
+    def read(self, image: np.ndarray = None):
+        shape = (self.height, self.width, 3)
+        if image is None or image.shape != shape or image.dtype != np.uint8 or not image.flags.c_contiguous:
+            image = np.empty(shape, dtype=np.uint8)
+        if not self._read_into(image):
+            return False, None
+        return True, image
+
+    def grab(self) -> bool:
+        if self._scratch is None:
+            self._scratch = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        return self._read_into(self._scratch)
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        process.stdout.close()
+        if process.poll() is None:
+            process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        self._stderr.close()
+        self._stderr = None
+
+    def release(self):
+        self._stop()
+        self._opened = False
+
+
+def open_scaled_capture(path: str, grid_size_for, scale: int = 1, force: bool = False):
+    """
+    FfmpegCapture ja na resolucao que o pipeline precisa. grid_size_for
+    recebe (largura, altura) de origem e devolve a grade; o retorno e
+    (captura, grade). Sem ffmpeg/ffprobe, ou (sem force) quando o video ja
+    e pequeno e nao ha o que reduzir, devolve (None, None) e quem chama usa
+    o OpenCV.
+    """
+    if not ffmpeg_available():
+        return None, None
+    probe = probe_video(path)
+    grid = grid_size_for(probe.width, probe.height)
+    size = ingest_size(grid, (probe.width, probe.height), scale)
+    if size == (probe.width, probe.height) and not force:
+        return None, None
+    return FfmpegCapture(path, size, probe), grid
+
+
+def scaled_frame_source(video_path: str, source, size: tuple, decoder: str = 'auto', target_fps: float = 0):
+    """
+    Troca um FrameSource do OpenCV (ainda nao iniciado) por um com
+    FfmpegCapture que ja entrega `size` (limitado a resolucao de origem).
+    Devolve o proprio `source` com decoder 'opencv', sem ffmpeg ou quando
+    nao ha o que reduzir.
+    """
+    from src.core.utils.frame_source import FrameSource
+
+    if decoder == 'opencv' or not ffmpeg_available():
+        return source
+    size = ingest_size(size, (source.width, source.height))
+    if size == (source.width, source.height) and decoder != 'ffmpeg':
+        return source
+    try:
+        capture = FfmpegCapture(video_path, size)
+    except IOError:
+        return source
+    source.close()
+    return FrameSource(capture, target_fps=target_fps)
@@ -0,0 +1,242 @@
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Frames decodificados a frente do consumidor
+DEFAULT_DECODE_AHEAD = 4
+# Fonte ao vivo: leituras falhas seguidas (com espera entre elas) antes de encerrar o stream
+LIVE_READ_RETRIES = 10
+LIVE_RETRY_DELAY = 0.5
+
+
+@dataclass
+class SourceFrame:
+    """Frame decodificado: indice no video de origem e instante em segundos."""
+    image: np.ndarray
+    index: int
+    timestamp: float
+
+
+def frame_interval_for(fps: float, target_fps: float) -> int:
+    """Frames da origem por frame de saida para nao passar de target_fps (0 = todos)."""
+    if target_fps and fps > target_fps:
+        return max(1, round(fps / target_fps))
+    return 1
+
+
+class _SourceError:
+    def __init__(self, error):
+        self.error = error
+
+
+_SOURCE_DONE = object()
+
+
+class FrameSource:
+    """
+    Decodifica um video numa thread de fundo para um anel de frames
+    pre-alocados, para a decodificacao do proximo frame correr enquanto o
+    atual e processado.
+
+    `source` e um caminho, um indice de camera ou um objeto com a interface
+    do cv2.VideoCapture (read/grab/get/set/release). O anel tem depth + 1
+    slots: ate depth frames prontos e o frame que esta com o consumidor. O
+    SourceFrame devolvido aponta para um slot do anel e so vale ate o
+    proximo next()/read(); use .copy() para guardar.
+
+    Com target_fps abaixo do fps do video so 1 a cada frame_interval frames
+    e decodificado: os outros sao so avancados com grab(), ou descartados
+    pelo proprio backend quando ele tem decimate() (FfmpegCapture). Com
+    loop o video volta ao inicio no fim. Fontes ao vivo (camera, por
+    padrao) nao acumulam atraso: com o anel cheio o frame pronto mais
+    antigo e descartado (dropped_frames) em vez de a captura esperar; uma
+    leitura falha (camera que perdeu um frame) espera retry_delay e tenta de
+    novo, ate read_retries falhas seguidas.
+    start_frame posiciona a captura antes da primeira leitura (os indices
+    seguem os do video de origem); deve ser multiplo de frame_interval para
+    a selecao de frames ser a mesma de uma leitura desde o inicio.
+    """
+
+    def __init__(self, source, depth: int = DEFAULT_DECODE_AHEAD, target_fps: float = 0,
+                 loop: bool = False, live: bool = None, start_frame: int = 0,
+                 read_retries: int = LIVE_READ_RETRIES, retry_delay: float = LIVE_RETRY_DELAY):
+        self.capture = source if hasattr(source, 'grab') else cv2.VideoCapture(source)
+        if not self.capture.isOpened():
+            raise IOError(f"Erro ao abrir video: {source}")
+        self.live = isinstance(source, int) if live is None else live
+        self.loop = loop
+        self.read_retries = read_retries
+        self.retry_delay = retry_delay
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.total_frames = max(0, int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_interval = frame_interval_for(self.fps, target_fps)
+        # Backend que descarta sozinho os frames pulados: cada leitura avanca frame_interval
+        self._index_step = 1
+        if self.frame_interval > 1 and hasattr(self.capture, 'decimate'):
+            self.capture.decimate(self.frame_interval)
+            self._index_step = self.frame_interval
+        self.dropped_frames = 0
+        self.start_frame = 0
+
+        slots = max(1, int(depth)) + 1
+        if self.width > 0 and self.height > 0:
+            self._ring = [np.empty((self.height, self.width, 3), dtype=np.uint8) for _ in range(slots)]
+        else:
+            # Dimensoes desconhecidas: cada slot e alocado na primeira leitura
+            self._ring = [None] * slots
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._ready = queue.Queue()
+        self._stop = threading.Event()
+        self._held = None
+        self._finished = False
+        self._thread = None
+        if start_frame:
+            self.seek(start_frame)
+
+    @property
+    def output_fps(self) -> float:
+        return self.fps / self.frame_interval
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> SourceFrame:
+        if self._finished:
+            raise StopIteration
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._decode, name="frame-source", daemon=True)
+            self._thread.start()
+        self._release_held()
+        item = self._ready.get()
+        if item is _SOURCE_DONE:
+            self._finished = True
+            raise StopIteration
+        if isinstance(item, _SourceError):
+            self._finished = True
+            raise item.error
+        slot, index, timestamp = item
+        self._held = slot
+        return SourceFrame(self._ring[slot], index, timestamp)
+
+    def seek(self, frame: int):
+        """Posiciona a captura no frame `frame` da origem; so antes da primeira leitura."""
+        if self._thread is not None:
+            raise RuntimeError("seek() deve ser chamado antes da primeira leitura")
+        self.start_frame = max(0, int(frame))
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+
+    def read(self):
+        """Mesma interface do cv2.VideoCapture.read(): (sucesso, imagem)."""
+        frame = next(self, None)
+        return (False, None) if frame is None else (True, frame.image)
+
+    def _release_held(self):
+        if self._held is not None:
+            self._free.put(self._held)
+            self._held = None
+
+    def _acquire_slot(self):
+        if self.live:
+            try:
+                return self._free.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                slot = self._ready.get_nowait()[0]
+                self.dropped_frames += 1
+                return slot
+            except queue.Empty:
+                pass
+        while not self._stop.is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _rewind(self, frames_since_rewind: int) -> bool:
+        # Um video que nao rende nenhum frame apos o rewind terminaria em loop infinito
+        if not self.loop or self.live or frames_since_rewind == 0:
+            return False
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return True
+
+    def _retry_live(self, failures: int) -> bool:
+        if not self.live or failures > self.read_retries:
+            return False
+        logger.warning("Erro ao ler frame (%d/%d), tentando de novo", failures, self.read_retries)
+        self._stop.wait(self.retry_delay)
+        return True
+
+    def _decode(self):
+        capture = self.capture
+        read_count = self.start_frame
+        since_rewind = 0
+        failures = 0
+        try:
+            while not self._stop.is_set():
+                # Frames pulados pelo frame_interval nao sao decodificados
+                if read_count % self.frame_interval != 0:
+                    if capture.grab():
+                        read_count += 1
+                        failures = 0
+                        continue
+                    failures += 1
+                    if self._retry_live(failures):
+                        continue
+                    if not self._rewind(since_rewind):
+                        break
+                    read_count = since_rewind = 0
+                    continue
+
+                slot = self._acquire_slot()
+                if slot is None:
+                    return
+                ok, image = capture.read(self._ring[slot])
+                if not ok or image is None:
+                    self._free.put(slot)
+                    failures += 1
+                    if self._retry_live(failures):
+                        continue
+                    if not self._rewind(since_rewind):
+                        break
+                    read_count = since_rewind = 0
+                    continue
+                # Primeira leitura (ou mudanca de resolucao) aloca o slot
+                self._ring[slot] = image
+                failures = 0
+                timestamp = read_count / self.fps if self.fps > 0 else 0.0
+                self._ready.put((slot, read_count, timestamp))
+                read_count += self._index_step
+                since_rewind += 1
+            self._ready.put(_SOURCE_DONE)
+        except BaseException as e:
+            self._ready.put(_SourceError(e))
+
+    def close(self):
+        """Para a thread de decodificacao e libera a captura."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._finished = True
+        self._held = None
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
@@ -0,0 +1,280 @@
+import cv2
+import numpy as np
+
+# Cada glifo e rasterizado num tile de 3x3 celulas. O bloco (by, bx) = (1, 1)
+# e a propria celula; os demais guardam o que o cv2.putText desenha fora dela
+# (ex.: 'W' em font_scale 0.5 invade a celula da direita, '(' a de cima, e o
+# retangulo preenchido do espaco tem 1px a mais para a direita e para baixo).
+#
+# Ordem em que as camadas chegam a uma celula no desenho original (row-major):
+# vizinhas de cima/esquerda, o proprio glifo, vizinhas da direita/de baixo.
+LAYER_ORDER = ((2, 2), (2, 1), (2, 0), (1, 2), (1, 1), (1, 0), (0, 2), (0, 1), (0, 0))
+
+EMPTY_GLYPH = ""
+CODEPOINT_LUT_SIZE = 0x10000
+
+
+def render_glyph_tile(
+    char: str,
+    font_scale: float,
+    cell_w: int,
+    cell_h: int,
+    font: int = cv2.FONT_HERSHEY_SIMPLEX,
+    thickness: int = 1
+) -> np.ndarray:
+    tile = np.zeros((3 * cell_h, 3 * cell_w), dtype=np.uint8)
+    if not char:
+        return tile
+    if char.strip():
+        text_y = 2 * cell_h - 4
+        cv2.putText(tile, char, (cell_w, text_y), font, font_scale, 255, thickness, cv2.LINE_AA)
+    else:
+        cv2.rectangle(tile, (cell_w, cell_h), (2 * cell_w, 2 * cell_h), 255, -1)
+    return tile
+
+
+def _cell_slices(n: int, offset: int):
+    # Fatias (origem, destino) para deslocar uma grade de n celulas em `offset`
+    return slice(max(0, -offset), n - max(0, offset)), slice(max(0, offset), n + min(0, offset))
+
+
+def _pack_bits(mask: np.ndarray) -> np.ndarray:
+    # Mascara de pixels de um tile em palavras de 64 bits (teste de sobreposicao barato)
+    bits = np.packbits(mask.ravel(), bitorder='little')
+    bits = np.pad(bits, (0, -len(bits) % 8))
+    return bits.view(np.uint64)
+
+
+def _blend(dst: np.ndarray, alpha: np.ndarray, color: np.ndarray) -> np.ndarray:
+    # Mesma aritmetica do LINE_AA do OpenCV: (dst*(255-a) + c*a + 127) // 255.
+    # O maior valor intermediario (65407) cabe em uint16.
+    a = alpha[..., None].astype(np.uint16)
+    out = dst.astype(np.uint16)
+    out *= 255 - a
+    out += color.astype(np.uint16) * a
+    out += 128
+    out += out >> 8
+    out >>= 8
+    return out.astype(np.uint8)
+
+
+class _Layer:
+    def __init__(self, n_colors: int, cell_h: int, cell_w: int):
+        words = len(_pack_bits(np.zeros(cell_h * cell_w, dtype=bool)))
+        self.alpha = np.zeros((1, cell_h, cell_w), dtype=np.uint8)
+        self.keep = np.full((1, cell_h, cell_w, 3), 255, dtype=np.uint8)
+        self.tinted = np.zeros((1, n_colors, cell_h, cell_w, 3), dtype=np.uint8)
+        self.ink_bits = np.zeros((1, words), dtype=np.uint64)
+        self.partial_bits = np.zeros((1, words), dtype=np.uint64)
+        self.window = slice(0, 0)
+        self._window_tables = None
+
+    def add(self, alpha: np.ndarray, tinted: np.ndarray) -> int:
+        slot = len(self.alpha)
+        # Pixels opacos (alpha 255) sobrescrevem o que havia embaixo
+        keep = np.where(alpha == 255, 0, 255).astype(np.uint8)
+        self.alpha = np.concatenate([self.alpha, alpha[None]])
+        self.keep = np.concatenate([self.keep, np.repeat(keep[None, :, :, None], 3, axis=3)])
+        self.tinted = np.concatenate([self.tinted, tinted[None]])
+        self.ink_bits = np.concatenate([self.ink_bits, _pack_bits(alpha > 0)[None]])
+        self.partial_bits = np.concatenate([self.partial_bits, _pack_bits((alpha > 0) & (alpha < 255))[None]])
+
+        # Faixa de linhas com tinta de algum glifo da camada (ex.: a sobra do
+        # espaco na celula de baixo e uma unica linha). Linhas inteiras mantem
+        # o trecho de cada tile contiguo, o que importa para os ufuncs.
+        ys = np.nonzero(self.alpha.any(axis=(0, 2)))[0]
+        self.window = slice(ys[0], ys[-1] + 1)
+        self._window_tables = None
+        return slot
+
+    def window_tables(self):
+        # keep e tinted recortados na janela e contiguos: np.take(out=) exige
+        # fonte contigua e copiaria a tabela inteira a cada chamada
+        if self._window_tables is None:
+            wy = self.window
+            keep = np.ascontiguousarray(self.keep[:, wy])
+            tinted = np.ascontiguousarray(self.tinted[:, :, wy])
+            self._window_tables = keep, tinted.reshape((-1,) + tinted.shape[2:])
+        return self._window_tables
+
+
+def _compose(dst: np.ndarray, layer: _Layer, src_slots: np.ndarray, src_codes: np.ndarray, pool=None):
+    # Sobre fundo preto (ou sob pixels opacos) o putText deixa exatamente o
+    # glifo tingido; os pixels de borda sobre tinta anterior sao corrigidos
+    # depois com _blend.
+    if pool is None:
+        np.bitwise_and(dst, layer.keep[src_slots, layer.window], out=dst)
+        np.maximum(dst, layer.tinted[src_slots, src_codes, layer.window], out=dst)
+        return
+
+    keep, tinted = layer.window_tables()
+    gathered = pool.get('atlas.gather', src_slots.shape + keep.shape[1:])
+    np.take(keep, src_slots, axis=0, out=gathered, mode='clip')
+    np.bitwise_and(dst, gathered, out=dst)
+    tint_index = pool.get('atlas.tint_index', src_slots.shape, np.int32)
+    np.multiply(src_slots, tinted.shape[0] // keep.shape[0], out=tint_index)
+    tint_index += src_codes
+    np.take(tinted, tint_index, axis=0, out=gathered, mode='clip')
+    np.maximum(dst, gathered, out=dst)
+
+
+class GlyphAtlas:
+    def __init__(
+        self,
+        font_scale: float,
+        cell_w: int,
+        cell_h: int,
+        palette: np.ndarray,
+        font: int = cv2.FONT_HERSHEY_SIMPLEX,
+        thickness: int = 1
+    ):
+        self.font_scale = font_scale
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+        self.font = font
+        self.thickness = thickness
+        self.palette = np.ascontiguousarray(palette, dtype=np.uint8)
+        self.n_colors = len(self.palette)
+
+        self.chars = []
+        self._index = {}
+        self._codepoint_lut = np.full(CODEPOINT_LUT_SIZE, -1, dtype=np.int32)
+        self._layers = {}
+        self.layer_slot = np.zeros((0, 3, 3), dtype=np.int32)
+
+        self.lookup([EMPTY_GLYPH])
+
+    def __len__(self) -> int:
+        return len(self.chars)
+
+    def _tint(self, alpha: np.ndarray) -> np.ndarray:
+        # Mesma aritmetica do LINE_AA do OpenCV sobre fundo preto: (c*a + 127) // 255
+        tinted = alpha.astype(np.uint32)[None, :, :, None] * self.palette.astype(np.uint32)[:, None, None, :]
+        return ((tinted + 127) // 255).astype(np.uint8)
+
+    def _add(self, char: str) -> int:
+        row = len(self.chars)
+        h, w = self.cell_h, self.cell_w
+        tile = render_glyph_tile(char, self.font_scale, w, h, self.font, self.thickness)
+        blocks = tile.reshape(3, h, 3, w).transpose(0, 2, 1, 3)
+
+        slots = np.zeros((1, 3, 3), dtype=np.int32)
+        for by, bx in LAYER_ORDER:
+            alpha = blocks[by, bx]
+            if not alpha.any():
+                continue
+            layer = self._layers.get((by, bx))
+            if layer is None:
+                layer = self._layers[(by, bx)] = _Layer(self.n_colors, h, w)
+            slots[0, by, bx] = layer.add(alpha, self._tint(alpha))
+
+        self.layer_slot = np.concatenate([self.layer_slot, slots])
+        self.chars.append(char)
+        self._index[char] = row
+        if len(char) == 1 and ord(char) < CODEPOINT_LUT_SIZE:
+            self._codepoint_lut[ord(char)] = row
+        return row
+
+    def lookup(self, chars) -> np.ndarray:
+        index = self._index
+        rows = np.empty(len(chars), dtype=np.int32)
+        for i, char in enumerate(chars):
+            row = index.get(char)
+            if row is None:
+                row = self._add(char)
+            rows[i] = row
+        return rows
+
+    def lookup_codepoints(self, codepoints: np.ndarray) -> np.ndarray:
+        if codepoints.size and codepoints.max() >= CODEPOINT_LUT_SIZE:
+            return self.lookup([chr(c) for c in codepoints.ravel()]).reshape(codepoints.shape)
+        rows = self._codepoint_lut[codepoints]
+        if (rows < 0).any():
+            for cp in np.unique(codepoints[rows < 0]):
+                self._add(chr(cp))
+            rows = self._codepoint_lut[codepoints]
+        return rows
+
+    def render(self, rows: np.ndarray, codes: np.ndarray, out: np.ndarray = None, pool=None) -> np.ndarray:
+        """
+        Compoe a imagem da grade (rows, codes). Com um BufferPool os tiles,
+        slots e mascaras de tinta vem do pool em vez de serem alocados a cada
+        frame; so as correcoes de sobreposicao (poucas celulas) alocam.
+        """
+        grid_h, grid_w = rows.shape
+        h, w = self.cell_h, self.cell_w
+        if pool is None:
+            codes = np.clip(codes, 0, self.n_colors - 1)
+        else:
+            codes = np.clip(codes, 0, self.n_colors - 1, out=pool.get('atlas.codes', rows.shape, np.int32))
+
+        if out is None:
+            out = np.empty((grid_h * h, grid_w * w, 3), dtype=np.uint8)
+        if grid_h == 0 or grid_w == 0:
+            return out
+
+        # Composicao em layout celula-major (cada tile contiguo); a transposicao
+        # para o layout de imagem acontece uma unica vez no final.
+        if pool is None:
+            tiles = np.zeros((grid_h, grid_w, h, w, 3), dtype=np.uint8)
+            slots = self.layer_slot[rows]
+        else:
+            tiles = pool.zeros('atlas.tiles', (grid_h, grid_w, h, w, 3))
+            slots = np.take(self.layer_slot, rows, axis=0, out=pool.get('atlas.slots', rows.shape + (3, 3), np.int32), mode='clip')
+        ink = None
+
+        for by, bx in LAYER_ORDER:
+            layer = self._layers.get((by, bx))
+            if layer is None:
+                continue
+            src_y, dst_y = _cell_slices(grid_h, by - 1)
+            src_x, dst_x = _cell_slices(grid_w, bx - 1)
+            src_slots = slots[src_y, src_x, by, bx]
+            used = np.count_nonzero(src_slots)
+            if used == 0:
+                continue
+            src_codes = codes[src_y, src_x]
+
+            # Pixels de borda antialiased que caem sobre tinta ja desenhada
+            # precisam do blend exato; guarda o valor anterior antes de compor.
+            if ink is None:
+                ink_shape = (grid_h, grid_w, layer.ink_bits.shape[1])
+                ink = np.zeros(ink_shape, dtype=np.uint64) if pool is None else pool.zeros('atlas.ink', ink_shape, np.uint64)
+            dst_ink = ink[dst_y, dst_x]
+            if pool is None:
+                overlap = dst_ink & layer.partial_bits[src_slots]
+                oy, ox = np.nonzero(overlap.any(axis=2))
+            else:
+                overlap = pool.get('atlas.bits', src_slots.shape + layer.partial_bits.shape[1:], np.uint64)
+                np.take(layer.partial_bits, src_slots, axis=0, out=overlap, mode='clip')
+                np.bitwise_and(overlap, dst_ink, out=overlap)
+                oy, ox = np.nonzero(np.any(overlap, axis=2, out=pool.get('atlas.overlap', src_slots.shape, bool)))
+            if len(oy):
+                bits = np.unpackbits(overlap[oy, ox].view(np.uint8), axis=1, bitorder='little')
+                k, p = np.nonzero(bits[:, :h * w])
+                oy, ox = oy[k], ox[k]
+                py, px = np.divmod(p, w)
+                ty, tx = oy + dst_y.start, ox + dst_x.start
+                prev = tiles[ty, tx, py, px]
+            if pool is None:
+                dst_ink |= layer.ink_bits[src_slots]
+            else:
+                dst_ink |= np.take(layer.ink_bits, src_slots, axis=0, out=overlap, mode='clip')
+
+            wy = layer.window
+            if used * 4 > src_slots.size:
+                _compose(tiles[dst_y, dst_x, wy], layer, src_slots, src_codes, pool)
+            else:
+                sy, sx = np.nonzero(src_slots)
+                ty_s = sy + dst_y.start
+                tx_s = sx + dst_x.start
+                dst = tiles[ty_s, tx_s, wy]
+                _compose(dst, layer, src_slots[sy, sx], src_codes[sy, sx])
+                tiles[ty_s, tx_s, wy] = dst
+
+            if len(oy):
+                alpha = layer.alpha[src_slots[oy, ox], py, px]
+                tiles[ty, tx, py, px] = _blend(prev, alpha, self.palette[src_codes[oy, ox]])
+
+        out.reshape(grid_h, h, grid_w, w, 3)[...] = tiles.transpose(0, 2, 1, 3, 4)
+        return out
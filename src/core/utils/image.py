@@ -1,22 +1,28 @@
+from functools import lru_cache
+
 import cv2
 import numpy as np
 
 
-def sharpen_frame(frame: np.ndarray, sharpen_amount: float = 0.5) -> np.ndarray:
+def sharpen_frame(frame: np.ndarray, sharpen_amount: float = 0.5, dst: np.ndarray = None) -> np.ndarray:
     if sharpen_amount <= 0:
         return frame
-    gaussian = cv2.GaussianBlur(frame, (5, 5), 1.0)
-    sharpened = cv2.addWeighted(frame, 1.0 + sharpen_amount, gaussian, -sharpen_amount, 0)
+    # Com dst o blur e o resultado usam o mesmo buffer (dst nao pode ser o proprio frame)
+    gaussian = cv2.GaussianBlur(frame, (5, 5), 1.0, dst=dst)
+    sharpened = cv2.addWeighted(frame, 1.0 + sharpen_amount, gaussian, -sharpen_amount, 0, dst=gaussian)
     return sharpened
 
 
-def apply_morphological_refinement(mask: np.ndarray, erode_size: int = 2, dilate_size: int = 2) -> np.ndarray:
+@lru_cache(maxsize=None)
+def _ellipse_kernel(size: int) -> np.ndarray:
+    return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size*2+1, size*2+1))
+
+
+def apply_morphological_refinement(mask: np.ndarray, erode_size: int = 2, dilate_size: int = 2, dst: np.ndarray = None) -> np.ndarray:
     erode_size = int(erode_size)
     dilate_size = int(dilate_size)
     if erode_size > 0:
-        kernel_erode = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (erode_size*2+1, erode_size*2+1))
-        mask = cv2.erode(mask, kernel_erode, iterations=1)
+        mask = cv2.erode(mask, _ellipse_kernel(erode_size), dst=dst, iterations=1)
     if dilate_size > 0:
-        kernel_dilate = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (dilate_size*2+1, dilate_size*2+1))
-        mask = cv2.dilate(mask, kernel_dilate, iterations=1)
+        mask = cv2.dilate(mask, _ellipse_kernel(dilate_size), dst=dst, iterations=1)
     return mask
@@ -27,3 +27,15 @@ def load_postfx_config(config: configparser.ConfigParser):
         glitch_intensity=config.getfloat('PostFX', 'glitch_intensity', fallback=0.6),
         glitch_block_size=config.getint('PostFX', 'glitch_block_size', fallback=8)
     )
+
+
+def postfx_effects(postfx_config) -> list:
+    """Nomes dos efeitos ligados num PostFXConfig (lista vazia sem PostFX)."""
+    if postfx_config is None or not POSTFX_AVAILABLE:
+        return []
+    return [name for name, enabled in (
+        ("Bloom", postfx_config.bloom_enabled),
+        ("Chromatic", postfx_config.chromatic_enabled),
+        ("Scanlines", postfx_config.scanlines_enabled),
+        ("Glitch", postfx_config.glitch_enabled),
+    ) if enabled]
@@ -0,0 +1,82 @@
+import numpy as np
+
+from .ascii_frame import EDGE_CHARS, MASK_CHAR, glyph_index_dtype, glyph_tokens
+
+_GRAY_LEVELS = np.arange(256, dtype=np.int32)
+
+
+class CompiledRamp:
+    """
+    Rampa de luminancia compilada uma unica vez: LUT de 256 entradas
+    (cinza -> indice na rampa), variantes com edge boost e a tabela de
+    tokens UTF-8 usada na serializacao do AsciiFrame.
+
+    A tabela de simbolos (glyphs) e a rampa seguida dos caracteres de borda
+    e do caractere da mascara, na mesma ordem de converter_frame_para_ascii.
+    """
+
+    def __init__(self, ramp: str):
+        self.ramp = ramp
+        self.glyphs = ramp + EDGE_CHARS + MASK_CHAR
+        self.edge_base = len(ramp)
+        self.mask_index = len(ramp) + len(EDGE_CHARS)
+        self.dtype = glyph_index_dtype(len(self.glyphs))
+        self.index_lut = self._index(_GRAY_LEVELS)
+        self.tokens = glyph_tokens(self.glyphs)
+        self._boosted = {}
+
+    def _index(self, brightness: np.ndarray) -> np.ndarray:
+        # Mesma conta em float64 do conversor original, feita uma vez por nivel
+        return ((brightness / 255) * (len(self.ramp) - 1)).astype(self.dtype)
+
+    def boosted_lut(self, edge_boost_amount: int) -> np.ndarray:
+        """LUT de 512 entradas: [0, 256) sem boost, [256, 512) para celulas de borda."""
+        lut = self._boosted.get(edge_boost_amount)
+        if lut is None:
+            boosted = np.clip(_GRAY_LEVELS + edge_boost_amount, 0, 255)
+            lut = np.concatenate([self.index_lut, self._index(boosted)])
+            self._boosted[edge_boost_amount] = lut
+        return lut
+
+    def lookup(self, gray_frame: np.ndarray, is_edge: np.ndarray = None, edge_boost_amount: int = 0, pool=None) -> np.ndarray:
+        """
+        Indices na rampa para um frame uint8; com is_edge aplica o edge boost.
+        Com um BufferPool o indice e a saida vem do pool.
+        """
+        if pool is None:
+            if is_edge is None or edge_boost_amount == 0:
+                return self.index_lut.take(gray_frame)
+            index = gray_frame.astype(np.uint16)
+            index[is_edge] += 256
+            return self.boosted_lut(edge_boost_amount).take(index)
+
+        out = pool.get('ramp.chars', gray_frame.shape, self.dtype)
+        if is_edge is None or edge_boost_amount == 0:
+            return self.index_lut.take(gray_frame, out=out, mode='clip')
+        index = pool.get('ramp.index', gray_frame.shape, np.uint16)
+        np.copyto(index, gray_frame)
+        np.add(index, 256, out=index, where=is_edge)
+        return self.boosted_lut(edge_boost_amount).take(index, out=out, mode='clip')
+
+
+_registry = {}
+
+
+def compile_ramp(ramp: str) -> CompiledRamp:
+    compiled = _registry.get(ramp)
+    if compiled is None:
+        compiled = _registry[ramp] = CompiledRamp(ramp)
+    return compiled
+
+
+def warm_ramps(ramps, edge_boost_amounts=(100,)) -> int:
+    """Compila de antemao as rampas (ex.: presets de LUMINANCE_RAMPS)."""
+    count = 0
+    for ramp in ramps:
+        if not ramp:
+            continue
+        compiled = compile_ramp(ramp)
+        for amount in edge_boost_amounts:
+            compiled.boosted_lut(amount)
+        count += 1
+    return count
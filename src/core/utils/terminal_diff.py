@@ -0,0 +1,174 @@
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from .ansi_encoder import AnsiEncoder, repeated_color_mask
+from .ascii_frame import ANSI_RESET, AsciiFrame, _token_table, glyph_tokens, serialize_cells
+
+SYNC_BEGIN = b"\033[?2026h"
+SYNC_END = b"\033[?2026l"
+CLEAR_SCREEN = b"\033[2J"
+HIDE_CURSOR = b"\033[?25l"
+SHOW_CURSOR = b"\033[?25h"
+RESET = ANSI_RESET.encode('ascii')
+
+# Um "\033[y;xH" custa ~8 bytes; lacunas limpas menores que isso saem mais
+# baratas redesenhadas dentro do mesmo run
+DEFAULT_MAX_GAP = 4
+
+# Terminais conhecidos por implementar o synchronized update (DEC mode 2026)
+_SYNC_TERMS = ('kitty', 'foot', 'alacritty', 'wezterm', 'ghostty', 'contour', 'mintty')
+_SYNC_TERM_PROGRAMS = ('WezTerm', 'iTerm.app', 'ghostty', 'contour', 'mintty')
+
+
+def supports_synchronized_output(environ=None) -> bool:
+    environ = os.environ if environ is None else environ
+    if environ.get('WT_SESSION'):
+        return True
+    if environ.get('TERM_PROGRAM', '') in _SYNC_TERM_PROGRAMS:
+        return True
+    term = environ.get('TERM', '')
+    return any(name in term for name in _SYNC_TERMS)
+
+
+@lru_cache(maxsize=8)
+def _row_tokens(height: int) -> tuple:
+    return _token_table(f"\033[{y + 1};" for y in range(height))
+
+
+@lru_cache(maxsize=8)
+def _col_tokens(width: int) -> tuple:
+    return _token_table(f"{x + 1}H" for x in range(width))
+
+
+def dirty_runs(dirty: np.ndarray, max_gap: int = DEFAULT_MAX_GAP) -> tuple:
+    """
+    Agrupa as celulas alteradas em runs horizontais, juntando runs da mesma
+    linha separados por ate max_gap celulas limpas. Retorna as mascaras
+    (in_run, run_start) no shape da grade.
+    """
+    height, width = dirty.shape
+    # Coluna extra False no fim de cada linha: nenhum run atravessa linhas
+    padded = np.zeros((height, width + 1), dtype=np.int8)
+    padded[:, :width] = dirty
+    edges = np.diff(padded.ravel(), prepend=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    if len(starts) > 1:
+        merge = (starts[1:] - ends[:-1] <= max_gap) & (starts[1:] // (width + 1) == ends[:-1] // (width + 1))
+        starts = starts[np.concatenate(([True], ~merge))]
+        ends = ends[np.concatenate((~merge, [True]))]
+
+    marks = np.zeros(padded.size + 1, dtype=np.int8)
+    marks[starts] = 1
+    marks[ends] -= 1
+    in_run = np.cumsum(marks[:-1], dtype=np.int8).astype(bool).reshape(height, width + 1)[:, :width]
+    run_start = np.zeros(padded.size, dtype=bool)
+    run_start[starts] = True
+    return in_run, run_start.reshape(height, width + 1)[:, :width]
+
+
+class TerminalDiffRenderer:
+    """
+    Back-end de terminal que guarda os planos (codepoint, cor) do frame
+    anterior e so reenvia as celulas que mudaram: cada run alterado vira um
+    posicionamento de cursor seguido das celulas, com o escape de cor so
+    no inicio do run e onde a cor muda. Com synchronized o frame vai entre
+    os marcadores do DEC mode 2026, e o terminal o exibe de uma vez.
+
+    Os bytes de cada frame sao contados no AnsiEncoder (bytes_per_frame).
+    """
+
+    def __init__(self, encoder: AnsiEncoder = None, synchronized: bool = None, stream=None, max_gap: int = DEFAULT_MAX_GAP):
+        self.encoder = encoder or AnsiEncoder()
+        self.synchronized = supports_synchronized_output() if synchronized is None else synchronized
+        self.stream = stream
+        self.max_gap = max_gap
+        self.last_dirty_cells = 0
+        self._prev_codepoints = None
+        self._prev_colors = None
+
+    @classmethod
+    def from_config(cls, config, encoder: AnsiEncoder = None, **kwargs) -> "TerminalDiffRenderer":
+        mode = config.get('Player', 'synchronized_output', fallback='auto').lower() if config else 'auto'
+        synchronized = None if mode == 'auto' else mode in ('true', 'on', 'sim', '1', 'yes')
+        return cls(encoder=encoder, synchronized=synchronized, **kwargs)
+
+    def reset(self):
+        """Forca um redesenho completo no proximo frame."""
+        self._prev_codepoints = None
+        self._prev_colors = None
+
+    def encode(self, chars: np.ndarray, glyphs: str, colors: np.ndarray) -> bytes:
+        """Bytes para levar o terminal do frame anterior a este (b'' se nada mudou)."""
+        encoder = self.encoder
+        colors = encoder.prepare_colors(colors)
+        table = np.frombuffer(glyphs.encode('utf-32-le'), dtype=np.uint32)
+        codepoints = table[chars]
+
+        full = self._prev_codepoints is None or self._prev_codepoints.shape != codepoints.shape \
+            or self._prev_colors.shape != colors.shape
+        if full:
+            dirty = np.ones(codepoints.shape, dtype=bool)
+        else:
+            dirty = codepoints != self._prev_codepoints
+            changed = colors != self._prev_colors
+            dirty |= changed.any(axis=2) if changed.ndim == 3 else changed
+        self._prev_codepoints = codepoints
+        self._prev_colors = colors.copy()
+
+        self.last_dirty_cells = int(np.count_nonzero(dirty))
+        if not self.last_dirty_cells:
+            return encoder.record(b'')
+
+        in_run, run_start = dirty_runs(dirty, self.max_gap)
+        height, width = chars.shape
+        not_start = ~run_start
+        skip_color = ~in_run
+        if encoder.run_length:
+            skip_color |= repeated_color_mask(colors) & not_start
+
+        rows = np.broadcast_to(np.arange(height)[:, None], (height, width))
+        cols = np.broadcast_to(np.arange(width)[None, :], (height, width))
+        body = serialize_cells([
+            (_row_tokens(height), rows, not_start),
+            (_col_tokens(width), cols, not_start),
+            *encoder.color_segments(colors, skip_color),
+            (glyph_tokens(glyphs), chars, ~in_run),
+        ], (height, width), newline=b'')
+
+        data = body + RESET
+        if full:
+            data = CLEAR_SCREEN + HIDE_CURSOR + data
+        if self.synchronized:
+            data = SYNC_BEGIN + data + SYNC_END
+        return encoder.record(data)
+
+    def render(self, chars: np.ndarray, glyphs: str, colors: np.ndarray) -> int:
+        data = self.encode(chars, glyphs, colors)
+        if data:
+            self._write(data)
+        return len(data)
+
+    def render_frame(self, frame: AsciiFrame) -> int:
+        return self.render(frame.chars, frame.glyphs, frame.colors)
+
+    def close(self):
+        """Devolve o cursor e as cores padrao do terminal."""
+        self._write(RESET + SHOW_CURSOR)
+        self.reset()
+
+    def _write(self, data: bytes):
+        stream = self.stream
+        if stream is None:
+            sys.stdout.flush()
+            stream = getattr(sys.stdout, 'buffer', None)
+            if stream is None:
+                sys.stdout.write(data.decode('utf-8'))
+                sys.stdout.flush()
+                return
+        stream.write(data)
+        stream.flush()
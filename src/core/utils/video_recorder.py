@@ -0,0 +1,148 @@
+import time
+
+import cv2
+import numpy as np
+
+from src.core.utils.encoder_sink import EncoderSink
+
+# Frames que podem esperar o encoder antes de a gravacao comecar a descartar
+DEFAULT_RECORD_QUEUE = 8
+
+
+def ffmpeg_record_command(output_path: str, size: tuple, fps: float) -> list:
+    width, height = size
+    return [
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'rawvideo',
+        '-pix_fmt', 'bgr24',
+        '-s', f'{width}x{height}',
+        '-r', f'{fps:g}',
+        '-i', '-',
+        '-c:v', 'libx264',
+        '-preset', 'medium',
+        '-crf', '12',
+        '-tune', 'animation',
+        '-g', '24',
+        '-bf', '0',
+        '-movflags', '+faststart',
+        '-pix_fmt', 'yuv420p',
+        output_path
+    ]
+
+
+def cfr_slot(timestamp: float, start: float, fps: float) -> int:
+    """Posicao (em frames de saida) de um frame capturado em `timestamp`."""
+    return int(round((timestamp - start) * fps))
+
+
+class VideoRecorder:
+    """
+    Grava frames BGR num MP4 por um ffmpeg que roda em paralelo, sem travar
+    quem chama (a thread do GTK, no calibrador).
+
+    write() so copia o frame para um buffer livre do EncoderSink e anota o
+    instante da captura (relogio de parede); a thread do EncoderSink envia
+    os frames como rawvideo para o stdin do ffmpeg. A saida e CFR em `fps`:
+    cada frame ocupa a posicao do seu instante de captura e e repetido ate
+    a posicao do proximo (camera ou UI mais lentas que `fps`), ou
+    descartado se a posicao ja foi ocupada. Assim a duracao do video bate
+    com a do audio gravado em paralelo. Com a fila cheia (encoder atrasado)
+    o frame e descartado (dropped_frames) e a lacuna e coberta pelo
+    anterior.
+
+    O tamanho do video e o do primeiro frame (ajustado para par, exigido
+    pelo yuv420p); frames de outro tamanho sao redimensionados.
+    """
+
+    def __init__(self, output_path: str, fps: float, depth: int = DEFAULT_RECORD_QUEUE, stderr=None):
+        self.output_path = output_path
+        self.fps = fps
+        self.depth = max(1, int(depth))
+        self.stderr = stderr
+        self.size = None
+        self.frames_received = 0
+        self.dropped_frames = 0
+        self.encoder = None
+        self._start = None
+        # Frame a espera do proximo para saber quantas vezes repetir: (slot, posicao)
+        self._pending = None
+        self._closed = False
+
+    def __len__(self):
+        return self.frames_received
+
+    @property
+    def frames_written(self) -> int:
+        return self.encoder.frames if self.encoder is not None else 0
+
+    def _setup(self, image: np.ndarray):
+        height, width = image.shape[:2]
+        self.size = (width + width % 2, height + height % 2)
+        # +1: o frame pendente ocupa um buffer enquanto o proximo nao chega
+        self.encoder = EncoderSink(ffmpeg_record_command(self.output_path, self.size, self.fps),
+                                   (self.size[1], self.size[0], 3), depth=self.depth + 1, stderr=self.stderr)
+
+    def write(self, image: np.ndarray, timestamp: float = None) -> bool:
+        """Entrega um frame sem bloquear; False se ele foi descartado."""
+        if self._closed or (self.encoder is not None and self.encoder.error is not None):
+            return False
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.encoder is None:
+            self._setup(image)
+            self._start = timestamp
+        position = cfr_slot(timestamp, self._start, self.fps)
+        if self._pending is not None and position <= self._pending[1]:
+            # Posicao ja ocupada: frame chegou rapido demais para o fps
+            return False
+        slot = self.encoder.acquire(block=False)
+        if slot is None:
+            self.dropped_frames += 1
+            return False
+
+        buffer = self.encoder.buffer(slot)
+        height, width = image.shape[:2]
+        if (width, height) == self.size:
+            np.copyto(buffer, image)
+        elif 0 <= self.size[0] - width <= 1 and 0 <= self.size[1] - height <= 1:
+            # So o ajuste para dimensoes pares: a coluna/linha extra fica preta
+            buffer[:height, :width] = image
+        else:
+            cv2.resize(image, self.size, dst=buffer, interpolation=cv2.INTER_AREA)
+        self._flush_pending(position)
+        self._pending = (slot, position)
+        self.frames_received += 1
+        return True
+
+    def _flush_pending(self, until: int):
+        # O frame pendente cobre as posicoes ate `until` (exclusive)
+        if self._pending is not None:
+            slot, position = self._pending
+            self.encoder.submit(slot, repeat=until - position)
+            self._pending = None
+
+    def close(self, end_time: float = None):
+        """
+        Finaliza o video: espera a fila esvaziar e o ffmpeg terminar.
+        end_time (relogio de parede, padrao agora) e o instante do stop: o
+        ultimo frame cobre ate ele. Devolve o numero de frames escritos;
+        erro do ffmpeg sobe como RuntimeError.
+        """
+        if self._closed:
+            return self.frames_written
+        self._closed = True
+        if self.encoder is None:
+            return 0
+        if self._pending is not None:
+            end = cfr_slot(time.monotonic() if end_time is None else end_time, self._start, self.fps)
+            self._flush_pending(max(end, self._pending[1] + 1))
+        returncode = self.encoder.close()
+        if self.encoder.error is not None or returncode != 0:
+            raise RuntimeError(f"Erro ao gravar video (ffmpeg saiu com {returncode}): {self.encoder.error or ''}")
+        return self.frames_written
+
+    def abort(self):
+        """Para a gravacao sem finalizar o video."""
+        self._closed = True
+        if self.encoder is not None:
+            self.encoder.abort()
@@ -0,0 +1,109 @@
+import numpy as np
+from src.core.utils.ansi_encoder import AnsiEncoder, encode_ansi256, encode_truecolor, repeated_color_mask
+from src.core.utils.ascii_frame import ANSI_RESET, AsciiFrame
+from src.core.renderer import ANSI_PALETTE_BGR, render_terminal
+
+
+def reference_truecolor(chars, glyphs, color_frame):
+    lines = []
+    for y in range(chars.shape[0]):
+        cells = []
+        for x in range(chars.shape[1]):
+            b, g, r = color_frame[y, x]
+            cells.append(f"\033[38;2;{r};{g};{b}m{glyphs[chars[y, x]]}")
+        lines.append("".join(cells))
+    return "\n".join(lines) + ANSI_RESET
+
+
+class TestRepeatedColorMask:
+
+    def test_codes(self):
+        codes = np.array([[1, 1, 2, 2], [2, 2, 2, 3]], dtype=np.uint8)
+        assert repeated_color_mask(codes).tolist() == [
+            [False, True, False, True], [False, True, True, False]
+        ]
+
+    def test_bgr_needs_all_channels(self):
+        colors = np.array([[[1, 2, 3], [1, 2, 3], [1, 2, 4]]], dtype=np.uint8)
+        assert repeated_color_mask(colors).tolist() == [[False, True, False]]
+
+
+class TestEncoders:
+
+    def test_truecolor_matches_per_cell_format_when_colors_differ(self):
+        rng = np.random.default_rng(0)
+        chars = rng.integers(0, 4, (3, 6)).astype(np.uint8)
+        colors = np.arange(3 * 6 * 3, dtype=np.uint8).reshape(3, 6, 3) * 3
+        encoded = encode_truecolor(chars, "@#é ", colors).decode('utf-8')
+        assert encoded == reference_truecolor(chars, "@#é ", colors)
+
+    def test_truecolor_skips_repeated_escape(self):
+        chars = np.array([[0, 1, 0]], dtype=np.uint8)
+        colors = np.full((1, 3, 3), 7, dtype=np.uint8)
+        assert encode_truecolor(chars, "ab", colors, reset=False) == b"\033[38;2;7;7;7maba"
+
+    def test_ansi256_escape_per_color_change(self):
+        chars = np.array([[0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+        codes = np.array([[16, 16, 231], [231, 231, 231]], dtype=np.uint8)
+        encoded = encode_ansi256(chars, "xy", codes)
+        assert encoded == b"\033[38;5;16mxx\033[38;5;231my\n\033[38;5;231myyy" + ANSI_RESET.encode()
+
+    def test_empty_grid(self):
+        chars = np.zeros((0, 5), dtype=np.uint8)
+        assert encode_ansi256(chars, "x", chars, reset=False) == b""
+
+
+class TestAnsiEncoder:
+
+    def frame(self):
+        chars = np.zeros((4, 20), dtype=np.uint8)
+        codes = np.full((4, 20), 196, dtype=np.uint8)
+        codes[:, 10:] = 21
+        return chars, codes
+
+    def test_run_length_shrinks_output(self):
+        chars, codes = self.frame()
+        plain = AnsiEncoder(run_length=False).encode(chars, "#", codes)
+        runs = AnsiEncoder().encode(chars, "#", codes)
+        assert plain.count(b"\033[38;5;") == 80
+        assert runs.count(b"\033[38;5;") == 8
+        assert len(runs) < len(plain) / 3
+
+    def test_counts_bytes_per_frame(self):
+        chars, codes = self.frame()
+        encoder = AnsiEncoder()
+        first = encoder.encode(chars, "#", codes)
+        encoder.encode(chars[:2], "#", codes[:2])
+        assert encoder.frames == 2
+        assert encoder.last_frame_bytes < len(first)
+        assert encoder.bytes_per_frame == (len(first) + encoder.last_frame_bytes) / 2
+
+    def test_tolerance_merges_close_truecolor(self):
+        chars = np.zeros((1, 4), dtype=np.uint8)
+        colors = np.array([[[100, 100, 100], [101, 102, 100], [103, 100, 101], [200, 10, 10]]], dtype=np.uint8)
+        exact = AnsiEncoder(truecolor=True).encode(chars, "#", colors, reset=False)
+        merged = AnsiEncoder(truecolor=True, color_tolerance=7).encode(chars, "#", colors, reset=False)
+        assert exact.count(b"\033[") == 4
+        assert merged.count(b"\033[") == 2
+
+    def test_tolerance_remaps_codes_through_palette(self):
+        chars = np.zeros((1, 3), dtype=np.uint8)
+        codes = np.array([[244, 245, 21]], dtype=np.uint8)
+        encoder = AnsiEncoder(color_tolerance=31, palette=ANSI_PALETTE_BGR)
+        assert encoder.encode(chars, "#", codes, reset=False).count(b"\033[") == 2
+
+    def test_frame_with_bgr_colors_in_256_mode(self):
+        chars = np.zeros((1, 2), dtype=np.uint8)
+        colors = np.zeros((1, 2, 3), dtype=np.uint8)
+        assert AnsiEncoder().encode(chars, "#", colors, reset=False) == b"\033[38;5;16m##"
+
+
+class TestRenderTerminal:
+
+    def test_writes_encoded_frame(self, capsysbinary):
+        frame = AsciiFrame(chars=np.zeros((2, 3), dtype=np.uint8), colors=np.full((2, 3), 46, dtype=np.uint8), glyphs="@")
+        encoder = AnsiEncoder()
+        render_terminal(frame, encoder)
+        out = capsysbinary.readouterr().out
+        assert out.endswith(b"\033[38;5;46m@@@\n\033[38;5;46m@@@" + ANSI_RESET.encode())
+        assert encoder.frames == 1
@@ -0,0 +1,98 @@
+import pytest
+import numpy as np
+from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT
+from src.core.utils.ascii_frame import AsciiFrame, COLOR_SEPARATOR, MASK_COLOR
+
+
+def convert(output_format, seed=0, ramp=LUMINANCE_RAMP_DEFAULT):
+    rng = np.random.default_rng(seed)
+    gray = rng.integers(0, 256, (6, 9), dtype=np.uint8)
+    color = rng.integers(0, 256, (6, 9, 3), dtype=np.uint8)
+    mask = np.zeros((6, 9), dtype=np.uint8)
+    mask[0, :3] = 255
+    magnitude = rng.integers(0, 256, (6, 9), dtype=np.uint8)
+    angle = rng.uniform(-np.pi, np.pi, (6, 9)).astype(np.float32)
+    return converter_frame_para_ascii(
+        gray, color, mask, magnitude, angle,
+        sobel_threshold=128,
+        luminance_ramp=ramp,
+        output_format=output_format
+    )
+
+
+class TestAsciiFrame:
+
+    def test_frame_format_returns_ascii_frame(self):
+        frame = convert("frame")
+        assert isinstance(frame, AsciiFrame)
+        assert frame.shape == (6, 9)
+        assert frame.chars.dtype == np.uint8
+        assert frame.colors.dtype == np.uint8
+        assert frame.ramp == LUMINANCE_RAMP_DEFAULT
+
+    def test_masked_cells(self):
+        frame = convert("frame")
+        assert (frame.char_array()[0, :3] == ' ').all()
+        assert (frame.colors[0, :3] == MASK_COLOR).all()
+
+    def test_to_text_matches_file_format(self):
+        assert convert("frame").to_text() == convert("file")
+
+    def test_to_ansi_matches_terminal_format(self):
+        assert convert("frame").to_ansi() == convert("terminal")
+
+    def test_from_text_round_trip(self):
+        text = convert("file")
+        frame = AsciiFrame.from_text(text)
+        assert frame.to_text() == text
+        assert np.array_equal(frame.char_array(), convert("frame").char_array())
+
+    def test_from_text_ragged_lines_are_padded(self):
+        text = f"a{COLOR_SEPARATOR}196{COLOR_SEPARATOR}b{COLOR_SEPARATOR}x{COLOR_SEPARATOR}\nc{COLOR_SEPARATOR}21{COLOR_SEPARATOR}"
+        frame = AsciiFrame.from_text(text)
+        assert frame.shape == (2, 2)
+        assert frame.char_array().tolist() == [['a', 'b'], ['c', ' ']]
+        assert frame.colors.tolist() == [[196, 255], [21, MASK_COLOR]]
+
+    def test_codepoints(self):
+        frame = AsciiFrame.from_text(f"@{COLOR_SEPARATOR}16{COLOR_SEPARATOR}█{COLOR_SEPARATOR}46{COLOR_SEPARATOR}")
+        assert frame.codepoints().tolist() == [[ord('@'), ord('█')]]
+
+    def test_large_glyph_table_uses_uint16(self):
+        ramp = ''.join(chr(0x2800 + i) for i in range(300))
+        frame = convert("frame", ramp=ramp)
+        assert frame.chars.dtype == np.uint16
+        assert frame.to_text() == convert("file", ramp=ramp)
+
+
+class TestSerializer:
+
+    @staticmethod
+    def reference_text(frame):
+        return "\n".join(
+            "".join(f"{c}{COLOR_SEPARATOR}{code}{COLOR_SEPARATOR}" for c, code in zip(row_chars, row_codes))
+            for row_chars, row_codes in zip(frame.char_array(), frame.colors)
+        )
+
+    @staticmethod
+    def reference_ansi(frame):
+        return "\n".join(
+            "".join(f"\033[38;5;{code}m{c}" for c, code in zip(row_chars, row_codes))
+            for row_chars, row_codes in zip(frame.char_array(), frame.colors)
+        ) + "\033[0m"
+
+    @pytest.mark.parametrize("ramp", [LUMINANCE_RAMP_DEFAULT, "█▓▒░ ", "10 "])
+    def test_matches_reference(self, ramp):
+        frame = convert("frame", seed=3, ramp=ramp)
+        assert frame.to_text() == self.reference_text(frame)
+        assert frame.to_ansi() == self.reference_ansi(frame)
+
+    def test_text_bytes_are_utf8(self):
+        frame = convert("frame", ramp="█▓▒░ ")
+        assert frame.to_text_bytes() == frame.to_text().encode('utf-8')
+
+    def test_single_digit_and_full_range_codes(self):
+        colors = np.arange(256, dtype=np.uint8).reshape(8, 32)
+        frame = AsciiFrame(chars=np.zeros((8, 32), dtype=np.uint8), colors=colors, glyphs="#")
+        assert frame.to_text() == self.reference_text(frame)
+        assert frame.to_ansi() == self.reference_ansi(frame)
@@ -0,0 +1,474 @@
+import configparser
+import gzip
+import threading
+
+import pytest
+import numpy as np
+import cv2
+from src.core import ascii_migration
+from src.core.ascii_migration import inspect_file, migrate_file, migration_output_path, strip_ascii_extension
+from src.core.converter import A4rSink, TxtSink
+from src.core.frame_pipeline import FramePipeline, PipelineSettings, StreamInfo
+from src.core.utils.ascii_frame import AsciiFrame
+from src.core.utils import ascii_video
+from src.core.utils.ascii_video import (
+    A4rReader, A4rWriter, COMPRESSION_NONE, COMPRESSION_ZLIB, FLUSH_INTERVAL, FRAME_DELTA, FRAME_KEY, CompressedTxtReader, TxtReader, TxtWriter,
+    a4r_options_from_config, is_a4r, open_ascii_video, read_ahead, txt_index_path, txt_output_extension
+)
+
+
+def make_frame(seed=0, height=6, width=10, glyphs=" .:#"):
+    rng = np.random.default_rng(seed)
+    return AsciiFrame(
+        chars=rng.integers(0, len(glyphs), size=(height, width), dtype=np.uint8),
+        colors=rng.integers(0, 256, size=(height, width), dtype=np.uint8),
+        glyphs=glyphs,
+    )
+
+
+def drifting_frames(count, height=40, width=120, changed=20):
+    # Poucas celulas mudam por frame, como num video com temporal coherence
+    frame = make_frame(0, height, width)
+    rng = np.random.default_rng(1)
+    frames = [frame]
+    for _ in range(count - 1):
+        frame = frame.copy()
+        ys, xs = rng.integers(0, height, changed), rng.integers(0, width, changed)
+        frame.chars[ys, xs] = rng.integers(0, len(frame.glyphs), changed)
+        frame.colors[ys, xs] = rng.integers(0, 256, changed)
+        frames.append(frame)
+    return frames
+
+
+def write_txt_frames(path, frames, fps=25.0):
+    with TxtWriter(str(path), fps) as writer:
+        for frame in frames:
+            writer.write_frame(frame)
+    return str(path)
+
+
+def write_a4r(path, frames, fps=24.0, ramp=".:#", keyframe_interval=30, compression=COMPRESSION_ZLIB):
+    height, width = frames[0].shape
+    with A4rWriter(str(path), fps, width, height, ramp=ramp, keyframe_interval=keyframe_interval,
+                   compression=compression) as writer:
+        for frame in frames:
+            writer.write_frame(frame)
+    return str(path)
+
+
+class TestA4rContainer:
+
+    def test_roundtrip(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(5)]
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", frames)) as reader:
+            assert reader.fps == 24.0
+            assert (reader.width, reader.height) == (10, 6)
+            assert reader.ramp == ".:#"
+            assert len(reader) == 5
+            for original, loaded in zip(frames, reader):
+                assert loaded.to_text() == original.to_text()
+
+    def test_random_access(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(5)]
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", frames)) as reader:
+            assert reader[3].to_text() == frames[3].to_text()
+            assert reader[-1].to_text() == frames[4].to_text()
+            with pytest.raises(IndexError):
+                reader[5]
+
+    def test_frames_with_different_glyph_tables(self, tmp_path):
+        frames = [make_frame(0, glyphs=" .:#"), make_frame(1, glyphs="#@ x")]
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", frames)) as reader:
+            assert reader.glyphs == " .:#@x"
+            assert [frame.to_text() for frame in reader] == [frame.to_text() for frame in frames]
+
+    def test_smaller_than_text(self, tmp_path):
+        frames = [make_frame(seed, 40, 120) for seed in range(3)]
+        path = write_a4r(tmp_path / "clip.a4r", frames)
+        text_bytes = sum(len(frame.to_text_bytes()) for frame in frames)
+        assert (tmp_path / "clip.a4r").stat().st_size < text_bytes / 2
+        assert is_a4r(path)
+
+    def test_rejects_wrong_grid(self, tmp_path):
+        with A4rWriter(str(tmp_path / "clip.a4r"), 24, 10, 6) as writer:
+            with pytest.raises(ValueError):
+                writer.write_frame(make_frame(height=5))
+
+    def test_abort_removes_file(self, tmp_path):
+        path = tmp_path / "clip.a4r"
+        writer = A4rWriter(str(path), 24, 10, 6)
+        writer.write_frame(make_frame())
+        writer.abort()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_incomplete_file(self, tmp_path):
+        path = tmp_path / "clip.a4r"
+        writer = A4rWriter(str(path), 24, 10, 6)
+        writer.write_frame(make_frame())
+        writer._file.flush()
+        assert not path.exists()
+        with pytest.raises(ValueError):
+            A4rReader(writer._temp_path)
+        writer.close()
+        assert len(A4rReader(str(path))) == 1
+
+
+class TestA4rDeltaFrames:
+
+    def test_keyframe_layout(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(7)]
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", frames, keyframe_interval=3)) as reader:
+            assert reader.keyframes.tolist() == [0, 3, 6]
+            assert reader.frame_types.tolist() == [FRAME_KEY, FRAME_DELTA, FRAME_DELTA] * 2 + [FRAME_KEY]
+            assert reader.keyframe_for(5) == 3
+            assert reader.keyframe_for(6) == 6
+
+    def test_sequential_reconstruction(self, tmp_path):
+        frames = drifting_frames(25)
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", frames, keyframe_interval=10)) as reader:
+            loaded = list(reader)
+        assert [frame.to_text() for frame in loaded] == [frame.to_text() for frame in frames]
+
+    def test_seek_out_of_order(self, tmp_path):
+        frames = drifting_frames(25)
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", frames, keyframe_interval=10)) as reader:
+            for index in (17, 4, 24, 9, 10, 0, 23):
+                assert reader[index].to_text() == frames[index].to_text()
+
+    def test_returned_frames_stay_valid(self, tmp_path):
+        frames = drifting_frames(5)
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", frames)) as reader:
+            first = reader[1]
+            reader[2], reader[3]
+            assert first.to_text() == frames[1].to_text()
+
+    def test_deltas_shrink_file(self, tmp_path):
+        frames = drifting_frames(30)
+        write_a4r(tmp_path / "keys.a4r", frames, keyframe_interval=1)
+        write_a4r(tmp_path / "delta.a4r", frames, keyframe_interval=30)
+        assert (tmp_path / "delta.a4r").stat().st_size < (tmp_path / "keys.a4r").stat().st_size / 3
+
+
+class TestA4rZeroCopy:
+
+    def test_uncompressed_keyframes_are_mmap_views(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(6)]
+        path = write_a4r(tmp_path / "clip.a4r", frames, keyframe_interval=1, compression=COMPRESSION_NONE)
+        reader = A4rReader(path)
+        assert reader.zero_copy
+        frame = reader[4]
+        assert not frame.chars.flags.owndata and not frame.chars.flags.writeable
+        assert frame.to_text() == frames[4].to_text()
+        assert reader[1].to_text() == frames[1].to_text()
+        reader.close()
+        assert frame.to_text() == frames[4].to_text()
+
+    def test_uncompressed_deltas(self, tmp_path):
+        frames = drifting_frames(12)
+        path = write_a4r(tmp_path / "clip.a4r", frames, keyframe_interval=5, compression=COMPRESSION_NONE)
+        with A4rReader(path) as reader:
+            assert not reader.zero_copy
+            assert [frame.to_text() for frame in reader] == [frame.to_text() for frame in frames]
+
+    def test_compressed_is_not_zero_copy(self, tmp_path):
+        with A4rReader(write_a4r(tmp_path / "clip.a4r", [make_frame()], keyframe_interval=1)) as reader:
+            assert not reader.zero_copy
+
+    def test_options_from_config(self):
+        config = configparser.ConfigParser()
+        config.read_dict({'Output': {'a4r_keyframe_interval': '1', 'a4r_compression': 'none'}})
+        assert a4r_options_from_config(config) == {'keyframe_interval': 1, 'compression': COMPRESSION_NONE}
+        defaults = a4r_options_from_config(configparser.ConfigParser())
+        assert defaults['compression'] == COMPRESSION_ZLIB
+
+
+class TestTxtReader:
+
+    def write_txt(self, path, frames, fps="30.0"):
+        path.write_text(fps + "\n[FRAME]\n" + "[FRAME]\n".join(frame.to_text() + "\n" for frame in frames) + "[FRAME]\n \n",
+                        encoding='utf-8')
+        return str(path)
+
+    def test_matches_legacy_split(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(4)]
+        path = self.write_txt(tmp_path / "clip.txt", frames)
+        with TxtReader(path) as reader:
+            assert reader.fps == 30.0
+            assert len(reader) == 4
+            assert reader.frame_text(2) == frames[2].to_text()
+            assert [frame.to_text() for frame in reader] == [frame.to_text() for frame in frames]
+
+    def test_index_cache_is_reused(self, tmp_path, monkeypatch):
+        path = self.write_txt(tmp_path / "clip.txt", [make_frame(seed) for seed in range(3)])
+        with TxtReader(path) as reader:
+            offsets = reader.offsets.copy()
+        assert (tmp_path / ".clip.txt.idx").exists()
+        assert txt_index_path(path) == str(tmp_path / ".clip.txt.idx")
+
+        def fail(self, body_start):
+            raise AssertionError("indice deveria vir do cache")
+        monkeypatch.setattr(TxtReader, "_build_index", fail)
+        with TxtReader(path) as reader:
+            assert np.array_equal(reader.offsets, offsets)
+
+    def test_index_cache_invalidated_by_changes(self, tmp_path):
+        path = tmp_path / "clip.txt"
+        self.write_txt(path, [make_frame(seed) for seed in range(3)])
+        TxtReader(str(path)).close()
+        self.write_txt(path, [make_frame(seed) for seed in range(5)])
+        with TxtReader(str(path)) as reader:
+            assert len(reader) == 5
+
+    def test_without_cache(self, tmp_path):
+        path = self.write_txt(tmp_path / "clip.txt", [make_frame()])
+        with TxtReader(path, use_index_cache=False) as reader:
+            assert len(reader) == 1
+        assert not (tmp_path / ".clip.txt.idx").exists()
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "clip.txt"
+        path.write_bytes(b"")
+        with pytest.raises(ValueError):
+            TxtReader(str(path))
+
+
+class TestOpenAsciiVideo:
+
+    def test_txt(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(3)]
+        path = tmp_path / "clip.txt"
+        path.write_text("30.0\n" + "[FRAME]\n".join(frame.to_text() for frame in frames) + "\n[FRAME]\n")
+        video = open_ascii_video(str(path))
+        assert isinstance(video, TxtReader)
+        assert video.fps == 30.0
+        assert len(video) == 3
+        assert video[1].to_text() == frames[1].to_text()
+
+    def test_detects_a4r_by_content(self, tmp_path):
+        path = write_a4r(tmp_path / "clip.bin", [make_frame()])
+        assert isinstance(open_ascii_video(path), A4rReader)
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            open_ascii_video(str(tmp_path / "nope.a4r"))
+
+    def test_invalid_fps(self, tmp_path):
+        path = tmp_path / "clip.txt"
+        path.write_text("abc\nx§1§")
+        with pytest.raises(ValueError):
+            open_ascii_video(str(path))
+
+
+class TestConverterSinks:
+
+    @pytest.fixture
+    def video_path(self, tmp_path):
+        path = str(tmp_path / "clip.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 64))
+        if not writer.isOpened():
+            pytest.skip("OpenCV sem encoder MJPG")
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+        for i in range(6):
+            frame[:, :] = (0, 200, 0)
+            frame[8 + i * 4:40 + i * 4, 16:48] = (200, 100, 50)
+            writer.write(frame)
+        writer.release()
+        return path
+
+    def test_a4r_matches_txt(self, video_path, tmp_path):
+        settings = PipelineSettings(target_width=16, char_aspect_ratio=0.5, sobel_threshold=50,
+                                    lower_green=np.array([35, 40, 40]), upper_green=np.array([85, 255, 255]))
+        txt_path = FramePipeline(settings).run(video_path, TxtSink(str(tmp_path / "out.txt")))
+        a4r_path = FramePipeline(settings).run(video_path, A4rSink(str(tmp_path / "out.a4r"), settings.luminance_ramp, keyframe_interval=4))
+        with open_ascii_video(txt_path) as txt, open_ascii_video(a4r_path) as a4r:
+            assert a4r.fps == txt.fps
+            assert a4r.ramp == settings.luminance_ramp
+            assert [frame.to_text() for frame in a4r] == [frame.to_text() for frame in txt]
+
+    @pytest.mark.parametrize("name, sink_class", [("out.txt", TxtSink), ("out.a4r", A4rSink)])
+    def test_streams_to_temp_file(self, tmp_path, name, sink_class):
+        path = tmp_path / name
+        sink = sink_class(str(path))
+        sink.open(StreamInfo("clip.avi", 30.0, FLUSH_INTERVAL, (10, 6)))
+        for seed in range(FLUSH_INTERVAL):
+            sink.write(make_frame(seed), None)
+        partial = [p for p in tmp_path.iterdir() if p.name.endswith(".part")]
+        assert not path.exists() and len(partial) == 1
+        assert partial[0].stat().st_size > 0
+        assert sink.close() == str(path)
+        assert list(tmp_path.iterdir()) == [path]
+        assert len(open_ascii_video(str(path))) == FLUSH_INTERVAL
+
+    @pytest.mark.parametrize("name, sink_class", [("out.txt", TxtSink), ("out.a4r", A4rSink)])
+    def test_abort_keeps_previous_output(self, tmp_path, name, sink_class):
+        path = tmp_path / name
+        path.write_bytes(b"anterior")
+        sink = sink_class(str(path))
+        sink.open(StreamInfo("clip.avi", 30.0, 3, (10, 6)))
+        sink.write(make_frame(), None)
+        sink.abort()
+        assert list(tmp_path.iterdir()) == [path]
+        assert path.read_bytes() == b"anterior"
+
+
+class TestTxtWriter:
+
+    def test_matches_joined_text(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(3)]
+        with TxtWriter(str(tmp_path / "clip.txt"), 24.0) as writer:
+            for frame in frames:
+                writer.write_frame(frame)
+        expected = "24.0\n" + "[FRAME]\n".join(frame.to_text() for frame in frames)
+        assert (tmp_path / "clip.txt").read_text(encoding='utf-8') == expected
+
+
+class TestCompressedTxt:
+
+    def write_gz(self, path, frames, fps=24.0):
+        with TxtWriter(str(path), fps, level=1) as writer:
+            for frame in frames:
+                writer.write_frame(frame)
+        return str(path)
+
+    def test_gzip_roundtrip(self, tmp_path):
+        frames = [make_frame(seed) for seed in range(4)]
+        path = self.write_gz(tmp_path / "clip.txt.gz", frames)
+        expected = "24.0\n" + "[FRAME]\n".join(frame.to_text() for frame in frames)
+        assert gzip.decompress((tmp_path / "clip.txt.gz").read_bytes()).decode('utf-8') == expected
+        video = open_ascii_video(path)
+        assert isinstance(video, CompressedTxtReader)
+        assert video.fps == 24.0
+        assert video and len(video) == 4
+        assert video[2].to_text() == frames[2].to_text()
+        assert [frame.to_text() for frame in video] == [frame.to_text() for frame in frames]
+
+    def test_frames_across_chunk_boundaries(self, tmp_path, monkeypatch):
+        frames = [make_frame(seed) for seed in range(5)]
+        path = self.write_gz(tmp_path / "clip.txt.gz", frames)
+        monkeypatch.setattr(ascii_video, "_READ_CHUNK", 7)
+        assert [frame.to_text() for frame in CompressedTxtReader(path)] == [frame.to_text() for frame in frames]
+
+    def test_without_frames(self, tmp_path):
+        path = self.write_gz(tmp_path / "clip.txt.gz", [])
+        video = open_ascii_video(path)
+        assert not video and len(video) == 0
+
+    def test_output_extension(self, monkeypatch):
+        config = configparser.ConfigParser()
+        assert txt_output_extension(config) == ".txt"
+        config.read_dict({'Output': {'txt_compression': 'gzip'}})
+        assert txt_output_extension(config) == ".txt.gz"
+        config.set('Output', 'txt_compression', 'zstd')
+        monkeypatch.setattr(ascii_video, "ZSTD_AVAILABLE", False)
+        assert txt_output_extension(config) == ".txt.gz"
+        monkeypatch.setattr(ascii_video, "ZSTD_AVAILABLE", True)
+        assert txt_output_extension(config) == ".txt.zst"
+
+    def test_zstd_roundtrip(self, tmp_path):
+        pytest.importorskip("zstandard")
+        frames = [make_frame(seed) for seed in range(3)]
+        path = self.write_gz(tmp_path / "clip.txt.zst", frames)
+        video = open_ascii_video(path)
+        assert isinstance(video, CompressedTxtReader)
+        assert [frame.to_text() for frame in video] == [frame.to_text() for frame in frames]
+
+    def test_sink_writes_gzip(self, tmp_path):
+        sink = TxtSink(str(tmp_path / "out.txt.gz"))
+        sink.open(StreamInfo("clip.avi", 30.0, 2, (10, 6)))
+        for seed in range(2):
+            sink.write(make_frame(seed), None)
+        path = sink.close()
+        assert (tmp_path / "out.txt.gz").read_bytes()[:2] == b"\x1f\x8b"
+        assert len(open_ascii_video(path)) == 2
+
+
+class TestReadAhead:
+
+    def test_preserves_order(self):
+        assert list(read_ahead(iter(range(50)), depth=4)) == list(range(50))
+
+    def test_depth_zero_iterates_directly(self):
+        assert list(read_ahead([1, 2, 3], depth=0)) == [1, 2, 3]
+
+    def test_propagates_errors(self):
+        def frames():
+            yield 1
+            raise ValueError("frame corrompido")
+        iterator = read_ahead(frames(), depth=2)
+        assert next(iterator) == 1
+        with pytest.raises(ValueError, match="corrompido"):
+            next(iterator)
+
+    def test_break_stops_worker(self):
+        for item in read_ahead(iter(range(1000)), depth=2):
+            if item == 3:
+                break
+        assert not any(thread.name == "ascii-read-ahead" and thread.is_alive() for thread in threading.enumerate())
+
+
+class TestMigrationPaths:
+
+    def test_strips_compound_extensions(self):
+        assert strip_ascii_extension("clip.txt.gz") == "clip"
+        assert strip_ascii_extension("clip.a4r") == "clip"
+        assert strip_ascii_extension("clip.v2.txt") == "clip.v2"
+
+    def test_output_path(self, tmp_path):
+        assert migration_output_path("/videos/clip.txt.zst", ".a4r") == "/videos/clip.a4r"
+        assert migration_output_path("clip.a4r", ".txt.gz", str(tmp_path)) == str(tmp_path / "clip.txt.gz")
+
+
+class TestMigrateFile:
+
+    def test_txt_to_a4r_roundtrip(self, tmp_path):
+        frames = drifting_frames(12, 10, 30)
+        source = write_txt_frames(tmp_path / "clip.txt", frames)
+        result = migrate_file(source, str(tmp_path / "clip.a4r"), keyframe_interval=5)
+        assert result.verified and result.frames == 12
+        assert result.output_bytes < result.source_bytes and result.size_reduction > 0
+        with A4rReader(result.output_path) as reader:
+            assert reader.fps == 25.0
+            assert len(reader.keyframes) == 3
+            assert [frame.to_text() for frame in reader] == [frame.to_text() for frame in frames]
+
+    def test_a4r_to_compressed_txt(self, tmp_path):
+        frames = drifting_frames(6, 8, 20)
+        source = write_a4r(tmp_path / "clip.a4r", frames)
+        result = migrate_file(source, str(tmp_path / "clip.txt.gz"))
+        with open_ascii_video(result.output_path) as video:
+            assert [frame.to_text() for frame in video] == [frame.to_text() for frame in frames]
+
+    def test_uncompressed_a4r(self, tmp_path):
+        source = write_txt_frames(tmp_path / "clip.txt", drifting_frames(4, 8, 20))
+        result = migrate_file(source, str(tmp_path / "clip.a4r"), compression=COMPRESSION_NONE, keyframe_interval=1)
+        with A4rReader(result.output_path) as reader:
+            assert reader.zero_copy
+
+    def test_divergence_removes_output(self, tmp_path, monkeypatch):
+        source = write_txt_frames(tmp_path / "clip.txt", drifting_frames(3, 8, 20))
+        digests = iter(range(100))
+        monkeypatch.setattr(ascii_migration, "_frame_digest", lambda frame: next(digests))
+        with pytest.raises(ValueError, match="Round-trip"):
+            migrate_file(source, str(tmp_path / "clip.a4r"))
+        assert not (tmp_path / "clip.a4r").exists()
+
+    def test_refuses_same_path(self, tmp_path):
+        source = write_txt_frames(tmp_path / "clip.txt", drifting_frames(2, 8, 20))
+        with pytest.raises(ValueError):
+            migrate_file(source, source)
+
+
+class TestInspectFile:
+
+    def test_a4r_index_stats(self, tmp_path):
+        path = write_a4r(tmp_path / "clip.a4r", drifting_frames(10, 8, 20), keyframe_interval=4)
+        info = inspect_file(path)
+        assert info['format'] == 'a4r'
+        assert info['frames'] == 10
+        assert info['keyframes'] == 3 and info['delta_frames'] == 7
+        assert info['grid'] == "20x8"
+
+    def test_txt(self, tmp_path):
+        path = write_txt_frames(tmp_path / "clip.txt", drifting_frames(3, 8, 20))
+        info = inspect_file(path)
+        assert info['format'] == 'txt' and info['frames'] == 3 and info['fps'] == 25.0
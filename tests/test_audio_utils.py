@@ -0,0 +1,78 @@
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from src.core import audio_utils
+from src.core.audio_utils import AAC_AUDIO_ARGS, AudioExtraction, live_audio_args
+
+
+class TestLiveAudio:
+
+    def test_maps_source_audio_after_pipe_input(self, monkeypatch):
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: True)
+        monkeypatch.setattr(audio_utils, 'audio_stream_decodes', lambda path: True)
+        args = live_audio_args("in.mp4")
+        assert args[:4] == ['-max_error_rate', '1', '-i', 'in.mp4']
+        assert args[4:8] == ['-map', '0:v:0', '-map', '1:a:0?']
+        assert args[8:] == AAC_AUDIO_ARGS
+
+    def test_no_args_without_audio(self, monkeypatch):
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: False)
+        assert live_audio_args("in.mp4") == []
+
+    def test_no_args_when_audio_does_not_decode(self, monkeypatch):
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: True)
+        monkeypatch.setattr(audio_utils, 'audio_stream_decodes', lambda path: False)
+        assert live_audio_args("in.mp4") == []
+
+    @pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg nao instalado")
+    def test_audio_stream_decodes(self, tmp_path):
+        audio = tmp_path / "ok.wav"
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'sine=d=1', str(audio)], check=True)
+        junk = tmp_path / "junk.mp3"
+        junk.write_bytes(bytes(range(256)) * 64)
+        assert audio_utils.audio_stream_decodes(str(audio))
+        assert not audio_utils.audio_stream_decodes(str(junk))
+
+
+class TestAudioExtraction:
+
+    def test_without_audio_does_not_start_process(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: False)
+        extraction = AudioExtraction("in.mp4", str(tmp_path / "a.m4a"))
+        assert extraction.process is None
+        assert extraction.result() is None
+
+    def test_failed_extraction_returns_none(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: True)
+        monkeypatch.setattr(audio_utils.subprocess, 'Popen', _popen_python("import sys; sys.exit(1)"))
+        assert AudioExtraction("in.mp4", str(tmp_path / "a.m4a")).result() is None
+
+    def test_runs_concurrently_until_result(self, tmp_path, monkeypatch):
+        output = tmp_path / "a.m4a"
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: True)
+        monkeypatch.setattr(audio_utils.subprocess, 'Popen', _popen_python(
+            f"import time; time.sleep(0.2); open({str(output)!r}, 'wb').write(bytes(2048))"))
+        extraction = AudioExtraction("in.mp4", str(output))
+        assert extraction.process.poll() is None
+        assert extraction.result() == str(output)
+
+    def test_cancel_removes_output(self, tmp_path, monkeypatch):
+        output = tmp_path / "a.m4a"
+        output.write_bytes(b"parcial")
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: True)
+        monkeypatch.setattr(audio_utils.subprocess, 'Popen', _popen_python("import time; time.sleep(10)"))
+        extraction = AudioExtraction("in.mp4", str(output))
+        extraction.cancel()
+        assert not output.exists()
+
+
+def _popen_python(script):
+    # Troca o comando ffmpeg por um script python, mantendo os demais argumentos do Popen
+    real_popen = subprocess.Popen
+
+    def popen(cmd, **kwargs):
+        return real_popen([sys.executable, "-c", script], **kwargs)
+    return popen
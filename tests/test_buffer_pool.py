@@ -0,0 +1,48 @@
+import numpy as np
+from src.core.utils.buffer_pool import BufferPool
+
+
+class TestBufferPool:
+
+    def test_same_request_reuses_memory(self):
+        pool = BufferPool()
+        first = pool.get('a', (4, 5), np.int16)
+        second = pool.get('a', (4, 5), np.int16)
+        assert np.shares_memory(first, second)
+        assert pool.allocations == 1
+
+    def test_shape_and_dtype(self):
+        buf = BufferPool().get('a', (3, 4, 2), np.float32)
+        assert buf.shape == (3, 4, 2)
+        assert buf.dtype == np.float32
+        assert buf.flags.c_contiguous
+
+    def test_smaller_request_fits_existing_block(self):
+        pool = BufferPool()
+        pool.get('a', (10, 10))
+        small = pool.get('a', (2, 3), np.uint64)
+        assert small.shape == (2, 3)
+        assert pool.allocations == 1
+
+    def test_larger_request_grows_block(self):
+        pool = BufferPool()
+        pool.get('a', (2, 2))
+        big = pool.get('a', (20, 20))
+        assert big.shape == (20, 20)
+        assert pool.allocations == 2
+
+    def test_names_are_independent(self):
+        pool = BufferPool()
+        a = pool.get('a', (8,))
+        b = pool.get('b', (8,))
+        assert not np.shares_memory(a, b)
+        assert len(pool) == 2
+
+    def test_zeros(self):
+        pool = BufferPool()
+        pool.get('a', (5,)).fill(7)
+        assert not pool.zeros('a', (5,)).any()
+
+    def test_empty_shape(self):
+        buf = BufferPool().get('a', (0, 3))
+        assert buf.shape == (0, 3)
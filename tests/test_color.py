@@ -1,6 +1,12 @@
+import os
+
 import pytest
 import numpy as np
-from src.core.utils.color import rgb_to_ansi256, rgb_to_ansi256_vectorized
+from src.core.utils import color
+from src.core.utils.buffer_pool import BufferPool
+from src.core.utils.color import (
+    rgb_to_ansi256, rgb_to_ansi256_vectorized, rgb_to_ansi256_lut, ColorLUT
+)
 
 
 class TestRgbToAnsi256:
@@ -72,3 +78,45 @@ class TestRgbToAnsi256Vectorized:
         assert 232 <= result[0, 0] <= 255
         assert 232 <= result[1, 1] <= 255
         assert 232 <= result[2, 2] <= 255
+
+
+class TestColorLUT:
+
+    def test_ansi256_lut_matches_vectorized(self):
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 256, (40, 60, 3), dtype=np.uint8)
+        frame[:10] = frame[:10, :, :1]
+        assert np.array_equal(rgb_to_ansi256_lut(frame), rgb_to_ansi256_vectorized(frame))
+
+    def test_pooled_lookup_matches(self):
+        frame = np.random.default_rng(1).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+        pool = BufferPool()
+        assert np.array_equal(rgb_to_ansi256_lut(frame, pool), rgb_to_ansi256_lut(frame))
+        lut = ColorLUT('test', lambda b, g, r: (b // 2 + g // 4 + r // 4), bits=6, cache=False)
+        assert np.array_equal(lut(frame, pool), lut(frame))
+
+    def test_ansi256_lut_returns_uint8(self, sample_color_frame):
+        result = rgb_to_ansi256_lut(sample_color_frame)
+        assert result.dtype == np.uint8
+        assert result.shape == sample_color_frame.shape[:2]
+
+    def test_table_is_cached_on_disk(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(color, '_lut_cache_dir', lambda: str(tmp_path))
+        builds = []
+
+        def builder(b, g, r):
+            builds.append(1)
+            return (b + g + r) // 3
+
+        table = ColorLUT('test', builder, bits=4).table
+        assert os.listdir(tmp_path) == ['test_lut4.npy']
+        calls = len(builds)
+        reloaded = ColorLUT('test', builder, bits=4).table
+        assert len(builds) == calls
+        assert np.array_equal(reloaded, table)
+
+    def test_quantized_table_size(self):
+        lut = ColorLUT('test', lambda b, g, r: (b + g + r) // 3, bits=4, cache=False)
+        assert lut.table.shape == (16, 16, 16)
+        frame = np.full((2, 2, 3), 255, dtype=np.uint8)
+        assert (lut(frame) == 248).all()
@@ -0,0 +1,106 @@
+import pytest
+import numpy as np
+from src.core.utils.buffer_pool import BufferPool
+from src.core.utils.ascii_frame import EDGE_CHARS
+from src.core.utils.ascii_converter import converter_frame_para_ascii, LUMINANCE_RAMP_DEFAULT
+from src.core.utils.edges import (
+    compute_edge_features,
+    orientation_bins,
+    orientation_from_angle,
+    NO_EDGE,
+)
+
+
+def reference_chars(dx, dy):
+    angle = (np.degrees(np.arctan2(dy, dx)) + 180) % 180
+    return np.select(
+        [(angle >= 22.5) & (angle < 67.5), (angle >= 67.5) & (angle < 112.5), (angle >= 112.5) & (angle < 157.5)],
+        ['/', '|', '\\'],
+        '-'
+    )
+
+
+class TestOrientationBins:
+
+    @pytest.mark.parametrize("dx, dy, expected", [
+        (100, 0, '-'), (-100, 0, '-'), (0, 100, '|'), (0, -100, '|'),
+        (100, 100, '/'), (-100, -100, '/'), (100, -100, '\\'), (-100, 100, '\\'),
+    ])
+    def test_axis_and_diagonal_directions(self, dx, dy, expected):
+        orientation = orientation_bins(np.array([dx], dtype=np.int16), np.array([dy], dtype=np.int16))
+        assert EDGE_CHARS[orientation[0]] == expected
+
+    def test_matches_arctan2_away_from_bin_limits(self):
+        rng = np.random.default_rng(0)
+        dx = rng.integers(-1020, 1021, 20000).astype(np.int16)
+        dy = rng.integers(-1020, 1021, 20000).astype(np.int16)
+        angle = (np.degrees(np.arctan2(dy, dx)) + 180) % 180
+        limits = np.array([22.5, 67.5, 112.5, 157.5])
+        far = np.abs(angle[:, None] - limits).min(axis=1) > 0.5
+        got = np.array(list(EDGE_CHARS))[orientation_bins(dx, dy)]
+        assert np.array_equal(got[far], reference_chars(dx, dy)[far])
+
+    def test_orientation_from_angle_matches_bins(self):
+        rng = np.random.default_rng(1)
+        dx = rng.normal(size=5000)
+        dy = rng.normal(size=5000)
+        angle = np.arctan2(dy, dx)
+        got = np.array(list(EDGE_CHARS))[orientation_from_angle(angle)]
+        assert np.array_equal(got, reference_chars(dx, dy))
+
+
+class TestEdgeFeatures:
+
+    def test_dtypes_and_shape(self):
+        gray = np.random.default_rng(2).integers(0, 256, (12, 20), dtype=np.uint8)
+        edges = compute_edge_features(gray)
+        assert edges.magnitude.shape == edges.orientation.shape == gray.shape
+        assert edges.magnitude.dtype == np.uint8
+        assert edges.orientation.dtype == np.uint8
+        assert edges.orientation.max() < len(EDGE_CHARS)
+
+    @pytest.mark.parametrize("normalize", [True, False])
+    def test_pooled_matches_plain(self, normalize):
+        gray = np.random.default_rng(5).integers(0, 256, (24, 40), dtype=np.uint8)
+        expected = compute_edge_features(gray, normalize)
+        edges = compute_edge_features(gray, normalize, pool=BufferPool())
+        assert np.array_equal(edges.magnitude, expected.magnitude)
+        assert np.array_equal(edges.orientation, expected.orientation)
+
+    def test_horizontal_gradient_is_dash(self):
+        gray = np.zeros((8, 8), dtype=np.uint8)
+        gray[:, 4:] = 200
+        edges = compute_edge_features(gray)
+        assert edges.magnitude.max() == 255
+        assert set(EDGE_CHARS[i] for i in edges.orientation[edges.edge_mask(128)]) == {'-'}
+
+    def test_normalize_false_saturates(self):
+        gray = np.zeros((8, 8), dtype=np.uint8)
+        gray[:, 4:] = 10
+        assert compute_edge_features(gray, normalize=False).magnitude.max() == 37
+        assert compute_edge_features(gray, normalize=True).magnitude.max() == 255
+        gray[:, 4:] = 200
+        assert compute_edge_features(gray, normalize=False).magnitude.max() == 255
+
+    def test_edge_index_plane(self):
+        gray = np.zeros((8, 8), dtype=np.uint8)
+        gray[4:, :] = 200
+        edges = compute_edge_features(gray)
+        index = edges.edge_index(128)
+        assert index.dtype == np.uint8
+        assert (index[0] == NO_EDGE).all()
+        assert (index[edges.edge_mask(128)] == EDGE_CHARS.index('|')).all()
+
+    def test_converter_accepts_orientation_plane(self):
+        rng = np.random.default_rng(3)
+        gray = rng.integers(0, 256, (6, 9), dtype=np.uint8)
+        color = rng.integers(0, 256, (6, 9, 3), dtype=np.uint8)
+        mask = np.zeros((6, 9), dtype=np.uint8)
+        edges = compute_edge_features(gray)
+        frame = converter_frame_para_ascii(
+            gray, color, mask, edges.magnitude, edges.orientation,
+            sobel_threshold=0, luminance_ramp=LUMINANCE_RAMP_DEFAULT, output_format="frame"
+        )
+        is_edge = edges.magnitude > 0
+        expected = np.array(list(EDGE_CHARS))[edges.orientation]
+        assert np.array_equal(frame.char_array()[is_edge], expected[is_edge])
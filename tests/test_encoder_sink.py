@@ -0,0 +1,95 @@
+import sys
+
+import numpy as np
+import pytest
+from src.core.utils.encoder_sink import EncoderSink
+
+SHAPE = (4, 6, 3)
+FRAME_BYTES = 4 * 6 * 3
+
+
+def fake_encoder(output_path, frame_bytes=FRAME_BYTES, delay=0.0):
+    # Processo que le rawvideo do stdin (devagar, com delay) e grava o primeiro byte de cada frame
+    script = (
+        "import sys, time\n"
+        "out = []\n"
+        "while True:\n"
+        f"    data = sys.stdin.buffer.read({frame_bytes})\n"
+        f"    if len(data) < {frame_bytes}:\n"
+        "        break\n"
+        "    out.append(data[0])\n"
+        f"    time.sleep({delay})\n"
+        f"open({output_path!r}, 'wb').write(bytes(out))\n"
+    )
+    return [sys.executable, "-c", script]
+
+
+def read_frames(path):
+    with open(path, 'rb') as f:
+        return list(f.read())
+
+
+class TestEncoderSink:
+
+    def test_frames_in_order(self, tmp_path):
+        output = str(tmp_path / "out.bin")
+        sink = EncoderSink(fake_encoder(output), SHAPE, depth=2)
+        for value in range(10):
+            sink.write(np.full(SHAPE, value, dtype=np.uint8))
+        assert sink.close() == 0
+        assert read_frames(output) == list(range(10))
+        assert sink.frames == 10
+
+    def test_buffers_are_reused_after_write(self, tmp_path):
+        output = str(tmp_path / "out.bin")
+        sink = EncoderSink(fake_encoder(output), SHAPE, depth=1)
+        image = np.full(SHAPE, 7, dtype=np.uint8)
+        sink.write(image)
+        # O chamador pode reaproveitar o proprio array logo apos write()
+        image.fill(9)
+        sink.write(image)
+        sink.close()
+        assert read_frames(output) == [7, 9]
+
+    def test_acquire_submit_with_repeat(self, tmp_path):
+        output = str(tmp_path / "out.bin")
+        sink = EncoderSink(fake_encoder(output), SHAPE, depth=2)
+        slot = sink.acquire()
+        sink.buffer(slot).fill(3)
+        sink.submit(slot, repeat=3)
+        sink.close()
+        assert read_frames(output) == [3, 3, 3]
+
+    def test_other_sizes_are_cropped_or_padded(self, tmp_path):
+        output = str(tmp_path / "out.bin")
+        sink = EncoderSink(fake_encoder(output), SHAPE, depth=2)
+        sink.write(np.full((2, 3, 3), 5, dtype=np.uint8))
+        sink.write(np.full((8, 8, 3), 6, dtype=np.uint8))
+        sink.close()
+        assert read_frames(output) == [5, 6]
+
+    def test_slow_encoder_counts_as_stall(self, tmp_path):
+        output = str(tmp_path / "out.bin")
+        # Frames maiores que o buffer do pipe: a escrita so termina quando o encoder le
+        shape = (256, 256, 3)
+        sink = EncoderSink(fake_encoder(output, 256 * 256 * 3, delay=0.02), shape, depth=1)
+        for value in range(8):
+            sink.write(np.full(shape, value, dtype=np.uint8))
+        sink.close()
+        assert sink.stall_seconds > 0.05
+        assert sink.render_seconds >= 0
+
+    def test_non_blocking_acquire_when_full(self, tmp_path):
+        sink = EncoderSink(fake_encoder(str(tmp_path / "out.bin")), SHAPE, depth=1)
+        slot = sink.acquire()
+        assert sink.acquire(block=False) is None
+        sink.submit(slot)
+        sink.close()
+
+    def test_pipe_error_raised_on_write(self, tmp_path):
+        sink = EncoderSink([sys.executable, "-c", "pass"], (64, 64, 3), depth=1)
+        sink.process.wait()
+        with pytest.raises(OSError):
+            for _ in range(100):
+                sink.write(np.zeros((64, 64, 3), dtype=np.uint8))
+        sink.abort()
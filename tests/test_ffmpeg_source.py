@@ -0,0 +1,156 @@
+import json
+import sys
+
+import cv2
+import numpy as np
+import pytest
+from src.core.utils import ffmpeg_source
+from src.core.utils.ffmpeg_source import (
+    FfmpegCapture, VideoProbe, ffmpeg_ingest_command, ingest_size, parse_probe, seek_time
+)
+from src.core.utils.frame_source import FrameSource
+
+
+def fake_ffmpeg(frames, width, height, exit_code=0):
+    # Processo que escreve `frames` frames rawvideo BGR (pixel = indice do frame) no stdout
+    script = (
+        "import sys\n"
+        f"for i in range({frames}):\n"
+        f"    sys.stdout.buffer.write(bytes([i % 256]) * {width * height * 3})\n"
+        "sys.stdout.flush()\n"
+        "sys.stderr.write('Error while decoding stream\\n')\n"
+        f"sys.exit({exit_code})\n"
+    )
+    return [sys.executable, "-c", script]
+
+
+class TestProbe:
+
+    def test_parses_stream(self):
+        output = json.dumps({'streams': [{'width': 3840, 'height': 2160, 'avg_frame_rate': '30000/1001', 'nb_frames': '300'}]})
+        probe = parse_probe(output)
+        assert (probe.width, probe.height, probe.frames) == (3840, 2160, 300)
+        assert probe.fps == pytest.approx(29.97, abs=0.01)
+
+    def test_frames_from_duration(self):
+        output = json.dumps({'streams': [{'width': 640, 'height': 360, 'avg_frame_rate': '0/0', 'r_frame_rate': '25/1'}],
+                             'format': {'duration': '4.0'}})
+        probe = parse_probe(output)
+        assert probe.fps == 25.0 and probe.frames == 100
+
+    @pytest.mark.parametrize("stream_extra", [
+        {'side_data_list': [{'side_data_type': 'Display Matrix', 'rotation': -90}]},
+        {'side_data_list': [{'rotation': 270}]},
+        {'tags': {'rotate': '90'}},
+    ])
+    def test_portrait_rotation_swaps_size(self, stream_extra):
+        stream = {'width': 1920, 'height': 1080, 'avg_frame_rate': '30/1', 'nb_frames': '30', **stream_extra}
+        probe = parse_probe(json.dumps({'streams': [stream]}))
+        assert (probe.width, probe.height) == (1080, 1920)
+        assert probe.rotation in (90, 270)
+
+    def test_upside_down_keeps_size(self):
+        stream = {'width': 1920, 'height': 1080, 'avg_frame_rate': '30/1', 'nb_frames': '30',
+                  'side_data_list': [{'rotation': 180}]}
+        probe = parse_probe(json.dumps({'streams': [stream]}))
+        assert (probe.width, probe.height, probe.rotation) == (1920, 1080, 180)
+
+    def test_without_video_stream(self):
+        with pytest.raises(IOError):
+            parse_probe(json.dumps({'streams': []}))
+
+
+class TestIngestSize:
+
+    def test_grid_multiple(self):
+        assert ingest_size((300, 75), (3840, 2160)) == (300, 75)
+        assert ingest_size((300, 75), (3840, 2160), scale=4) == (1200, 300)
+
+    def test_never_upscales(self):
+        assert ingest_size((300, 75), (640, 360), scale=4) == (640, 360)
+
+    def test_command(self):
+        cmd = ffmpeg_ingest_command("in.mp4", (300, 75), (3840, 2160), frame_interval=2)
+        vf = cmd[cmd.index('-vf') + 1]
+        assert vf == "select='not(mod(n\\,2))',scale=300:75:flags=area"
+        assert cmd[-5:] == ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+
+    def test_command_without_filters(self):
+        assert '-vf' not in ffmpeg_ingest_command("in.mp4", (640, 360), (640, 360))
+
+    def test_seek_lands_before_ntsc_frame_pts(self):
+        fps = 30000 / 1001
+        for frame in (1, 2, 1799, 1800, 53946):
+            cmd = ffmpeg_ingest_command("in.mp4", (640, 360), (640, 360), start_time=seek_time(frame, fps))
+            ss = float(cmd[cmd.index('-ss') + 1])
+            assert (frame - 1) / fps < ss < frame / fps
+        assert seek_time(0, fps) == 0.0
+
+    def test_command_seeks_before_input(self):
+        cmd = ffmpeg_ingest_command("in.mp4", (640, 360), (640, 360), start_time=2.5)
+        assert cmd[cmd.index('-ss') + 1] == '2.500000'
+        assert cmd.index('-ss') < cmd.index('-i')
+        assert '-ss' not in ffmpeg_ingest_command("in.mp4", (640, 360), (640, 360))
+
+
+class TestFfmpegCapture:
+
+    @pytest.fixture
+    def capture(self, monkeypatch):
+        monkeypatch.setattr(ffmpeg_source, "ffmpeg_ingest_command", lambda *args: fake_ffmpeg(5, 8, 4))
+        capture = FfmpegCapture("clip.mp4", size=(8, 4), probe=VideoProbe(64, 32, 30.0, 5))
+        yield capture
+        capture.release()
+
+    def test_reports_output_size(self, capture):
+        assert capture.get(cv2.CAP_PROP_FRAME_WIDTH) == 8 and capture.get(cv2.CAP_PROP_FRAME_HEIGHT) == 4
+        assert capture.get(cv2.CAP_PROP_FPS) == 30.0 and capture.get(cv2.CAP_PROP_FRAME_COUNT) == 5
+
+    def test_reads_into_buffer(self, capture):
+        buffer = np.empty((4, 8, 3), dtype=np.uint8)
+        ok, image = capture.read(buffer)
+        assert ok and image is buffer and not image.any()
+        ok, image = capture.read(buffer)
+        assert image[0, 0, 0] == 1
+
+    def test_end_of_stream_and_rewind(self, capture):
+        assert [capture.read()[0] for _ in range(6)] == [True] * 5 + [False]
+        assert capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        assert capture.read()[1][0, 0, 0] == 0
+
+    def test_ffmpeg_failure_raises_with_stderr(self, monkeypatch):
+        monkeypatch.setattr(ffmpeg_source, "ffmpeg_ingest_command", lambda *args: fake_ffmpeg(2, 8, 4, exit_code=1))
+        capture = FfmpegCapture("clip.mp4", size=(8, 4), probe=VideoProbe(64, 32, 30.0, 5))
+        try:
+            assert capture.read()[0] and capture.read()[0]
+            with pytest.raises(IOError, match="Error while decoding"):
+                capture.read()
+        finally:
+            capture.release()
+
+    def test_frame_source_surfaces_ffmpeg_failure(self, monkeypatch):
+        monkeypatch.setattr(ffmpeg_source, "ffmpeg_ingest_command", lambda *args: fake_ffmpeg(0, 8, 4, exit_code=1))
+        capture = FfmpegCapture("clip.mp4", size=(8, 4), probe=VideoProbe(64, 32, 30.0, 5))
+        with FrameSource(capture) as source:
+            with pytest.raises(IOError):
+                list(source)
+
+    def test_seek_restarts_at_frame(self, monkeypatch):
+        commands = []
+        monkeypatch.setattr(ffmpeg_source, "ffmpeg_ingest_command",
+                            lambda *args: commands.append(args) or fake_ffmpeg(2, 8, 4))
+        capture = FfmpegCapture("clip.mp4", size=(8, 4), probe=VideoProbe(64, 32, 30.0, 90))
+        try:
+            assert capture.set(cv2.CAP_PROP_POS_FRAMES, 60)
+            assert capture.read()[0]
+            assert commands[-1][-1] == pytest.approx(59.5 / 30.0)
+            assert capture.get(cv2.CAP_PROP_POS_FRAMES) == 61
+        finally:
+            capture.release()
+
+    def test_frame_source_uses_ring_and_decimation(self, capture):
+        with FrameSource(capture, target_fps=15) as source:
+            assert capture.frame_interval == 2
+            # O processo falso ignora o select: cada leitura conta como 2 frames da origem
+            frames = [(frame.index, int(frame.image[0, 0, 0])) for frame in source]
+        assert frames == [(0, 0), (2, 1), (4, 2), (6, 3), (8, 4)]
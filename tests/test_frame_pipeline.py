@@ -0,0 +1,221 @@
+import pytest
+import numpy as np
+import cv2
+from src.core.frame_pipeline import FramePipeline, FrameSink, PipelineSettings
+from src.core.utils.ascii_frame import AsciiFrame, MASK_COLOR
+
+
+def make_settings(**overrides):
+    values = dict(
+        target_width=16, char_aspect_ratio=0.5, sobel_threshold=50,
+        lower_green=np.array([35, 40, 40]), upper_green=np.array([85, 255, 255]),
+        sharpen_enabled=False,
+    )
+    values.update(overrides)
+    return PipelineSettings(**values)
+
+
+def green_frame_with_box():
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    frame[:] = (0, 200, 0)
+    frame[16:48, 16:48] = (200, 100, 50)
+    return frame
+
+
+class CollectSink(FrameSink):
+
+    def __init__(self):
+        self.frames = []
+        self.images = []
+        self.closed = False
+
+    def write(self, frame, image):
+        self.frames.append(frame)
+        self.images.append(image)
+
+    def close(self):
+        self.closed = True
+        return "done"
+
+
+class TestPipelineSettings:
+
+    def test_grid_size_from_aspect(self):
+        assert make_settings().grid_size(64, 32) == (16, 4)
+
+    def test_grid_size_manual_height(self):
+        assert make_settings(target_height=9).grid_size(64, 32) == (16, 9)
+
+    def test_grid_size_fallback(self):
+        assert make_settings().grid_size(0, 0) == (16, int(16 * 9 / 16 * 0.5))
+
+    def test_edge_normalize_from_config(self):
+        import configparser
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_dict({
+            'Conversor': {'target_width': '16', 'char_aspect_ratio': '0.5', 'sobel_threshold': '50'},
+            'ChromaKey': {'h_min': '35', 's_min': '40', 'v_min': '40', 'h_max': '85', 's_max': '255', 'v_max': '255'},
+        })
+        assert PipelineSettings.from_config(config).edge_normalize
+        assert not FramePipeline.from_config(config, edge_normalize=False).settings.edge_normalize
+
+    @pytest.mark.parametrize("module, function", [
+        ("src.core.mp4_converter", "converter_video_para_mp4"),
+        ("src.core.gif_converter", "converter_video_para_gif"),
+        ("src.core.html_converter", "converter_video_para_html"),
+        ("src.core.png_converter", "converter_video_para_png_todos"),
+    ])
+    def test_rendered_formats_use_raw_edge_magnitude(self, module, function, monkeypatch, tmp_path):
+        import configparser
+        import importlib
+        converter = importlib.import_module(module)
+        seen = {}
+
+        def from_config(config, chroma_override=None, edge_normalize=True, **kwargs):
+            seen['edge_normalize'] = edge_normalize
+            raise RuntimeError("parar antes de abrir o video")
+        monkeypatch.setattr(converter.FramePipeline, 'from_config', from_config)
+        with pytest.raises(RuntimeError):
+            getattr(converter, function)("in.mp4", str(tmp_path), configparser.ConfigParser())
+        assert seen == {'edge_normalize': False}
+
+
+class TestFramePipeline:
+
+    def test_process_returns_frame(self):
+        frame = FramePipeline(make_settings()).process(green_frame_with_box())
+        assert isinstance(frame, AsciiFrame)
+        assert frame.shape == (8, 16)
+
+    def test_user_mode_masks_chroma(self):
+        frame = FramePipeline(make_settings(render_mode='user')).process(green_frame_with_box())
+        assert (frame.colors[0] == MASK_COLOR).all()
+        assert (frame.char_array()[0] == ' ').all()
+        assert not (frame.colors[4, 6:10] == MASK_COLOR).any()
+
+    def test_background_mode_masks_subject(self):
+        frame = FramePipeline(make_settings(render_mode='background')).process(green_frame_with_box())
+        assert (frame.colors[4, 6:10] == MASK_COLOR).all()
+        assert not (frame.colors[0] == MASK_COLOR).any()
+
+    def test_buffers_are_reused(self):
+        pipeline = FramePipeline(make_settings())
+        pipeline.process(green_frame_with_box())
+        gray, color = pipeline._gray, pipeline._color
+        pipeline.process(green_frame_with_box())
+        assert pipeline._gray is gray and pipeline._color is color
+
+    @pytest.mark.parametrize("render_mode", ['user', 'background', 'both'])
+    def test_steady_state_allocates_nothing(self, render_mode):
+        pipeline = FramePipeline(make_settings(
+            render_mode=render_mode, sharpen_enabled=True, temporal_enabled=True, edge_boost_enabled=True
+        ))
+        pipeline.rasterize(pipeline.process(green_frame_with_box()))
+        assert pipeline.frame_allocations > 0
+        allocations = pipeline.pool.allocations
+        for shift in range(3):
+            frame = np.roll(green_frame_with_box(), shift * 5, axis=1)
+            pipeline.rasterize(pipeline.process(frame))
+            assert pipeline.frame_allocations == 0
+        assert pipeline.pool.allocations == allocations
+
+    @pytest.mark.parametrize("edge_normalize", [True, False])
+    def test_pooled_output_matches_plain_converter(self, edge_normalize):
+        from src.core.renderer import render_ascii_as_image
+        from src.core.utils.ascii_converter import converter_frame_para_ascii
+        from src.core.utils.edges import compute_edge_features
+        settings = make_settings(edge_boost_enabled=True, edge_normalize=edge_normalize)
+        pipeline = FramePipeline(settings)
+        frame = pipeline.process(green_frame_with_box())
+        image = pipeline.rasterize(frame)
+
+        gray, color = pipeline._gray, pipeline._color
+        edges = compute_edge_features(gray, normalize=edge_normalize)
+        expected = converter_frame_para_ascii(
+            gray, color, pipeline._mask_for_ascii, edges.magnitude, edges.orientation,
+            settings.sobel_threshold, settings.luminance_ramp, output_format="frame",
+            edge_boost_enabled=True, edge_boost_amount=settings.edge_boost_amount
+        )
+        assert np.array_equal(frame.chars, expected.chars)
+        assert np.array_equal(frame.colors, expected.colors)
+        assert np.array_equal(image, render_ascii_as_image(expected, font_scale=pipeline.font_scale))
+
+    def test_temporal_keeps_small_changes(self):
+        pipeline = FramePipeline(make_settings(temporal_enabled=True, temporal_threshold=50, use_edge_chars=False))
+        first = pipeline.process(np.full((32, 64, 3), 100, dtype=np.uint8)).copy()
+        second = pipeline.process(np.full((32, 64, 3), 120, dtype=np.uint8)).copy()
+        assert np.array_equal(first.chars, second.chars)
+        third = pipeline.process(np.full((32, 64, 3), 250, dtype=np.uint8))
+        assert not np.array_equal(first.chars, third.chars)
+
+
+class TestRun:
+
+    @pytest.fixture
+    def video_path(self, tmp_path):
+        path = str(tmp_path / "clip.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 64))
+        if not writer.isOpened():
+            pytest.skip("OpenCV sem encoder MJPG")
+        for _ in range(12):
+            writer.write(green_frame_with_box())
+        writer.release()
+        return path
+
+    def test_run_writes_every_frame(self, video_path):
+        sink = CollectSink()
+        assert FramePipeline(make_settings()).run(video_path, sink) == "done"
+        assert sink.closed
+        assert len(sink.frames) == 12
+        assert sink.images[0] is None
+        assert sink.info.grid_size == (16, 8)
+
+    def test_target_fps_skips_frames(self, video_path):
+        sink = CollectSink()
+        FramePipeline(make_settings(), target_fps=10).run(video_path, sink)
+        assert sink.info.frame_interval == 3
+        assert len(sink.frames) == 4
+
+    def test_image_sink_gets_rasterized_frames(self, video_path):
+        sink = CollectSink()
+        sink.needs_image = True
+        FramePipeline(make_settings()).run(video_path, sink, max_frames=2)
+        assert len(sink.images) == 2
+        assert sink.images[0].shape == (8 * 16, 16 * 8, 3)
+
+    def test_frame_range(self, video_path):
+        sink = CollectSink()
+        pipeline = FramePipeline(make_settings())
+        pipeline.run(video_path, sink, start_frame=4, stop_frame=9)
+        assert len(sink.frames) == 5 and pipeline.frames_written == 5
+
+    def test_frame_range_forces_ffmpeg_seek(self, video_path, monkeypatch):
+        from src.core import frame_pipeline
+        calls = []
+        monkeypatch.setattr(frame_pipeline, 'open_scaled_capture',
+                            lambda *args, force=False: calls.append(force) or (None, None))
+        pipeline = FramePipeline(make_settings(video_decoder='opencv'))
+        pipeline.run(video_path, CollectSink())
+        assert calls == []
+        pipeline.run(video_path, CollectSink(), start_frame=4)
+        assert calls == [True]
+
+    def test_frame_range_aligned_to_interval(self, video_path):
+        sink = CollectSink()
+        FramePipeline(make_settings(), target_fps=10).run(video_path, sink, start_frame=2, stop_frame=7)
+        # Com interval 3 o trecho [2, 7) vira [3, 9): frames 3 e 6
+        assert len(sink.frames) == 2
+
+    def test_prime_frames_are_not_written(self, video_path):
+        sink = CollectSink()
+        pipeline = FramePipeline(make_settings(temporal_enabled=True))
+        process = pipeline.process
+        processed = []
+        pipeline.process = lambda image: processed.append(1) or process(image)
+        pipeline.run(video_path, sink, start_frame=6, prime_frames=3)
+        assert len(processed) == 9
+        assert len(sink.frames) == 6
+
+    def test_missing_video(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            FramePipeline(make_settings()).run(str(tmp_path / "nope.mp4"), CollectSink())
@@ -0,0 +1,162 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+from src.core.utils.frame_source import FrameSource
+
+
+class FakeCapture:
+    """Captura em memoria com a interface do cv2.VideoCapture; o frame i tem todos os pixels = i."""
+
+    def __init__(self, count=10, fps=30.0, width=8, height=6, fail_at=None, drop_reads=()):
+        self.count = count
+        self.props = {cv2.CAP_PROP_FPS: fps, cv2.CAP_PROP_FRAME_COUNT: count,
+                      cv2.CAP_PROP_FRAME_WIDTH: width, cv2.CAP_PROP_FRAME_HEIGHT: height}
+        self.shape = (height, width, 3)
+        self.fail_at = fail_at
+        # Leituras (pela ordem de chamada) que falham sem avancar, como uma camera que perde um frame
+        self.drop_reads = set(drop_reads)
+        self.reads = 0
+        self.position = 0
+        self.decoded = 0
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+
+    def grab(self):
+        if self.position >= self.count:
+            return False
+        self.position += 1
+        return True
+
+    def read(self, image=None):
+        self.reads += 1
+        if self.reads in self.drop_reads:
+            return False, None
+        if self.position >= self.count:
+            return False, None
+        if self.position == self.fail_at:
+            raise RuntimeError("falha no decoder")
+        if image is None or image.shape != self.shape:
+            image = np.empty(self.shape, dtype=np.uint8)
+        image.fill(self.position)
+        self.position += 1
+        self.decoded += 1
+        return True, image
+
+    def release(self):
+        self.released = True
+
+
+class TestFrameSource:
+
+    def test_metadata_and_order(self):
+        with FrameSource(FakeCapture(5, fps=25.0)) as source:
+            assert (source.fps, source.total_frames, source.width, source.height) == (25.0, 5, 8, 6)
+            frames = [(frame.index, frame.timestamp, int(frame.image[0, 0, 0])) for frame in source]
+        assert frames == [(i, i / 25.0, i) for i in range(5)]
+
+    def test_frame_interval_skips_decoding(self):
+        capture = FakeCapture(10, fps=30.0)
+        with FrameSource(capture, target_fps=10) as source:
+            assert source.frame_interval == 3 and source.output_fps == 10.0
+            assert [frame.index for frame in source] == [0, 3, 6, 9]
+        assert capture.decoded == 4
+
+    def test_start_frame_seeks(self):
+        capture = FakeCapture(10, fps=30.0)
+        with FrameSource(capture, target_fps=10, start_frame=6) as source:
+            assert [(frame.index, int(frame.image[0, 0, 0])) for frame in source] == [(6, 6), (9, 9)]
+
+    def test_seek_after_first_read(self):
+        with FrameSource(FakeCapture(5)) as source:
+            next(source)
+            with pytest.raises(RuntimeError):
+                source.seek(2)
+
+    def test_ring_is_reused(self):
+        with FrameSource(FakeCapture(20), depth=2) as source:
+            buffers = {id(frame.image) for frame in source}
+        assert len(buffers) <= 3
+
+    def test_frame_valid_until_next_read(self):
+        with FrameSource(FakeCapture(20), depth=1) as source:
+            first = next(source)
+            kept = first.image.copy()
+            threading.Event().wait(0.05)
+            assert np.array_equal(first.image, kept)
+
+    def test_loop_restarts(self):
+        with FrameSource(FakeCapture(3), loop=True) as source:
+            assert [next(source).index for _ in range(7)] == [0, 1, 2, 0, 1, 2, 0]
+
+    def test_loop_on_empty_video_ends(self):
+        with FrameSource(FakeCapture(0), loop=True) as source:
+            assert list(source) == []
+
+    def test_read_compat(self):
+        with FrameSource(FakeCapture(1)) as source:
+            ok, image = source.read()
+            assert ok and image.shape == (6, 8, 3)
+            assert source.read() == (False, None)
+
+    def test_decoder_errors_propagate(self):
+        with FrameSource(FakeCapture(5, fail_at=2)) as source:
+            assert next(source).index == 0
+            assert next(source).index == 1
+            with pytest.raises(RuntimeError, match="decoder"):
+                next(source)
+
+    def test_close_stops_thread_and_releases(self):
+        capture = FakeCapture(1000)
+        source = FrameSource(capture, depth=2)
+        next(source)
+        source.close()
+        assert capture.released
+        assert not any(thread.name == "frame-source" and thread.is_alive() for thread in threading.enumerate())
+        assert capture.decoded < 1000
+
+    def test_live_source_drops_stale_frames(self):
+        source = FrameSource(FakeCapture(200), depth=2, live=True, retry_delay=0)
+        with source:
+            next(source)
+            threading.Event().wait(0.2)
+            indices = [frame.index for frame in source]
+        assert source.dropped_frames > 0
+        assert indices == sorted(indices) and len(indices) < 199
+
+    def test_live_source_retries_failed_read(self):
+        capture = FakeCapture(4, drop_reads={2, 3})
+        with FrameSource(capture, live=True, retry_delay=0) as source:
+            assert [int(frame.image[0, 0, 0]) for frame in source] == [0, 1, 2, 3]
+
+    def test_live_source_gives_up_after_retries(self):
+        capture = FakeCapture(4, drop_reads=set(range(2, 10)))
+        with FrameSource(capture, live=True, read_retries=3, retry_delay=0) as source:
+            assert [int(frame.image[0, 0, 0]) for frame in source] == [0]
+        assert capture.reads == 5
+
+    def test_opencv_file(self, tmp_path):
+        path = str(tmp_path / "clip.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (32, 24))
+        if not writer.isOpened():
+            pytest.skip("OpenCV sem encoder MJPG")
+        for i in range(6):
+            writer.write(np.full((24, 32, 3), i * 40, dtype=np.uint8))
+        writer.release()
+        with FrameSource(path) as source:
+            assert source.total_frames == 6
+            assert [frame.index for frame in source] == list(range(6))
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(IOError):
+            FrameSource(str(tmp_path / "nope.avi"))
@@ -0,0 +1,121 @@
+import base64
+import configparser
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+from src.core.frame_pipeline import StreamInfo
+from src.core.gif_converter import (
+    GIF_PALETTES, GifSink, ansi_palette_image, ansi_palette_uri, ffmpeg_gif_command, ffmpeg_paletteuse_command, ffmpeg_spool_command,
+    gif_palette_from_config
+)
+from src.core.renderer import ASCII_CHAR_HEIGHT, ASCII_CHAR_WIDTH, ansi256_to_bgr
+
+
+class TestAnsiPalette:
+
+    def test_palette_layout(self):
+        palette = ansi_palette_image()
+        assert palette.shape == (16, 16, 3) and palette.dtype == np.uint8
+        for code in (0, 15, 16, 123, 231, 232, 255):
+            assert tuple(palette[code // 16, code % 16]) == ansi256_to_bgr(code)
+
+    def test_uri_decodes_to_palette(self):
+        uri = ansi_palette_uri()
+        assert uri.startswith("data:image/png;base64,")
+        png = np.frombuffer(base64.b64decode(uri.split(',', 1)[1]), dtype=np.uint8)
+        assert np.array_equal(cv2.imdecode(png, cv2.IMREAD_COLOR), ansi_palette_image())
+
+
+class TestGifCommand:
+
+    def test_single_pipe_with_fixed_palette(self):
+        cmd = ffmpeg_gif_command("out.gif", (640, 360), 12)
+        assert cmd[cmd.index('-s') + 1] == '640x360'
+        assert cmd[cmd.index('-r') + 1] == '12'
+        inputs = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-i']
+        assert inputs[0] == '-' and inputs[1].startswith("data:image/png")
+        assert 'paletteuse' in cmd[cmd.index('-filter_complex') + 1]
+        assert not any('palettegen' in arg for arg in cmd)
+        assert cmd[-1] == "out.gif"
+
+
+    def test_spool_collects_palette_stats_in_same_process(self):
+        cmd = ffmpeg_spool_command("frames.mkv", (640, 360), 12, "palette.png")
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        assert 'split' in graph and 'palettegen=stats_mode=full' in graph
+        assert cmd[cmd.index('-c:v') + 1] == 'ffv1' and cmd[-1] == "frames.mkv"
+        assert '-filter_complex' not in ffmpeg_spool_command("frames.mkv", (640, 360), 12)
+
+    def test_paletteuse_reads_spool_and_palette(self):
+        cmd = ffmpeg_paletteuse_command(['-i', 'frames.mkv'], "palette.png", "out.gif")
+        inputs = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-i']
+        assert inputs == ['frames.mkv', 'palette.png']
+        assert cmd[-1] == "out.gif"
+
+
+class TestGifPaletteConfig:
+
+    @staticmethod
+    def config(value=None):
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_dict({'Output': {'gif_palette': value} if value else {}})
+        return config
+
+    def test_default_is_ansi(self):
+        assert gif_palette_from_config(self.config()) == 'ansi'
+        assert gif_palette_from_config(self.config('bogus')) == 'ansi'
+        assert gif_palette_from_config(self.config('adaptive')) == 'adaptive'
+
+    def test_postfx_forces_adaptive(self):
+        assert gif_palette_from_config(self.config(), postfx_enabled=True) == 'adaptive'
+        assert gif_palette_from_config(self.config('ansi'), postfx_enabled=True) == 'adaptive'
+
+
+def read_gif_colors(path):
+    capture = cv2.VideoCapture(path)
+    colors = []
+    while True:
+        ok, image = capture.read()
+        if not ok:
+            break
+        colors.append(tuple(int(c) for c in image[0, 0]))
+    return colors
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg nao instalado")
+class TestGifSink:
+
+    def write_frames(self, sink, colors):
+        sink.open(StreamInfo("in.mp4", 10.0, len(colors), (4, 2), 1))
+        height, width = 2 * ASCII_CHAR_HEIGHT, 4 * ASCII_CHAR_WIDTH
+        for color in colors:
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[:] = color
+            sink.write(None, frame)
+        return sink.close()
+
+    @pytest.mark.parametrize("palette", GIF_PALETTES)
+    def test_writes_gif_with_ansi_colors(self, tmp_path, palette):
+        output = str(tmp_path / "out.gif")
+        colors = [ansi256_to_bgr(code) for code in (196, 46, 21)]
+        assert self.write_frames(GifSink(output, palette), colors) == output
+        assert read_gif_colors(output) == colors
+
+    def test_default_writes_no_intermediate_files(self, tmp_path):
+        output = str(tmp_path / "out.gif")
+        sink = GifSink(output)
+        self.write_frames(sink, [ansi256_to_bgr(196)])
+        assert sink.palette == 'ansi' and sink.temp_dir is None
+        assert os.listdir(tmp_path) == ["out.gif"]
+
+    def test_adaptive_keeps_colors_outside_ansi(self, tmp_path):
+        # Cor de borda antialiased: metade do vermelho ANSI 196 sobre preto
+        output = str(tmp_path / "out.gif")
+        edge = (0, 0, 128)
+        sink = GifSink(output, 'adaptive')
+        self.write_frames(sink, [edge, ansi256_to_bgr(196)])
+        assert read_gif_colors(output) == [edge, ansi256_to_bgr(196)]
+        assert not os.path.exists(sink.temp_dir)
@@ -0,0 +1,101 @@
+import pytest
+import numpy as np
+from src.core.utils.buffer_pool import BufferPool
+from src.core.renderer import (
+    COLOR_SEPARATOR, ASCII_CHAR_WIDTH, ASCII_CHAR_HEIGHT,
+    render_ascii_as_image, render_ascii_as_image_legacy, get_glyph_atlas, parse_ascii_grid
+)
+from src.core.utils.glyph_atlas import GlyphAtlas, render_glyph_tile
+
+
+def build_frame(chars, codes):
+    return "\n".join(
+        "".join(f"{c}{COLOR_SEPARATOR}{code}{COLOR_SEPARATOR}" for c, code in zip(row_chars, row_codes))
+        for row_chars, row_codes in zip(chars, codes)
+    )
+
+
+def random_frame(width, height, ramp, seed=0):
+    rng = np.random.default_rng(seed)
+    chars = [[ramp[i] for i in row] for row in rng.integers(0, len(ramp), (height, width))]
+    codes = rng.integers(16, 256, (height, width)).tolist()
+    return build_frame(chars, codes)
+
+
+class TestRenderGlyphTile:
+
+    def test_empty_glyph_is_blank(self):
+        tile = render_glyph_tile("", 0.4, 8, 12)
+        assert tile.shape == (36, 24)
+        assert not tile.any()
+
+    def test_space_fills_cell(self):
+        tile = render_glyph_tile(" ", 0.4, 8, 12)
+        assert (tile[12:24, 8:16] == 255).all()
+
+
+class TestGlyphAtlas:
+
+    def test_lookup_is_stable(self):
+        atlas = GlyphAtlas(0.4, 8, 12, np.full((4, 3), 255, dtype=np.uint8))
+        first = atlas.lookup(["a", "b", "a"])
+        assert first[0] == first[2]
+        assert np.array_equal(atlas.lookup(["b"]), first[1:2])
+
+    def test_lookup_codepoints_matches_lookup(self):
+        atlas = GlyphAtlas(0.4, 8, 12, np.full((4, 3), 255, dtype=np.uint8))
+        codepoints = np.array([ord(c) for c in "xyzx"], dtype=np.uint32)
+        assert np.array_equal(atlas.lookup_codepoints(codepoints), atlas.lookup(list("xyzx")))
+
+    def test_render_output_shape(self):
+        atlas = GlyphAtlas(0.4, 8, 12, np.full((4, 3), 255, dtype=np.uint8))
+        rows = atlas.lookup(list("ab#.")).reshape(2, 2)
+        image = atlas.render(rows, np.zeros((2, 2), dtype=np.int32))
+        assert image.shape == (24, 16, 3)
+        assert image.dtype == np.uint8
+
+
+class TestRenderAsciiAsImage:
+
+    def test_single_glyph_matches_legacy(self):
+        frame = build_frame([list(" @ ")], [[196, 46, 21]])
+        assert np.array_equal(render_ascii_as_image(frame), render_ascii_as_image_legacy(frame))
+
+    def test_isolated_glyphs_match_legacy(self):
+        ramp = "@#%*+=-:."
+        chars = [[ramp[(x + y) % len(ramp)] if (x + y) % 2 == 0 else " " for x in range(12)] for y in range(6)]
+        codes = [[16 + x * 6 + y for x in range(12)] for y in range(6)]
+        frame = build_frame(chars, codes)
+        assert np.array_equal(render_ascii_as_image(frame), render_ascii_as_image_legacy(frame))
+
+    @pytest.mark.parametrize("font_scale", [0.4, 0.5])
+    def test_dense_frame_matches_legacy(self, font_scale):
+        frame = random_frame(40, 12, "$@B%8&WM#*oahkbdpqwmZO0QLCJUYXzcvunxrjft/\\|()1{}[]?-_+~<>i!lI;:,\"^`'. ")
+        atlas_image = render_ascii_as_image(frame, font_scale)
+        legacy_image = render_ascii_as_image_legacy(frame, font_scale)
+        assert np.array_equal(atlas_image, legacy_image)
+
+    def test_ragged_lines_match_legacy(self):
+        frame = build_frame([list("ab"), list("abcd"), []], [[196, 46], [21, 226, 255, 16], []])
+        assert np.array_equal(render_ascii_as_image(frame), render_ascii_as_image_legacy(frame))
+
+    def test_invalid_code_falls_back_to_white(self):
+        frame = f"@{COLOR_SEPARATOR}x{COLOR_SEPARATOR}"
+        assert np.array_equal(render_ascii_as_image(frame), render_ascii_as_image_legacy(frame))
+
+    @pytest.mark.parametrize("font_scale", [0.4, 0.5])
+    def test_pooled_render_matches_legacy(self, font_scale):
+        pool = BufferPool()
+        for seed in range(2):
+            frame = random_frame(30, 10, "@#%*+=-:. W(", seed=seed)
+            image = render_ascii_as_image(frame, font_scale, pool=pool)
+            assert np.array_equal(image, render_ascii_as_image_legacy(frame, font_scale))
+
+    def test_parse_grid_shape(self):
+        frame = random_frame(7, 3, "@#. ")
+        rows, codes = parse_ascii_grid(frame, get_glyph_atlas())
+        assert rows.shape == codes.shape == (3, 7)
+
+    def test_image_size_follows_grid(self):
+        frame = random_frame(5, 4, "@#. ")
+        assert render_ascii_as_image(frame).shape == (4 * ASCII_CHAR_HEIGHT, 5 * ASCII_CHAR_WIDTH, 3)
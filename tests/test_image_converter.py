@@ -0,0 +1,45 @@
+import configparser
+
+import cv2
+import numpy as np
+from src.core.image_converter import iniciar_conversao_imagem
+from src.core.utils.ascii_video import open_ascii_video
+from src.core.utils.ascii_frame import MASK_COLOR
+
+
+def make_config(render_mode):
+    config = configparser.ConfigParser(interpolation=None)
+    config.read_dict({
+        'Conversor': {
+            'target_width': '16', 'char_aspect_ratio': '0.5', 'sobel_threshold': '50',
+            'sharpen_enabled': 'false', 'render_mode': render_mode,
+        },
+        'ChromaKey': {'h_min': '35', 's_min': '40', 'v_min': '40', 'h_max': '85', 's_max': '255', 'v_max': '255'},
+        'Output': {'txt_compression': 'none'},
+    })
+    return config
+
+
+def green_screen_image(tmp_path):
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    frame[:] = (0, 200, 0)
+    frame[16:48, 16:48] = (200, 100, 50)
+    path = str(tmp_path / "still.png")
+    cv2.imwrite(path, frame)
+    return path
+
+
+class TestImageConversion:
+
+    def test_chroma_key_applied_in_both_mode(self, tmp_path):
+        output = iniciar_conversao_imagem(green_screen_image(tmp_path), str(tmp_path), make_config('both'))
+        with open_ascii_video(output) as reader:
+            frame = reader[0]
+        assert (frame.colors[0] == MASK_COLOR).all()
+        assert not (frame.colors[4, 6:10] == MASK_COLOR).any()
+
+    def test_background_mode_is_kept(self, tmp_path):
+        output = iniciar_conversao_imagem(green_screen_image(tmp_path), str(tmp_path), make_config('background'))
+        with open_ascii_video(output) as reader:
+            frame = reader[0]
+        assert (frame.colors[4, 6:10] == MASK_COLOR).all()
@@ -0,0 +1,22 @@
+import os
+
+import pytest
+from src.core import mp4_converter
+from src.core.frame_pipeline import StreamInfo
+from src.core.mp4_converter import Mp4Sink
+
+
+class TestMp4Sink:
+
+    def test_abort_after_failed_open_closes_stderr_log(self, tmp_path, monkeypatch):
+        def encoder_sink(*args, **kwargs):
+            raise FileNotFoundError("ffmpeg")
+        monkeypatch.setattr(mp4_converter, 'EncoderSink', encoder_sink)
+        sink = Mp4Sink(str(tmp_path / "out.mp4"), audio=False)
+        with pytest.raises(FileNotFoundError):
+            sink.open(StreamInfo("in.mp4", 30.0, 10, (16, 8)))
+        stderr_file = sink.stderr_file
+        sink.abort()
+        assert stderr_file.closed
+        assert not os.path.exists(sink.temp_dir)
+        assert not (tmp_path / "out.mp4").exists()
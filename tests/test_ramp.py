@@ -0,0 +1,47 @@
+import pytest
+import numpy as np
+from src.core.utils.ascii_converter import LUMINANCE_RAMP_DEFAULT
+from src.core.utils.ramp import compile_ramp, warm_ramps, CompiledRamp
+
+
+def reference_indices(gray, ramp_len, is_edge=None, edge_boost_amount=0):
+    brightness = gray.astype(np.int32)
+    if is_edge is not None:
+        brightness = np.clip(brightness + is_edge.astype(np.int32) * edge_boost_amount, 0, 255)
+    return ((brightness / 255) * (ramp_len - 1)).astype(np.int32)
+
+
+class TestCompiledRamp:
+
+    @pytest.mark.parametrize("ramp", [LUMINANCE_RAMP_DEFAULT, "@%#*+=-:. ", "10 ", "#"])
+    def test_lookup_matches_float_formula(self, ramp):
+        gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+        assert np.array_equal(compile_ramp(ramp).lookup(gray), reference_indices(gray, len(ramp)))
+
+    @pytest.mark.parametrize("amount", [-50, 60, 100, 300])
+    def test_edge_boost_matches_float_formula(self, amount):
+        rng = np.random.default_rng(0)
+        gray = rng.integers(0, 256, (20, 30), dtype=np.uint8)
+        is_edge = rng.random((20, 30)) < 0.5
+        compiled = compile_ramp(LUMINANCE_RAMP_DEFAULT)
+        expected = reference_indices(gray, len(LUMINANCE_RAMP_DEFAULT), is_edge, amount)
+        assert np.array_equal(compiled.lookup(gray, is_edge, amount), expected)
+
+    def test_glyph_table_layout(self):
+        compiled = CompiledRamp("ab")
+        assert compiled.glyphs == "ab/|\\- "
+        assert compiled.glyphs[compiled.edge_base] == "/"
+        assert compiled.glyphs[compiled.mask_index] == " "
+
+    def test_large_ramp_uses_uint16(self):
+        ramp = ''.join(chr(0x2800 + i) for i in range(300))
+        assert compile_ramp(ramp).index_lut.dtype == np.uint16
+
+
+class TestRegistry:
+
+    def test_compile_is_cached(self):
+        assert compile_ramp("xyz ") is compile_ramp("xyz ")
+
+    def test_warm_ramps_skips_empty(self):
+        assert warm_ramps(["ab ", "", "cd "]) == 2
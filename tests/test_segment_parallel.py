@@ -0,0 +1,123 @@
+import configparser
+
+import cv2
+import numpy as np
+import pytest
+from src.core import audio_utils, segment_parallel
+from src.core.segment_parallel import (
+    Segment, _config_to_dict, concat_ascii_segments, concat_list, concat_video_segments, convert_segment,
+    ffmpeg_concat_command, plan_segments, supports_segments
+)
+from src.core.utils.ascii_video import A4rReader, open_ascii_video
+
+
+def make_config():
+    config = configparser.ConfigParser(interpolation=None)
+    config.read_dict({
+        'Conversor': {
+            'target_width': '16', 'char_aspect_ratio': '0.5', 'sobel_threshold': '50',
+            'sharpen_enabled': 'false', 'video_decoder': 'opencv',
+        },
+        'ChromaKey': {'h_min': '35', 's_min': '40', 'v_min': '40', 'h_max': '85', 's_max': '255', 'v_max': '255'},
+        'Output': {'format': 'txt', 'txt_compression': 'none'},
+    })
+    return config
+
+
+class TestPlanSegments:
+
+    def test_even_split(self):
+        segments = plan_segments(400, 4)
+        assert [(s.start, s.stop) for s in segments] == [(0, 100), (100, 200), (200, 300), (300, None)]
+        assert all(s.prime_frames == 0 for s in segments)
+
+    def test_prime_frames_skip_first_segment(self):
+        segments = plan_segments(400, 4, prime_frames=4)
+        assert [s.prime_frames for s in segments] == [0, 4, 4, 4]
+
+    def test_short_video_uses_fewer_segments(self):
+        assert len(plan_segments(100, 16, min_frames=48)) == 2
+        assert len(plan_segments(10, 16, min_frames=48)) == 1
+
+    def test_unknown_length_is_one_segment(self):
+        assert plan_segments(0, 8) == [Segment(0, 0, None)]
+
+    def test_source_frames(self):
+        last = plan_segments(400, 4)[-1]
+        assert last.source_frames(400) == 100
+
+    def test_supported_formats(self, monkeypatch):
+        monkeypatch.setattr(segment_parallel, 'ffmpeg_available', lambda: True)
+        assert supports_segments('mp4') and supports_segments('a4r')
+        assert not supports_segments('html')
+        assert not supports_segments('txt', 'pixelart')
+
+    def test_needs_ffmpeg(self, monkeypatch):
+        monkeypatch.setattr(segment_parallel, 'ffmpeg_available', lambda: False)
+        assert not supports_segments('mp4')
+
+
+class TestConcatCommand:
+
+    def test_list_escapes_quotes(self):
+        assert concat_list(["/videos/a.mp4", "/videos/it's.mp4"]) == (
+            "file '/videos/a.mp4'\n"
+            "file '/videos/it'\\''s.mp4'\n"
+        )
+
+    def test_mp4_copies_video_and_muxes_audio(self, monkeypatch):
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: True)
+        monkeypatch.setattr(audio_utils, 'audio_stream_decodes', lambda path: True)
+        cmd = ffmpeg_concat_command("list.txt", "out.mp4", "in.mp4")
+        assert cmd[cmd.index('-f') + 1] == 'concat'
+        assert cmd[cmd.index('-c:v') + 1] == 'copy'
+        assert ['-i', 'in.mp4', '-map', '0:v:0', '-map', '1:a:0?'] == cmd[cmd.index('in.mp4') - 1:cmd.index('in.mp4') + 5]
+        assert 'in.mp4' not in ffmpeg_concat_command("list.txt", "out.mp4", "in.mp4", audio=False)
+
+    def test_mp4_falls_back_to_video_only(self, tmp_path, monkeypatch):
+        from src.core import gif_converter
+        monkeypatch.setattr(audio_utils, 'has_audio_stream', lambda path: True)
+        monkeypatch.setattr(audio_utils, 'audio_stream_decodes', lambda path: True)
+        calls = []
+
+        def run_ffmpeg(cmd, error):
+            calls.append(cmd)
+            if 'in.mp4' in cmd:
+                raise RuntimeError(error)
+        monkeypatch.setattr(gif_converter, 'run_ffmpeg', run_ffmpeg)
+        output = str(tmp_path / "out.mp4")
+        assert concat_video_segments([str(tmp_path / "seg0.mp4")], output, 'mp4', "in.mp4") == output
+        assert len(calls) == 2 and 'in.mp4' not in calls[1]
+
+
+class TestSegmentedConversion:
+
+    @pytest.fixture
+    def video_path(self, tmp_path):
+        path = str(tmp_path / "clip.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 64))
+        if not writer.isOpened():
+            pytest.skip("OpenCV sem encoder MJPG")
+        for i in range(12):
+            frame = np.zeros((64, 64, 3), dtype=np.uint8)
+            frame[:, i * 4:i * 4 + 16] = (200, 100, 50)
+            writer.write(frame)
+        writer.release()
+        return path
+
+    @pytest.mark.parametrize("output_name", ["out.txt", "out.a4r"])
+    def test_stitched_matches_serial(self, video_path, tmp_path, output_name):
+        from src.core.converter import iniciar_conversao
+        config = make_config()
+        serial = iniciar_conversao(video_path, str(tmp_path), config, force_output_path=str(tmp_path / f"serial_{output_name}"))
+
+        sections = _config_to_dict(config)
+        paths = [convert_segment(video_path, sections, 'txt', segment, str(tmp_path / f"seg{segment.index}.a4r")).path
+                 for segment in plan_segments(12, 3, min_frames=4)]
+        for path in paths:
+            with A4rReader(path) as reader:
+                assert len(reader) == 4
+        stitched = concat_ascii_segments(paths, str(tmp_path / output_name), config)
+
+        with open_ascii_video(serial) as expected, open_ascii_video(stitched) as actual:
+            assert [f.to_text() for f in actual] == [f.to_text() for f in expected]
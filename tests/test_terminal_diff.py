@@ -0,0 +1,126 @@
+import io
+
+import numpy as np
+from src.core.utils.ansi_encoder import AnsiEncoder
+from src.core.utils.ascii_frame import AsciiFrame
+from src.core.utils.terminal_diff import (
+    CLEAR_SCREEN, SHOW_CURSOR, SYNC_BEGIN, SYNC_END, TerminalDiffRenderer, dirty_runs,
+    supports_synchronized_output
+)
+from src.core.renderer import render_terminal
+
+
+def make_planes(height=4, width=10, seed=0):
+    rng = np.random.default_rng(seed)
+    chars = rng.integers(0, 3, size=(height, width), dtype=np.uint8)
+    codes = rng.integers(16, 232, size=(height, width), dtype=np.uint8)
+    return chars, ".:#", codes
+
+
+class TestDirtyRuns:
+
+    def test_merges_short_gaps_in_same_row(self):
+        dirty = np.array([[1, 0, 0, 1, 0, 0, 0, 0, 0, 1]], dtype=bool)
+        in_run, run_start = dirty_runs(dirty, max_gap=2)
+        assert in_run.tolist() == [[True, True, True, True, False, False, False, False, False, True]]
+        assert np.flatnonzero(run_start[0]).tolist() == [0, 9]
+
+    def test_runs_do_not_cross_rows(self):
+        dirty = np.array([[0, 0, 1], [1, 0, 0]], dtype=bool)
+        in_run, run_start = dirty_runs(dirty, max_gap=8)
+        assert in_run.tolist() == [[False, False, True], [True, False, False]]
+        assert run_start.tolist() == [[False, False, True], [True, False, False]]
+
+    def test_clean_grid(self):
+        in_run, run_start = dirty_runs(np.zeros((3, 5), dtype=bool))
+        assert not in_run.any() and not run_start.any()
+
+
+class TestSupportsSynchronizedOutput:
+
+    def test_known_terminals(self):
+        assert supports_synchronized_output({'TERM': 'xterm-kitty'})
+        assert supports_synchronized_output({'TERM_PROGRAM': 'WezTerm', 'TERM': 'xterm-256color'})
+        assert supports_synchronized_output({'WT_SESSION': 'abc'})
+
+    def test_unknown_terminal(self):
+        assert not supports_synchronized_output({'TERM': 'xterm-256color'})
+        assert not supports_synchronized_output({})
+
+
+class TestTerminalDiffRenderer:
+
+    def test_first_frame_is_full_redraw(self):
+        chars, glyphs, codes = make_planes()
+        data = TerminalDiffRenderer(synchronized=False).encode(chars, glyphs, codes)
+        assert data.startswith(CLEAR_SCREEN)
+        assert data.count(b"H") >= chars.shape[0]
+
+    def test_static_frame_emits_nothing(self):
+        chars, glyphs, codes = make_planes()
+        renderer = TerminalDiffRenderer(synchronized=False)
+        renderer.encode(chars, glyphs, codes)
+        assert renderer.encode(chars, glyphs, codes) == b''
+        assert renderer.last_dirty_cells == 0
+        assert renderer.encoder.frames == 2
+
+    def test_single_cell_change_positions_cursor(self):
+        chars, glyphs, codes = make_planes()
+        renderer = TerminalDiffRenderer(synchronized=False)
+        renderer.encode(chars, glyphs, codes)
+        chars = chars.copy()
+        chars[2, 7] = (chars[2, 7] + 1) % 3
+        data = renderer.encode(chars, glyphs, codes)
+        expected = f"\033[3;8H\033[38;5;{codes[2, 7]}m{glyphs[chars[2, 7]]}".encode('utf-8')
+        assert data == expected + b"\033[0m"
+        assert renderer.last_dirty_cells == 1
+
+    def test_color_change_marks_cell_dirty(self):
+        chars, glyphs, codes = make_planes()
+        renderer = TerminalDiffRenderer(synchronized=False)
+        renderer.encode(chars, glyphs, codes)
+        codes = codes.copy()
+        codes[0, 0] = 255 if codes[0, 0] != 255 else 16
+        assert renderer.encode(chars, glyphs, codes).startswith(b"\033[1;1H\033[38;5;")
+
+    def test_synchronized_wraps_frame(self):
+        chars, glyphs, codes = make_planes()
+        data = TerminalDiffRenderer(synchronized=True).encode(chars, glyphs, codes)
+        assert data.startswith(SYNC_BEGIN) and data.endswith(SYNC_END)
+
+    def test_shape_change_forces_full_redraw(self):
+        renderer = TerminalDiffRenderer(synchronized=False)
+        renderer.encode(*make_planes(4, 10))
+        assert renderer.encode(*make_planes(5, 10)).startswith(CLEAR_SCREEN)
+
+    def test_bytes_follow_changed_cells(self):
+        chars, glyphs, colors = make_planes(40, 120)
+        colors = np.random.default_rng(1).integers(0, 256, size=(40, 120, 3), dtype=np.uint8)
+        renderer = TerminalDiffRenderer(AnsiEncoder(truecolor=True), synchronized=False)
+        full = len(renderer.encode(chars, glyphs, colors))
+        chars = chars.copy()
+        chars[::10, ::12] = (chars[::10, ::12] + 1) % 3
+        partial = len(renderer.encode(chars, glyphs, colors))
+        assert renderer.last_dirty_cells == 40
+        assert partial < full / 10
+
+    def test_writes_to_stream_and_restores_cursor(self):
+        stream = io.BytesIO()
+        renderer = TerminalDiffRenderer(synchronized=False, stream=stream)
+        chars, glyphs, codes = make_planes()
+        written = renderer.render(chars, glyphs, codes)
+        assert renderer.render(chars, glyphs, codes) == 0
+        renderer.close()
+        assert len(stream.getvalue()) == written + len(b"\033[0m" + SHOW_CURSOR)
+        assert stream.getvalue().endswith(SHOW_CURSOR)
+
+    def test_render_terminal_uses_diff_renderer(self):
+        stream = io.BytesIO()
+        renderer = TerminalDiffRenderer(synchronized=False, stream=stream)
+        chars, glyphs, codes = make_planes()
+        frame = AsciiFrame(chars=chars, colors=codes, glyphs=glyphs)
+        render_terminal(frame, diff_renderer=renderer)
+        render_terminal(frame, diff_renderer=renderer)
+        assert stream.getvalue().startswith(CLEAR_SCREEN)
+        assert renderer.encoder.frames == 2
+        assert renderer.encoder.last_frame_bytes == 0
@@ -0,0 +1,93 @@
+import sys
+
+import numpy as np
+import pytest
+from src.core.utils import video_recorder
+from src.core.utils.video_recorder import VideoRecorder, cfr_slot
+
+
+def fake_encoder(output_path, frame_bytes):
+    # Processo que le rawvideo do stdin e grava no arquivo o primeiro byte de cada frame
+    script = (
+        "import sys\n"
+        "out = []\n"
+        "while True:\n"
+        f"    data = sys.stdin.buffer.read({frame_bytes})\n"
+        f"    if len(data) < {frame_bytes}:\n"
+        "        break\n"
+        "    out.append(data[0])\n"
+        f"open({output_path!r}, 'wb').write(bytes(out))\n"
+    )
+    return [sys.executable, "-c", script]
+
+
+@pytest.fixture
+def recorded(tmp_path, monkeypatch):
+    output = str(tmp_path / "frames.bin")
+    monkeypatch.setattr(video_recorder, 'ffmpeg_record_command',
+                        lambda path, size, fps: fake_encoder(path, size[0] * size[1] * 3))
+
+    def read():
+        with open(output, 'rb') as f:
+            return list(f.read())
+    return output, read
+
+
+def solid(value, shape=(4, 6, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+class TestCfrSlot:
+
+    def test_rounds_to_nearest_output_frame(self):
+        assert cfr_slot(10.0, 10.0, 30) == 0
+        assert cfr_slot(10.1, 10.0, 30) == 3
+        assert cfr_slot(10.49, 10.0, 10) == 5
+
+
+class TestVideoRecorder:
+
+    def test_frames_follow_capture_time(self, recorded):
+        output, read = recorded
+        recorder = VideoRecorder(output, fps=10)
+        # Lacuna de 0.3s entre 1 e 2: o frame 1 cobre as posicoes vazias
+        for value, timestamp in ((1, 0.0), (2, 0.3), (3, 0.4)):
+            assert recorder.write(solid(value), timestamp=timestamp)
+        assert recorder.close(end_time=0.7) == 7
+        assert read() == [1, 1, 1, 2, 3, 3, 3]
+
+    def test_frames_faster_than_fps_are_dropped(self, recorded):
+        output, read = recorded
+        recorder = VideoRecorder(output, fps=10)
+        for value, timestamp in ((1, 0.0), (2, 0.01), (3, 0.1)):
+            recorder.write(solid(value), timestamp=timestamp)
+        recorder.close(end_time=0.1)
+        assert read() == [1, 3]
+
+    def test_odd_size_is_padded_and_other_sizes_resized(self, recorded):
+        output, read = recorded
+        recorder = VideoRecorder(output, fps=10)
+        recorder.write(solid(5, (5, 7, 3)), timestamp=0.0)
+        recorder.write(solid(6, (20, 30, 3)), timestamp=0.1)
+        assert recorder.size == (8, 6)
+        recorder.close(end_time=0.1)
+        assert read() == [5, 6]
+
+    def test_full_ring_drops_without_blocking(self, recorded):
+        output, _ = recorded
+        recorder = VideoRecorder(output, fps=10, depth=1)
+        accepted = [recorder.write(solid(i), timestamp=i / 10) for i in range(50)]
+        recorder.close()
+        assert accepted[0] and recorder.dropped_frames == accepted.count(False)
+        assert len(recorder) == accepted.count(True)
+
+    def test_close_without_frames(self, tmp_path):
+        assert VideoRecorder(str(tmp_path / "x.mp4"), fps=30).close() == 0
+
+    def test_encoder_failure_raises_on_close(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(video_recorder, 'ffmpeg_record_command',
+                            lambda path, size, fps: [sys.executable, "-c", "import sys; sys.exit(3)"])
+        recorder = VideoRecorder(str(tmp_path / "x.mp4"), fps=10)
+        recorder.write(solid(1), timestamp=0.0)
+        with pytest.raises(RuntimeError):
+            recorder.close(end_time=5.0)
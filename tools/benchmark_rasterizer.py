@@ -0,0 +1,52 @@
+import sys
+import os
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import numpy as np
+
+from src.app.constants import QUALITY_PRESETS, DEFAULT_LUMINANCE_RAMP
+from src.core.renderer import (
+    COLOR_SEPARATOR, render_ascii_as_image, render_ascii_as_image_legacy
+)
+
+ITERATIONS = 10
+
+
+def build_frame(width, height):
+    rng = np.random.default_rng(0)
+    ramp = DEFAULT_LUMINANCE_RAMP
+    chars = rng.integers(0, len(ramp), (height, width))
+    codes = rng.integers(16, 256, (height, width))
+    lines = []
+    for y in range(height):
+        lines.append("".join(
+            f"{ramp[c]}{COLOR_SEPARATOR}{code}{COLOR_SEPARATOR}" for c, code in zip(chars[y], codes[y])
+        ))
+    return "\n".join(lines)
+
+
+def measure(func, frame):
+    func(frame)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(frame)
+    return (time.perf_counter() - start) * 1000 / ITERATIONS
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+print(f"{'preset':<10} {'grade':>8} {'legacy':>10} {'atlas':>10} {'speedup':>8} {'psnr':>8}")
+for preset_id, preset in QUALITY_PRESETS.items():
+    frame = build_frame(preset['width'], preset['height'])
+    legacy_ms = measure(render_ascii_as_image_legacy, frame)
+    atlas_ms = measure(render_ascii_as_image, frame)
+    quality = psnr(render_ascii_as_image_legacy(frame), render_ascii_as_image(frame))
+    grid = f"{preset['width']}x{preset['height']}"
+    print(f"{preset_id:<10} {grid:>8} {legacy_ms:>8.1f}ms {atlas_ms:>8.1f}ms "
+          f"{legacy_ms / atlas_ms:>7.1f}x {quality:>6.1f}dB")